@@ -0,0 +1,84 @@
+# benchmarks/bench_alert_webhook.py
+"""
+告警 webhook 批次處理的基準測試：一個 Alertmanager payload 從解析到排隊的耗時。
+
+量測項目：
+- `parse`: 將整批告警轉換並一次驗證為 `SRERequest` 列表。
+- `ingest`: 依指紋分組、合併重複告警，並以一次批次寫入將新事件排入 SQLite 工作佇列。
+
+使用方式：
+
+    PYTHONPATH=src python benchmarks/bench_alert_webhook.py --alerts 1000 --incidents 20
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sre_assistant.alerts.dedup import AlertCoalescer
+from sre_assistant.alerts.webhooks import parse_alert_webhook
+from sre_assistant.jobs.queue import JobQueue
+from sre_assistant.jobs.store import SQLiteJobStore
+
+
+def make_payload(alerts: int, incidents: int) -> dict:
+    """產生 `incidents` 種告警、共 `alerts` 個 Pod 層級告警的 Alertmanager payload。"""
+    return {
+        "version": "4", "status": "firing", "groupKey": "bench",
+        "alerts": [
+            {
+                "status": "firing",
+                "labels": {"alertname": f"Alert{i % incidents}", "service": f"svc-{i % incidents}",
+                           "severity": "critical", "pod": f"pod-{i}"},
+                "annotations": {"summary": "error rate above SLO"},
+                "startsAt": "2024-05-01T00:00:00Z",
+                "fingerprint": f"fp-{i}",
+            }
+            for i in range(alerts)
+        ],
+    }
+
+
+async def run(alerts: int, incidents: int, rounds: int):
+    """
+    重複量測解析與排隊的耗時。
+
+    Args:
+        alerts (int): 每個 payload 的告警數。
+        incidents (int): 每個 payload 中不同事件的數量。
+        rounds (int): 量測回合數 (每回合使用新的佇列與合併狀態)。
+    """
+    payload = make_payload(alerts, incidents)
+    parse_times, ingest_times = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        for r in range(rounds):
+            store = SQLiteJobStore(os.path.join(directory, f"jobs-{r}.sqlite"))
+            queue = JobQueue(store, lambda job: None, max_pending_per_tenant=alerts)
+            coalescer = AlertCoalescer(queue.submit, ignored_labels=["pod"], submit_many=queue.submit_many)
+
+            started = time.perf_counter()
+            batch = parse_alert_webhook(payload, "alertmanager")
+            parsed = time.perf_counter()
+            results = await coalescer.ingest_batch("bench", batch.requests)
+            finished = time.perf_counter()
+
+            assert len(results) == incidents
+            parse_times.append((parsed - started) * 1000)
+            ingest_times.append((finished - parsed) * 1000)
+            await store.close()
+
+    print(f"alerts={alerts} incidents={incidents} rounds={rounds}")
+    print(f"parse   median {sorted(parse_times)[rounds // 2]:.2f} ms")
+    print(f"ingest  median {sorted(ingest_times)[rounds // 2]:.2f} ms")
+    print(f"total   median {sorted(p + i for p, i in zip(parse_times, ingest_times))[rounds // 2]:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=1000)
+    parser.add_argument("--incidents", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=9)
+    args = parser.parse_args()
+    asyncio.run(run(args.alerts, args.incidents, args.rounds))
@@ -0,0 +1,88 @@
+# benchmarks/bench_fast_path_dispatch.py
+"""
+量測分診快速路徑 (規則表) 的命中率、比對延遲與估算節省的延遲。
+
+工作負載由已知事件型態 (評估案例與其變體) 與未知型態的診斷結果依 `--known-ratio` 混合而成，
+每筆診斷以 `diagnostic_signature` 組成簽章後交給內建規則表比對；
+信心達到門檻者視為快速路徑命中，其餘交由 LLM 分診器 (以 `--llm-latency-ms` 估算其延遲)。
+
+使用方式：
+
+    PYTHONPATH=src python benchmarks/bench_fast_path_dispatch.py --runs 20000 --known-ratio 0.6
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from sre_assistant.sub_agents.fast_path_dispatcher import (
+    DEFAULT_DISPATCH_RULES, DispatchRuleTable, diagnostic_signature,
+)
+
+KNOWN = [
+    {"metrics_analysis": {"error_rate": 0.01, "latency_ms": 1500},
+     "logs_analysis": {"critical_errors": 5, "pattern": "timeout"}},
+    {"metrics_analysis": {"error_rate": 0.6, "latency_ms": 200},
+     "logs_analysis": {"critical_errors": 250, "pattern": "NullPointerException"}},
+    {"diagnostic_findings": [
+        {"severity": "P1", "component": "checkout", "summary": "p99 latency 4.2s, upstream requests timing out",
+         "evidence": ["context deadline exceeded: timed out after 3000ms"]}]},
+    {"diagnostic_findings": [
+        {"severity": "P0", "component": "payments", "summary": "pods in CrashLoopBackOff since rollout v2.3.1",
+         "evidence": ["Back-off restarting failed container"]}]},
+    {"diagnostic_findings": [
+        {"severity": "P1", "component": "search", "summary": "containers OOMKilled under steady traffic",
+         "evidence": ["memory usage at limit 2Gi"]}]},
+]
+UNKNOWN = [
+    {"diagnostic_findings": [
+        {"severity": "P2", "component": "db-1", "summary": "disk usage growing 2% per hour", "evidence": []}]},
+    {"diagnostic_findings": [
+        {"severity": "P1", "component": "edge", "summary": "TLS handshake failures from one region",
+         "evidence": ["certificate verify failed"]}]},
+    {"metrics_analysis": {"error_rate": 0.02, "latency_ms": 180},
+     "logs_analysis": {"critical_errors": 3, "pattern": "ConnectionResetError"}},
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20000)
+    parser.add_argument("--known-ratio", type=float, default=0.6, help="工作負載中已知事件型態的比例")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--llm-latency-ms", type=float, default=2000.0, help="LLM 分診器的估算延遲")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    table = DispatchRuleTable(DEFAULT_DISPATCH_RULES)
+    workload = [rng.choice(KNOWN if rng.random() < args.known_ratio else UNKNOWN) for _ in range(args.runs)]
+
+    hits = 0
+    timings = []
+    for state in workload:
+        started = time.perf_counter()
+        match = table.match(diagnostic_signature(state))
+        timings.append(time.perf_counter() - started)
+        if match is not None and match[1].confidence >= args.threshold:
+            hits += 1
+
+    timings.sort()
+    match_ms = statistics.fmean(timings) * 1000
+    llm_s = args.llm_latency_ms / 1000
+    baseline = args.runs * llm_s
+    # 未命中時比對成本仍會加在 LLM 呼叫之前
+    with_fast_path = hits * match_ms / 1000 + (args.runs - hits) * (llm_s + match_ms / 1000)
+
+    print(f"runs: {args.runs}, known ratio: {args.known_ratio:.0%}, threshold: {args.threshold}")
+    print(f"fast-path hit rate: {hits / args.runs:.1%} ({hits}/{args.runs})")
+    print(f"match latency: mean {match_ms * 1000:.1f} us, p50 {timings[len(timings) // 2] * 1e6:.1f} us, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us")
+    print(f"mean dispatch latency: {baseline / args.runs * 1000:.0f} ms LLM-only -> "
+          f"{with_fast_path / args.runs * 1000:.0f} ms with fast path "
+          f"(saved {(baseline - with_fast_path) / args.runs * 1000:.0f} ms per run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_filtered_search.py
+"""
+中繼資料過濾搜尋的效能與召回率基準測試。
+
+在 `InMemoryBackend` 上比較兩種策略，並以精確 (暴力) 過濾結果作為基準真值：
+- `pre-filter`: 後端原生過濾 (`search(..., filters=...)`)，只對符合條件的列評分。
+- `post-filter`: 先取回 `k * overfetch` 筆未過濾結果，再在 Python 中以 `matches` 過濾。
+
+過濾條件越嚴格，post-filter 越容易不足 k 筆 (召回率下降)，
+而 pre-filter 則因為評分的列變少而變快。
+
+使用方式：
+
+    PYTHONPATH=src python benchmarks/bench_filtered_search.py --size 200000 --dimension 384
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from sre_assistant.config.config_manager import MemoryConfig, MemoryBackend
+from sre_assistant.memory.filters import matches
+from sre_assistant.memory.in_memory_backend import InMemoryBackend
+
+SERVICES = [f"service-{i}" for i in range(50)]
+SEVERITIES = ["P0", "P1", "P2", "P3", "P4"]
+DAY = 86400.0
+START = 1714521600.0  # 2024-05-01T00:00:00Z
+
+
+def synthetic_metadata(count: int, rng: np.random.Generator) -> List[Dict[str, Any]]:
+    """產生具有服務名稱、嚴重程度與 30 天內時間戳的合成中繼資料。"""
+    services = rng.integers(0, len(SERVICES), count)
+    severities = rng.integers(0, len(SEVERITIES), count)
+    timestamps = START + rng.random(count) * 30 * DAY
+    return [
+        {"id": str(i), "service": SERVICES[s], "severity": SEVERITIES[v], "timestamp": float(t)}
+        for i, (s, v, t) in enumerate(zip(services, severities, timestamps))
+    ]
+
+
+async def run(size: int, dimension: int, queries: int, k: int, overfetch: int):
+    """
+    建立索引並針對不同選擇性的過濾條件比較兩種策略。
+
+    Args:
+        size (int): 索引中的向量數。
+        dimension (int): 向量維度。
+        queries (int): 每種條件執行的查詢數。
+        k (int): 每個查詢要返回的結果數量。
+        overfetch (int): post-filter 的過量取回倍數。
+    """
+    rng = np.random.default_rng(0)
+    backend = InMemoryBackend(MemoryConfig(backend=MemoryBackend.MEMORY, embedding_dimension=dimension))
+    vectors = rng.standard_normal((size, dimension), dtype=np.float32)
+    await backend.upsert(vectors.tolist(), synthetic_metadata(size, rng))
+    query_vectors = rng.standard_normal((queries, dimension), dtype=np.float32).tolist()
+
+    cases = {
+        "severity in P0/P1 (~40%)": {"severity": {"$in": ["P0", "P1"]}},
+        "one service (~2%)": {"service": "service-7"},
+        "service + P0 + last 7 days (~0.1%)": {
+            "service": "service-7", "severity": "P0", "timestamp": {"$gte": START + 23 * DAY},
+        },
+    }
+    print(f"size={size} dimension={dimension} queries={queries} k={k} overfetch={overfetch}")
+    print(f"{'filter':<38}{'pre ms/q':>10}{'post ms/q':>11}{'pre recall':>12}{'post recall':>13}")
+    for name, filters in cases.items():
+        # 欄式過濾快取在每次寫入後的第一個查詢建立，不計入穩態延遲
+        await backend.search(query_vectors[0], k, filters)
+        started = time.perf_counter()
+        pre = [await backend.search(q, k, filters) for q in query_vectors]
+        pre_ms = (time.perf_counter() - started) * 1000 / queries
+
+        started = time.perf_counter()
+        post = []
+        for q in query_vectors:
+            candidates = await backend.search(q, k * overfetch)
+            post.append([r for r in candidates if matches(r, filters)][:k])
+        post_ms = (time.perf_counter() - started) * 1000 / queries
+
+        # 預先過濾的精確搜尋即為基準真值；以結果數量計算可達成的召回率
+        expected = sum(len(r) for r in pre)
+        pre_recall = 1.0 if expected else 0.0
+        post_recall = (sum(len({r["id"] for r in p} & {r["id"] for r in e}) for p, e in zip(post, pre))
+                       / expected) if expected else 0.0
+        print(f"{name:<38}{pre_ms:>10.2f}{post_ms:>11.2f}{pre_recall:>12.3f}{post_recall:>13.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pre-filter vs post-filter vector search.")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--overfetch", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.size, args.dimension, args.queries, args.k, args.overfetch))
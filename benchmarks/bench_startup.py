@@ -0,0 +1,80 @@
+# benchmarks/bench_startup.py
+"""
+以 `python -X importtime` 量測模組的冷啟動匯入時間，並檢查是否匯入了未選用的後端 SDK。
+
+每個模組在新的子行程中匯入 (避免快取影響)，回報總匯入時間、累計時間最長的模組，
+以及 weaviate / asyncpg / redis / Vertex AI / chromadb 等 SDK 是否被載入。
+
+使用方式：
+
+    PYTHONPATH=src python benchmarks/bench_startup.py
+    PYTHONPATH=src python benchmarks/bench_startup.py --module sre_assistant.main --top 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULES = ("sre_assistant.memory.backend_factory", "sre_assistant.main")
+
+# 只應在對應後端被選用時才匯入的 SDK
+HEAVY_SDKS = ("weaviate", "asyncpg", "redis", "google.cloud.aiplatform", "chromadb")
+
+
+def import_profile(module: str) -> Tuple[float, float, Dict[str, int]]:
+    """
+    在子行程中以 `-X importtime` 匯入模組。
+
+    Args:
+        module (str): 要匯入的模組。
+
+    Raises:
+        RuntimeError: 如果匯入失敗。
+
+    Returns:
+        Tuple[float, float, Dict[str, int]]: 子行程的牆鐘時間 (秒)、總匯入時間 (秒)，
+        以及每個模組的累計匯入時間 (微秒)。
+    """
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=os.environ.copy())
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    cumulative: Dict[str, int] = {}
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        # 格式: "import time: self [us] | cumulative | imported package"，名稱的縮排表示巢狀深度
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative_us)
+    return elapsed, total_us / 1e6, cumulative
+
+
+def report(module: str, top: int):
+    elapsed, total, cumulative = import_profile(module)
+    loaded_sdks: List[str] = [sdk for sdk in HEAVY_SDKS if sdk in cumulative]
+    print(f"\n{module}: process {elapsed * 1000:.0f} ms, imports {total * 1000:.0f} ms, "
+          f"{len(cumulative)} modules")
+    print(f"  heavy SDKs imported: {', '.join(loaded_sdks) or 'none'}")
+    for name, us in sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="要量測的模組 (可重複)")
+    parser.add_argument("--top", type=int, default=10, help="列出累計時間最長的模組數")
+    args = parser.parse_args()
+    for module in args.module or DEFAULT_MODULES:
+        report(module, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/load_test.py
+"""
+對執行中的 SRE Assistant 服務進行負載測試，回報 `/` 與 `/execute` 的 RPS 與延遲百分位數。
+
+`/execute` 只將工作排入佇列，因此量測的是 API 層 (認證、准入控制、持久化排隊) 的吞吐量；
+佇列飽和時返回的 429 / 503 會分別計數，而不是視為錯誤。
+
+使用方式 (先以生產模式啟動服務)：
+
+    PYTHONPATH=src python benchmarks/load_test.py --url http://localhost:8080 --concurrency 64 --duration 20
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], q: float) -> float:
+    """返回已排序列表的 q 百分位數 (0-100)。"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def hammer(client: httpx.AsyncClient, method: str, path: str, body: Optional[Dict],
+                 deadline: float, latencies: List[float], statuses: Counter):
+    """在期限內以單一連線重複送出請求。"""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            statuses[response.status_code] += 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_endpoint(url: str, method: str, path: str, body: Optional[Dict], concurrency: int,
+                       duration: float, token: Optional[str]):
+    """
+    以固定並行數對一個端點施壓並輸出結果。
+
+    Args:
+        url (str): 服務的基底 URL。
+        method (str): HTTP 方法。
+        path (str): 端點路徑。
+        body (Optional[Dict]): JSON 請求內容。
+        concurrency (int): 同時進行的請求數。
+        duration (float): 施壓秒數。
+        token (Optional[str]): Bearer token。
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=30) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(hammer(client, method, path, body, deadline, latencies, statuses)
+                               for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{method} {path}: {len(latencies) / elapsed:,.0f} req/s over {elapsed:.1f}s, "
+          f"p50 {percentile(latencies, 50):.1f} ms, p99 {percentile(latencies, 99):.1f} ms, "
+          f"statuses {dict(statuses)}")
+
+
+async def main(args):
+    await run_endpoint(args.url, "GET", "/", None, args.concurrency, args.duration, args.token)
+    await run_endpoint(args.url, "POST", "/execute",
+                       {"user_query": "checkout p99 latency is above SLO", "session_id": "load-test"},
+                       args.concurrency, args.duration, args.token)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--token", default=None)
+    asyncio.run(main(parser.parse_args()))
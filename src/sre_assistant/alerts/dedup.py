@@ -0,0 +1,482 @@
+# src/sre_assistant/alerts/dedup.py
+"""
+此檔案實現了工作流程前的告警去重與合併入口。
+
+同一個告警常同時由數百個 Pod 觸發，若每個都啟動一次完整的 `EnhancedSREWorkflow`
+(三個由 LLM 驅動的診斷代理)，會造成 LLM 費用與佇列深度暴增。`AlertCoalescer`：
+- 以告警名稱、服務 (`SRERequest.affected_services`) 與非實例層級的標籤計算指紋。
+- 在自第一個告警起算的視窗內，相同指紋的告警併入同一次執行：只有第一個告警提交工作，
+  其餘告警 (包含提交尚未完成時同時到達者) 取得同一個執行 ID。視窗不會因重複告警而延長，
+  持續觸發的告警在每個視窗結束後會重新診斷一次。
+- 執行成功後、視窗結束前到達的重複告警仍附加到該執行，直接取用其結果；
+  執行失敗後到達的告警則啟動新的執行。
+- 提供抑制計數，以量化節省的執行次數。
+
+指紋到執行的對應預設只存在於行程內：多個工作行程或副本各自合併，同一告警風暴最多啟動
+(工作行程數) 次執行。配置 `RedisIncidentRegistry` (`alerts.redis_url`) 時，指紋以
+`SET NX PX` 在所有工作行程之間登記，整個部署只啟動一次執行。
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from ..contracts import SRERequest
+from ..jobs.models import Job, JobStatus
+
+# 每個告警指紋最多記錄的不同實例數 (例如 Pod 名稱)
+MAX_TRACKED_INSTANCES = 50
+
+SubmitFn = Callable[[str, Dict[str, Any]], Awaitable[Job]]
+SubmitManyFn = Callable[[str, List[Dict[str, Any]]], Awaitable[List[Job]]]
+GetJobFn = Callable[[str], Awaitable[Optional[Job]]]
+
+# 比對舊值後替換或刪除指紋鍵：ARGV[2] 為空字串時刪除，ARGV[3] 為空字串時保留原本的過期時間
+_REDIS_SWAP = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then return 0 end
+if ARGV[2] == '' then
+  redis.call('DEL', KEYS[1])
+elseif ARGV[3] == '' then
+  redis.call('SET', KEYS[1], ARGV[2], 'KEEPTTL')
+else
+  redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+end
+return 1
+"""
+
+
+class IngestResult(BaseModel):
+    """一個告警的入口處理結果。"""
+    run_id: str
+    fingerprint: str
+    coalesced: bool
+    duplicates: int
+
+
+class _Incident:
+    """一個告警指紋在視窗內的合併狀態。"""
+
+    def __init__(self, run_id: "asyncio.Future[str]", now: float):
+        self.run_id = run_id
+        self.first_seen = now
+        self.last_seen = now
+        self.duplicates = 0
+        self.instances: List[str] = []
+        # 執行已成功結束時不再查詢其狀態
+        self.succeeded = False
+
+
+class RedisIncidentRegistry:
+    """
+    以 Redis 在工作行程與副本之間共用告警指紋到執行 ID 的對應。
+
+    每個指紋一個鍵，以 `SET NX PX` 登記，過期時間即為合併視窗。登記成功的工作行程先寫入佔位值，
+    提交工作後再寫入執行 ID；其他工作行程讀到佔位值時短暫等待執行 ID。
+    替換與刪除以 Lua 腳本比對舊值後原子地完成。同步的 Redis 客戶端在執行緒中呼叫，避免阻塞事件迴圈。
+    """
+
+    PENDING = "pending"
+
+    def __init__(self, client: Any, namespace: str = "sre_alerts", pending_timeout_seconds: float = 10.0,
+                 poll_interval_seconds: float = 0.05):
+        """
+        初始化共用登錄。
+
+        Args:
+            client (Any): `redis.Redis` 客戶端。
+            namespace (str): 所有鍵的前綴。
+            pending_timeout_seconds (float): 等待其他工作行程寫入執行 ID 的上限；
+                逾時表示登記者可能在提交前結束，由等待者接手。
+            poll_interval_seconds (float): 等待執行 ID 時的輪詢間隔。
+        """
+        self.redis = client
+        self.namespace = namespace
+        self.pending_timeout_seconds = pending_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self._swap_script = client.register_script(_REDIS_SWAP)
+
+    def _key(self, fingerprint: str) -> str:
+        return f"{self.namespace}:incident:{fingerprint}"
+
+    async def _call(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def claim(self, fingerprint: str, window_seconds: float) -> Optional[str]:
+        """
+        登記指紋。
+
+        Args:
+            fingerprint (str): 告警指紋。
+            window_seconds (float): 合併視窗，作為鍵的過期時間。
+
+        Returns:
+            Optional[str]: None 表示登記成功 (呼叫者應提交工作並以 `publish` 寫入執行 ID)；
+                否則為其他工作行程在視窗內已啟動的執行 ID。
+        """
+        key = self._key(fingerprint)
+        px = max(1, int(window_seconds * 1000))
+        deadline = time.monotonic() + self.pending_timeout_seconds
+        while True:
+            if await self._call(self.redis.set, key, self.PENDING, nx=True, px=px):
+                return None
+            value = await self._call(self.redis.get, key)
+            if value is None:
+                # 鍵在 SET 與 GET 之間過期，重新登記
+                continue
+            value = value.decode() if isinstance(value, bytes) else value
+            if value != self.PENDING:
+                return value
+            if time.monotonic() >= deadline:
+                if await self.replace(fingerprint, self.PENDING, self.PENDING, window_seconds):
+                    print(f"Took over alert fingerprint {fingerprint}: no run was published within "
+                          f"{self.pending_timeout_seconds}s")
+                    return None
+                continue
+            await asyncio.sleep(self.poll_interval_seconds)
+
+    async def replace(self, fingerprint: str, expected: str, value: Optional[str],
+                      window_seconds: Optional[float] = None) -> bool:
+        """
+        指紋鍵的值仍為 `expected` 時將它替換為 `value`。
+
+        Args:
+            fingerprint (str): 告警指紋。
+            expected (str): 預期的目前值。
+            value (Optional[str]): 新的值；None 表示刪除鍵。
+            window_seconds (Optional[float]): 新的過期時間；None 表示保留原本的過期時間。
+
+        Returns:
+            bool: 是否已替換。
+        """
+        px = "" if window_seconds is None else str(max(1, int(window_seconds * 1000)))
+        swapped = await self._call(self._swap_script, keys=[self._key(fingerprint)],
+                                   args=[expected, value or "", px])
+        return bool(swapped)
+
+    async def publish(self, fingerprint: str, run_id: str) -> bool:
+        """將登記成功的指紋由佔位值改為執行 ID，讓其他工作行程併入此執行。"""
+        return await self.replace(fingerprint, self.PENDING, run_id)
+
+    async def release(self, fingerprint: str) -> bool:
+        """提交失敗時刪除仍為佔位值的登記，讓其他工作行程能重新登記。"""
+        return await self.replace(fingerprint, self.PENDING, None)
+
+
+def build_user_query(request: SRERequest) -> str:
+    """
+    將告警契約轉換為工作流程的使用者查詢文字。
+
+    Args:
+        request (SRERequest): 告警請求。
+
+    Returns:
+        str: 包含嚴重程度、受影響服務與告警內容的查詢。
+    """
+    services = ", ".join(request.affected_services) or "unknown"
+    return f"[{request.severity.value}] Incident {request.incident_id} affecting {services}: {request.input}"
+
+
+def default_payload(request: SRERequest) -> Dict[str, Any]:
+    """由告警產生工作 payload (查詢文字、嚴重程度與以事件 ID 命名的會話)。"""
+    return {
+        "user_query": build_user_query(request),
+        "severity": request.severity.value,
+        "session_id": request.session_id or f"incident-{request.incident_id}",
+        "user_info": {},
+    }
+
+
+class AlertCoalescer:
+    """
+    以指紋與自第一個告警起算的視窗合併重複告警的入口。
+    """
+
+    def __init__(self, submit: SubmitFn, window_seconds: float = 300.0,
+                 max_incidents: int = 10000, ignored_labels: Iterable[str] = (),
+                 submit_many: Optional[SubmitManyFn] = None, get_job: Optional[GetJobFn] = None,
+                 registry: Optional[RedisIncidentRegistry] = None):
+        """
+        初始化告警入口。
+
+        Args:
+            submit (SubmitFn): 提交工作的協程函式 (通常為 `JobQueue.submit`)，返回已排隊的工作。
+            window_seconds (float): 視窗長度，自指紋的第一個告警起算；重複告警不會延長視窗。
+            max_incidents (int): 追蹤中的指紋上限，超過時淘汰最早出現者。
+            ignored_labels (Iterable[str]): 計算指紋時忽略的實例層級標籤。
+            submit_many (Optional[SubmitManyFn]): 批次提交函式，`ingest_batch` 以它一次提交所有新事件。
+            get_job (Optional[GetJobFn]): 讀取工作狀態的協程函式 (通常為 `JobQueue.get`)；
+                提供時，重複告警不會併入已失敗的執行。
+            registry (Optional[RedisIncidentRegistry]): 工作行程之間共用的指紋登錄；
+                未提供時只在本行程內合併。
+        """
+        self.submit = submit
+        self.submit_many = submit_many
+        self.get_job = get_job
+        self.registry = registry
+        self.window_seconds = window_seconds
+        self.max_incidents = max_incidents
+        self.ignored_labels = frozenset(ignored_labels)
+        self._incidents: "OrderedDict[str, _Incident]" = OrderedDict()
+        self.stats = {"received": 0, "runs_started": 0, "suppressed": 0, "rejected": 0}
+
+    @classmethod
+    def from_config(cls, config, submit: SubmitFn, submit_many: Optional[SubmitManyFn] = None,
+                    get_job: Optional[GetJobFn] = None) -> "AlertCoalescer":
+        """
+        根據 `AlertIngestionConfig` 創建告警入口。
+
+        Args:
+            config (AlertIngestionConfig): 告警入口配置。
+            submit (SubmitFn): 提交工作的協程函式。
+            submit_many (Optional[SubmitManyFn]): 批次提交函式。
+            get_job (Optional[GetJobFn]): 讀取工作狀態的協程函式。
+
+        Returns:
+            AlertCoalescer: 告警入口實例；配置了 `redis_url` 時使用共用的指紋登錄。
+        """
+        registry = None
+        if config.redis_url:
+            from redis import Redis
+            registry = RedisIncidentRegistry(Redis.from_url(config.redis_url))
+        return cls(submit, config.dedup_window_seconds, config.max_tracked_incidents, config.ignored_labels,
+                   submit_many, get_job, registry)
+
+    def fingerprint(self, tenant_id: str, request: SRERequest) -> str:
+        """
+        計算告警指紋。
+
+        使用 `context["labels"]` 中非實例層級的標籤 (包含 alertname) 與排序後的受影響服務；
+        沒有標籤時以正規化的告警內容代替。嚴重程度與 incident_id 不參與計算，
+        因為同一告警的每個實例通常有不同的 ID。
+
+        Args:
+            tenant_id (str): 租戶；不同租戶的相同告警不會合併。
+            request (SRERequest): 告警請求。
+
+        Returns:
+            str: 十六進位指紋。
+        """
+        labels = request.context.get("labels") or {}
+        identity = {key: str(value) for key, value in labels.items() if key not in self.ignored_labels}
+        if not identity:
+            identity = {"input": " ".join(request.input.lower().split())}
+        digest = hashlib.sha256(json.dumps(
+            [tenant_id, sorted(set(request.affected_services)), sorted(identity.items())],
+        ).encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    def _instance_of(self, request: SRERequest) -> Optional[str]:
+        """返回告警的實例識別 (例如 Pod 名稱)，用於記錄合併了哪些實例。"""
+        labels = request.context.get("labels") or {}
+        for key in ("pod", "pod_name", "instance", "host", "node"):
+            if labels.get(key):
+                return str(labels[key])
+        return None
+
+    def _expire(self, now: float):
+        """移除視窗已結束的指紋 (依第一個告警的時間，按登記順序)，並將追蹤數量限制在上限內。"""
+        while self._incidents:
+            fingerprint, incident = next(iter(self._incidents.items()))
+            if now - incident.first_seen <= self.window_seconds and len(self._incidents) <= self.max_incidents:
+                break
+            del self._incidents[fingerprint]
+
+    def _touch(self, incident: _Incident, request: SRERequest, now: float, duplicate: bool):
+        """記錄一個告警併入事件：更新最後出現時間並記錄實例 (不延長視窗)。"""
+        incident.last_seen = now
+        if duplicate:
+            incident.duplicates += 1
+            self.stats["suppressed"] += 1
+        instance = self._instance_of(request)
+        if instance and instance not in incident.instances and len(incident.instances) < MAX_TRACKED_INSTANCES:
+            incident.instances.append(instance)
+
+    async def _forget_failed(self, fingerprints: Iterable[str]):
+        """移除執行已失敗 (或已不存在) 的指紋，讓之後的告警啟動新的執行。"""
+        if self.get_job is None:
+            return
+        for fingerprint in fingerprints:
+            incident = self._incidents.get(fingerprint)
+            if incident is None or incident.succeeded or not incident.run_id.done() or incident.run_id.exception():
+                continue
+            job = await self.get_job(incident.run_id.result())
+            if job is not None and job.status == JobStatus.SUCCEEDED:
+                incident.succeeded = True
+            elif (job is None or job.status == JobStatus.FAILED) and self._incidents.get(fingerprint) is incident:
+                # 等待期間其他呼叫者可能已經移除並重新登記了這個指紋
+                del self._incidents[fingerprint]
+
+    async def _run_failed(self, run_id: str) -> bool:
+        """執行是否已失敗 (或已不存在)；未提供 `get_job` 時視為未失敗。"""
+        if self.get_job is None:
+            return False
+        job = await self.get_job(run_id)
+        return job is None or job.status == JobStatus.FAILED
+
+    async def _claim_shared(self, fingerprint: str) -> Optional[str]:
+        """
+        在共用登錄中登記指紋。其他工作行程已啟動的執行失敗時接手指紋；
+        登錄無法使用時退回只在本行程內合併。
+
+        Returns:
+            Optional[str]: 其他工作行程已啟動且未失敗的執行 ID；None 表示由本行程提交。
+        """
+        try:
+            while True:
+                run_id = await self.registry.claim(fingerprint, self.window_seconds)
+                if run_id is None or not await self._run_failed(run_id):
+                    return run_id
+                if await self.registry.replace(fingerprint, run_id, self.registry.PENDING, self.window_seconds):
+                    return None
+        except Exception as e:
+            print(f"Shared alert registry unavailable, coalescing within this worker only: {e}")
+            return None
+
+    async def _settle_shared(self, fingerprints: List[str], run_ids: Optional[List[str]]):
+        """提交後寫入執行 ID，提交失敗 (`run_ids` 為 None) 時釋放登記；登錄錯誤不影響提交結果。"""
+        try:
+            for i, fingerprint in enumerate(fingerprints):
+                if run_ids is None:
+                    await self.registry.release(fingerprint)
+                else:
+                    await self.registry.publish(fingerprint, run_ids[i])
+        except Exception as e:
+            print(f"Failed to update shared alert registry: {e}")
+
+    async def _submit_all(self, tenant_id: str, payloads: List[Dict[str, Any]]) -> List[Job]:
+        """以批次提交函式一次提交；未提供時逐一提交。"""
+        if self.submit_many is not None:
+            return await self.submit_many(tenant_id, payloads)
+        return [await self.submit(tenant_id, payload) for payload in payloads]
+
+    async def ingest(self, tenant_id: str, request: SRERequest,
+                     payload: Optional[Dict[str, Any]] = None) -> IngestResult:
+        """
+        處理一個告警：在視窗內有相同指紋且未失敗的執行時併入，否則提交新的工作。
+
+        Args:
+            tenant_id (str): 租戶。
+            request (SRERequest): 告警請求。
+            payload (Optional[Dict[str, Any]]): 新工作的 payload；預設由 `default_payload` 產生。
+
+        Raises:
+            AdmissionError: 提交新工作時佇列已飽和 (同時等待此提交的重複告警也會收到此例外)。
+
+        Returns:
+            IngestResult: 執行 ID 與是否被合併。
+        """
+        payload_for = (lambda _: payload) if payload is not None else None
+        return (await self.ingest_batch(tenant_id, [request], payload_for))[0]
+
+    async def ingest_batch(self, tenant_id: str, requests: List[SRERequest],
+                           payload_for: Optional[Callable[[SRERequest], Dict[str, Any]]] = None
+                           ) -> List[IngestResult]:
+        """
+        處理一批告警：先在批次內依指紋分組，已在視窗內且執行未失敗的事件直接併入，
+        其餘每組的第一個告警以一次批次提交啟動執行。
+
+        Args:
+            tenant_id (str): 租戶。
+            requests (List[SRERequest]): 告警請求列表。
+            payload_for (Optional[Callable]): 由事件的第一個告警產生工作 payload 的函式。
+
+        Raises:
+            AdmissionError: 批次提交被佇列拒絕 (整批新事件都不會被記住)。
+
+        Returns:
+            List[IngestResult]: 每個事件 (指紋分組) 一個結果，依首次出現的順序排列。
+        """
+        payload_for = payload_for or default_payload
+        self.stats["received"] += len(requests)
+        now = time.monotonic()
+        self._expire(now)
+
+        groups: "OrderedDict[str, List[SRERequest]]" = OrderedDict()
+        for request in requests:
+            groups.setdefault(self.fingerprint(tenant_id, request), []).append(request)
+        await self._forget_failed(groups)
+
+        loop = asyncio.get_running_loop()
+        pending = []
+        new = []
+        for fingerprint, members in groups.items():
+            incident = self._incidents.get(fingerprint)
+            coalesced = incident is not None
+            if incident is None:
+                # 在等待提交之前先登記指紋，讓同時到達的重複告警能找到它
+                incident = self._incidents[fingerprint] = _Incident(loop.create_future(), now)
+                new.append((fingerprint, incident, members[0]))
+            for i, request in enumerate(members):
+                self._touch(incident, request, now, duplicate=coalesced or i > 0)
+            pending.append((fingerprint, incident, coalesced))
+
+        shared = set()
+        if new and self.registry is not None:
+            # 其他工作行程在視窗內已為指紋啟動執行時直接併入，不再提交
+            claimed = []
+            run_ids = await asyncio.gather(*(self._claim_shared(fingerprint) for fingerprint, _, _ in new))
+            for (fingerprint, incident, request), run_id in zip(new, run_ids):
+                if run_id is None:
+                    claimed.append((fingerprint, incident, request))
+                    continue
+                incident.run_id.set_result(run_id)
+                incident.duplicates += 1
+                self.stats["suppressed"] += 1
+                shared.add(fingerprint)
+            new = claimed
+
+        if new:
+            try:
+                jobs = await self._submit_all(tenant_id, [payload_for(request) for _, _, request in new])
+            except Exception as e:
+                if self.registry is not None:
+                    await self._settle_shared([fingerprint for fingerprint, _, _ in new], None)
+                self.stats["rejected"] += len(new)
+                for fingerprint, incident, _ in new:
+                    self._incidents.pop(fingerprint, None)
+                    incident.run_id.set_exception(e)
+                    # 沒有其他等待者時避免 "Future exception was never retrieved" 警告
+                    incident.run_id.exception()
+                raise
+            for (_, incident, _), job in zip(new, jobs):
+                incident.run_id.set_result(job.job_id)
+            self.stats["runs_started"] += len(new)
+            if self.registry is not None:
+                await self._settle_shared([fingerprint for fingerprint, _, _ in new], [job.job_id for job in jobs])
+
+        results = []
+        for fingerprint, incident, coalesced in pending:
+            # 提交仍在進行時等待同一個 Future；提交失敗時重複告警也得到相同的例外
+            run_id = await asyncio.shield(incident.run_id)
+            results.append(IngestResult(run_id=run_id, fingerprint=fingerprint,
+                                        coalesced=coalesced or fingerprint in shared,
+                                        duplicates=incident.duplicates))
+        return results
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        返回抑制計數與目前追蹤中的指紋。
+
+        Returns:
+            Dict[str, Any]: 統計，包含抑制比例與重複最多的指紋。
+        """
+        self._expire(time.monotonic())
+        top = sorted(self._incidents.items(), key=lambda item: item[1].duplicates, reverse=True)[:10]
+        return {
+            **self.stats,
+            "suppression_ratio": self.stats["suppressed"] / max(1, self.stats["received"]),
+            "active_incidents": len(self._incidents),
+            "top_incidents": [
+                {
+                    "fingerprint": fingerprint,
+                    "duplicates": incident.duplicates,
+                    "instances": len(incident.instances),
+                }
+                for fingerprint, incident in top
+            ],
+        }
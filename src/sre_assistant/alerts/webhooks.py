@@ -0,0 +1,110 @@
+# src/sre_assistant/alerts/webhooks.py
+"""
+此檔案將 Alertmanager 與 Grafana 告警的 webhook 批次 payload 轉換為 `SRERequest` 契約。
+
+兩者的 webhook 格式相同 (Grafana unified alerting 沿用 Alertmanager 的 `alerts` 陣列，
+另外附帶 `valueString`、`dashboardURL` 等欄位)：每個告警有 `labels`、`annotations`、
+`startsAt` 與 `fingerprint`。整批告警先以純字典轉換，再以一個 `TypeAdapter`
+一次驗證為 `SRERequest` 列表，避免逐個建立模型的額外成本。
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from ..contracts import SRERequest, SeverityLevel
+
+_REQUESTS = TypeAdapter(List[SRERequest])
+
+# 告警 severity 標籤到 SeverityLevel 的對應；未知值視為 P2
+SEVERITY_MAP = {
+    "critical": SeverityLevel.P0, "page": SeverityLevel.P0, "p0": SeverityLevel.P0,
+    "high": SeverityLevel.P1, "error": SeverityLevel.P1, "major": SeverityLevel.P1, "p1": SeverityLevel.P1,
+    "warning": SeverityLevel.P2, "warn": SeverityLevel.P2, "minor": SeverityLevel.P2, "p2": SeverityLevel.P2,
+    "info": SeverityLevel.P3, "low": SeverityLevel.P3, "none": SeverityLevel.P3, "p3": SeverityLevel.P3,
+}
+
+# 依序嘗試作為受影響服務的標籤
+SERVICE_LABELS = ("service", "app", "app_kubernetes_io_name", "job")
+
+# 從 Grafana 告警附帶到上下文中的欄位
+GRAFANA_FIELDS = ("valueString", "dashboardURL", "panelURL", "silenceURL", "imageURL")
+
+
+class AlertBatch(BaseModel):
+    """一個 webhook 批次的轉換結果。"""
+    source: str
+    requests: List[SRERequest] = Field(default_factory=list)
+    resolved: int = 0
+
+
+def _severity(labels: Dict[str, Any]) -> SeverityLevel:
+    return SEVERITY_MAP.get(str(labels.get("severity", "")).lower(), SeverityLevel.P2)
+
+
+def _services(labels: Dict[str, Any]) -> List[str]:
+    for key in SERVICE_LABELS:
+        if labels.get(key):
+            return [str(labels[key])]
+    return []
+
+
+def _alert_to_request(alert: Dict[str, Any], common: Dict[str, Any], source: str,
+                      group_key: Optional[str]) -> Dict[str, Any]:
+    """將單一告警轉換為 `SRERequest` 的字典形式 (尚未驗證)。"""
+    labels = {**common.get("commonLabels", {}), **(alert.get("labels") or {})}
+    annotations = {**common.get("commonAnnotations", {}), **(alert.get("annotations") or {})}
+    alertname = labels.get("alertname", "UnnamedAlert")
+    summary = annotations.get("summary") or annotations.get("description") or alertname
+    context = {
+        "source": source,
+        "labels": labels,
+        "annotations": annotations,
+        "starts_at": alert.get("startsAt"),
+        "generator_url": alert.get("generatorURL"),
+        "group_key": group_key,
+    }
+    for field in GRAFANA_FIELDS:
+        if alert.get(field):
+            context[field] = alert[field]
+    return {
+        "incident_id": alert.get("fingerprint") or f"{alertname}-{alert.get('startsAt', '')}",
+        "severity": _severity(labels),
+        "input": f"{alertname}: {summary}",
+        "affected_services": _services(labels),
+        "context": context,
+    }
+
+
+def parse_alert_webhook(payload: Dict[str, Any], source: str) -> AlertBatch:
+    """
+    將 Alertmanager / Grafana webhook payload 轉換並一次驗證為 `SRERequest` 列表。
+
+    只有 `firing` 狀態的告警會轉換為請求；`resolved` 告警只計數。
+
+    Args:
+        payload (Dict[str, Any]): webhook 的 JSON 內容。
+        source (str): 來源，"alertmanager" 或 "grafana"。
+
+    Raises:
+        ValueError: 如果 payload 沒有 `alerts` 陣列，或告警格式錯誤。
+        pydantic.ValidationError: 如果任何告警無法轉換為有效的 `SRERequest`。
+
+    Returns:
+        AlertBatch: 驗證後的請求與已解決的告警數。
+    """
+    alerts = payload.get("alerts")
+    if not isinstance(alerts, list):
+        raise ValueError("Webhook payload must contain an 'alerts' array")
+    group_key = payload.get("groupKey")
+    raw: List[Dict[str, Any]] = []
+    resolved = 0
+    for alert in alerts:
+        if not isinstance(alert, dict) or not isinstance(alert.get("labels") or {}, dict):
+            raise ValueError("Each alert must be an object with a 'labels' object")
+        if alert.get("status", payload.get("status", "firing")) == "resolved":
+            resolved += 1
+            continue
+        raw.append(_alert_to_request(alert, payload, source, group_key))
+    return AlertBatch(source=source, requests=_REQUESTS.validate_python(raw), resolved=resolved)
+
@@ -39,6 +39,8 @@ class MemoryBackend(str, Enum):
     VERTEX_AI = "vertex_ai"
     REDIS = "redis"
     MEMORY = "memory"  # 純記憶體, 僅供開發和測試使用
+    QUANTIZED = "quantized"  # 本地壓縮 (int8/PQ) 向量儲存, 適合大型知識庫
+    HNSW = "hnsw"  # 本地記憶體映射的持久化 HNSW 索引, 免重建即可暖啟動
 
 class DeploymentConfig(BaseModel):
     """
@@ -60,6 +62,8 @@ class DeploymentConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8080
     debug: bool = False
+    workers: Optional[int] = None        # 生產模式的工作行程數, 未設定時依 cpu 推算
+    drain_timeout_seconds: float = 30.0  # 優雅關閉時等待執行中請求與工作流程完成的期限
 
     @field_validator('project_id', mode='before')
     @classmethod
@@ -78,6 +82,8 @@ class MemoryConfig(BaseModel):
     weaviate_class_name: str = "SREKnowledge"
     postgres_connection_string: Optional[str] = None
     postgres_pool_size: int = 10
+    postgres_copy_batch_size: int = 10000  # 每次 COPY 到暫存表的列數
+    postgres_copy_threshold: int = 1000    # upsert 筆數達到此值時改走 COPY 路徑
     use_pgvector: bool = True
     vertex_index_endpoint: Optional[str] = None
     vertex_deployed_index_id: Optional[str] = None
@@ -85,6 +91,26 @@ class MemoryConfig(BaseModel):
     redis_ttl_seconds: int = 3600
     embedding_model: str = "textembedding-gecko@003"
     embedding_dimension: int = 768
+    similarity_metric: str = "cosine"  # "cosine" 或 "dot", 供本地向量引擎使用
+    embedding_batch_size: int = 64         # 嵌入服務每個微批次的最大文本數
+    embedding_batch_wait_ms: float = 5.0   # 收集一個微批次的最長等待時間 (毫秒)
+    embedding_cache_size: int = 10000      # 行程內嵌入 LRU 快取的項目數
+    embedding_cache_path: Optional[str] = None  # SQLite 磁碟嵌入快取路徑, None 表示停用
+    enable_hybrid_search: bool = False     # 是否在向量後端旁並列 BM25 詞彙索引
+    hybrid_rrf_k: int = 60                 # 倒數排名融合 (RRF) 的平滑常數
+    lexical_index_path: Optional[str] = "./lexical_index.sqlite"  # 詞彙索引檔, 記憶體後端時不持久化
+    enable_query_cache: bool = False       # 是否快取 RAG 查詢結果 (TTL 為 redis_ttl_seconds)
+    query_cache_size: int = 1024           # 行程內查詢結果 LRU 的項目數
+    query_cache_precision: int = 4         # 查詢向量量化為快取鍵時保留的小數位數
+    query_cache_generation_ttl_seconds: float = 1.0  # 共用世代計數器在行程內沿用的秒數 (其他行程寫入的失效延遲)
+    quantized_store_path: str = "./quantized_store"  # 壓縮向量儲存的目錄
+    quantization: str = "int8"             # "int8" (4 倍壓縮) 或 "pq" (乘積量化)
+    pq_subvectors: int = 192               # PQ 子向量數, 必須整除 embedding_dimension
+    rerank_candidates: int = 100           # 以全精度向量重新評分的候選數
+    hnsw_index_path: str = "./hnsw_index"  # HNSW 圖與向量的記憶體映射檔案目錄
+    hnsw_m: int = 16                       # 每個節點在上層的鄰居數 (第 0 層為 2M)
+    hnsw_ef_construction: int = 200        # 建置時的候選列表大小
+    hnsw_ef_search: int = 64               # 查詢時的候選列表大小
     chunk_size: int = 512
     chunk_overlap: int = 50
 
@@ -103,6 +129,172 @@ class SessionBackend(str, Enum):
     FIRESTORE = "firestore"
     IN_MEMORY = "in_memory"
 
+class JobStoreBackend(str, Enum):
+    """
+    定義 /execute 工作佇列可用的持久化儲存選項.
+    """
+    SQLITE = "sqlite"          # 本地開發, 單機多行程共用
+    POSTGRESQL = "postgresql"  # 生產環境, 多副本以 SKIP LOCKED 共同取用
+    REDIS = "redis"            # 生產環境, 多副本共用
+
+class JobConfig(BaseModel):
+    """
+    定義工作佇列 (取代 FastAPI BackgroundTasks 執行工作流程) 的配置.
+    """
+    store: JobStoreBackend = JobStoreBackend.SQLITE
+    sqlite_path: str = "./sre_jobs.sqlite"
+    connection_string: Optional[str] = None  # PostgreSQL DSN 或 Redis URL
+    concurrency: int = 4                     # 每個副本同時執行的工作流程數
+    max_pending: int = 1000                  # 全域排隊上限, 超過時返回 503
+    max_pending_per_tenant: int = 100        # 單一租戶排隊上限, 超過時返回 429
+    max_running_per_tenant: int = 2          # 單一租戶在一個副本上同時執行的上限
+    lease_seconds: float = 300.0             # 工作租約, 副本當機時租約到期即可被其他副本接手
+    max_attempts: int = 3                    # 工作因租約過期被重新排隊的次數上限
+    poll_interval_seconds: float = 1.0       # 輪詢其他副本提交之工作的間隔
+    retention_seconds: float = 7 * 24 * 3600  # 已結束工作 (含 payload 與結果) 的保留時間, 0 表示不刪除
+
+    @model_validator(mode='after')
+    def validate_connection_string(self) -> 'JobConfig':
+        # 以 after 驗證器檢查, 未提供 connection_string (使用預設值) 時同樣生效
+        if self.store in (JobStoreBackend.POSTGRESQL, JobStoreBackend.REDIS) and not self.connection_string:
+            raise ValueError("connection_string is required for PostgreSQL / Redis job stores")
+        return self
+
+class RunEventBackend(str, Enum):
+    """
+    定義執行事件 (SSE / WebSocket 串流) 跨行程傳遞的日誌選項.
+    """
+    MEMORY = "memory"  # 只在執行該工作的行程內, 適用單一工作行程
+    SQLITE = "sqlite"  # 同一主機的 pre-fork 工作行程共用
+    REDIS = "redis"    # 多副本共用 (Redis Streams)
+
+class RunStoreConfig(BaseModel):
+    """
+    定義工作流程執行紀錄 (GET /runs/{id}) 的保留配置.
+    """
+    max_entries: int = 1000                 # 記憶體 LRU 中保留的執行數
+    retention_seconds: float = 7 * 24 * 3600  # 已結束執行的保留時間
+    sqlite_path: Optional[str] = None       # 設定時持久化到 SQLite, 否則只保存在記憶體中
+    # 執行事件日誌: 觀看者的請求可能落在未執行該工作的工作行程或副本上
+    events_backend: RunEventBackend = RunEventBackend.SQLITE
+    events_sqlite_path: str = "./sre_run_events.sqlite"
+    events_redis_url: Optional[str] = None
+    events_retention_seconds: float = 900.0  # 事件日誌的保留時間, 供晚到的觀看者重播
+    events_poll_seconds: float = 0.25        # 其他行程的觀看者輪詢事件日誌的間隔
+    events_idle_seconds: float = 600.0       # 沒有訂閱者也沒有新事件的未結束串流的保留時間
+
+    @model_validator(mode='after')
+    def validate_events_backend(self) -> 'RunStoreConfig':
+        if self.events_backend == RunEventBackend.REDIS and not self.events_redis_url:
+            raise ValueError("runs.events_redis_url is required when runs.events_backend is 'redis'")
+        return self
+
+class AlertIngestionConfig(BaseModel):
+    """
+    定義告警去重與合併 (告警入口) 的配置.
+    """
+    dedup_window_seconds: float = 300.0      # 自第一個告警起算的視窗: 視窗內的重複告警併入同一次執行
+    max_tracked_incidents: int = 10000       # 追蹤中的告警指紋上限
+    # 計算指紋時忽略的實例層級標籤, 讓 200 個 Pod 的同一告警得到相同指紋
+    ignored_labels: List[str] = Field(default_factory=lambda: [
+        "pod", "pod_name", "instance", "container", "container_id", "node", "host", "hostname", "ip", "endpoint",
+    ])
+    # 在工作行程與副本之間共用指紋的 Redis; 未設定時每個工作行程各自合併 (多工作行程時應設定)
+    redis_url: Optional[str] = None
+
+class HealthCheckConfig(BaseModel):
+    """
+    定義就緒檢查 (/readyz) 的深度健康檢查配置.
+    """
+    timeout_seconds: float = 2.0     # 每個元件檢查的逾時, 應小於探測的逾時
+    cache_ttl_seconds: float = 5.0   # 彙總結果的快取時間, 避免頻繁探測衝擊後端
+
+class TracingConfig(BaseModel):
+    """
+    定義 OpenTelemetry 追蹤的配置.
+    """
+    enabled: bool = False
+    service_name: str = "sre-assistant"
+    exporter: str = "otlp"                  # "otlp" (HTTP) 或 "console"
+    otlp_endpoint: Optional[str] = None     # 未設定時使用 OTEL_EXPORTER_OTLP_* 環境變數
+    head_sample_ratio: float = Field(0.1, ge=0.0, le=1.0)  # 依追蹤 ID 固定保留的比例
+    tail_latency_threshold_ms: float = 15000.0  # 超過此延遲的追蹤一律保留 (診斷預算上限)
+    max_buffered_traces: int = 1024         # 等待尾部取樣決定的追蹤上限
+    max_queue_size: int = 2048              # 批次匯出的佇列上限
+    max_export_batch_size: int = 512
+    schedule_delay_millis: float = 5000.0
+
+class DiagnosticPhaseConfig(BaseModel):
+    """
+    定義並行診斷階段的截止時間與聚合策略.
+    """
+    timeout_seconds: float = Field(12.0, gt=0)          # 整個診斷階段的截止時間 (診斷目標 10-15 秒)
+    agent_timeout_seconds: Optional[float] = Field(10.0, gt=0)  # 每個分析代理的預設截止時間
+    agent_timeouts: Dict[str, float] = Field(default_factory=dict)  # 個別代理的截止時間, 例如 TraceAnalyzer
+    aggregation_strategy: str = "all_or_timeout"         # "all_or_timeout" 或 "first_n"
+    min_results: int = Field(2, ge=1)                    # first_n 策略下需要完成的代理數
+    summary_token_budget: int = Field(600, ge=50)        # 寫入 aggregated_diagnosis 的摘要 token 預算
+    dedup_similarity: float = Field(0.5, gt=0.0, le=1.0)  # 合併重複發現的詞彙相似度門檻
+
+class DispatchConfig(BaseModel):
+    """
+    定義分診階段快速路徑 (規則表) 的配置.
+    """
+    fast_path_enabled: bool = True
+    confidence_threshold: float = Field(0.8, ge=0.0, le=1.0)  # 低於此信心時交由 LLM 分診器
+    expected_llm_seconds: float = 2.0   # 估算節省延遲的 LLM 分診器初始耗時, 之後以實際耗時的移動平均取代
+    # 附加在內建規則之後的規則, 格式同 DispatchRule (name, experts, all_of, any_of, none_of, confidence, reasoning)
+    extra_rules: List[Dict[str, Any]] = Field(default_factory=list)
+
+class LLMCacheConfig(BaseModel):
+    """
+    定義 LLM 代理回應快取的配置.
+    """
+    enabled: bool = True
+    # 啟用快取的代理 (明確列出); 帶有副作用工具的代理即使列出也會被略過
+    agents: List[str] = Field(default_factory=lambda: [
+        "MetricsAnalyzer", "LogAnalyzer", "TraceAnalyzer", "IntelligentDispatcher",
+    ])
+    side_effecting_tools: List[str] = Field(default_factory=lambda: ["ask_for_approval"])
+    ttl_seconds: float = 300.0            # 事件處理期間的重複提示通常在數分鐘內出現
+    max_entries: int = 1024
+    normalize_volatile: bool = True       # 計算鍵前遮蔽 UUID、時間戳與長十六進位識別碼
+    semantic_enabled: bool = False        # 語意層需要可用的嵌入模型 (memory.embedding_model)
+    semantic_threshold: float = Field(0.95, gt=0.0, le=1.0)
+    coalesce_wait_seconds: float = 20.0   # 等待相同提示的進行中呼叫的最長時間
+
+class ModelRoutingConfig(BaseModel):
+    """
+    定義各代理的模型分級與路由策略.
+    """
+    enabled: bool = True
+    # 分級名稱到模型; 值為 None 的分級使用頂層的 llm_model
+    tiers: Dict[str, Optional[str]] = Field(default_factory=lambda: {"fast": "gemini-1.5-flash", "pro": None})
+    default_tier: str = "fast"                    # 未列在 agent_tiers 的代理使用的分級
+    agent_tiers: Dict[str, str] = Field(default_factory=dict)
+    # 依事件嚴重程度覆寫代理的分級, 例如 P0 事件的分診器使用較大的模型
+    severity_overrides: Dict[str, Dict[str, str]] = Field(default_factory=lambda: {
+        "P0": {"IntelligentDispatcher": "pro"},
+    })
+    escalation_tier: Optional[str] = "pro"        # LLM 分診決策信心不足時重新分診使用的分級; None 表示不升級
+    escalate_below_confidence: float = Field(0.6, ge=0.0, le=1.0)
+    # 每百萬 token 的美元價格, 用以估算各路由的成本
+    model_costs: Dict[str, Dict[str, float]] = Field(default_factory=lambda: {
+        "gemini-1.5-flash": {"input": 0.075, "output": 0.30},
+        "gemini-1.5-pro": {"input": 1.25, "output": 5.00},
+        "gemini-1.5-pro-latest": {"input": 1.25, "output": 5.00},
+    })
+
+    @model_validator(mode='after')
+    def check_tiers(self) -> 'ModelRoutingConfig':
+        referenced = {self.default_tier, *self.agent_tiers.values()}
+        referenced.update(t for overrides in self.severity_overrides.values() for t in overrides.values())
+        if self.escalation_tier:
+            referenced.add(self.escalation_tier)
+        if unknown := referenced - set(self.tiers):
+            raise ValueError(f"Unknown model tiers in model_routing: {sorted(unknown)}")
+        return self
+
 class SREAssistantConfig(BaseModel):
     """
     應用程式的頂層配置模型.
@@ -111,6 +303,15 @@ class SREAssistantConfig(BaseModel):
     memory: MemoryConfig
     auth: AuthConfig
     session_backend: SessionBackend = SessionBackend.IN_MEMORY
+    jobs: JobConfig = Field(default_factory=JobConfig)
+    runs: RunStoreConfig = Field(default_factory=RunStoreConfig)
+    alerts: AlertIngestionConfig = Field(default_factory=AlertIngestionConfig)
+    health: HealthCheckConfig = Field(default_factory=HealthCheckConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
+    diagnostics: DiagnosticPhaseConfig = Field(default_factory=DiagnosticPhaseConfig)
+    dispatch: DispatchConfig = Field(default_factory=DispatchConfig)
+    llm_cache: LLMCacheConfig = Field(default_factory=LLMCacheConfig)
+    model_routing: ModelRoutingConfig = Field(default_factory=ModelRoutingConfig)
     firestore_project_id: Optional[str] = None
     firestore_collection: str = "sre_assistant_sessions"
 
@@ -165,6 +366,12 @@ class ConfigManager:
             config.setdefault("memory", {})["weaviate_url"] = weaviate_url
         if pg_conn := os.getenv("DATABASE_URL"):
             config.setdefault("memory", {})["postgres_connection_string"] = pg_conn
+        if jobs_conn := os.getenv("JOBS_DATABASE_URL"):
+            config.setdefault("jobs", {})["connection_string"] = jobs_conn
+        if events_url := os.getenv("RUN_EVENTS_REDIS_URL"):
+            config.setdefault("runs", {})["events_redis_url"] = events_url
+        if alerts_url := os.getenv("ALERTS_REDIS_URL"):
+            config.setdefault("alerts", {})["redis_url"] = alerts_url
         return config
 
     def get_deployment_config(self) -> DeploymentConfig:
@@ -176,4 +383,31 @@ class ConfigManager:
     def get_auth_config(self) -> AuthConfig:
         return self.config.auth
 
+    def get_job_config(self) -> JobConfig:
+        return self.config.jobs
+
+    def get_run_store_config(self) -> RunStoreConfig:
+        return self.config.runs
+
+    def get_alert_config(self) -> AlertIngestionConfig:
+        return self.config.alerts
+
+    def get_health_config(self) -> HealthCheckConfig:
+        return self.config.health
+
+    def get_tracing_config(self) -> TracingConfig:
+        return self.config.tracing
+
+    def get_diagnostic_config(self) -> DiagnosticPhaseConfig:
+        return self.config.diagnostics
+
+    def get_dispatch_config(self) -> DispatchConfig:
+        return self.config.dispatch
+
+    def get_llm_cache_config(self) -> LLMCacheConfig:
+        return self.config.llm_cache
+
+    def get_model_routing_config(self) -> ModelRoutingConfig:
+        return self.config.model_routing
+
 config_manager = ConfigManager()
@@ -144,6 +144,15 @@ class AgentState(BaseModel):
     class Config:
         extra = "allow"
 
+class DispatchDecision(BaseModel):
+    """
+    定義智能分診器 (IntelligentDispatcher) 的決策輸出格式,
+    這確保了 LLM 的輸出是可預測和可用的; 快速路徑分診器以規則表產生相同格式的決策.
+    """
+    selected_experts: List[str] = Field(description="根據診斷結果，選擇最合適的專家代理名稱列表")
+    reasoning: str = Field(description="解釋為什麼選擇這些專家代理的簡要理由")
+    confidence: float = Field(description="對此決策的信心指數 (0.0 到 1.0)")
+
 class RiskAssessment(BaseModel):
     """風險評估結果模型 (Pydantic Model)"""
     level: RiskLevel = Field(description="綜合風險等級.")
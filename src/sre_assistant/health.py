@@ -0,0 +1,129 @@
+# src/sre_assistant/health.py
+"""
+此檔案實現了就緒檢查 (`/readyz`) 使用的深度健康檢查彙總。
+
+每個 `AuthProvider` 與 `VectorBackend` 都實現了 `health_check()`；`HealthAggregator`：
+- **並行** 呼叫所有已註冊元件的檢查，總耗時約為最慢的一項而非總和。
+- 每項檢查有 **各自的逾時**，卡住的後端只會讓該元件被標記為不健康，不會拖垮整個探測。
+- 彙總結果以 **短 TTL 快取**，並讓同時到達的探測共用同一次檢查 (single-flight)，
+  負載平衡器與協調器的頻繁探測不會持續衝擊 Weaviate / Postgres。
+- 回報每個元件的延遲與錯誤，方便找出拖慢探測的依賴。
+
+存活檢查 (`/healthz`) 刻意不呼叫這些檢查：依賴變慢時應該停止送入流量，而不是重新啟動健康的行程。
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+HealthCheck = Callable[[], Awaitable[bool]]
+
+
+class ComponentHealth(BaseModel):
+    """一個元件的健康檢查結果。"""
+    healthy: bool
+    latency_ms: float
+    critical: bool = True
+    error: Optional[str] = None
+
+
+class HealthReport(BaseModel):
+    """所有元件的健康檢查彙總。"""
+    healthy: bool
+    checked_at: float = Field(default_factory=time.time)
+    cached: bool = False
+    duration_ms: float = 0.0
+    components: Dict[str, ComponentHealth] = Field(default_factory=dict)
+
+
+class HealthAggregator:
+    """
+    並行執行元件健康檢查並快取彙總結果。
+    """
+
+    def __init__(self, timeout_seconds: float = 2.0, ttl_seconds: float = 5.0):
+        """
+        初始化健康檢查彙總。
+
+        Args:
+            timeout_seconds (float): 每項檢查的逾時秒數。
+            ttl_seconds (float): 彙總結果的快取秒數；0 表示每次都重新檢查。
+        """
+        self.timeout_seconds = timeout_seconds
+        self.ttl_seconds = ttl_seconds
+        self._checks: Dict[str, HealthCheck] = {}
+        self._critical: Dict[str, bool] = {}
+        self._report: Optional[HealthReport] = None
+        self._expires_at = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config) -> "HealthAggregator":
+        """
+        根據 `HealthCheckConfig` 創建健康檢查彙總。
+
+        Args:
+            config (HealthCheckConfig): 健康檢查配置。
+
+        Returns:
+            HealthAggregator: 健康檢查彙總實例。
+        """
+        return cls(config.timeout_seconds, config.cache_ttl_seconds)
+
+    def register(self, name: str, check: HealthCheck, critical: bool = True):
+        """
+        註冊一個元件的健康檢查。
+
+        Args:
+            name (str): 元件名稱。
+            check (HealthCheck): 返回是否健康的協程函式 (通常為元件的 `health_check`)。
+            critical (bool): 為 False 時，該元件不健康只會被回報，不影響整體就緒狀態。
+        """
+        self._checks[name] = check
+        self._critical[name] = critical
+        self._expires_at = 0.0
+
+    async def _check_one(self, name: str, check: HealthCheck) -> ComponentHealth:
+        started = time.perf_counter()
+        error = None
+        try:
+            healthy = bool(await asyncio.wait_for(check(), self.timeout_seconds))
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            healthy, error = False, f"{type(e).__name__}: {e}"
+        return ComponentHealth(healthy=healthy, latency_ms=(time.perf_counter() - started) * 1000,
+                               critical=self._critical[name], error=error)
+
+    async def _refresh(self) -> HealthReport:
+        started = time.perf_counter()
+        names = list(self._checks)
+        results = await asyncio.gather(*(self._check_one(name, self._checks[name]) for name in names))
+        components = dict(zip(names, results))
+        report = HealthReport(
+            healthy=all(c.healthy for c in components.values() if c.critical),
+            duration_ms=(time.perf_counter() - started) * 1000,
+            components=components,
+        )
+        self._report = report
+        self._expires_at = time.monotonic() + self.ttl_seconds
+        return report
+
+    async def check(self, force: bool = False) -> HealthReport:
+        """
+        返回彙總的健康狀態；快取未過期時直接返回快取結果。
+
+        Args:
+            force (bool): 忽略快取，立即重新檢查。
+
+        Returns:
+            HealthReport: 彙總結果；`cached` 表示是否來自快取。
+        """
+        if not force and self._report is not None and time.monotonic() < self._expires_at:
+            return self._report.model_copy(update={"cached": True})
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._refresh())
+        # 探測端斷線 (取消) 時不取消共用的檢查，讓其他等待者仍能取得結果
+        return await asyncio.shield(self._inflight)
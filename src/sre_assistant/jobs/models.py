@@ -0,0 +1,60 @@
+# src/sre_assistant/jobs/models.py
+"""
+此檔案定義了工作佇列子系統共用的資料模型與例外。
+"""
+
+import math
+import time
+import uuid
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobStatus(str, Enum):
+    """工作的生命週期狀態。"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class Job(BaseModel):
+    """
+    一個排隊中或執行中的工作流程執行請求。
+    """
+    job_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    tenant_id: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    enqueued_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class AdmissionError(Exception):
+    """
+    工作因佇列飽和而被拒絕。`status_code` 與 `retry_after` 直接對應 HTTP 回應。
+    """
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        # Retry-After 標頭只接受整數秒
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class QueueFullError(AdmissionError):
+    """整個副本的排隊工作已達上限 (HTTP 503)。"""
+    status_code = 503
+
+
+class TenantQuotaExceededError(AdmissionError):
+    """單一租戶的排隊工作已達上限 (HTTP 429)。"""
+    status_code = 429
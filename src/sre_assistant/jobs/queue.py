@@ -0,0 +1,357 @@
+# src/sre_assistant/jobs/queue.py
+"""
+此檔案實現了 /execute 使用的工作佇列與工作者池。
+
+- **有界並行**: 每個副本最多同時執行 `concurrency` 個工作流程，派發器只在有空閒
+  工作者時才從儲存取用工作，交給一個有界的 `asyncio.Queue`。
+- **准入控制**: 提交時檢查排隊數量，單一租戶超過上限時拋出
+  `TenantQuotaExceededError` (429)，全域超過上限時拋出 `QueueFullError` (503)，
+  兩者都附帶依平均執行時間估算的 Retry-After。
+- **租戶公平性**: 派發器以輪替方式在有排隊工作的租戶間選擇，並限制單一租戶在本副本
+  同時執行的數量，避免某個租戶的告警風暴佔滿所有工作者。
+- **持久化**: 工作存放在 `JobStore` 中，重啟後仍在；執行中的工作持有租約並定期續約，
+  副本當機時租約到期，工作會被重新排隊並由任何副本接手。已結束的工作保留 `retention_seconds` 後刪除。
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .models import Job, JobStatus, QueueFullError, TenantQuotaExceededError
+from .store import JobStore, create_job_store
+from ..config.config_manager import JobConfig
+
+JobHandler = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+# 尚無執行紀錄時，估算 Retry-After 使用的平均工作時間 (秒)
+DEFAULT_JOB_SECONDS = 30.0
+# 平均工作時間的指數移動平均權重
+EWMA_ALPHA = 0.2
+# 刪除過期已結束工作的最短間隔 (秒)
+PURGE_INTERVAL_SECONDS = 600.0
+
+
+class JobQueue:
+    """
+    以持久化儲存為後盾的有界工作佇列。
+    """
+
+    def __init__(self, store: JobStore, handler: JobHandler, concurrency: int = 4,
+                 max_pending: int = 1000, max_pending_per_tenant: int = 100,
+                 max_running_per_tenant: int = 2, lease_seconds: float = 300.0,
+                 max_attempts: int = 3, poll_interval: float = 1.0,
+                 worker_id: Optional[str] = None, retention_seconds: float = 0.0):
+        """
+        初始化工作佇列。
+
+        Args:
+            store (JobStore): 工作的持久化儲存。
+            handler (JobHandler): 執行一個工作的協程函式，返回值會作為工作結果儲存。
+            concurrency (int): 本副本同時執行的工作數。
+            max_pending (int): 全域排隊上限。
+            max_pending_per_tenant (int): 單一租戶排隊上限。
+            max_running_per_tenant (int): 單一租戶在本副本同時執行的上限。
+            lease_seconds (float): 工作租約長度，執行期間每 1/3 租約續約一次。
+            max_attempts (int): 租約過期後重新排隊的次數上限。
+            poll_interval (float): 沒有本地提交時，輪詢儲存的間隔。
+            worker_id (Optional[str]): 本副本的識別字，預設為主機名稱 + PID。
+            retention_seconds (float): 已結束工作的保留秒數，0 表示不刪除。
+
+        Raises:
+            ValueError: 如果並行數或上限不是正數。
+        """
+        if concurrency < 1 or max_pending < 1 or max_pending_per_tenant < 1 or max_running_per_tenant < 1:
+            raise ValueError("Job queue concurrency and limits must be positive")
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.max_pending_per_tenant = max_pending_per_tenant
+        self.max_running_per_tenant = max_running_per_tenant
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._worker_id = worker_id
+        self.retention_seconds = retention_seconds
+        self._suffix = uuid.uuid4().hex[:6]
+
+        self._jobs: "asyncio.Queue[Job]" = asyncio.Queue(maxsize=concurrency)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._wake = asyncio.Event()
+        self._running: Dict[str, int] = defaultdict(int)
+        self._last_served: Dict[str, int] = {}
+        self._ticks = 0
+        self._tasks: List[asyncio.Task] = []
+        self._accepting = True  # 關閉開始後不再取用新工作
+        self._next_reap = 0.0
+        self._next_purge = 0.0
+        self._avg_job_seconds = DEFAULT_JOB_SECONDS
+        self._last_pending = 0  # 最近一次查詢到的排隊工作數 (供指標使用，不另外查詢儲存)
+        self.stats = {
+            "submitted": 0, "rejected_tenant": 0, "rejected_full": 0,
+            "succeeded": 0, "failed": 0, "requeued": 0, "purged": 0,
+        }
+
+    @property
+    def worker_id(self) -> str:
+        """本副本的識別字；包含 PID，預先載入後 fork 出的每個工作行程各有不同的識別字。"""
+        return self._worker_id or f"{socket.gethostname()}-{os.getpid()}-{self._suffix}"
+
+    @classmethod
+    def from_config(cls, config: JobConfig, handler: JobHandler) -> "JobQueue":
+        """
+        根據配置創建工作佇列與其儲存。
+
+        Args:
+            config (JobConfig): 工作佇列配置。
+            handler (JobHandler): 執行一個工作的協程函式。
+
+        Returns:
+            JobQueue: 工作佇列實例 (尚未啟動)。
+        """
+        return cls(
+            create_job_store(config), handler,
+            concurrency=config.concurrency,
+            max_pending=config.max_pending,
+            max_pending_per_tenant=config.max_pending_per_tenant,
+            max_running_per_tenant=config.max_running_per_tenant,
+            lease_seconds=config.lease_seconds,
+            max_attempts=config.max_attempts,
+            poll_interval=config.poll_interval_seconds,
+            retention_seconds=config.retention_seconds,
+        )
+
+    # --- 提交與准入控制 ---
+
+    def _retry_after(self, backlog: int, parallelism: int) -> float:
+        """以平均工作時間估算排在前面的工作消化所需的秒數。"""
+        return self._avg_job_seconds * (backlog / max(1, parallelism))
+
+    async def _admit(self, tenant_id: str, count: int):
+        """檢查加入 `count` 個工作後是否超過租戶或全域上限。"""
+        counts = await self.store.pending_counts()
+        tenant_pending = counts.get(tenant_id, 0)
+        if tenant_pending + count > self.max_pending_per_tenant:
+            self.stats["rejected_tenant"] += count
+            raise TenantQuotaExceededError(
+                f"Tenant '{tenant_id}' has {tenant_pending} queued runs",
+                self._retry_after(tenant_pending + count, min(self.max_running_per_tenant, self.concurrency)),
+            )
+        total_pending = self._last_pending = sum(counts.values())
+        if total_pending + count > self.max_pending:
+            self.stats["rejected_full"] += count
+            raise QueueFullError(
+                f"Job queue is full ({total_pending} queued runs)",
+                self._retry_after(total_pending + count, self.concurrency),
+            )
+
+    async def submit(self, tenant_id: str, payload: Dict[str, Any]) -> Job:
+        """
+        提交一個工作。
+
+        Args:
+            tenant_id (str): 提交工作的租戶。
+            payload (Dict[str, Any]): 交給處理函式的資料，必須可序列化為 JSON。
+
+        Raises:
+            TenantQuotaExceededError: 該租戶的排隊工作已達上限。
+            QueueFullError: 全域排隊工作已達上限。
+
+        Returns:
+            Job: 已持久化的排隊工作。
+        """
+        return (await self.submit_many(tenant_id, [payload]))[0]
+
+    async def submit_many(self, tenant_id: str, payloads: List[Dict[str, Any]]) -> List[Job]:
+        """
+        以一次准入檢查與一次批次寫入提交多個工作 (全部接受或全部拒絕)。
+
+        Args:
+            tenant_id (str): 提交工作的租戶。
+            payloads (List[Dict[str, Any]]): 每個工作的資料。
+
+        Raises:
+            TenantQuotaExceededError: 加入後該租戶的排隊工作會超過上限。
+            QueueFullError: 加入後全域排隊工作會超過上限。
+
+        Returns:
+            List[Job]: 已持久化的排隊工作。
+        """
+        if not payloads:
+            return []
+        await self._admit(tenant_id, len(payloads))
+        jobs = await self.store.enqueue_many([Job(tenant_id=tenant_id, payload=payload) for payload in payloads])
+        self.stats["submitted"] += len(jobs)
+        self._wake.set()
+        return jobs
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """依 ID 讀取工作的目前狀態。"""
+        return await self.store.get(job_id)
+
+    # --- 派發 ---
+
+    async def _claim_next(self) -> Optional[Job]:
+        """
+        以輪替方式選擇租戶並取用其最早的工作。
+
+        最久沒有被服務的租戶優先 (同樣久時，最早排隊者優先)；
+        在本副本已達執行上限的租戶會被跳過。
+        """
+        counts = await self.store.pending_counts()
+        self._last_pending = sum(counts.values())
+        eligible = [tenant for tenant in counts if self._running[tenant] < self.max_running_per_tenant]
+        order = {tenant: i for i, tenant in enumerate(counts)}
+        eligible.sort(key=lambda tenant: (self._last_served.get(tenant, -1), order[tenant]))
+        for tenant in eligible:
+            job = await self.store.claim(tenant, self.worker_id, self.lease_seconds)
+            if job is not None:
+                self._ticks += 1
+                self._last_served[job.tenant_id] = self._ticks
+                return job
+        return None
+
+    async def _reap(self):
+        """定期將租約過期的工作 (其他副本當機留下的) 重新排隊，並刪除超過保留期限的已結束工作。"""
+        now = time.monotonic()
+        if self.retention_seconds > 0 and now >= self._next_purge:
+            self._next_purge = now + PURGE_INTERVAL_SECONDS
+            purged = await self.store.purge(time.time() - self.retention_seconds)
+            if purged:
+                self.stats["purged"] += purged
+                print(f"Job queue purged {purged} finished job(s)")
+        if now < self._next_reap:
+            return
+        self._next_reap = now + max(self.poll_interval, self.lease_seconds / 4)
+        requeued = await self.store.requeue_expired(self.max_attempts)
+        if requeued:
+            self.stats["requeued"] += requeued
+            print(f"Job queue requeued {requeued} job(s) with expired leases")
+
+    async def _dispatch(self):
+        """派發器迴圈：有空閒工作者時取用工作，否則等待提交或輪詢間隔。"""
+        while True:
+            await self._slots.acquire()
+            if not self._accepting:
+                self._slots.release()
+                return
+            # 在查詢前清除喚醒旗標，查詢期間的新提交會讓下一次等待立即返回
+            self._wake.clear()
+            try:
+                await self._reap()
+                job = await self._claim_next()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            except Exception as e:
+                print(f"Job dispatcher error: {e}")
+                job = None
+            if job is None:
+                self._slots.release()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._running[job.tenant_id] += 1
+            self._jobs.put_nowait(job)
+
+    # --- 執行 ---
+
+    async def _heartbeat(self, job: Job):
+        """在工作執行期間定期續約。"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await self.store.extend_lease(job.job_id, self.worker_id, self.lease_seconds):
+                print(f"Lost lease on job '{job.job_id}'")
+                return
+
+    async def _execute(self, job: Job):
+        """執行一個工作並記錄結果；被取消時 (副本關閉) 將工作放回佇列。"""
+        started = time.monotonic()
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            result = await self.handler(job)
+        except asyncio.CancelledError:
+            await asyncio.shield(self.store.release(job.job_id, self.worker_id))
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"Job '{job.job_id}' failed: {e}")
+            finished = await self.store.finish(job.job_id, JobStatus.FAILED, error=str(e), worker_id=self.worker_id)
+        else:
+            self.stats["succeeded"] += 1
+            finished = await self.store.finish(job.job_id, JobStatus.SUCCEEDED, result=result,
+                                               worker_id=self.worker_id)
+        finally:
+            heartbeat.cancel()
+            elapsed = time.monotonic() - started
+            self._avg_job_seconds += EWMA_ALPHA * (elapsed - self._avg_job_seconds)
+        if not finished:
+            # 租約已被收回並由其他副本重新取用，結果以新的取用者為準
+            print(f"Discarded result of job '{job.job_id}': lease was lost")
+
+    async def _worker(self):
+        """工作者迴圈。"""
+        while True:
+            job = await self._jobs.get()
+            try:
+                await self._execute(job)
+            finally:
+                self._running[job.tenant_id] -= 1
+                self._slots.release()
+                self._jobs.task_done()
+                self._wake.set()
+
+    # --- 生命週期 ---
+
+    async def start(self):
+        """初始化儲存並啟動派發器與工作者。"""
+        if self._tasks:
+            return
+        await self.store.initialize()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._dispatch()))
+        print(f"Job queue '{self.worker_id}' started with {self.concurrency} worker(s)")
+
+    def stop_intake(self):
+        """停止取用新工作，執行中的工作照常完成；只設定旗標，可在訊號處理器中呼叫。"""
+        self._accepting = False
+
+    async def stop(self, drain_timeout: float = 30.0):
+        """
+        停止取用新工作，等待執行中的工作完成；逾時後取消它們並放回佇列。
+
+        Args:
+            drain_timeout (float): 等待執行中工作完成的秒數。
+        """
+        if not self._tasks:
+            return
+        workers, dispatcher = self._tasks[:-1], self._tasks[-1]
+        self.stop_intake()
+        dispatcher.cancel()
+        await asyncio.gather(dispatcher, return_exceptions=True)
+        try:
+            await asyncio.wait_for(self._jobs.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"Job queue drain timed out after {drain_timeout}s; releasing unfinished jobs")
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        while not self._jobs.empty():
+            await self.store.release(self._jobs.get_nowait().job_id, self.worker_id)
+        self._tasks = []
+        await self.store.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回佇列統計與目前的本地執行狀態。"""
+        return {
+            **self.stats,
+            "running": sum(self._running.values()),
+            "pending": self._last_pending,
+            "avg_job_seconds": round(self._avg_job_seconds, 3),
+        }
@@ -0,0 +1,704 @@
+# src/sre_assistant/jobs/store.py
+"""
+此檔案定義了工作佇列的持久化儲存介面，以及 SQLite、PostgreSQL 與 Redis 的實現。
+
+排隊中的工作存放在持久化儲存中，而不是 API 行程的記憶體裡，因此：
+- 行程重啟後，排隊中的工作不會遺失。
+- 任何副本都可以取用 (claim) 工作；取用時會取得一個有期限的租約 (lease)，
+  執行中的副本當機時，租約到期後工作會被重新排隊，由其他副本接手。
+"""
+
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .models import Job, JobStatus
+from ..config.config_manager import JobConfig, JobStoreBackend
+
+
+class JobStore(abc.ABC):
+    """
+    工作儲存的抽象基礎類別。所有方法都必須是跨行程安全的。
+    """
+
+    async def initialize(self):
+        """建立資料表或連線；預設不做任何事。"""
+
+    @abc.abstractmethod
+    async def enqueue(self, job: Job) -> Job:
+        """新增一個排隊中的工作。"""
+
+    async def enqueue_many(self, jobs: List[Job]) -> List[Job]:
+        """新增多個排隊中的工作；預設逐一新增，子類別可覆寫為單一交易的批次寫入。"""
+        return [await self.enqueue(job) for job in jobs]
+
+    @abc.abstractmethod
+    async def pending_counts(self) -> Dict[str, int]:
+        """
+        返回每個租戶的排隊工作數，依各租戶最早排隊的工作時間排序 (最早的在前)。
+        """
+
+    @abc.abstractmethod
+    async def claim(self, tenant_id: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        原子性地取用指定租戶最早排隊的工作，並取得租約。
+
+        Args:
+            tenant_id (str): 租戶 ID。
+            worker_id (str): 取用者 (副本 + 工作者) 的識別字。
+            lease_seconds (float): 租約長度 (秒)。
+
+        Returns:
+            Optional[Job]: 取用到的工作；該租戶沒有排隊工作或已被其他副本取走時返回 None。
+        """
+
+    @abc.abstractmethod
+    async def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """延長仍由 `worker_id` 持有的租約；租約已被收回時返回 False。"""
+
+    @abc.abstractmethod
+    async def finish(self, job_id: str, status: JobStatus, result: Optional[Dict[str, Any]] = None,
+                     error: Optional[str] = None, worker_id: Optional[str] = None) -> bool:
+        """
+        將工作標記為成功或失敗。
+
+        Args:
+            job_id (str): 工作 ID。
+            status (JobStatus): 最終狀態。
+            result (Optional[Dict[str, Any]]): 執行結果。
+            error (Optional[str]): 錯誤訊息。
+            worker_id (Optional[str]): 只在工作仍由此取用者執行時寫入 (租約已被收回並由其他副本
+                重新取用時，不覆寫新取用者的結果)；None 表示不檢查。
+
+        Returns:
+            bool: 是否寫入。
+        """
+
+    @abc.abstractmethod
+    async def release(self, job_id: str, worker_id: Optional[str] = None):
+        """將執行中的工作放回佇列 (例如副本正常關閉時)，不計入嘗試次數；指定 `worker_id` 時只放回仍由其持有的工作。"""
+
+    @abc.abstractmethod
+    async def requeue_expired(self, max_attempts: int) -> int:
+        """
+        將租約已過期的執行中工作重新排隊；已達嘗試上限的工作標記為失敗。
+
+        Returns:
+            int: 被處理的工作數。
+        """
+
+    @abc.abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        """依 ID 讀取工作。"""
+
+    @abc.abstractmethod
+    async def purge(self, finished_before: float) -> int:
+        """
+        刪除在指定時間之前結束 (成功或失敗) 的工作。
+
+        Args:
+            finished_before (float): Unix 時間戳。
+
+        Returns:
+            int: 被刪除的工作數。
+        """
+
+    async def health_check(self) -> bool:
+        """以一次讀取確認儲存可用；預設查詢一個不存在的工作。"""
+        await self.get("__health_check__")
+        return True
+
+    async def close(self):
+        """釋放連線；預設不做任何事。"""
+
+
+_COLUMNS = ("job_id", "tenant_id", "payload", "status", "attempts", "enqueued_at", "started_at",
+            "finished_at", "lease_owner", "lease_expires_at", "result", "error")
+
+
+def _to_row(job: Job) -> tuple:
+    """將工作轉換為資料列 (JSON 欄位序列化為字串)。"""
+    data = job.model_dump()
+    data["payload"] = json.dumps(data["payload"], default=str)
+    data["result"] = json.dumps(data["result"], default=str) if data["result"] is not None else None
+    data["status"] = job.status.value
+    return tuple(data[column] for column in _COLUMNS)
+
+
+def _from_row(row) -> Job:
+    """將資料列轉換回工作。"""
+    data = dict(zip(_COLUMNS, row))
+    for column in ("payload", "result"):
+        if isinstance(data[column], str):
+            data[column] = json.loads(data[column])
+    return Job(**data)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    以 SQLite (WAL 模式) 儲存工作，適合本地開發與單機多行程部署。
+    所有 SQL 都在執行緒中執行，避免阻塞事件迴圈。
+    """
+
+    def __init__(self, path: str):
+        """
+        開啟 (或創建) 工作資料庫。
+
+        Args:
+            path (str): SQLite 檔案路徑。
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._conn  # 立即建立資料表，讓錯誤的路徑在啟動時就失敗
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """
+        返回本行程的連線。SQLite 連線不可跨 fork 共用，因此在預先載入後 fork 出的
+        工作行程中第一次使用時會重新連線。
+        """
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, payload TEXT, status TEXT NOT NULL,
+                    attempts INTEGER, enqueued_at REAL, started_at REAL, finished_at REAL,
+                    lease_owner TEXT, lease_expires_at REAL, result TEXT, error TEXT
+                )
+            """)
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_queue_idx ON jobs (status, tenant_id, enqueued_at)"
+            )
+        return self._connection
+
+    async def _run(self, fn, *args):
+        """在執行緒中以鎖保護執行同步的資料庫操作。"""
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    async def enqueue(self, job: Job) -> Job:
+        placeholders = ",".join("?" * len(_COLUMNS))
+        await self._run(self._conn.execute, f"INSERT INTO jobs ({','.join(_COLUMNS)}) VALUES ({placeholders})",
+                        _to_row(job))
+        return job
+
+    async def enqueue_many(self, jobs: List[Job]) -> List[Job]:
+        def insert():
+            placeholders = ",".join("?" * len(_COLUMNS))
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(f"INSERT INTO jobs ({','.join(_COLUMNS)}) VALUES ({placeholders})",
+                                       [_to_row(job) for job in jobs])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        await self._run(insert)
+        return jobs
+
+    async def pending_counts(self) -> Dict[str, int]:
+        def query():
+            return self._conn.execute(
+                "SELECT tenant_id, COUNT(*) FROM jobs WHERE status = 'queued' "
+                "GROUP BY tenant_id ORDER BY MIN(enqueued_at)"
+            ).fetchall()
+        return dict(await self._run(query))
+
+    async def claim(self, tenant_id: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        def claim_one():
+            now = time.time()
+            # BEGIN IMMEDIATE 取得寫入鎖，確保多個行程不會取用同一個工作
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, "
+                    f"lease_owner = ?, lease_expires_at = ? "
+                    f"WHERE job_id = (SELECT job_id FROM jobs WHERE status = 'queued' AND tenant_id = ? "
+                    f"ORDER BY enqueued_at LIMIT 1) RETURNING {','.join(_COLUMNS)}",
+                    (now, worker_id, now + lease_seconds, tenant_id),
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return row
+        row = await self._run(claim_one)
+        return _from_row(row) if row else None
+
+    async def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        cursor = await self._run(
+            self._conn.execute,
+            "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND lease_owner = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    async def finish(self, job_id: str, status: JobStatus, result: Optional[Dict[str, Any]] = None,
+                     error: Optional[str] = None, worker_id: Optional[str] = None) -> bool:
+        sql = ("UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, lease_expires_at = NULL "
+               "WHERE job_id = ?")
+        params = [status.value, time.time(), json.dumps(result, default=str) if result is not None else None,
+                  error, job_id]
+        if worker_id is not None:
+            sql += " AND lease_owner = ? AND status = 'running'"
+            params.append(worker_id)
+        cursor = await self._run(self._conn.execute, sql, params)
+        return cursor.rowcount == 1
+
+    async def release(self, job_id: str, worker_id: Optional[str] = None):
+        sql = ("UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), lease_owner = NULL, "
+               "lease_expires_at = NULL WHERE job_id = ? AND status = 'running'")
+        params = [job_id]
+        if worker_id is not None:
+            sql += " AND lease_owner = ?"
+            params.append(worker_id)
+        await self._run(self._conn.execute, sql, params)
+
+    async def requeue_expired(self, max_attempts: int) -> int:
+        def requeue():
+            now = time.time()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, error = 'lease expired too many times' "
+                    "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?",
+                    (now, now, max_attempts),
+                ).rowcount
+                requeued = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL "
+                    "WHERE status = 'running' AND lease_expires_at < ?",
+                    (now,),
+                ).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return failed + requeued
+        return await self._run(requeue)
+
+    async def purge(self, finished_before: float) -> int:
+        cursor = await self._run(
+            self._conn.execute,
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+            (finished_before,),
+        )
+        return cursor.rowcount
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        def query():
+            return self._conn.execute(f"SELECT {','.join(_COLUMNS)} FROM jobs WHERE job_id = ?",
+                                      (job_id,)).fetchone()
+        row = await self._run(query)
+        return _from_row(row) if row else None
+
+    async def close(self):
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+
+
+class PostgresJobStore(JobStore):
+    """
+    以 PostgreSQL 儲存工作；取用時使用 `FOR UPDATE SKIP LOCKED`，
+    讓多個副本可以同時取用不同的工作而不互相阻塞。
+    """
+
+    def __init__(self, connection_string: str):
+        """
+        初始化 PostgreSQL 工作儲存。
+
+        Args:
+            connection_string (str): asyncpg 可用的 DSN。
+        """
+        self.connection_string = connection_string
+        self.pool = None
+
+    async def initialize(self):
+        if self.pool:
+            return
+        import asyncpg
+        self.pool = await asyncpg.create_pool(self.connection_string, min_size=1, max_size=10)
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS sre_jobs (
+                    job_id TEXT PRIMARY KEY, tenant_id TEXT NOT NULL, payload JSONB, status TEXT NOT NULL,
+                    attempts INTEGER, enqueued_at DOUBLE PRECISION, started_at DOUBLE PRECISION,
+                    finished_at DOUBLE PRECISION, lease_owner TEXT, lease_expires_at DOUBLE PRECISION,
+                    result JSONB, error TEXT
+                )
+            """)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS sre_jobs_queue_idx
+                ON sre_jobs (tenant_id, enqueued_at) WHERE status = 'queued'
+            """)
+
+    async def enqueue(self, job: Job) -> Job:
+        await self.initialize()
+        placeholders = ",".join(f"${i}" for i in range(1, len(_COLUMNS) + 1))
+        async with self.pool.acquire() as conn:
+            await conn.execute(f"INSERT INTO sre_jobs ({','.join(_COLUMNS)}) VALUES ({placeholders})", *_to_row(job))
+        return job
+
+    async def enqueue_many(self, jobs: List[Job]) -> List[Job]:
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table("sre_jobs", records=[_to_row(job) for job in jobs], columns=_COLUMNS)
+        return jobs
+
+    async def pending_counts(self) -> Dict[str, int]:
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT tenant_id, COUNT(*) AS n FROM sre_jobs WHERE status = 'queued' "
+                "GROUP BY tenant_id ORDER BY MIN(enqueued_at)"
+            )
+        return {row["tenant_id"]: row["n"] for row in rows}
+
+    async def claim(self, tenant_id: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        await self.initialize()
+        now = time.time()
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"""
+                UPDATE sre_jobs SET status = 'running', attempts = attempts + 1, started_at = $1,
+                       lease_owner = $2, lease_expires_at = $3
+                WHERE job_id = (
+                    SELECT job_id FROM sre_jobs WHERE status = 'queued' AND tenant_id = $4
+                    ORDER BY enqueued_at LIMIT 1 FOR UPDATE SKIP LOCKED
+                )
+                RETURNING {','.join(_COLUMNS)}
+                """,
+                now, worker_id, now + lease_seconds, tenant_id,
+            )
+        return _from_row(tuple(row)) if row else None
+
+    async def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            status = await conn.execute(
+                "UPDATE sre_jobs SET lease_expires_at = $1 WHERE job_id = $2 AND lease_owner = $3 "
+                "AND status = 'running'",
+                time.time() + lease_seconds, job_id, worker_id,
+            )
+        return status.endswith(" 1")
+
+    async def finish(self, job_id: str, status: JobStatus, result: Optional[Dict[str, Any]] = None,
+                     error: Optional[str] = None, worker_id: Optional[str] = None) -> bool:
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            updated = await conn.execute(
+                "UPDATE sre_jobs SET status = $1, finished_at = $2, result = $3::jsonb, error = $4, "
+                "lease_expires_at = NULL WHERE job_id = $5 "
+                "AND ($6::text IS NULL OR (lease_owner = $6 AND status = 'running'))",
+                status.value, time.time(), json.dumps(result, default=str) if result is not None else None,
+                error, job_id, worker_id,
+            )
+        return updated.endswith(" 1")
+
+    async def release(self, job_id: str, worker_id: Optional[str] = None):
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE sre_jobs SET status = 'queued', attempts = GREATEST(attempts - 1, 0), "
+                "lease_owner = NULL, lease_expires_at = NULL WHERE job_id = $1 AND status = 'running' "
+                "AND ($2::text IS NULL OR lease_owner = $2)",
+                job_id, worker_id,
+            )
+
+    async def requeue_expired(self, max_attempts: int) -> int:
+        await self.initialize()
+        now = time.time()
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                failed = await conn.execute(
+                    "UPDATE sre_jobs SET status = 'failed', finished_at = $1, "
+                    "error = 'lease expired too many times' "
+                    "WHERE status = 'running' AND lease_expires_at < $1 AND attempts >= $2",
+                    now, max_attempts,
+                )
+                requeued = await conn.execute(
+                    "UPDATE sre_jobs SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL "
+                    "WHERE status = 'running' AND lease_expires_at < $1",
+                    now,
+                )
+        return int(failed.split()[-1]) + int(requeued.split()[-1])
+
+    async def purge(self, finished_before: float) -> int:
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            deleted = await conn.execute(
+                "DELETE FROM sre_jobs WHERE status IN ('succeeded', 'failed') AND finished_at < $1",
+                finished_before,
+            )
+        return int(deleted.split()[-1])
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        await self.initialize()
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(f"SELECT {','.join(_COLUMNS)} FROM sre_jobs WHERE job_id = $1", job_id)
+        return _from_row(tuple(row)) if row else None
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+
+# 以下腳本在 Redis 內原子地移動工作並寫入其狀態 (每個工作是一個雜湊，狀態欄位可以個別更新)，
+# 副本之間不會互相覆寫彼此寫入的工作狀態。工作的雜湊鍵由 ARGV 中的前綴組成 (單一 Redis 實例)。
+
+# 取出租戶佇列最前端的工作、登記租約並標記為執行中；佇列為空時移除租戶
+# (在同一個腳本內，不會與同時的 enqueue 交錯而誤刪剛加入工作的租戶)
+_REDIS_CLAIM = """
+local job_id = redis.call('LPOP', KEYS[1])
+if not job_id then
+  redis.call('ZREM', KEYS[2], ARGV[1])
+  return false
+end
+local key = ARGV[5] .. job_id
+if redis.call('EXISTS', key) == 0 then return false end
+redis.call('ZADD', KEYS[3], ARGV[2], job_id)
+redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'status', 'running', 'started_at', ARGV[3], 'lease_owner', ARGV[4],
+           'lease_expires_at', ARGV[2])
+return redis.call('HGETALL', key)
+"""
+
+# 只在工作仍由 ARGV[2] 持有且租約仍存在時延長租約
+_REDIS_EXTEND = """
+if redis.call('HGET', KEYS[1], 'status') ~= 'running' or redis.call('HGET', KEYS[1], 'lease_owner') ~= ARGV[2] then
+  return 0
+end
+if not redis.call('ZSCORE', KEYS[2], ARGV[1]) then return 0 end
+redis.call('HSET', KEYS[1], 'lease_expires_at', ARGV[3])
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+return 1
+"""
+
+# 寫入結果並移除租約；ARGV[2] 不為空字串時只在工作仍由該取用者持有時寫入，ARGV[7] 為結果的保留秒數
+_REDIS_FINISH = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+if ARGV[2] ~= '' and (redis.call('HGET', KEYS[1], 'status') ~= 'running'
+                      or redis.call('HGET', KEYS[1], 'lease_owner') ~= ARGV[2]) then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'status', ARGV[3], 'finished_at', ARGV[4])
+redis.call('HDEL', KEYS[1], 'lease_expires_at', 'result', 'error')
+if ARGV[5] ~= '' then redis.call('HSET', KEYS[1], 'result', ARGV[5]) end
+if ARGV[6] ~= '' then redis.call('HSET', KEYS[1], 'error', ARGV[6]) end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if tonumber(ARGV[7]) > 0 then redis.call('EXPIRE', KEYS[1], ARGV[7]) end
+return 1
+"""
+
+# 移除租約並將工作放回租戶佇列的最前端；只有移除租約的呼叫者會放回，多個副本同時處理
+# 同一個過期租約時工作只會被放回一次。ARGV[2] 為空字串時不檢查是否過期，ARGV[3] 不為空字串時
+# 只在工作仍由該取用者持有時放回。ARGV[6] 為空字串表示正常放回 (不計入嘗試次數)，
+# 否則為嘗試上限：已達上限的過期工作標記為失敗 (返回 2，並以 ARGV[8] 秒為保留期限)
+_REDIS_REQUEUE = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score then return 0 end
+if ARGV[2] ~= '' and tonumber(score) > tonumber(ARGV[2]) then return 0 end
+if ARGV[3] ~= '' and redis.call('HGET', KEYS[4], 'lease_owner') ~= ARGV[3] then return 0 end
+redis.call('ZREM', KEYS[1], ARGV[1])
+if redis.call('EXISTS', KEYS[4]) == 0 then return 0 end
+local attempts = tonumber(redis.call('HGET', KEYS[4], 'attempts') or '0')
+if ARGV[6] == '' then
+  attempts = math.max(attempts - 1, 0)
+elseif attempts >= tonumber(ARGV[6]) then
+  redis.call('HSET', KEYS[4], 'status', 'failed', 'finished_at', ARGV[7], 'error', 'lease expired too many times')
+  redis.call('HDEL', KEYS[4], 'lease_expires_at')
+  if tonumber(ARGV[8]) > 0 then redis.call('EXPIRE', KEYS[4], ARGV[8]) end
+  return 2
+end
+redis.call('HSET', KEYS[4], 'status', 'queued', 'attempts', attempts)
+redis.call('HDEL', KEYS[4], 'lease_owner', 'lease_expires_at')
+redis.call('LPUSH', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[3], 'NX', ARGV[5], ARGV[4])
+return 1
+"""
+
+
+def _to_hash(job: Job) -> Dict[str, Any]:
+    """將工作轉換為 Redis 雜湊的欄位 (JSON 欄位序列化為字串，None 的欄位省略)。"""
+    data = job.model_dump()
+    data["payload"] = json.dumps(data["payload"], default=str)
+    data["result"] = json.dumps(data["result"], default=str) if data["result"] is not None else None
+    data["status"] = job.status.value
+    return {column: value for column, value in data.items() if value is not None}
+
+
+def _from_hash(raw: Dict[Any, Any]) -> Optional[Job]:
+    """將 Redis 雜湊轉換回工作；雜湊不存在 (空字典) 時返回 None。"""
+    if not raw:
+        return None
+    data = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in raw.items()}
+    for column in ("payload", "result"):
+        if column in data:
+            data[column] = json.loads(data[column])
+    return Job(**data)
+
+
+class RedisJobStore(JobStore):
+    """
+    以 Redis 儲存工作：每個工作一個雜湊，每個租戶一個 FIFO 列表，執行中工作的租約存放在有序集合中。
+    取用、續約、完成與放回都以 Lua 腳本原子地完成，並在同一個腳本內寫入工作狀態
+    (租約有序集合即為處理中清單)；續約與完成只在工作仍由呼叫的取用者持有時生效。
+    已結束的工作以鍵的 TTL 保留 `retention_seconds` 秒，由 Redis 自行刪除。
+    同步的 Redis 客戶端在執行緒中呼叫，避免阻塞事件迴圈。
+    """
+
+    def __init__(self, client: Any, namespace: str = "sre_jobs", retention_seconds: float = 7 * 24 * 3600):
+        """
+        初始化 Redis 工作儲存。
+
+        Args:
+            client (Any): `redis.Redis` 客戶端。
+            namespace (str): 所有鍵的前綴。
+            retention_seconds (float): 已結束工作的保留秒數，0 表示不過期。
+        """
+        self.redis = client
+        self.namespace = namespace
+        self.retention_seconds = retention_seconds
+        self._claim_script = client.register_script(_REDIS_CLAIM)
+        self._extend_script = client.register_script(_REDIS_EXTEND)
+        self._finish_script = client.register_script(_REDIS_FINISH)
+        self._requeue_script = client.register_script(_REDIS_REQUEUE)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.namespace,) + parts)
+
+    async def _call(self, fn, *args, **kwargs):
+        return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def enqueue(self, job: Job) -> Job:
+        return (await self.enqueue_many([job]))[0]
+
+    async def enqueue_many(self, jobs: List[Job]) -> List[Job]:
+        def push():
+            pipe = self.redis.pipeline()
+            for job in jobs:
+                pipe.hset(self._key("job", job.job_id), mapping=_to_hash(job))
+                pipe.rpush(self._key("queue", job.tenant_id), job.job_id)
+                pipe.zadd(self._key("tenants"), {job.tenant_id: job.enqueued_at}, nx=True)
+            pipe.execute()
+        await self._call(push)
+        return jobs
+
+    async def pending_counts(self) -> Dict[str, int]:
+        def counts():
+            tenants = [t.decode() if isinstance(t, bytes) else t
+                       for t in self.redis.zrange(self._key("tenants"), 0, -1)]
+            pipe = self.redis.pipeline()
+            for tenant in tenants:
+                pipe.llen(self._key("queue", tenant))
+            return {tenant: n for tenant, n in zip(tenants, pipe.execute()) if n}
+        return await self._call(counts)
+
+    async def claim(self, tenant_id: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        now = time.time()
+        fields = await self._call(
+            self._claim_script,
+            keys=[self._key("queue", tenant_id), self._key("tenants"), self._key("leases")],
+            args=[tenant_id, now + lease_seconds, now, worker_id, self._key("job", "")])
+        if not fields:
+            return None
+        return _from_hash(dict(zip(fields[::2], fields[1::2])))
+
+    async def extend_lease(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        extended = await self._call(
+            self._extend_script, keys=[self._key("job", job_id), self._key("leases")],
+            args=[job_id, worker_id, time.time() + lease_seconds])
+        return bool(extended)
+
+    async def finish(self, job_id: str, status: JobStatus, result: Optional[Dict[str, Any]] = None,
+                     error: Optional[str] = None, worker_id: Optional[str] = None) -> bool:
+        finished = await self._call(
+            self._finish_script, keys=[self._key("job", job_id), self._key("leases")],
+            args=[job_id, worker_id or "", status.value, time.time(),
+                  json.dumps(result, default=str) if result is not None else "", error or "",
+                  int(self.retention_seconds)])
+        return bool(finished)
+
+    async def _requeue(self, job: Job, worker_id: Optional[str] = None, expired_before: Optional[float] = None,
+                       max_attempts: Optional[int] = None) -> int:
+        """
+        原子地移除工作的租約，並將工作放回其租戶佇列的最前端 (或標記為失敗)。
+
+        Args:
+            job (Job): 要放回的工作 (只使用其不變的 ID、租戶與排隊時間)。
+            worker_id (Optional[str]): 只在工作仍由此取用者持有時放回；None 表示不檢查。
+            expired_before (Optional[float]): 只在租約於此時間前過期時處理；None 表示不檢查。
+            max_attempts (Optional[int]): 嘗試上限，已達上限的工作標記為失敗；None 表示正常放回 (不計入嘗試次數)。
+
+        Returns:
+            int: 0 表示未處理 (租約已不存在或已被其他副本處理)，1 表示已放回，2 表示已標記為失敗。
+        """
+        return await self._call(
+            self._requeue_script,
+            keys=[self._key("leases"), self._key("queue", job.tenant_id), self._key("tenants"),
+                  self._key("job", job.job_id)],
+            args=[job.job_id, "" if expired_before is None else expired_before, worker_id or "",
+                  job.tenant_id, job.enqueued_at, "" if max_attempts is None else max_attempts, time.time(),
+                  int(self.retention_seconds)])
+
+    async def release(self, job_id: str, worker_id: Optional[str] = None):
+        job = await self.get(job_id)
+        if job is not None and job.status == JobStatus.RUNNING:
+            await self._requeue(job, worker_id)
+
+    async def requeue_expired(self, max_attempts: int) -> int:
+        now = time.time()
+        expired = await self._call(self.redis.zrangebyscore, self._key("leases"), 0, now)
+        requeued = 0
+        for job_id in expired:
+            job_id = job_id.decode() if isinstance(job_id, bytes) else job_id
+            job = await self.get(job_id)
+            if job is None:
+                await self._call(self.redis.zrem, self._key("leases"), job_id)
+                continue
+            if await self._requeue(job, expired_before=now, max_attempts=max_attempts):
+                requeued += 1
+        return requeued
+
+    async def purge(self, finished_before: float) -> int:
+        # 已結束的工作在結束時即設定了 TTL，由 Redis 自行刪除
+        return 0
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return _from_hash(await self._call(self.redis.hgetall, self._key("job", job_id)))
+
+
+def create_job_store(config: JobConfig) -> JobStore:
+    """
+    根據配置創建工作儲存。
+
+    Args:
+        config (JobConfig): 工作佇列配置。
+
+    Raises:
+        ValueError: 如果配置了不支援的儲存。
+
+    Returns:
+        JobStore: 工作儲存實例。
+    """
+    if config.store == JobStoreBackend.SQLITE:
+        return SQLiteJobStore(config.sqlite_path)
+    if config.store == JobStoreBackend.POSTGRESQL:
+        return PostgresJobStore(config.connection_string)
+    if config.store == JobStoreBackend.REDIS:
+        from redis import Redis
+        return RedisJobStore(Redis.from_url(config.connection_string), retention_seconds=config.retention_seconds)
+    raise ValueError(f"Unsupported job store: {config.store}")
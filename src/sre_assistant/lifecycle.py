@@ -0,0 +1,164 @@
+# src/sre_assistant/lifecycle.py
+"""
+此檔案實現了服務啟動的並行初始化與就緒狀態 (readiness) 追蹤。
+
+匯入 `sre_assistant.main` 不再建構任何服務；工作流程、會話服務、認證提供者、工作佇列、
+執行登錄、事件中心、告警入口與健康檢查改在 FastAPI lifespan 中初始化：
+- 彼此獨立的初始化步驟以 `asyncio.gather` 並行執行 (同步的建構函式放到執行緒中)，
+  啟動時間約為最慢的一步，而非所有步驟的總和。
+- 每個步驟記錄狀態與耗時，供 `/readyz` 回報與找出啟動瓶頸。
+- **存活 (liveness)** 與 **就緒 (readiness)** 分開：行程在初始化期間就能回應存活檢查，
+  但直到所有步驟成功前都回報未就緒，讓負載平衡器不要送入流量；初始化失敗時連存活檢查也失敗，
+  讓協調器重新啟動行程。
+
+優雅關閉由 `ShutdownState` 協調：收到結束訊號時立即開始一個共同的排空期限並停止取用新工作，
+HTTP 連線的排空與執行中工作流程的排空共用這個期限，整個關閉不會超過 `drain_timeout_seconds`。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+StartupStep = Callable[[], Awaitable[Any]]
+
+
+class ComponentStatus(BaseModel):
+    """一個初始化步驟的狀態。"""
+    name: str
+    state: str = "pending"  # pending / ready / failed
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class StartupState:
+    """
+    追蹤啟動步驟的狀態，並提供存活與就緒判斷。
+    """
+
+    def __init__(self):
+        self.components: Dict[str, ComponentStatus] = {}
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def failed(self) -> bool:
+        return any(c.state == "failed" for c in self.components.values())
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None and not self.failed
+
+    async def _run_step(self, name: str, step: StartupStep) -> Any:
+        status = self.components[name] = ComponentStatus(name=name)
+        started = time.perf_counter()
+        try:
+            result = await step()
+        except Exception as e:
+            status.state = "failed"
+            status.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            status.duration_ms = (time.perf_counter() - started) * 1000
+        status.state = "ready"
+        return result
+
+    async def gather(self, steps: Dict[str, StartupStep]) -> Dict[str, Any]:
+        """
+        並行執行一組彼此獨立的初始化步驟。
+
+        Args:
+            steps (Dict[str, StartupStep]): 步驟名稱到初始化協程函式的對應。
+
+        Raises:
+            Exception: 任何步驟失敗時，在所有步驟結束後拋出第一個失敗的例外。
+
+        Returns:
+            Dict[str, Any]: 步驟名稱到初始化結果的對應。
+        """
+        results = await asyncio.gather(*(self._run_step(name, step) for name, step in steps.items()),
+                                       return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return dict(zip(steps, results))
+
+    def complete(self):
+        """標記所有初始化步驟已完成。"""
+        self.finished_at = time.monotonic()
+        print(f"Startup completed in {(self.finished_at - self.started_at) * 1000:.0f} ms: "
+              + ", ".join(f"{c.name}={c.duration_ms:.0f}ms" for c in self.components.values()))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        返回就緒狀態與各步驟的狀態。
+
+        Returns:
+            Dict[str, Any]: 包含 `ready`、啟動耗時與各元件狀態。
+        """
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "ready": self.ready,
+            "startup_ms": elapsed * 1000,
+            "components": {name: c.model_dump() for name, c in self.components.items()},
+        }
+
+
+class ShutdownState:
+    """
+    優雅關閉的共同期限。
+    """
+
+    def __init__(self):
+        self.deadline: Optional[float] = None
+        self._hooks: List[Callable[[], None]] = []
+
+    @property
+    def draining(self) -> bool:
+        return self.deadline is not None
+
+    def on_begin(self, hook: Callable[[], None]):
+        """
+        註冊開始排空時呼叫的函式 (例如停止取用新工作)；已在排空中時立即呼叫。
+
+        Args:
+            hook (Callable[[], None]): 不阻塞的同步函式，可能在訊號處理器中被呼叫。
+        """
+        self._hooks.append(hook)
+        if self.draining:
+            hook()
+
+    def begin(self, drain_seconds: float):
+        """
+        開始排空並設定期限；重複呼叫 (例如第二次收到訊號) 不會延長期限。
+
+        Args:
+            drain_seconds (float): 從現在起整個排空的期限。
+        """
+        if self.draining:
+            return
+        self.deadline = time.monotonic() + drain_seconds
+        for hook in self._hooks:
+            try:
+                hook()
+            except Exception as e:
+                print(f"Shutdown hook failed: {e}")
+
+    def remaining(self, default: float) -> float:
+        """
+        返回排空期限剩餘的秒數。
+
+        Args:
+            default (float): 尚未開始排空時 (例如未經由訊號關閉) 返回的秒數。
+
+        Returns:
+            float: 剩餘秒數，不小於 0。
+        """
+        if self.deadline is None:
+            return default
+        return max(0.0, self.deadline - time.monotonic())
+
+
+# 行程內的關閉狀態；由伺服器的訊號處理器開始，lifespan 關閉時讀取剩餘期限
+shutdown = ShutdownState()
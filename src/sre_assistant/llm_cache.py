@@ -0,0 +1,374 @@
+# src/sre_assistant/llm_cache.py
+"""
+此檔案實現了工作流程中 LLM 代理呼叫的回應快取 `LLMResponseCache`。
+
+告警風暴期間，分析代理與分診器會在短時間內收到幾乎相同的提示。此快取以 ADK 的
+`before_model_callback` / `after_model_callback` 實現，命中時直接返回先前的回應，不呼叫模型：
+- **精確層**: 鍵為 (模型名稱, 系統指令, 工具與輸出結構描述) 的範圍雜湊，加上正規化後的對話內容；
+  正規化會合併空白並遮蔽 UUID、時間戳等每次告警都不同的值。
+- **語意層 (可選)**: 以記憶體子系統的 `EmbeddingService` 編碼對話內容，存入 `InMemoryBackend`，
+  在同一範圍內相似度達到門檻即視為命中。
+- **請求合併**: 相同提示的並行請求只由第一個呼叫模型，其餘等待其結果；模型呼叫拋出例外時，
+  `LLMCacheErrorPlugin` (ADK 只在外掛提供 `on_model_error_callback`) 立即釋放等待者，改為自行呼叫模型。
+- 項目有 TTL，並以 LRU 限制數量；被淘汰的項目同時從語意索引刪除。
+- 代理需在配置中明確啟用；帶有副作用工具 (長時間執行的 HITL 工具或配置中列出的工具) 的代理
+  一律略過，例如 `RemediationExecutor`。
+
+命中率與節省的 token 以 `sre_llm_cache_lookups{agent,result}` 與 `sre_llm_cache_tokens_saved{agent}` 匯出。
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins import BasePlugin
+from google.genai import types
+from opentelemetry import trace
+
+from .memory.in_memory_backend import InMemoryBackend
+from .observability.metrics import metrics as default_metrics
+
+# 嵌入函式的型別：輸入文本，輸出向量
+Embed = Callable[[str], Awaitable[List[float]]]
+
+# 每次告警都不同、不應影響快取鍵的值
+_VOLATILE_PATTERNS = (
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?\b"), "<ts>"),
+    (re.compile(r"\b[0-9a-f]{16,}\b", re.IGNORECASE), "<hex>"),
+)
+_WHITESPACE = re.compile(r"\s+")
+# 語意層編碼的最大字元數
+MAX_EMBED_CHARS = 4000
+# 等待 before/after 配對的呼叫上限 (模型呼叫拋出例外時不會呼叫 after 回呼)
+MAX_PENDING_CALLS = 1024
+
+
+def _tool_names(agent) -> List[str]:
+    names = []
+    for tool in getattr(agent, "tools", None) or []:
+        names.append(getattr(tool, "name", None) or getattr(tool, "__name__", type(tool).__name__))
+    return names
+
+
+def _content_text(content: types.Content) -> str:
+    parts = []
+    for part in content.parts or []:
+        if part.text:
+            parts.append(part.text)
+        elif part.function_call:
+            parts.append(f"call {part.function_call.name} "
+                         f"{json.dumps(part.function_call.args or {}, sort_keys=True, default=str)}")
+        elif part.function_response:
+            parts.append(f"result {part.function_response.name} "
+                         f"{json.dumps(part.function_response.response or {}, sort_keys=True, default=str)}")
+    return f"{content.role or ''}: " + " ".join(parts)
+
+
+class _Entry:
+    __slots__ = ("content", "expires_at", "tokens", "semantic")
+
+    def __init__(self, content: types.Content, expires_at: float, tokens: int, semantic: bool):
+        self.content = content
+        self.expires_at = expires_at
+        self.tokens = tokens
+        self.semantic = semantic
+
+
+class LLMResponseCache:
+    """
+    以 ADK 模型回呼實現的兩層 LLM 回應快取。
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 1024,
+                 agents: Iterable[str] = (), side_effecting_tools: Iterable[str] = (),
+                 normalize_volatile: bool = True, embed: Optional[Embed] = None,
+                 semantic_threshold: float = 0.95, coalesce_wait_seconds: float = 30.0,
+                 metrics=None):
+        """
+        初始化回應快取。
+
+        Args:
+            ttl_seconds (float): 快取項目的存活秒數。
+            max_entries (int): 快取項目上限，超過時淘汰最久未使用的項目。
+            agents (Iterable[str]): 啟用快取的代理名稱。
+            side_effecting_tools (Iterable[str]): 具副作用的工具名稱；使用這些工具的代理不啟用快取。
+            normalize_volatile (bool): 計算鍵前是否遮蔽 UUID、時間戳與長十六進位識別碼。
+            embed (Optional[Embed]): 語意層使用的嵌入函式；None 表示只使用精確層。
+            semantic_threshold (float): 語意層命中所需的餘弦相似度。
+            coalesce_wait_seconds (float): 等待相同提示的進行中呼叫的最長秒數，逾時後自行呼叫模型。
+            metrics (SREMetrics): 指標集合；預設為服務的指標單例。
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.agents = set(agents)
+        self.side_effecting_tools = set(side_effecting_tools)
+        self.normalize_volatile = normalize_volatile
+        self.embed = embed
+        self.semantic_threshold = semantic_threshold
+        self.coalesce_wait_seconds = coalesce_wait_seconds
+        self.metrics = metrics or default_metrics
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._index = InMemoryBackend() if embed is not None else None
+        self._evicted: List[str] = []
+        self._pending: Dict[Tuple[str, str], Tuple[str, str, Optional[List[float]], float]] = {}
+        self._inflight: Dict[str, Tuple[asyncio.Future, float]] = {}
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "coalesced": 0, "misses": 0,
+                      "stores": 0, "evictions": 0, "tokens_saved": 0, "embed_errors": 0}
+
+    @classmethod
+    def from_config(cls, config, memory_config=None) -> "LLMResponseCache":
+        """
+        根據 `LLMCacheConfig` 創建回應快取。
+
+        Args:
+            config (LLMCacheConfig): 回應快取配置。
+            memory_config (Optional[MemoryConfig]): 啟用語意層時，用以取得共用嵌入服務的記憶體配置。
+
+        Returns:
+            LLMResponseCache: 回應快取實例。
+        """
+        embed = None
+        if config.semantic_enabled and memory_config is not None:
+            from .memory.embedding_service import get_embedding_service
+            embed = get_embedding_service(memory_config).encode_one
+        return cls(
+            ttl_seconds=config.ttl_seconds,
+            max_entries=config.max_entries,
+            agents=config.agents if config.enabled else (),
+            side_effecting_tools=config.side_effecting_tools,
+            normalize_volatile=config.normalize_volatile,
+            embed=embed,
+            semantic_threshold=config.semantic_threshold,
+            coalesce_wait_seconds=config.coalesce_wait_seconds,
+        )
+
+    # --- 掛載 ---
+
+    def has_side_effects(self, agent) -> bool:
+        """代理是否帶有長時間執行 (HITL) 或配置中列為具副作用的工具。"""
+        tools = getattr(agent, "tools", None) or []
+        return (any(getattr(tool, "is_long_running", False) for tool in tools)
+                or bool(self.side_effecting_tools.intersection(_tool_names(agent))))
+
+    def attach(self, agent) -> bool:
+        """
+        為一個 LLM 代理掛上快取回呼 (放在既有模型回呼之前，命中時其他 before 回呼不會執行)。
+
+        Args:
+            agent (LlmAgent): 要啟用快取的代理。
+
+        Returns:
+            bool: 是否已掛上；未啟用或帶有副作用工具的代理返回 False。
+        """
+        if agent.name not in self.agents or not hasattr(agent, "before_model_callback"):
+            return False
+        if self.has_side_effects(agent):
+            print(f"LLM response cache bypassed for '{agent.name}': agent has side-effecting tools.")
+            return False
+        for field, callback in (("before_model_callback", self.before_model_callback),
+                                ("after_model_callback", self.after_model_callback)):
+            existing = getattr(agent, field, None)
+            callbacks = list(existing) if isinstance(existing, list) else ([existing] if existing else [])
+            if callback not in callbacks:
+                setattr(agent, field, [callback] + callbacks)
+        return True
+
+    def attach_to_tree(self, root) -> List[str]:
+        """
+        為代理樹中所有啟用快取的代理掛上回呼。
+
+        Args:
+            root (BaseAgent): 代理樹的根。
+
+        Returns:
+            List[str]: 已掛上快取的代理名稱。
+        """
+        attached = []
+        stack = [root]
+        while stack:
+            agent = stack.pop()
+            if self.attach(agent):
+                attached.append(agent.name)
+            stack.extend(getattr(agent, "sub_agents", None) or [])
+        return attached
+
+    # --- 鍵 ---
+
+    def _normalize(self, text: str) -> str:
+        if self.normalize_volatile:
+            for pattern, replacement in _VOLATILE_PATTERNS:
+                text = pattern.sub(replacement, text)
+        return _WHITESPACE.sub(" ", text).strip()
+
+    def keys(self, llm_request: LlmRequest) -> Tuple[str, str, str]:
+        """
+        計算請求的範圍雜湊、精確鍵與正規化後的對話內容。
+
+        Args:
+            llm_request (LlmRequest): ADK 的模型請求。
+
+        Returns:
+            Tuple[str, str, str]: (範圍雜湊, 精確鍵, 正規化的對話內容)。
+        """
+        config = llm_request.config
+        system = config.system_instruction if config else None
+        if isinstance(system, types.Content):
+            system = _content_text(system)
+        tools = [t.model_dump(mode="json", exclude_none=True) for t in (config.tools or [])] if config else []
+        schema = config.response_schema if config else None
+        if schema is not None and not isinstance(schema, (dict, str)):
+            schema = schema.model_json_schema() if hasattr(schema, "model_json_schema") else repr(schema)
+        scope = hashlib.sha256(json.dumps(
+            [llm_request.model, self._normalize(str(system or "")), tools, schema], sort_keys=True, default=str,
+        ).encode("utf-8")).hexdigest()
+        prompt = self._normalize("\n".join(_content_text(c) for c in llm_request.contents))
+        exact = hashlib.sha256(f"{scope}\0{prompt}".encode("utf-8")).hexdigest()
+        return scope, exact, prompt
+
+    # --- 存取 ---
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.semantic:
+            self._evicted.append(key)
+
+    async def _flush_evicted(self):
+        if self._index is not None and self._evicted:
+            evicted, self._evicted = self._evicted, []
+            await self._index.delete(evicted)
+
+    async def _semantic_lookup(self, scope: str, embedding: List[float]) -> Optional[Tuple[str, _Entry]]:
+        results = await self._index.search(
+            embedding, k=1, filters={"scope": scope, "expires_at": {"$gt": time.time()}})
+        if results and results[0]["similarity"] >= self.semantic_threshold:
+            key = results[0]["id"]
+            entry = self._get(key)
+            if entry is not None:
+                return key, entry
+        return None
+
+    def _hit(self, agent: str, result: str, entry: _Entry) -> LlmResponse:
+        self.stats[f"{result}_hits" if result != "coalesced" else "coalesced"] += 1
+        self.stats["tokens_saved"] += entry.tokens
+        self.metrics.observe_llm_cache(agent, result, entry.tokens)
+        trace.get_current_span().set_attribute("sre.llm.cache", result)
+        # 不帶 usage_metadata：快取的回應沒有消耗 token
+        return LlmResponse(content=entry.content.model_copy(deep=True), turn_complete=True,
+                           custom_metadata={"sre_llm_cache": result})
+
+    # --- ADK 模型回呼 ---
+
+    async def before_model_callback(self, callback_context, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """ADK `before_model_callback`：命中時返回快取的回應，跳過模型呼叫。"""
+        agent = callback_context.agent_name
+        scope, exact, prompt = self.keys(llm_request)
+        await self._flush_evicted()
+
+        entry = self._get(exact)
+        if entry is not None:
+            return self._hit(agent, "exact", entry)
+
+        inflight = self._inflight.get(exact)
+        if inflight is not None and time.monotonic() - inflight[1] < self.coalesce_wait_seconds:
+            try:
+                entry = await asyncio.wait_for(asyncio.shield(inflight[0]), self.coalesce_wait_seconds)
+            except asyncio.TimeoutError:
+                entry = None
+            if entry is not None:
+                return self._hit(agent, "coalesced", entry)
+
+        embedding = None
+        if self.embed is not None:
+            try:
+                embedding = await self.embed(prompt[-MAX_EMBED_CHARS:])
+                match = await self._semantic_lookup(scope, embedding)
+            except Exception as e:
+                self.stats["embed_errors"] += 1
+                print(f"LLM response cache semantic lookup failed: {e}")
+                embedding, match = None, None
+            if match is not None:
+                return self._hit(agent, "semantic", match[1])
+
+        self.stats["misses"] += 1
+        self.metrics.observe_llm_cache(agent, "miss")
+        if len(self._pending) >= MAX_PENDING_CALLS:
+            self._pending.clear()
+        self._pending[(callback_context.invocation_id, agent)] = (scope, exact, embedding, time.monotonic())
+        if exact not in self._inflight or self._inflight[exact][0].done():
+            self._inflight[exact] = (asyncio.get_running_loop().create_future(), time.monotonic())
+        return None
+
+    async def after_model_callback(self, callback_context, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """ADK `after_model_callback`：快取完整且成功的回應；返回 None 保留原本的回應。"""
+        if llm_response.partial:
+            return None
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if pending is None:
+            return None
+        scope, exact, embedding, _ = pending
+        cacheable = llm_response.content is not None and llm_response.content.parts and not llm_response.error_code
+        entry = None
+        if cacheable:
+            usage = llm_response.usage_metadata
+            tokens = ((usage.prompt_token_count or 0) + (usage.candidates_token_count or 0)) if usage else 0
+            entry = _Entry(llm_response.content.model_copy(deep=True), time.monotonic() + self.ttl_seconds,
+                           tokens, semantic=embedding is not None)
+            self._remove(exact)
+            self._entries[exact] = entry
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+            if embedding is not None:
+                await self._index.upsert([embedding], [{
+                    "id": exact, "scope": scope, "expires_at": time.time() + self.ttl_seconds}])
+        inflight = self._inflight.pop(exact, None)
+        if inflight is not None and not inflight[0].done():
+            inflight[0].set_result(entry)
+        return None
+
+    def on_model_error(self, callback_context):
+        """
+        模型呼叫拋出例外時清除該呼叫的進行中項目，讓合併的等待者立即改為自行呼叫模型。
+
+        Args:
+            callback_context (CallbackContext): 失敗的模型呼叫的回呼上下文。
+        """
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if pending is None:
+            return
+        inflight = self._inflight.pop(pending[1], None)
+        if inflight is not None and not inflight[0].done():
+            inflight[0].set_result(None)
+
+
+class LLMCacheErrorPlugin(BasePlugin):
+    """
+    將 ADK 的模型錯誤回呼轉給回應快取 (代理層級的回呼沒有錯誤回呼)，以 `Runner(plugins=[...])` 註冊。
+    """
+
+    def __init__(self, cache: LLMResponseCache):
+        super().__init__(name="sre_llm_cache")
+        self.cache = cache
+
+    async def on_model_error_callback(self, *, callback_context, llm_request: LlmRequest,
+                                      error: Exception) -> Optional[LlmResponse]:
+        """釋放等待該呼叫結果的請求；返回 None 讓例外照常傳遞。"""
+        self.cache.on_model_error(callback_context)
+        return None
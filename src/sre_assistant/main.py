@@ -4,24 +4,37 @@ SRE Assistant - FastAPI 服務入口點
 
 本檔案負責：
 1. 建立 FastAPI 應用程式。
-2. 實例化核心的 SRE 工作流程 (EnhancedSREWorkflow)。
-3. 定義 API 端點 (例如 /execute)，用於接收請求並觸發工作流程。
-4. 使用 uvicorn 啟動服務。
+2. 在 lifespan 中並行初始化核心的 SRE 工作流程 (EnhancedSREWorkflow) 與各項服務；
+   匯入本模組不會建構任何服務，初始化完成前 `/readyz` 回報未就緒。
+3. 定義 API 端點 (例如 /execute)，用於接收請求並將工作流程提交到持久化的工作佇列。
+4. 以 SSE / WebSocket 串流工作流程執行中產生的事件。
+5. 使用 uvicorn 啟動服務。
 """
 
 import asyncio
+import importlib
 import uvicorn
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
-from .workflow import EnhancedSREWorkflow
 from .config.config_manager import config_manager
-from .auth.auth_factory import AuthFactory
-from .session.backend_factory import session_factory
-from google.adk.runners import Runner
-from google.genai import types
+from .lifecycle import StartupState, shutdown
+from .health import HealthAggregator
+from .observability.metrics import MetricsMiddleware, metrics
+from .observability.tracing import context_from_carrier, record_error, setup_tracing, trace_carrier, tracer
+from .jobs.models import AdmissionError, Job, JobStatus
+from .jobs.queue import JobQueue
+from .server import plan_server, serve
+from .runs.events import RunEventBroker, adk_event_payload
+from .runs.store import RunRecord, create_run_registry
+from .alerts.dedup import AlertCoalescer, IngestResult, build_user_query
+from .alerts.webhooks import parse_alert_webhook
+from .model_routing import severity_state
+from .contracts import SRERequest
 
 # --- 1. 定義 API 的請求與回應模型 ---
 
@@ -35,35 +48,184 @@ class ExecuteResponse(BaseModel):
     status: str
     session_id: str
     message: str
+    job_id: Optional[str] = None
+
+class WebhookAck(BaseModel):
+    """定義告警 webhook 端點的單一確認回應"""
+    status: str
+    received: int
+    resolved_skipped: int
+    incidents: int
+    runs_started: int
+    run_ids: List[str]
 
 
 # --- 2. 初始化應用程式和核心服務 ---
 
+# 以下服務在 lifespan 中初始化 (見 `initialize_services`)；匯入本模組時皆為 None
+sre_workflow = None
+runner = None
+session_service = None
+auth_provider = None
+run_registry = None
+memory_backend = None
+job_queue: Optional[JobQueue] = None
+tracer_provider = None
+# 就緒檢查使用的深度健康檢查 (並行、逐項逾時、短 TTL 快取)
+health: Optional[HealthAggregator] = None
+# 工作流程事件的發布/訂閱中心；經由共用的事件日誌，觀看者可以連到任何工作行程或副本
+event_broker: Optional[RunEventBroker] = None
+# 告警入口：在自第一個告警起算的視窗內將相同指紋的告警合併為一次執行 (不併入已失敗的執行)
+alert_coalescer: Optional[AlertCoalescer] = None
+
+# 啟動步驟的狀態，供 /healthz (存活) 與 /readyz (就緒) 回報
+startup = StartupState()
+
+# 在 fork 工作行程之前預先匯入的重量級模組 (代理樹、ADK Runner 與各後端)
+PRELOAD_MODULES = (".workflow", "google.adk.runners", "google.adk.agents.run_config",
+                   ".session.backend_factory", ".auth.auth_factory")
+
+
+def preload_modules():
+    """在主行程中預先匯入重量級模組，讓 fork 出的工作行程共用已載入的程式碼。"""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name, __package__)
+
+
+async def initialize_services():
+    """
+    並行初始化所有服務。
+
+    第一階段的步驟彼此獨立 (同步的建構函式在執行緒中執行)：建構代理樹、會話服務、
+    認證提供者、長期記憶體後端、執行登錄、事件中心與工作佇列。第二階段建立依賴前兩者的 Runner
+    並啟動工作佇列的工作者，最後建立告警入口並註冊各元件的健康檢查。
+    """
+    global sre_workflow, runner, session_service, auth_provider, run_registry, memory_backend, job_queue
+    global tracer_provider, health, event_broker, alert_coalescer
+
+    # 在任何跨度建立之前安裝 TracerProvider (ADK 的跨度也經由它匯出)
+    tracer_provider = setup_tracing(config_manager.get_tracing_config())
+
+    def build_workflow():
+        from .workflow import EnhancedSREWorkflow
+        return EnhancedSREWorkflow()
+
+    def build_session_service():
+        from .session.backend_factory import session_factory
+        return session_factory.create()
+
+    def build_auth_provider():
+        from .auth.auth_factory import AuthFactory
+        return AuthFactory.create(config_manager.get_auth_config())
+
+    def build_memory_backend():
+        from .memory.backend_factory import MemoryBackendFactory
+        return MemoryBackendFactory.create(config_manager.get_memory_config())
+
+    built = await startup.gather({
+        "workflow": lambda: asyncio.to_thread(build_workflow),
+        "session_service": lambda: asyncio.to_thread(build_session_service),
+        "auth_provider": lambda: asyncio.to_thread(build_auth_provider),
+        "memory_backend": lambda: asyncio.to_thread(build_memory_backend),
+        "run_registry": lambda: asyncio.to_thread(create_run_registry, config_manager.get_run_store_config()),
+        "event_broker": lambda: asyncio.to_thread(RunEventBroker.from_config, config_manager.get_run_store_config()),
+        "job_queue": lambda: asyncio.to_thread(JobQueue.from_config, config_manager.get_job_config(), run_job),
+    })
+    sre_workflow = built["workflow"]
+    session_service = built["session_service"]
+    auth_provider = built["auth_provider"]
+    memory_backend = built["memory_backend"]
+    run_registry = built["run_registry"]
+    event_broker = built["event_broker"]
+    job_queue = built["job_queue"]
+
+    async def build_runner():
+        from google.adk.runners import Runner
+        return Runner(agent=sre_workflow, session_service=session_service, app_name="sre_assistant_app",
+                      plugins=sre_workflow.plugins())
+
+    runner = (await startup.gather({"runner": build_runner, "job_queue_workers": job_queue.start}))["runner"]
+    alert_coalescer = AlertCoalescer.from_config(config_manager.get_alert_config(), submit_run, submit_runs,
+                                                 job_queue.get)
+    health = HealthAggregator.from_config(config_manager.get_health_config())
+    health.register("auth_provider", auth_provider.health_check)
+    health.register("memory_backend", memory_backend.health_check)
+    health.register("job_store", job_queue.store.health_check)
+    # 收到結束訊號時立即停止取用新工作，不必等到 HTTP 連線排空後的 lifespan 關閉
+    shutdown.on_begin(job_queue.stop_intake)
+    metrics.bind_queue(job_queue.snapshot)
+    startup.complete()
+
+
+async def shutdown_services():
+    """
+    停止取用新工作，並在期限內等待執行中的工作流程；逾時者放回佇列由其他副本接手。
+    經由訊號關閉時，只使用與 HTTP 排空共用的期限中剩餘的時間。
+    """
+    if job_queue is not None:
+        drain_timeout = config_manager.get_deployment_config().drain_timeout_seconds
+        await job_queue.stop(drain_timeout=shutdown.remaining(drain_timeout))
+    if run_registry is not None:
+        await run_registry.close()
+    if event_broker is not None:
+        await event_broker.stop()
+    if tracer_provider is not None:
+        # 匯出仍在批次佇列中的跨度
+        await asyncio.to_thread(tracer_provider.shutdown)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    在背景初始化服務：行程立即開始接受連線並回應存活檢查，初始化完成後才回報就緒。
+    初始化失敗時記錄錯誤，`/healthz` 與 `/readyz` 皆回報失敗。
+    """
+    async def initialize():
+        try:
+            await initialize_services()
+        except Exception as e:
+            print(f"Startup failed: {e}")
+
+    task = asyncio.create_task(initialize())
+    try:
+        yield
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await shutdown_services()
+
+
 app = FastAPI(
     title="SRE Assistant API",
     description="用於與 SRE Assistant 智能代理工作流程互動的 API。",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
-# 實例化核心 SRE 工作流程
-sre_workflow = EnhancedSREWorkflow()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
 
-# 根據配置初始化認證提供者
-auth_config = config_manager.get_auth_config()
-auth_provider = AuthFactory.create(auth_config)
 security_scheme = HTTPBearer(auto_error=False) # auto_error=False 允許匿名訪問
 
-# 根據配置，使用工廠模式創建會話服務
-session_service = session_factory.create()
-runner = Runner(agent=sre_workflow, session_service=session_service, app_name="sre_assistant_app")
-
 
 # --- 3. 定義認證依賴和非同步執行工作流程的函式 ---
 
+def ensure_ready():
+    """服務尚未完成初始化時返回 503，並建議客戶端稍後重試。"""
+    if not startup.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is starting up" if not startup.failed else "Service failed to start",
+            headers={"Retry-After": "5"},
+        )
+
+
 async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_scheme)) -> Dict[str, Any]:
     """
     一個 FastAPI 依賴，用於驗證傳入的憑證並返回用戶資訊。
+    服務尚未就緒時返回 503。
     """
+    ensure_ready()
     token = credentials.token if credentials else None
 
     # 對於 "none" 提供者，即使沒有 token 也會返回一個模擬用戶
@@ -80,11 +242,21 @@ async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] =
         )
     return user_info
 
-async def run_workflow_in_background(user_query: str, session_id: str, user_info: Dict[str, Any]):
+async def run_workflow_in_background(user_query: str, session_id: str, user_info: Dict[str, Any],
+                                     run_id: Optional[str] = None, severity: Optional[str] = None) -> str:
     """
-    一個非同步函式，用於在背景執行 ADK Runner。
+    一個非同步函式，用於在工作者中執行 ADK Runner。
     這避免了阻塞 API 回應。
+    指定 `run_id` 時，每個 ADK 事件 (包含串流中的部分回應) 都會發布到事件中心，
+    供 `/runs/{run_id}/events` 的訂閱者即時觀看。
+    事件的嚴重程度 (`severity`，例如 "P0") 在執行開始時寫入會話狀態，供模型路由選擇各代理的模型。
+
+    Returns:
+        str: 工作流程的最終回應。
     """
+    from google.adk.agents.run_config import RunConfig, StreamingMode
+    from google.genai import types
+
     user_id = user_info.get("user_id", "anonymous")
     print(f"Received request for session '{session_id}'. Query: '{user_query}' from user '{user_id}'")
     
@@ -99,17 +271,103 @@ async def run_workflow_in_background(user_query: str, session_id: str, user_info
     user_content = types.Content(role="user", parts=[types.Part(text=user_query)])
     
     # 異步執行並迭代事件（實際的執行發生在此處）
-    # 在真實應用中，可以將這些事件推送到 WebSocket 或日誌系統
+    # 以 SSE 串流模式執行，讓模型的部分回應一產生就能推送給觀看者
     final_response = ""
-    async for event in runner.run_async(session_id=session.id, new_message=user_content):
-        if event.content and event.content.parts:
-            text = "".join(part.text or "" for part in event.content.parts)
-            if text:
-                print(f"[{event.author}] {text}")
-                if event.author == sre_workflow.name:
-                    final_response = text
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+    async for event in runner.run_async(user_id=user_id, session_id=session.id,
+                                        new_message=user_content, run_config=run_config,
+                                        state_delta=severity_state(severity)):
+        payload = adk_event_payload(event)
+        if event.usage_metadata and not payload["partial"]:
+            metrics.add_tokens(event.author, event.usage_metadata)
+        if run_id:
+            event_broker.publish(run_id, "event", payload)
+            run_registry.record_event(run_id, event.author)
+        if payload["text"] and not payload["partial"]:
+            print(f"[{event.author}] {payload['text']}")
+            if event.author == sre_workflow.name:
+                final_response = payload["text"]
 
     print(f"Workflow for session '{session_id}' completed. Final response: {final_response}")
+    return final_response
+
+
+async def record_run_metrics(run_id: str):
+    """執行結束時，由執行紀錄一次寫入執行時間與各代理 (階段) 的時間。"""
+    record = await run_registry.get(run_id)
+    if record is None or record.duration_ms is None:
+        return
+    metrics.observe_run(record.status, record.duration_ms / 1000)
+    for agent, timing in record.phases.items():
+        metrics.observe_phase(agent, timing.duration_ms / 1000)
+
+
+async def run_job(job: Job) -> Dict[str, Any]:
+    """
+    工作佇列的處理函式：以工作的 payload 執行工作流程，工作 ID 即為執行 ID。
+    整個執行包在 `sre.workflow.run` 跨度中，並接續提交時 (HTTP 請求或 `SRERequest.trace_id`) 的追蹤上下文。
+    """
+    payload = job.payload
+    if await run_registry.get(job.job_id) is None:
+        # 由其他副本提交且未共用持久化登錄時，在此補建紀錄
+        await run_registry.create(job.job_id, job.tenant_id, payload.get("session_id", ""),
+                                  payload.get("user_query", ""))
+    await run_registry.start(job.job_id)
+    await event_broker.prepare(job.job_id)
+    event_broker.publish(job.job_id, "status", {"status": "running", "attempt": job.attempts})
+    with tracer.start_as_current_span(
+        "sre.workflow.run",
+        context=context_from_carrier(payload.get("trace_context")),
+        attributes={"sre.run_id": job.job_id, "sre.tenant_id": job.tenant_id,
+                    "sre.session_id": payload.get("session_id", ""), "sre.attempt": job.attempts},
+        record_exception=False,
+        set_status_on_exception=False,
+    ) as span:
+        try:
+            final_response = await run_workflow_in_background(
+                payload["user_query"], payload["session_id"], payload.get("user_info", {}), run_id=job.job_id,
+                severity=payload.get("severity"))
+        except asyncio.CancelledError:
+            # 副本關閉時工作會被放回佇列，串流保持開啟
+            span.set_attribute("sre.run.requeued", True)
+            event_broker.publish(job.job_id, "status", {"status": "requeued"})
+            raise
+        except Exception as e:
+            record_error(span, e)
+            await run_registry.finish(job.job_id, "failed", error=str(e))
+            await record_run_metrics(job.job_id)
+            event_broker.close(job.job_id, "failed", {"error": str(e)})
+            raise
+    await run_registry.finish(job.job_id, "succeeded", final_response=final_response)
+    await record_run_metrics(job.job_id)
+    event_broker.close(job.job_id, "succeeded", {"final_response": final_response})
+    return {"final_response": final_response}
+
+
+def tenant_of(user_info: Dict[str, Any]) -> str:
+    """返回用戶所屬的租戶；未提供租戶時以用戶 ID 作為租戶。"""
+    return user_info.get("tenant_id") or user_info.get("user_id", "anonymous")
+
+
+async def submit_runs(tenant_id: str, payloads: List[Dict[str, Any]]) -> List[Job]:
+    """以一次准入檢查與批次寫入提交多次工作流程執行，並登錄其執行紀錄。"""
+    jobs = await job_queue.submit_many(tenant_id, payloads)
+    await run_registry.create_many([
+        RunRecord(run_id=job.job_id, tenant_id=tenant_id, session_id=payload["session_id"],
+                  user_query=payload["user_query"])
+        for job, payload in zip(jobs, payloads)
+    ])
+    return jobs
+
+
+async def submit_run(tenant_id: str, payload: Dict[str, Any]) -> Job:
+    """提交一次工作流程執行並登錄其執行紀錄。"""
+    return (await submit_runs(tenant_id, [payload]))[0]
+
+
+def admission_http_error(e: AdmissionError) -> HTTPException:
+    """將佇列准入錯誤轉換為帶 Retry-After 標頭的 HTTP 錯誤。"""
+    return HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
 
 # --- 4. 定義 API 端點 ---
@@ -117,42 +375,257 @@ async def run_workflow_in_background(user_query: str, session_id: str, user_info
 @app.post("/execute", response_model=ExecuteResponse)
 async def execute_workflow(
     request: ExecuteRequest,
-    background_tasks: BackgroundTasks,
+    http_request: Request,
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
-    接收使用者查詢並在背景啟動 SRE 工作流程。
+    接收使用者查詢並將 SRE 工作流程提交到工作佇列。
     此端點現在受到 `get_current_user` 依賴的保護。
+    佇列飽和時返回 429 (租戶超量) 或 503 (全域已滿)，並附帶 Retry-After 標頭。
     """
-    background_tasks.add_task(
-        run_workflow_in_background,
-        request.user_query,
-        request.session_id,
-        current_user
-    )
-    
+    try:
+        job = await submit_run(tenant_of(current_user), {
+            "user_query": request.user_query,
+            "session_id": request.session_id,
+            "user_info": current_user,
+            "trace_context": trace_carrier(dict(http_request.headers)),
+        })
+    except AdmissionError as e:
+        raise admission_http_error(e)
+
     return ExecuteResponse(
         status="accepted",
         session_id=request.session_id,
-        message="SRE workflow has been accepted and is running in the background."
+        message="SRE workflow has been queued.",
+        job_id=job.job_id
     )
 
+@app.post("/alerts", response_model=IngestResult)
+async def ingest_alert(request: SRERequest, http_request: Request,
+                       current_user: Dict[str, Any] = Depends(get_current_user)):
+    """
+    接收一個告警；視窗內的重複告警併入既有的執行，返回其執行 ID 而不啟動新的工作流程。
+    """
+    try:
+        return await alert_coalescer.ingest(tenant_of(current_user), request, {
+            "user_query": build_user_query(request),
+            "severity": request.severity.value,
+            "session_id": request.session_id or f"incident-{request.incident_id}",
+            "user_info": current_user,
+            "trace_context": trace_carrier(dict(http_request.headers), request.trace_id),
+        })
+    except AdmissionError as e:
+        raise admission_http_error(e)
+
+
+@app.post("/webhooks/{source}", response_model=WebhookAck)
+async def ingest_alert_webhook(
+    source: str,
+    request: Request,
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    接收 Alertmanager (`/webhooks/alertmanager`) 或 Grafana (`/webhooks/grafana`) 的批次告警。
+    整批告警一次驗證為 SRERequest、依事件分組，新事件以一次批次寫入排隊，並以單一回應確認。
+    """
+    if source not in ("alertmanager", "grafana"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown webhook source '{source}'")
+    try:
+        batch = parse_alert_webhook(await request.json(), source)
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    headers = dict(request.headers)
+
+    def payload_for(alert: SRERequest) -> Dict[str, Any]:
+        return {
+            "user_query": build_user_query(alert),
+            "severity": alert.severity.value,
+            "session_id": alert.session_id or f"incident-{alert.incident_id}",
+            "user_info": current_user,
+            "trace_context": trace_carrier(headers, alert.trace_id),
+        }
+
+    try:
+        results = await alert_coalescer.ingest_batch(tenant_of(current_user), batch.requests, payload_for)
+    except AdmissionError as e:
+        raise admission_http_error(e)
+    return WebhookAck(
+        status="accepted",
+        received=len(batch.requests) + batch.resolved,
+        resolved_skipped=batch.resolved,
+        incidents=len(results),
+        runs_started=sum(not r.coalesced for r in results),
+        run_ids=[r.run_id for r in results],
+    )
+
+
+@app.get("/alerts/stats")
+async def alert_stats(current_user: Dict[str, Any] = Depends(get_current_user)):
+    """返回告警去重的抑制計數。"""
+    return alert_coalescer.snapshot()
+
+
+@app.get("/runs/{run_id}", response_model=RunRecord)
+async def get_run(run_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """
+    查詢一個執行的狀態、各階段時間與最終輸出。
+    執行紀錄已被淘汰時，退回到工作佇列中的狀態與結果。
+    """
+    record = await run_registry.get(run_id)
+    if record is None:
+        job = await job_queue.get(run_id)
+        if job is not None:
+            record = RunRecord(
+                run_id=job.job_id, tenant_id=job.tenant_id,
+                session_id=job.payload.get("session_id", ""), user_query=job.payload.get("user_query", ""),
+                status=job.status.value, created_at=job.enqueued_at, started_at=job.started_at,
+                finished_at=job.finished_at, final_response=(job.result or {}).get("final_response"),
+                error=job.error,
+            )
+    if record is None or record.tenant_id != tenant_of(current_user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Run '{run_id}' not found")
+    return record
+
+
+async def open_run_events(run_id: str, user_info: Dict[str, Any], last_event_id: Optional[str]):
+    """
+    驗證執行存在且屬於該用戶的租戶，並返回事件訂閱。
+
+    Raises:
+        HTTPException: 執行不存在 (或屬於其他租戶) 時返回 404；`Last-Event-ID` 格式錯誤時返回 400。
+    """
+    job = await job_queue.get(run_id)
+    if job is None or job.tenant_id != tenant_of(user_info):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Run '{run_id}' not found")
+    try:
+        cursor = int(last_event_id) if last_event_id not in (None, "") else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Last-Event-ID")
+    if job.status in (JobStatus.SUCCEEDED, JobStatus.FAILED) and not await event_broker.has_events(run_id):
+        # 事件已被淘汰或由其他副本執行：只重播最終結果
+        event_broker.close(run_id, job.status.value, {**(job.result or {}), "error": job.error})
+    return event_broker.subscribe(run_id, cursor)
+
+
+@app.get("/runs/{run_id}/events")
+async def stream_run_events(
+    run_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    以 Server-Sent Events 串流一個執行的事件。
+    斷線後客戶端 (EventSource) 會自動帶上 `Last-Event-ID`，從下一個事件繼續。
+    """
+    events = await open_run_events(run_id, current_user, last_event_id)
+
+    async def frames():
+        async for event in events:
+            if await request.is_disconnected():
+                break
+            # 心跳以 SSE 註解送出，保持連線並讓我們偵測到斷線
+            yield event.to_sse() if event else ": keep-alive\n\n"
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/runs/{run_id}/ws")
+async def stream_run_events_ws(websocket: WebSocket, run_id: str):
+    """
+    以 WebSocket 串流一個執行的事件。
+    瀏覽器無法為 WebSocket 設定標頭，因此憑證與續傳序號以查詢參數 `token` / `last_event_id` 傳遞。
+    """
+    if not startup.ready:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    token = websocket.query_params.get("token")
+    is_authenticated, user_info = await auth_provider.authenticate({"token": token} if token else {})
+    if not is_authenticated:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        events = await open_run_events(run_id, user_info, websocket.query_params.get("last_event_id"))
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    await websocket.accept()
+    try:
+        async for event in events:
+            if event is None:
+                await websocket.send_json({"type": "heartbeat"})
+            else:
+                await websocket.send_text(event.model_dump_json())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
 @app.get("/")
 def read_root():
     """一個簡單的根端點，用於健康檢查或基本測試。"""
     return {"message": "SRE Assistant API is running."}
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """以 Prometheus 文字格式匯出指標，供 `config/prometheus/prometheus.yml` 的 sre_assistant 任務抓取。"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/healthz")
+def liveness():
+    """存活檢查：初始化期間也返回 200；只有初始化失敗時返回 503，讓協調器重新啟動行程。"""
+    if startup.failed:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "failed"})
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness():
+    """
+    就緒檢查：所有服務初始化完成前返回 503，並附上各初始化步驟的狀態與耗時。
+    初始化完成後並行檢查各元件 (認證提供者、長期記憶體後端、工作儲存) 的健康狀態，
+    回報每個元件的延遲；任一關鍵元件不健康或逾時時返回 503。結果會短暫快取。
+    """
+    snapshot = startup.snapshot()
+    if snapshot["ready"]:
+        report = await health.check()
+        snapshot["ready"] = report.healthy
+        snapshot["health"] = report.model_dump()
+    if not snapshot["ready"]:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=snapshot)
+    return snapshot
+
+
 # --- 5. 服務啟動邏輯 ---
 
 def start():
-    """使用 uvicorn 啟動 FastAPI 應用程式。"""
-    uvicorn.run(
-        "sre_assistant.main:app", 
-        host="0.0.0.0", 
-        port=8000, 
-        reload=True
-    )
+    """
+    啟動 FastAPI 應用程式。
+    `deployment.debug` 為 true 時使用單一行程並自動重新載入；否則使用生產模式
+    (多工作行程、預先載入與優雅關閉，見 `server.serve`)。
+    """
+    deployment = config_manager.get_deployment_config()
+    if deployment.debug:
+        uvicorn.run(
+            "sre_assistant.main:app",
+            host=deployment.host,
+            port=deployment.port,
+            reload=True
+        )
+        return
+    if not config_manager.get_alert_config().redis_url and plan_server(deployment).workers > 1:
+        print("alerts.redis_url is not set; alert deduplication only coalesces within each worker, "
+              "so an alert storm may start one run per worker")
+    preload_modules()
+    serve(app, deployment)
 
 if __name__ == "__main__":
     # 這使得我們可以透過 `python -m src.sre_assistant.main` 來啟動服務
@@ -2,82 +2,37 @@
 """
 此檔案實現了向量數據庫後端的工廠模式。
 
-它定義了一個統一的 `VectorBackend` 抽象介面，並為多種向量數據庫
+它基於 `base.py` 中統一的 `VectorBackend` 抽象介面，為多種向量數據庫
 （如 Weaviate, PostgreSQL with pgvector, Vertex AI Vector Search）
 提供了具體的實現。`MemoryBackendFactory` 則根據配置動態創建
 對應的後端實例。
 
 這使得 SRE Assistant 的長期記憶體 (RAG) 功能可以輕鬆地在
 不同的底層技術之間切換，以適應不同的部署環境和需求。
+
+各後端的 SDK (weaviate、asyncpg、redis、Vertex AI、chromadb) 只在該後端被選用時才匯入，
+避免它們拖慢使用其他後端 (例如 `memory`) 時的冷啟動，也讓未安裝的 SDK 不影響其他後端。
 """
 
-from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-import weaviate
-import asyncpg
-from redis import Redis
-from google.cloud.aiplatform.matching_engine import MatchingEngineIndexEndpoint
+import asyncio
+import hashlib
+import importlib
+import json
+import uuid
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Iterable, Tuple
 from ..config.config_manager import MemoryConfig
-from .chroma_backend import ChromaBackend
-
-class VectorBackend(ABC):
-    """
-    統一的向量數據庫後端抽象基礎類別 (Interface)。
-    所有具體的後端實現都必須繼承此類別。
-    """
-
-    @abstractmethod
-    async def upsert(self, embeddings: List[List[float]],
-                    metadata: List[Dict[str, Any]]) -> bool:
-        """
-        插入或更新向量及其中繼資料。
-
-        Args:
-            embeddings (List[List[float]]): 要插入的向量列表。
-            metadata (List[Dict[str, Any]]): 與每個向量對應的中繼資料列表。
-
-        Returns:
-            bool: 操作是否成功。
-        """
-        pass
-
-    @abstractmethod
-    async def search(self, query_embedding: List[float],
-                    k: int = 10) -> List[Dict[str, Any]]:
-        """
-        根據查詢向量，搜尋最相似的 k 個結果。
-
-        Args:
-            query_embedding (List[float]): 用於查詢的單個向量。
-            k (int): 要返回的相似結果數量。
-
-        Returns:
-            List[Dict[str, Any]]: 一個包含相似結果（通常包括中繼資料和相似度分數）的列表。
-        """
-        pass
-
-    @abstractmethod
-    async def delete(self, ids: List[str]) -> bool:
-        """
-        根據提供的 ID 列表刪除向量。
-
-        Args:
-            ids (List[str]): 要刪除的向量的唯一 ID 列表。
-
-        Returns:
-            bool: 操作是否成功。
-        """
-        pass
-
-    @abstractmethod
-    async def health_check(self) -> bool:
-        """
-        檢查向量數據庫後端的健康狀況。
-
-        Returns:
-            bool: 如果後端服務健康，返回 True。
-        """
-        pass
+from ..observability.metrics import metrics
+from .base import VectorBackend
+from .cached_backend import CachedBackend
+from .filters import (MetadataFilter, to_pgvector_sql, to_vertex_datapoint_restricts,
+                      to_vertex_restricts, to_weaviate_where)
+from .hybrid_backend import HybridBackend
+from .lexical_index import BM25Index
+from .instrumented_backend import InstrumentedBackend
+
+if TYPE_CHECKING:
+    import asyncpg
+    from google.cloud.aiplatform.matching_engine.matching_engine_index_endpoint import Namespace, NumericNamespace
 
 class WeaviateBackend(VectorBackend):
     """Weaviate 向量數據庫的具體實現。"""
@@ -89,6 +44,8 @@ class WeaviateBackend(VectorBackend):
         Args:
             config (MemoryConfig): 包含 Weaviate URL 和 API Key 的配置。
         """
+        import weaviate
+
         self.client = weaviate.Client(
             url=config.weaviate_url,
             auth_client_secret=weaviate.AuthApiKey(api_key=config.weaviate_api_key)
@@ -133,25 +90,64 @@ class WeaviateBackend(VectorBackend):
                 )
         return True # Assuming flush() on exit is successful
 
-    async def search(self, query_embedding, k=10):
+    async def search(self, query_embedding, k=10, filters=None):
         """
         在 Weaviate 中執行近鄰搜尋。
 
         Args:
             query_embedding (List[float]): 查詢向量。
             k (int): 返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，轉換為 `with_where`，
+                由 Weaviate 在向量搜尋前套用。
 
         Returns:
             List[Dict[str, Any]]: 搜尋結果列表。
         """
-        result = self.client.query.get(
+        builder = self.client.query.get(
             self.class_name,
             ["content", "metadata"]
         ).with_near_vector({
             "vector": query_embedding
-        }).with_limit(k).do()
+        }).with_limit(k)
+        where = to_weaviate_where(filters)
+        if where:
+            builder = builder.with_where(where)
+        result = builder.do()
         return result.get("data", {}).get("Get", {}).get(self.class_name, [])
 
+    async def search_batch(self, query_embeddings, k=10, filters=None):
+        """
+        以單一 GraphQL 請求 (`multi_get`) 執行多個近鄰搜尋。
+
+        每個查詢都會被賦予一個別名 (alias)，Weaviate 會在一次往返中
+        返回所有別名對應的結果。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，轉換為 `with_where`。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表。
+        """
+        if not query_embeddings:
+            return []
+        where = to_weaviate_where(filters)
+        builders = []
+        for i, query_embedding in enumerate(query_embeddings):
+            builder = self.client.query.get(
+                self.class_name,
+                ["content", "metadata"]
+            ).with_near_vector({
+                "vector": query_embedding
+            }).with_limit(k).with_alias(f"q{i}")
+            if where:
+                builder = builder.with_where(where)
+            builders.append(builder)
+        result = self.client.query.multi_get(builders).do()
+        data = result.get("data", {}).get("Get", {})
+        return [data.get(f"q{i}", []) for i in range(len(query_embeddings))]
+
     async def delete(self, ids: List[str]) -> bool:
         """
         從 Weaviate 中刪除數據。
@@ -176,7 +172,8 @@ class WeaviateBackend(VectorBackend):
         Returns:
             bool: 如果服務健康，返回 True。
         """
-        return self.client.is_ready()
+        # 同步的 HTTP 呼叫放到執行緒中，避免探測阻塞事件迴圈
+        return await asyncio.to_thread(self.client.is_ready)
 
 class PostgreSQLBackend(VectorBackend):
     """使用 PostgreSQL 和 pgvector 擴展的向量數據庫實現。"""
@@ -189,8 +186,10 @@ class PostgreSQLBackend(VectorBackend):
             config (MemoryConfig): 包含資料庫連接字串和向量維度的配置。
         """
         self.connection_string = config.postgres_connection_string
-        self.pool: Optional[asyncpg.Pool] = None
+        self.pool: Optional["asyncpg.Pool"] = None
         self.dimension = config.embedding_dimension
+        self.copy_batch_size = config.postgres_copy_batch_size
+        self.copy_threshold = config.postgres_copy_threshold
 
     async def initialize(self):
         """
@@ -198,6 +197,8 @@ class PostgreSQLBackend(VectorBackend):
         """
         if self.pool:
             return
+        import asyncpg
+
         self.pool = await asyncpg.create_pool(self.connection_string, min_size=5, max_size=20)
         async with self.pool.acquire() as conn:
             await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
@@ -210,16 +211,52 @@ class PostgreSQLBackend(VectorBackend):
                     created_at TIMESTAMP DEFAULT NOW()
                 )
             """)
+            # `doc_id` 是 upsert 的業務鍵，讓重新索引時覆寫既有的列而非不斷新增
+            await conn.execute("ALTER TABLE sre_embeddings ADD COLUMN IF NOT EXISTS doc_id TEXT")
+            await conn.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS sre_embeddings_doc_id_idx
+                ON sre_embeddings (doc_id)
+            """)
             await conn.execute("""
                 CREATE INDEX IF NOT EXISTS embedding_idx
                 ON sre_embeddings
                 USING ivfflat (embedding vector_cosine_ops)
                 WITH (lists = 100)
             """)
+            # 支援 `metadata @> ...` 包含查詢的 GIN 索引，讓過濾條件在排序前先縮小候選集
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS sre_embeddings_metadata_idx
+                ON sre_embeddings
+                USING GIN (metadata jsonb_path_ops)
+            """)
+
+    @staticmethod
+    def _doc_id(meta: Dict[str, Any]) -> str:
+        """
+        決定一筆記錄的 upsert 鍵。
+
+        優先使用中繼資料中的 `id`；若沒有，則以內容的 SHA-256 雜湊作為鍵，
+        使相同內容在重新索引時會覆寫而不是重複插入。
+
+        Args:
+            meta (Dict[str, Any]): 記錄的中繼資料。
+
+        Returns:
+            str: 記錄的唯一鍵。
+        """
+        if meta.get("id") is not None:
+            return str(meta["id"])
+        content = meta.get("content")
+        if content:
+            return hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return str(uuid.uuid4())
 
     async def upsert(self, embeddings, metadata):
         """
-        將向量和中繼資料插入到 PostgreSQL 資料表中。
+        將向量和中繼資料插入或更新到 PostgreSQL 資料表中。
+
+        小批次使用 `executemany` 搭配 `INSERT ... ON CONFLICT`；
+        當筆數達到 `postgres_copy_threshold` 時，改用 `bulk_upsert` 的 COPY 路徑。
 
         Args:
             embeddings (List[List[float]]): 向量列表。
@@ -228,47 +265,205 @@ class PostgreSQLBackend(VectorBackend):
         Returns:
             bool: 操作是否成功。
         """
+        if len(embeddings) >= self.copy_threshold:
+            await self.bulk_upsert(zip(embeddings, metadata))
+            return True
         await self.initialize()
+        records = self._dedupe_records(zip(embeddings, metadata))
         async with self.pool.acquire() as conn:
-            for emb, meta in zip(embeddings, metadata):
-                await conn.execute(
-                    "INSERT INTO sre_embeddings (embedding, content, metadata) VALUES ($1, $2, $3)",
-                    emb, meta.get("content", ""), meta
-                )
+            await conn.executemany(
+                """
+                INSERT INTO sre_embeddings (doc_id, embedding, content, metadata)
+                VALUES ($1, $2::float4[]::vector, $3, $4::jsonb)
+                ON CONFLICT (doc_id) DO UPDATE
+                SET embedding = EXCLUDED.embedding,
+                    content = EXCLUDED.content,
+                    metadata = EXCLUDED.metadata
+                """,
+                records
+            )
         return True
 
-    async def search(self, query_embedding, k=10):
+    def _dedupe_records(self, items: Iterable[Tuple[List[float], Dict[str, Any]]]) -> List[Tuple]:
+        """
+        將 (向量, 中繼資料) 轉換為資料庫記錄，同一批次內重複的鍵只保留最後一筆。
+
+        `ON CONFLICT DO UPDATE` 不允許在同一語句中更新同一列兩次，
+        因此必須先在用戶端去重。
+
+        Args:
+            items (Iterable[Tuple[List[float], Dict[str, Any]]]): 向量與中繼資料的配對。
+
+        Returns:
+            List[Tuple]: `(doc_id, embedding, content, metadata_json)` 記錄列表。
+        """
+        records: Dict[str, Tuple] = {}
+        for emb, meta in items:
+            doc_id = self._doc_id(meta)
+            records[doc_id] = (
+                doc_id, list(emb), meta.get("content", ""), json.dumps(meta, default=str)
+            )
+        return list(records.values())
+
+    async def bulk_upsert(self, items: Iterable[Tuple[List[float], Dict[str, Any]]]) -> int:
+        """
+        以 COPY 協定大量寫入向量，適用於重新索引整個知識庫。
+
+        資料以 `copy_batch_size` 為單位分批串流：每批先透過
+        `copy_records_to_table` 以二進位 COPY 寫入交易內的暫存表，
+        再以一條 `INSERT ... SELECT ... ON CONFLICT` 合併到主表。
+        輸入可以是任意可迭代物件（例如生成器），不需一次載入記憶體。
+
+        Args:
+            items (Iterable[Tuple[List[float], Dict[str, Any]]]): 向量與中繼資料的配對。
+
+        Returns:
+            int: 寫入 (插入或更新) 的記錄數。
+        """
+        await self.initialize()
+        written = 0
+        batch: List[Tuple[List[float], Dict[str, Any]]] = []
+        async with self.pool.acquire() as conn:
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self.copy_batch_size:
+                    written += await self._copy_batch(conn, batch)
+                    batch = []
+            if batch:
+                written += await self._copy_batch(conn, batch)
+        return written
+
+    async def _copy_batch(self, conn: "asyncpg.Connection",
+                          batch: List[Tuple[List[float], Dict[str, Any]]]) -> int:
+        """
+        將單一批次 COPY 到暫存表並合併至 `sre_embeddings`。
+
+        暫存表使用 `float4[]` 與 `TEXT` 欄位，讓 asyncpg 無需註冊
+        pgvector 的編解碼器即可使用二進位 COPY；轉型在伺服器端完成。
+
+        Args:
+            conn (asyncpg.Connection): 資料庫連線。
+            batch (List[Tuple[List[float], Dict[str, Any]]]): 要寫入的記錄。
+
+        Returns:
+            int: 本批次寫入的記錄數。
+        """
+        records = self._dedupe_records(batch)
+        async with conn.transaction():
+            await conn.execute("""
+                CREATE TEMP TABLE sre_embeddings_staging (
+                    doc_id TEXT,
+                    embedding float4[],
+                    content TEXT,
+                    metadata TEXT
+                ) ON COMMIT DROP
+            """)
+            await conn.copy_records_to_table(
+                "sre_embeddings_staging",
+                records=records,
+                columns=["doc_id", "embedding", "content", "metadata"]
+            )
+            await conn.execute("""
+                INSERT INTO sre_embeddings (doc_id, embedding, content, metadata)
+                SELECT doc_id, embedding::vector, content, metadata::jsonb
+                FROM sre_embeddings_staging
+                ON CONFLICT (doc_id) DO UPDATE
+                SET embedding = EXCLUDED.embedding,
+                    content = EXCLUDED.content,
+                    metadata = EXCLUDED.metadata
+            """)
+        return len(records)
+
+    async def search(self, query_embedding, k=10, filters=None):
         """
         在 PostgreSQL 中使用 pgvector 執行向量相似度搜尋。
 
         Args:
             query_embedding (List[float]): 查詢向量。
             k (int): 返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，轉換為 `WHERE` 子句。
 
         Returns:
             List[Dict[str, Any]]: 搜尋結果列表，包含相似度分數。
         """
         await self.initialize()
+        where, params = to_pgvector_sql(filters, first_param=3)
         async with self.pool.acquire() as conn:
+            # 查詢向量以 float4[] 傳入並在伺服器端轉型，無需在 asyncpg 註冊 pgvector 的編解碼器
             rows = await conn.fetch(
-                "SELECT content, metadata, 1 - (embedding <=> $1::vector) as similarity FROM sre_embeddings ORDER BY embedding <=> $1::vector LIMIT $2",
-                query_embedding, k
+                f"SELECT content, metadata, 1 - (embedding <=> $1::float4[]::vector) as similarity FROM sre_embeddings WHERE {where} ORDER BY embedding <=> $1::float4[]::vector LIMIT $2",
+                list(query_embedding), k, *params
             )
             return [dict(row) for row in rows]
 
+    async def search_batch(self, query_embeddings, k=10, filters=None):
+        """
+        以 `LATERAL` 子查詢，以單一 SQL 語句完成批次向量搜尋。
+
+        所有查詢向量攤平為一個 `float4[]` 傳入，在伺服器端依維度切片後逐列轉型為 `vector`，
+        與單一查詢相同，無需在 asyncpg 註冊 pgvector 的編解碼器
+        (多維陣列不能使用 `unnest`，它會把元素攤平為純量)。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，轉換為 `WHERE` 子句。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表。
+
+        Raises:
+            ValueError: 如果查詢向量的維度不一致。
+        """
+        if not query_embeddings:
+            return []
+        dimension = len(query_embeddings[0])
+        if any(len(q) != dimension for q in query_embeddings):
+            raise ValueError("All query embeddings in a batch must have the same dimension")
+        flat = [float(x) for q in query_embeddings for x in q]
+        await self.initialize()
+        where, params = to_pgvector_sql(filters, first_param=4, table_alias="e")
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT q.idx, r.content, r.metadata, r.similarity
+                FROM (
+                    SELECT i AS idx, ($1::float4[])[(i - 1) * $3::int + 1 : i * $3::int]::vector AS embedding
+                    FROM generate_series(1, cardinality($1::float4[]) / $3::int) AS i
+                ) q
+                CROSS JOIN LATERAL (
+                    SELECT content, metadata, 1 - (e.embedding <=> q.embedding) AS similarity
+                    FROM sre_embeddings e
+                    WHERE {where}
+                    ORDER BY e.embedding <=> q.embedding
+                    LIMIT $2
+                ) r
+                ORDER BY q.idx, r.similarity DESC
+                """,
+                flat, k, dimension, *params
+            )
+        results: List[List[Dict[str, Any]]] = [[] for _ in query_embeddings]
+        for row in rows:
+            record = dict(row)
+            results[record.pop("idx") - 1].append(record)
+        return results
+
     async def delete(self, ids: List[str]) -> bool:
         """
-        根據 UUID 從 PostgreSQL 中刪除記錄。
+        根據 upsert 鍵 (`doc_id`) 或資料列 UUID 從 PostgreSQL 中刪除記錄。
 
         Args:
-            ids (List[str]): 要刪除的記錄的 UUID 列表。
+            ids (List[str]): 要刪除的記錄的 `doc_id` 或 UUID 列表。
 
         Returns:
             bool: 操作是否成功。
         """
         await self.initialize()
         async with self.pool.acquire() as conn:
-            await conn.execute("DELETE FROM sre_embeddings WHERE id = ANY($1::UUID[])", ids)
+            await conn.execute(
+                "DELETE FROM sre_embeddings WHERE doc_id = ANY($1::TEXT[]) OR id::TEXT = ANY($1::TEXT[])",
+                [str(i) for i in ids]
+            )
         return True
 
     async def health_check(self) -> bool:
@@ -295,8 +490,11 @@ class VertexAIBackend(VectorBackend):
         Args:
             config (MemoryConfig): 包含 Vertex AI 端點和索引 ID 的配置。
         """
+        from google.cloud.aiplatform.matching_engine import MatchingEngineIndexEndpoint
+
         self.index_endpoint = MatchingEngineIndexEndpoint(index_endpoint_name=config.vertex_index_endpoint)
         self.deployed_index_id = config.vertex_deployed_index_id
+        self.metric = config.similarity_metric
 
     async def upsert(self, embeddings, metadata):
         """
@@ -309,30 +507,93 @@ class VertexAIBackend(VectorBackend):
         Returns:
             bool: 操作是否成功。
         """
-        datapoints = [
-            {"datapoint_id": str(meta.get("id", i)), "feature_vector": emb, "restricts": [{"namespace": "sre_knowledge"}]}
-            for i, (emb, meta) in enumerate(zip(embeddings, metadata))
-        ]
+        datapoints = []
+        for i, (emb, meta) in enumerate(zip(embeddings, metadata)):
+            # 將中繼資料寫成 token / 數值 restricts，搜尋時才能以過濾條件命中
+            restricts, numeric_restricts = to_vertex_datapoint_restricts(meta)
+            datapoints.append({
+                "datapoint_id": str(meta.get("id", i)),
+                "feature_vector": emb,
+                "restricts": [{"namespace": "sre_knowledge"}] + restricts,
+                "numeric_restricts": numeric_restricts,
+            })
         self.index_endpoint.upsert_datapoints(datapoints)
         return True
 
-    async def search(self, query_embedding, k=10):
+    async def search(self, query_embedding, k=10, filters=None):
         """
         在 Vertex AI 中執行近鄰搜尋。
 
         Args:
             query_embedding (List[float]): 查詢向量。
             k (int): 返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，轉換為 restricts。
 
         Returns:
             List[Dict[str, Any]]: 搜尋結果列表。
         """
+        return (await self.search_batch([query_embedding], k, filters))[0]
+
+    @staticmethod
+    def _restricts(filters: Optional[MetadataFilter]) -> Tuple[Optional[List["Namespace"]],
+                                                              Optional[List["NumericNamespace"]]]:
+        """
+        將過濾表達式轉換為 `find_neighbors` 的 `filter` 與 `numeric_filter` 參數。
+
+        Args:
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            Tuple: (token restricts, 數值 restricts)；沒有對應條件時為 None。
+        """
+        from google.cloud.aiplatform.matching_engine.matching_engine_index_endpoint import (
+            Namespace, NumericNamespace)
+
+        tokens, numeric = to_vertex_restricts(filters)
+        token_restricts = [Namespace(name=name, allow_tokens=values) for name, values in tokens]
+        numeric_restricts = [
+            NumericNamespace(name=name, value_double=value, op=op) for name, value, op in numeric
+        ]
+        return token_restricts or None, numeric_restricts or None
+
+    async def search_batch(self, query_embeddings, k=10, filters=None):
+        """
+        利用 `find_neighbors` 原生的多查詢能力，以單次呼叫完成批次搜尋。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式；等值與 `$in` 條件
+                轉換為 `Namespace`，範圍條件轉換為 `NumericNamespace`。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表，
+                每個結果與其他後端相同為 `{"id", "similarity"}` 字典。
+        """
+        if not query_embeddings:
+            return []
+        restricts, numeric_restricts = self._restricts(filters)
         response = self.index_endpoint.find_neighbors(
             deployed_index_id=self.deployed_index_id,
-            queries=[query_embedding],
-            num_neighbors=k
+            queries=query_embeddings,
+            num_neighbors=k,
+            filter=restricts,
+            numeric_filter=numeric_restricts
         )
-        return response[0] if response else []
+        if not response:
+            return [[] for _ in query_embeddings]
+        return [[self._to_result(neighbor) for neighbor in neighbors] for neighbors in response]
+
+    def _to_result(self, neighbor: Any) -> Dict[str, Any]:
+        """
+        將 `MatchNeighbor` 轉換為與其他後端一致的結果字典。
+
+        餘弦索引 (COSINE_DISTANCE) 返回的是距離，相似度為 `1 - distance`；
+        內積索引 (DOT_PRODUCT_DISTANCE) 返回的即為內積，直接作為相似度。
+        """
+        distance = float(neighbor.distance or 0.0)
+        similarity = distance if self.metric == "dot" else 1.0 - distance
+        return {"id": neighbor.id, "similarity": similarity}
 
     async def delete(self, ids: List[str]) -> bool:
         """
@@ -361,6 +622,18 @@ class VertexAIBackend(VectorBackend):
         except Exception:
             return False
 
+# 後端名稱到 "模組:類別" 的對應；模組在後端被選用時才匯入
+BACKEND_PATHS = {
+    "weaviate": ".backend_factory:WeaviateBackend",
+    "postgresql": ".backend_factory:PostgreSQLBackend",
+    "vertex_ai": ".backend_factory:VertexAIBackend",
+    "memory": ".in_memory_backend:InMemoryBackend",
+    "quantized": ".quantized_backend:QuantizedBackend",
+    "hnsw": ".hnsw_backend:HNSWBackend",
+    "chroma": ".chroma_backend:ChromaBackend",
+}
+
+
 class MemoryBackendFactory:
     """記憶體後端工廠類別。"""
 
@@ -378,33 +651,31 @@ class MemoryBackendFactory:
         Returns:
             VectorBackend: 一個具體的向量數據庫後端實例。
         """
-        class InMemoryBackend(VectorBackend):
-            """一個純記憶體的後端，用於本地開發和快速測試。"""
-            def __init__(self):
-                self.vectors = []
-                self.metadata = []
-            async def upsert(self, embeddings, metadata):
-                self.vectors.extend(embeddings)
-                self.metadata.extend(metadata)
-                return True
-            async def search(self, query_embedding, k=10):
-                # 這是一個簡化的搜尋，不是真正的向量搜尋。
-                return self.metadata[:k]
-            async def delete(self, ids: List[str]) -> bool:
-                return True
-            async def health_check(self) -> bool:
-                return True
-
-        backend_map = {
-            "weaviate": WeaviateBackend,
-            "postgresql": PostgreSQLBackend,
-            "vertex_ai": VertexAIBackend,
-            "memory": InMemoryBackend,
-            "chroma": ChromaBackend
-        }
-        backend_class = backend_map.get(config.backend.value)
-        if not backend_class:
+        path = BACKEND_PATHS.get(config.backend.value)
+        if not path:
             raise ValueError(f"Unsupported backend: {config.backend.value}")
-        if config.backend.value == "memory":
-            return InMemoryBackend()
-        return backend_class(config)
+        module_name, class_name = path.split(":")
+        backend_class = getattr(importlib.import_module(module_name, __package__), class_name)
+        # 最內層記錄實際送到後端的操作延遲 (Prometheus)
+        backend = InstrumentedBackend(backend_class(config), config.backend.value, metrics)
+        if config.enable_hybrid_search:
+            # 在向量後端旁並列 BM25 詞彙索引，提供 hybrid_search；
+            # 持久化的向量後端搭配持久化的詞彙索引，重新啟動後仍保有詞彙檢索
+            persistent = config.backend.value != "memory" and config.lexical_index_path
+            backend = HybridBackend(backend, BM25Index(path=config.lexical_index_path if persistent else None),
+                                    rrf_k=config.hybrid_rrf_k)
+        if config.enable_query_cache:
+            # 最外層的查詢結果快取；設定 redis_url 時跨行程共用結果與世代計數器
+            redis_client = None
+            if config.redis_url:
+                from redis import Redis
+                redis_client = Redis.from_url(config.redis_url)
+            backend = CachedBackend(
+                backend,
+                ttl_seconds=config.redis_ttl_seconds,
+                max_entries=config.query_cache_size,
+                precision=config.query_cache_precision,
+                redis_client=redis_client,
+                generation_ttl_seconds=config.query_cache_generation_ttl_seconds,
+            )
+        return backend
@@ -0,0 +1,95 @@
+# src/sre_assistant/memory/base.py
+"""
+定義所有向量數據庫後端共用的抽象基礎類別 (Interface)。
+
+將介面獨立於 `backend_factory.py` 之外，可以讓各個具體後端
+（例如 `chroma_backend.py`, `in_memory_backend.py`）直接依賴此模組，
+避免與工廠模組之間產生循環導入。
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+
+from .filters import MetadataFilter
+
+class VectorBackend(ABC):
+    """
+    統一的向量數據庫後端抽象基礎類別 (Interface)。
+    所有具體的後端實現都必須繼承此類別。
+    """
+
+    @abstractmethod
+    async def upsert(self, embeddings: List[List[float]],
+                    metadata: List[Dict[str, Any]]) -> bool:
+        """
+        插入或更新向量及其中繼資料。
+
+        Args:
+            embeddings (List[List[float]]): 要插入的向量列表。
+            metadata (List[Dict[str, Any]]): 與每個向量對應的中繼資料列表。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        pass
+
+    @abstractmethod
+    async def search(self, query_embedding: List[float],
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """
+        根據查詢向量，搜尋最相似的 k 個結果。
+
+        Args:
+            query_embedding (List[float]): 用於查詢的單個向量。
+            k (int): 要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式 (見 `filters.py`)，
+                應在後端原生地套用 (pre-filter)，確保返回的 k 筆都符合條件。
+
+        Returns:
+            List[Dict[str, Any]]: 一個包含相似結果（通常包括中繼資料和相似度分數）的列表。
+        """
+        pass
+
+    async def search_batch(self, query_embeddings: List[List[float]],
+                          k: int = 10,
+                          filters: Optional[MetadataFilter] = None) -> List[List[Dict[str, Any]]]:
+        """
+        一次搜尋多個查詢向量，每個查詢各自返回最相似的 k 個結果。
+
+        具體後端應盡量覆寫此方法，以單次往返 (round trip) 完成所有查詢。
+        此預設實現僅作為後備：它會並行地對每個查詢呼叫 `search`。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，套用於所有查詢。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表。
+        """
+        return list(await asyncio.gather(*(self.search(q, k, filters) for q in query_embeddings)))
+
+    @abstractmethod
+    async def delete(self, ids: List[str]) -> bool:
+        """
+        根據提供的 ID 列表刪除向量。
+
+        Args:
+            ids (List[str]): 要刪除的向量的唯一 ID 列表。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        pass
+
+    @abstractmethod
+    async def health_check(self) -> bool:
+        """
+        檢查向量數據庫後端的健康狀況。
+
+        Returns:
+            bool: 如果後端服務健康，返回 True。
+        """
+        pass
@@ -0,0 +1,295 @@
+# src/sre_assistant/memory/cached_backend.py
+"""
+此檔案實現了包裝任意 `VectorBackend` 的 RAG 查詢結果快取。
+
+事件處理期間，多個代理與工程師常在幾分鐘內重複詢問相同的問題
+(例如「服務 X 的相似事件」、「5xx 突增的 runbook」)。`CachedBackend`
+將這類查詢的結果快取起來：
+- **快取鍵**: 量化後查詢向量的雜湊 + k + 過濾條件 (混合搜尋另含查詢文本)。
+- **兩層快取**: 行程內的 LRU，以及可選、跨行程共用的 Redis。
+- **世代計數器 (generation counter) 失效**: 每次 `upsert` / `delete` 都會遞增世代，
+  世代是快取鍵的一部分，舊世代的項目自然不再被命中，並在 TTL 後過期。
+  共用的世代在行程內快取 `generation_ttl_seconds` 秒，LRU 命中不需要 Redis 往返；
+  其他行程的寫入最多延遲這段時間才使本行程的快取失效 (本行程的寫入立即生效)。
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .base import VectorBackend
+from .filters import MetadataFilter
+
+
+class CachedBackend(VectorBackend):
+    """
+    為向量後端加上 LRU + Redis 兩層查詢結果快取的包裝器。
+    """
+
+    def __init__(self, backend: VectorBackend, ttl_seconds: int = 3600,
+                 max_entries: int = 1024, precision: int = 4,
+                 redis_client: Optional[Any] = None, namespace: str = "sre_rag_cache",
+                 generation_ttl_seconds: float = 1.0):
+        """
+        初始化快取後端。
+
+        Args:
+            backend (VectorBackend): 被包裝的向量後端。
+            ttl_seconds (int): 快取項目的存活秒數。
+            max_entries (int): 行程內 LRU 的最大項目數，0 表示停用 LRU 層。
+            precision (int): 查詢向量量化時保留的小數位數，用以吸收浮點雜訊。
+            redis_client (Optional[Any]): `redis.Redis` 客戶端；None 表示只使用行程內快取。
+            namespace (str): Redis 鍵的前綴，同一索引的所有行程必須相同。
+            generation_ttl_seconds (float): 從 Redis 讀取的世代在行程內沿用的秒數，0 表示每次查詢都讀取。
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.precision = precision
+        self.redis = redis_client
+        self.namespace = namespace
+        self._generation_key = f"{namespace}:generation"
+        self._generation = 0
+        self.generation_ttl_seconds = generation_ttl_seconds
+        self._generation_checked_at = float("-inf")
+        self._lru: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.stats = {
+            "hits": 0, "misses": 0, "lru_hits": 0, "redis_hits": 0,
+            "invalidations": 0, "redis_errors": 0,
+            "hit_latency_ms": 0.0, "miss_latency_ms": 0.0,
+        }
+
+    def __getattr__(self, name: str) -> Any:
+        """未定義的屬性 (例如 `embed`) 委派給被包裝的後端。"""
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    # --- 世代計數器 ---
+
+    async def _redis_call(self, method: str, *args, **kwargs) -> Any:
+        """
+        在執行緒中呼叫同步的 Redis 客戶端，避免阻塞事件迴圈。
+        Redis 不可用時記錄錯誤並返回 None，查詢會退回到被包裝的後端。
+        """
+        try:
+            return await asyncio.to_thread(getattr(self.redis, method), *args, **kwargs)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            print(f"Query cache Redis error on {method}: {e}")
+            return None
+
+    async def _current_generation(self) -> int:
+        """
+        返回目前的世代；使用 Redis 時以共用計數器為準，讓其他行程的寫入也能使快取失效。
+        共用的世代在 `generation_ttl_seconds` 內沿用上次讀取的值。
+        """
+        if self.redis is not None and time.monotonic() - self._generation_checked_at >= self.generation_ttl_seconds:
+            value = await self._redis_call("get", self._generation_key)
+            self._generation_checked_at = time.monotonic()
+            if value is not None:
+                self._generation = int(value)
+        return self._generation
+
+    async def invalidate(self):
+        """遞增世代，使所有既有的快取項目失效。"""
+        self._generation += 1
+        self._lru.clear()
+        if self.redis is not None:
+            value = await self._redis_call("incr", self._generation_key)
+            if value is not None:
+                self._generation = int(value)
+                self._generation_checked_at = time.monotonic()
+        self.stats["invalidations"] += 1
+
+    # --- 快取存取 ---
+
+    def _key(self, generation: int, kind: str, query_embedding: Optional[List[float]],
+             k: int, filters: Optional[MetadataFilter], query_text: Optional[str] = None) -> str:
+        """
+        計算快取鍵。
+
+        Args:
+            generation (int): 目前的世代。
+            kind (str): 查詢類型，例如 "vector" 或 "hybrid"。
+            query_embedding (Optional[List[float]]): 查詢向量，量化後參與雜湊。
+            k (int): 結果數量。
+            filters (Optional[MetadataFilter]): 過濾條件，以排序後的 JSON 參與雜湊。
+            query_text (Optional[str]): 查詢文本 (混合搜尋)。
+
+        Returns:
+            str: 帶有命名空間與世代的快取鍵。
+        """
+        digest = hashlib.sha256()
+        digest.update(f"{kind}|{k}|{query_text or ''}|".encode("utf-8"))
+        digest.update(json.dumps(filters or {}, sort_keys=True, default=str).encode("utf-8"))
+        if query_embedding is not None:
+            quantized = np.round(np.asarray(query_embedding, dtype=np.float64) * 10 ** self.precision)
+            digest.update(quantized.astype(np.int64).tobytes())
+        return f"{self.namespace}:{generation}:{digest.hexdigest()}"
+
+    async def _get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """依序查詢 LRU 與 Redis；Redis 命中時回填 LRU。"""
+        entry = self._lru.get(key)
+        if entry is not None:
+            expires_at, results = entry
+            if expires_at > time.monotonic():
+                self._lru.move_to_end(key)
+                self.stats["lru_hits"] += 1
+                return results
+            del self._lru[key]
+        if self.redis is not None:
+            raw = await self._redis_call("get", key)
+            if raw is not None:
+                results = json.loads(raw)
+                self._lru_put(key, results)
+                self.stats["redis_hits"] += 1
+                return results
+        return None
+
+    def _lru_put(self, key: str, results: List[Dict[str, Any]]):
+        """寫入 LRU 並淘汰最久未使用的項目。"""
+        if self.max_entries <= 0:
+            return
+        self._lru[key] = (time.monotonic() + self.ttl_seconds, results)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def _put(self, key: str, results: List[Dict[str, Any]]):
+        """寫入 LRU 與 Redis (帶 TTL)。"""
+        self._lru_put(key, results)
+        if self.redis is not None:
+            await self._redis_call("set", key, json.dumps(results, default=str), ex=self.ttl_seconds)
+
+    def _record(self, hit: bool, started: float):
+        """累計命中/未命中次數與延遲。"""
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if hit:
+            self.stats["hits"] += 1
+            self.stats["hit_latency_ms"] += elapsed_ms
+        else:
+            self.stats["misses"] += 1
+            self.stats["miss_latency_ms"] += elapsed_ms
+
+    # --- VectorBackend 介面 ---
+
+    async def upsert(self, embeddings: List[List[float]],
+                    metadata: List[Dict[str, Any]]) -> bool:
+        """寫入被包裝的後端，並使快取失效。"""
+        try:
+            return await self.backend.upsert(embeddings, metadata)
+        finally:
+            await self.invalidate()
+
+    async def bulk_upsert(self, items: Iterable[Tuple[List[float], Dict[str, Any]]]) -> int:
+        """
+        委派給被包裝後端的大量寫入路徑 (例如 PostgreSQL COPY)，並使快取失效；
+        被包裝的後端沒有大量寫入路徑時 (例如 `HybridBackend`) 退回到 `upsert`。
+
+        Returns:
+            int: 寫入的筆數。
+        """
+        try:
+            bulk_upsert = getattr(self.backend, "bulk_upsert", None)
+            if bulk_upsert is not None:
+                return await bulk_upsert(items)
+            items = list(items)
+            await self.backend.upsert([embedding for embedding, _ in items], [meta for _, meta in items])
+            return len(items)
+        finally:
+            await self.invalidate()
+
+    async def delete(self, ids: List[str]) -> bool:
+        """從被包裝的後端刪除，並使快取失效。"""
+        try:
+            return await self.backend.delete(ids)
+        finally:
+            await self.invalidate()
+
+    async def search(self, query_embedding: List[float],
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """
+        先查快取，未命中時委派給被包裝的後端並寫入快取。
+
+        Args:
+            query_embedding (List[float]): 查詢向量。
+            k (int): 要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            List[Dict[str, Any]]: 搜尋結果 (淺複製，呼叫端可安全修改)。
+        """
+        started = time.perf_counter()
+        key = self._key(await self._current_generation(), "vector", query_embedding, k, filters)
+        results = await self._get(key)
+        if results is None:
+            results = await self.backend.search(query_embedding, k, filters)
+            await self._put(key, results)
+            self._record(False, started)
+        else:
+            self._record(True, started)
+        return [dict(result) for result in results]
+
+    async def search_batch(self, query_embeddings: List[List[float]],
+                          k: int = 10,
+                          filters: Optional[MetadataFilter] = None) -> List[List[Dict[str, Any]]]:
+        """
+        逐一查快取，只將未命中的查詢以一次 `search_batch` 交給被包裝的後端。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表。
+        """
+        started = time.perf_counter()
+        generation = await self._current_generation()
+        keys = [self._key(generation, "vector", q, k, filters) for q in query_embeddings]
+        cached = [await self._get(key) for key in keys]
+        missing = [i for i, results in enumerate(cached) if results is None]
+        missing_set = set(missing)
+        if missing:
+            fetched = await self.backend.search_batch([query_embeddings[i] for i in missing], k, filters)
+            for i, results in zip(missing, fetched):
+                cached[i] = results
+                await self._put(keys[i], results)
+        for i in range(len(keys)):
+            self._record(i not in missing_set, started)
+        return [[dict(result) for result in results] for results in cached]
+
+    async def hybrid_search(self, query_text: str,
+                            query_embedding: Optional[List[float]] = None,
+                            k: int = 10,
+                            filters: Optional[MetadataFilter] = None,
+                            candidates: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        快取被包裝後端 (`HybridBackend`) 的混合搜尋結果；查詢文本也是快取鍵的一部分。
+
+        Raises:
+            AttributeError: 如果被包裝的後端不支援混合搜尋。
+        """
+        hybrid_search = self.backend.hybrid_search
+        started = time.perf_counter()
+        key = self._key(await self._current_generation(), f"hybrid:{candidates}",
+                        query_embedding, k, filters, query_text)
+        results = await self._get(key)
+        if results is None:
+            results = await hybrid_search(query_text, query_embedding, k, filters, candidates)
+            await self._put(key, results)
+            self._record(False, started)
+        else:
+            self._record(True, started)
+        return [dict(result) for result in results]
+
+    async def health_check(self) -> bool:
+        """快取是可選的加速層，健康狀態取決於被包裝的後端。"""
+        return await self.backend.health_check()
@@ -7,11 +7,14 @@
 底層的向量儲存和搜尋引擎。
 """
 
+import asyncio
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 import chromadb
-from sentence_transformers import SentenceTransformer
 
-from .backend_factory import VectorBackend
+from .base import VectorBackend
+from .embedding_service import EmbeddingService, get_embedding_service
+from .filters import MetadataFilter, to_chroma_where, to_epoch
 from ..config.config_manager import MemoryConfig
 
 class ChromaBackend(VectorBackend):
@@ -32,9 +35,10 @@ class ChromaBackend(VectorBackend):
         #    - 數據將儲存在 `./chroma_db` 目錄下
         self.client = chromadb.PersistentClient(path="./chroma_db")
 
-        # 2. 初始化句子轉換器模型，用於將文本轉換為向量
+        # 2. 取得共用的嵌入服務，用於將文本轉換為向量
         #    - 使用配置中指定的模型，例如 'multi-qa-MiniLM-L6-cos-v1'
-        self.embedding_model = SentenceTransformer(config.embedding_model)
+        #    - 同一模型在行程內只載入一次，並具備微批次與內容雜湊快取
+        self.embedding_service: EmbeddingService = get_embedding_service(config)
 
         # 3. 獲取或創建一個 ChromaDB 集合 (Collection)
         #    - 集合類似於 SQL 中的資料表
@@ -45,6 +49,18 @@ class ChromaBackend(VectorBackend):
             metadata={"hnsw:space": "cosine"}  # 指定使用餘弦相似度
         )
 
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        使用共用的嵌入服務將文本轉換為向量。
+
+        Args:
+            texts (List[str]): 要編碼的文本列表。
+
+        Returns:
+            List[List[float]]: 與輸入順序一致的向量列表。
+        """
+        return await self.embedding_service.encode(texts)
+
     async def upsert(self, embeddings: List[List[float]],
                     metadata: List[Dict[str, Any]]) -> bool:
         """
@@ -61,25 +77,42 @@ class ChromaBackend(VectorBackend):
         self.collection.upsert(
             ids=ids,
             embeddings=embeddings,
-            metadatas=metadata
+            metadatas=[self._to_chroma_metadata(meta) for meta in metadata]
         )
         return True
 
+    @staticmethod
+    def _to_chroma_metadata(meta: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        ChromaDB 的範圍過濾只支援數值，因此將 `datetime` 欄位轉換為 epoch 秒數。
+
+        Args:
+            meta (Dict[str, Any]): 原始中繼資料。
+
+        Returns:
+            Dict[str, Any]: 可寫入 ChromaDB 的中繼資料。
+        """
+        return {key: to_epoch(value) if isinstance(value, datetime) else value
+                for key, value in meta.items()}
+
     async def search(self, query_embedding: List[float],
-                    k: int = 10) -> List[Dict[str, Any]]:
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
         """
         在 ChromaDB 中執行向量相似度搜尋。
 
         Args:
             query_embedding (List[float]): 用於查詢的單個向量。
             k (int): 要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，會轉換為 Chroma 的 `where`。
 
         Returns:
             List[Dict[str, Any]]: 搜尋結果列表，包含中繼資料和相似度分數。
         """
         results = self.collection.query(
             query_embeddings=[query_embedding],
-            n_results=k
+            n_results=k,
+            where=to_chroma_where(filters)
         )
         # 結果格式轉換，以符合應用程式的預期
         # ChromaDB 返回的 `results` 是一個包含 `ids`, `distances`, `metadatas` 等鍵的字典
@@ -88,9 +121,47 @@ class ChromaBackend(VectorBackend):
 
         # results 字典中的每個值都是一個列表的列表，因為可以同時查詢多個向量
         # 我們只查詢了一個，所以取第一個元素 `[0]`
-        ids = results['ids'][0]
-        distances = results['distances'][0]
-        metadatas = results['metadatas'][0]
+        return self._format_results(results, 0)
+
+    async def search_batch(self, query_embeddings: List[List[float]],
+                          k: int = 10,
+                          filters: Optional[MetadataFilter] = None) -> List[List[Dict[str, Any]]]:
+        """
+        利用 `collection.query` 原生的多查詢能力，以單次呼叫完成批次搜尋。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，會轉換為 Chroma 的 `where`。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表。
+        """
+        if not query_embeddings:
+            return []
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=to_chroma_where(filters)
+        )
+        if not results or not results.get('ids'):
+            return [[] for _ in query_embeddings]
+        return [self._format_results(results, i) for i in range(len(query_embeddings))]
+
+    def _format_results(self, results: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """
+        將 ChromaDB 對第 `index` 個查詢的結果轉換為應用程式期望的格式。
+
+        Args:
+            results (Dict[str, Any]): `collection.query` 的原始回傳值。
+            index (int): 查詢在批次中的位置。
+
+        Returns:
+            List[Dict[str, Any]]: 包含中繼資料、`id` 和相似度分數的結果列表。
+        """
+        ids = results['ids'][index]
+        distances = results['distances'][index]
+        metadatas = results['metadatas'][index]
 
         # 將結果組合成應用程式期望的格式
         output = []
@@ -126,6 +197,6 @@ class ChromaBackend(VectorBackend):
         """
         try:
             # `heartbeat()` 返回一個時間戳（奈秒），如果服務正常則表示健康
-            return self.client.heartbeat() is not None
+            return await asyncio.to_thread(self.client.heartbeat) is not None
         except Exception:
             return False
@@ -0,0 +1,342 @@
+# src/sre_assistant/memory/embedding_service.py
+"""
+此檔案實現了一個帶快取的批次文本嵌入 (embedding) 服務。
+
+在告警風暴中，相同的告警文字和日誌行會重複出現成千上萬次。
+`EmbeddingService` 透過以下機制降低編碼成本：
+- **內容雜湊快取**: 以 (模型名稱, 文本) 的 SHA-256 作為鍵的行程內 LRU 快取，
+  以及可選的 SQLite 磁碟快取，讓重複文本幾乎不需要重新編碼。
+- **請求合併**: 同一文本的並行請求共用同一個 Future，只編碼一次。
+- **微批次 (micro-batching)**: 將短時間內 (最多 `max_wait_ms` 毫秒或
+  `max_batch_size` 筆) 的並行請求合併成一個批次送入模型。
+- **執行緒池**: 模型推論在執行緒池中執行，不會阻塞 asyncio 事件迴圈。
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config.config_manager import MemoryConfig
+
+# 編碼函式的型別：輸入一批文本，輸出對應的向量
+Encoder = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+class SQLiteEmbeddingCache:
+    """
+    以 SQLite 實現的磁碟嵌入快取，讓快取在行程重啟後依然有效。
+    向量以 float32 的原始位元組儲存，以節省空間並加快讀取。
+    """
+
+    def __init__(self, path: str):
+        """
+        開啟 (或創建) 快取資料庫。
+
+        Args:
+            path (str): SQLite 資料庫檔案路徑。
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """
+        批次讀取快取中的向量。
+
+        Args:
+            keys (List[str]): 內容雜湊鍵列表。
+
+        Returns:
+            Dict[str, np.ndarray]: 命中的鍵到向量的對應。
+        """
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+            ).fetchall()
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+
+    def put_many(self, items: List[Tuple[str, np.ndarray]]):
+        """
+        批次寫入向量。
+
+        Args:
+            items (List[Tuple[str, np.ndarray]]): (鍵, 向量) 配對列表。
+        """
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items],
+            )
+            self._conn.commit()
+
+    def close(self):
+        """關閉資料庫連線。"""
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingService:
+    """
+    將文本編碼為向量的非同步服務，具備微批次、請求合併與多層快取。
+    """
+
+    def __init__(self, model_name: str, encoder: Optional[Encoder] = None,
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 cache_size: int = 10000, cache_path: Optional[str] = None,
+                 max_workers: int = 1):
+        """
+        初始化嵌入服務。
+
+        Args:
+            model_name (str): 嵌入模型名稱，也是快取鍵的一部分。
+            encoder (Optional[Encoder]): 自訂的編碼函式。若為 None，
+                會在第一次編碼時延遲載入 `SentenceTransformer(model_name)`。
+            max_batch_size (int): 每個微批次的最大文本數。
+            max_wait_ms (float): 收集一個微批次的最長等待時間 (毫秒)。
+            cache_size (int): 行程內 LRU 快取的最大項目數，0 表示停用。
+            cache_path (Optional[str]): SQLite 磁碟快取路徑，None 表示停用。
+            max_workers (int): 執行模型推論的執行緒數，同時也是並行批次的上限。
+        """
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self._encoder = encoder
+        self._encoder_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding")
+        self._max_workers = max_workers
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk = SQLiteEmbeddingCache(cache_path) if cache_path else None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"requests": 0, "lru_hits": 0, "disk_hits": 0, "coalesced": 0, "encoded": 0, "batches": 0}
+
+    @classmethod
+    def from_config(cls, config: MemoryConfig, encoder: Optional[Encoder] = None) -> "EmbeddingService":
+        """
+        根據 `MemoryConfig` 創建嵌入服務。
+
+        Args:
+            config (MemoryConfig): 記憶體配置。
+            encoder (Optional[Encoder]): 自訂的編碼函式。
+
+        Returns:
+            EmbeddingService: 新的服務實例。
+        """
+        return cls(
+            model_name=config.embedding_model,
+            encoder=encoder,
+            max_batch_size=config.embedding_batch_size,
+            max_wait_ms=config.embedding_batch_wait_ms,
+            cache_size=config.embedding_cache_size,
+            cache_path=config.embedding_cache_path,
+        )
+
+    def _key(self, text: str) -> str:
+        """計算 (模型名稱, 文本) 的內容雜湊鍵。"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        """從 LRU 快取讀取，命中時將項目移到最新位置。"""
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key: str, vector: np.ndarray):
+        """寫入 LRU 快取，超過容量時淘汰最舊的項目。"""
+        if self.cache_size <= 0:
+            return
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.cache_size:
+            self._lru.popitem(last=False)
+
+    def _load_encoder(self) -> Encoder:
+        """延遲載入預設的 SentenceTransformer 模型 (只載入一次)。"""
+        with self._encoder_lock:
+            if self._encoder is None:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.model_name)
+                self._encoder = lambda texts: model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+            return self._encoder
+
+    def _encode_batch_sync(self, keys: List[str], texts: List[str]) -> Tuple[List[np.ndarray], int]:
+        """
+        在工作執行緒中編碼一個批次：先查詢磁碟快取，只將未命中的文本送入模型。
+
+        Args:
+            keys (List[str]): 批次中每個文本的雜湊鍵。
+            texts (List[str]): 批次中的文本。
+
+        Returns:
+            Tuple[List[np.ndarray], int]: 與輸入順序一致的向量，以及磁碟快取命中數。
+        """
+        found = self._disk.get_many(keys) if self._disk else {}
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            encoded = np.asarray(self._load_encoder()([texts[i] for i in missing]), dtype=np.float32)
+            new_items = []
+            for row, i in enumerate(missing):
+                found[keys[i]] = encoded[row]
+                new_items.append((keys[i], encoded[row]))
+            if self._disk:
+                self._disk.put_many(new_items)
+        return [found[key] for key in keys], len(keys) - len(missing)
+
+    def _ensure_worker(self):
+        """確保批次收集任務在目前的事件迴圈中運行。"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self._max_workers)
+            self._inflight = {}
+            self._worker = loop.create_task(self._batch_loop())
+
+    async def _batch_loop(self):
+        """持續從佇列收集請求，組成微批次後交給執行緒池處理。"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # 先取走佇列中已就緒的請求，再等待後續請求直到截止時間
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, str, asyncio.Future]]):
+        """
+        在執行緒池中編碼一個批次並完成對應的 Future。
+
+        Args:
+            batch (List[Tuple[str, str, asyncio.Future]]): (鍵, 文本, Future) 列表。
+        """
+        keys = [key for key, _, _ in batch]
+        texts = [text for _, text, _ in batch]
+        try:
+            vectors, disk_hits = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._encode_batch_sync, keys, texts
+            )
+            self.stats["batches"] += 1
+            self.stats["disk_hits"] += disk_hits
+            self.stats["encoded"] += len(batch) - disk_hits
+            for (key, _, future), vector in zip(batch, vectors):
+                self._lru_put(key, vector)
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for key in keys:
+                self._inflight.pop(key, None)
+            self._slots.release()
+
+    async def encode(self, texts: List[str]) -> List[List[float]]:
+        """
+        將一批文本編碼為向量。
+
+        Args:
+            texts (List[str]): 要編碼的文本列表。
+
+        Returns:
+            List[List[float]]: 與輸入順序一致的向量列表。
+        """
+        if not texts:
+            return []
+        self._ensure_worker()
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        waiting: List[Tuple[int, asyncio.Future]] = []
+        for i, text in enumerate(texts):
+            self.stats["requests"] += 1
+            key = self._key(text)
+            vector = self._lru_get(key)
+            if vector is not None:
+                self.stats["lru_hits"] += 1
+                results[i] = vector
+                continue
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._loop.create_future()
+                self._inflight[key] = future
+                self._queue.put_nowait((key, text, future))
+            else:
+                self.stats["coalesced"] += 1
+            waiting.append((i, future))
+        for i, future in waiting:
+            # 同一文本的 future 由所有合併的呼叫者共用；以 shield 等待，取消一個呼叫者不會取消其他人
+            results[i] = await asyncio.shield(future)
+        return [vector.tolist() for vector in results]
+
+    async def encode_one(self, text: str) -> List[float]:
+        """
+        編碼單一文本。並行呼叫會被自動合併到同一個微批次。
+
+        Args:
+            text (str): 要編碼的文本。
+
+        Returns:
+            List[float]: 文本的向量。
+        """
+        return (await self.encode([text]))[0]
+
+    async def close(self):
+        """停止批次收集任務並釋放執行緒池與磁碟快取。"""
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+        if self._disk:
+            self._disk.close()
+
+
+_services: Dict[Tuple[str, Optional[str]], EmbeddingService] = {}
+
+
+def get_embedding_service(config: MemoryConfig) -> EmbeddingService:
+    """
+    返回指定模型共用的嵌入服務單例，避免每個後端實例各自載入一份模型。
+
+    Args:
+        config (MemoryConfig): 記憶體配置。
+
+    Returns:
+        EmbeddingService: 與 (模型名稱, 磁碟快取路徑) 對應的共用服務。
+    """
+    key = (config.embedding_model, config.embedding_cache_path)
+    if key not in _services:
+        _services[key] = EmbeddingService.from_config(config)
+    return _services[key]
@@ -0,0 +1,293 @@
+# src/sre_assistant/memory/filters.py
+"""
+此檔案定義了一個與後端無關的中繼資料過濾表達式，以及它到各種向量數據庫
+原生過濾語法的轉換。
+
+過濾表達式是一個字典，鍵為中繼資料欄位，值為條件：
+- 純量值表示等值比對：`{"service": "checkout"}`
+- `$in` 表示成員比對：`{"severity": {"$in": ["P0", "P1"]}}`
+- `$gt` / `$gte` / `$lt` / `$lte` 表示範圍比對，常用於時間戳：
+  `{"timestamp": {"$gte": "2024-05-01T00:00:00Z", "$lt": datetime(...)}}`
+- `$eq` 為等值比對的明確寫法。
+
+多個欄位之間、同一欄位的多個運算子之間皆為 AND 關係。時間戳可使用
+`datetime`、ISO 8601 字串或 epoch 秒數，比較時一律轉換為 epoch 秒數。
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 過濾表達式的型別別名
+MetadataFilter = Dict[str, Any]
+
+RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+SUPPORTED_OPERATORS = ("$eq", "$in") + RANGE_OPERATORS
+
+
+class Condition(NamedTuple):
+    """一個已解析的過濾條件：欄位、運算子與比較值。"""
+    field: str
+    op: str
+    value: Any
+
+
+def parse_filters(filters: Optional[MetadataFilter]) -> List[Condition]:
+    """
+    將過濾表達式解析為條件列表，並驗證運算子。
+
+    Args:
+        filters (Optional[MetadataFilter]): 過濾表達式。
+
+    Raises:
+        ValueError: 如果使用了不支援的運算子、`$in` 的值不是列表，
+            或範圍運算子的值不是數值、`datetime` 或 ISO 8601 字串。
+
+    Returns:
+        List[Condition]: 條件列表；`filters` 為空時返回空列表。
+    """
+    conditions: List[Condition] = []
+    for field, spec in (filters or {}).items():
+        if not isinstance(spec, dict):
+            conditions.append(Condition(field, "$eq", spec))
+            continue
+        for op, value in spec.items():
+            if op not in SUPPORTED_OPERATORS:
+                raise ValueError(f"Unsupported filter operator '{op}' on field '{field}'")
+            if op == "$in" and not isinstance(value, (list, tuple, set)):
+                raise ValueError(f"'$in' on field '{field}' requires a list of values")
+            if op in RANGE_OPERATORS and to_epoch(value) is None:
+                raise ValueError(f"'{op}' on field '{field}' requires a number, datetime or ISO 8601 string, "
+                                 f"got {value!r}")
+            conditions.append(Condition(field, op, list(value) if op == "$in" else value))
+    return conditions
+
+
+def to_epoch(value: Any) -> Optional[float]:
+    """
+    將時間戳或數值轉換為可比較的 epoch 秒數。
+
+    Args:
+        value (Any): `datetime`、ISO 8601 字串或數值。
+
+    Returns:
+        Optional[float]: epoch 秒數；無法轉換時返回 None。
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return to_epoch(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            return None
+    return None
+
+
+def _compare(actual: Any, op: str, expected: Any) -> bool:
+    """以指定運算子比較單一欄位的值。"""
+    if op == "$eq":
+        return actual == expected
+    if op == "$in":
+        return actual in expected
+    left, right = to_epoch(actual), to_epoch(expected)
+    if left is None or right is None:
+        return False
+    if op == "$gt":
+        return left > right
+    if op == "$gte":
+        return left >= right
+    if op == "$lt":
+        return left < right
+    return left <= right
+
+
+def matches(metadata: Dict[str, Any], filters: Optional[MetadataFilter]) -> bool:
+    """
+    在 Python 中判斷一筆中繼資料是否符合過濾表達式。
+
+    Args:
+        metadata (Dict[str, Any]): 中繼資料。
+        filters (Optional[MetadataFilter]): 過濾表達式。
+
+    Returns:
+        bool: 是否符合所有條件。
+    """
+    return all(_compare(metadata.get(c.field), c.op, c.value) for c in parse_filters(filters))
+
+
+def _to_iso(value: Any) -> str:
+    """將時間戳轉換為 RFC 3339 字串。"""
+    return datetime.fromtimestamp(to_epoch(value), tz=timezone.utc).isoformat()
+
+
+def _is_temporal(value: Any) -> bool:
+    """判斷範圍比較的值是否為時間 (而非一般數值)。"""
+    return isinstance(value, (datetime, str))
+
+
+# --- 各後端的原生過濾語法轉換 ---
+
+def to_chroma_where(filters: Optional[MetadataFilter]) -> Optional[Dict[str, Any]]:
+    """
+    轉換為 ChromaDB 的 `where` 子句。
+
+    ChromaDB 的範圍運算子只支援數值，因此時間戳會轉換為 epoch 秒數
+    (寫入時也應以數值儲存時間戳)。
+
+    Args:
+        filters (Optional[MetadataFilter]): 過濾表達式。
+
+    Returns:
+        Optional[Dict[str, Any]]: `where` 子句；無條件時返回 None。
+    """
+    clauses = []
+    for c in parse_filters(filters):
+        value = to_epoch(c.value) if c.op in RANGE_OPERATORS else c.value
+        clauses.append({c.field: {c.op: value}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def to_pgvector_sql(filters: Optional[MetadataFilter], first_param: int,
+                    table_alias: Optional[str] = None) -> Tuple[str, List[Any]]:
+    """
+    轉換為 PostgreSQL `WHERE` 片段與對應的參數。
+
+    所有等值條件會合併為一個 `metadata @> $n::jsonb` 包含查詢，
+    可直接使用 `metadata` 欄位上的 GIN (jsonb_path_ops) 索引。
+
+    Args:
+        filters (Optional[MetadataFilter]): 過濾表達式。
+        first_param (int): 第一個參數佔位符的編號 (例如 3 表示 `$3`)。
+        table_alias (Optional[str]): `metadata` 欄位所屬資料表的別名 (例如 "e" 產生 `e.metadata`)。
+
+    Returns:
+        Tuple[str, List[Any]]: (SQL 片段, 參數列表)；無條件時 SQL 為 "TRUE"。
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    containment: Dict[str, Any] = {}
+    column = f"{table_alias}.metadata" if table_alias else "metadata"
+
+    def placeholder(value: Any) -> str:
+        params.append(value)
+        return f"${first_param + len(params) - 1}"
+
+    for c in parse_filters(filters):
+        if c.op == "$eq":
+            containment[c.field] = c.value
+        elif c.op == "$in":
+            options = [json.dumps({c.field: v}, default=str) for v in c.value]
+            clauses.append(f"{column} @> ANY({placeholder(options)}::jsonb[])")
+        else:
+            sql_op = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[c.op]
+            field = placeholder(c.field)
+            if _is_temporal(c.value):
+                value = placeholder(datetime.fromtimestamp(to_epoch(c.value), tz=timezone.utc))
+                clauses.append(f"({column}->>{field}::text)::timestamptz {sql_op} {value}")
+            else:
+                value = placeholder(float(c.value))
+                clauses.append(f"({column}->>{field}::text)::double precision {sql_op} {value}")
+    if containment:
+        clauses.insert(0, f"{column} @> {placeholder(json.dumps(containment, default=str))}::jsonb")
+    return (" AND ".join(clauses) if clauses else "TRUE"), params
+
+
+def _weaviate_value(value: Any) -> Dict[str, Any]:
+    """根據值的型別，返回 Weaviate `where` 過濾器的值欄位。"""
+    if isinstance(value, bool):
+        return {"valueBoolean": value}
+    if isinstance(value, int):
+        return {"valueInt": value}
+    if isinstance(value, float):
+        return {"valueNumber": value}
+    if isinstance(value, datetime):
+        return {"valueDate": _to_iso(value)}
+    return {"valueText": value}
+
+
+def to_weaviate_where(filters: Optional[MetadataFilter]) -> Optional[Dict[str, Any]]:
+    """
+    轉換為 Weaviate 的 `with_where` 過濾器。
+
+    Args:
+        filters (Optional[MetadataFilter]): 過濾表達式。
+
+    Returns:
+        Optional[Dict[str, Any]]: 過濾器；無條件時返回 None。
+    """
+    operators = {"$eq": "Equal", "$gt": "GreaterThan", "$gte": "GreaterThanEqual",
+                 "$lt": "LessThan", "$lte": "LessThanEqual"}
+    operands = []
+    for c in parse_filters(filters):
+        if c.op == "$in":
+            operands.append({
+                "operator": "Or",
+                "operands": [{"path": [c.field], "operator": "Equal", **_weaviate_value(v)} for v in c.value],
+            })
+            continue
+        value = c.value
+        if c.op in RANGE_OPERATORS and isinstance(value, str):
+            value = datetime.fromtimestamp(to_epoch(value), tz=timezone.utc)
+        operands.append({"path": [c.field], "operator": operators[c.op], **_weaviate_value(value)})
+    if not operands:
+        return None
+    return operands[0] if len(operands) == 1 else {"operator": "And", "operands": operands}
+
+
+def to_vertex_restricts(filters: Optional[MetadataFilter]) -> Tuple[List[Tuple[str, List[str]]],
+                                                                   List[Tuple[str, float, str]]]:
+    """
+    轉換為 Vertex AI Vector Search 的 token 與數值 restricts。
+
+    返回純資料結構，由呼叫端轉換為 SDK 的 `Namespace` / `NumericNamespace`。
+
+    Args:
+        filters (Optional[MetadataFilter]): 過濾表達式。
+
+    Returns:
+        Tuple: (`[(namespace, allow_tokens)]`, `[(namespace, value, operator)]`)。
+    """
+    operators = {"$gt": "GREATER", "$gte": "GREATER_EQUAL", "$lt": "LESS", "$lte": "LESS_EQUAL"}
+    tokens: List[Tuple[str, List[str]]] = []
+    numeric: List[Tuple[str, float, str]] = []
+    for c in parse_filters(filters):
+        if c.op == "$eq":
+            tokens.append((c.field, [str(c.value)]))
+        elif c.op == "$in":
+            tokens.append((c.field, [str(v) for v in c.value]))
+        else:
+            numeric.append((c.field, to_epoch(c.value), operators[c.op]))
+    return tokens, numeric
+
+
+def to_vertex_datapoint_restricts(metadata: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    根據中繼資料產生 Vertex AI 資料點的 restricts，使其可以被上述過濾條件命中。
+
+    字串、布林與整數欄位成為 token restricts；數值與時間戳欄位成為數值 restricts。
+
+    Args:
+        metadata (Dict[str, Any]): 資料點的中繼資料。
+
+    Returns:
+        Tuple: (`restricts`, `numeric_restricts`) 兩個字典列表。
+    """
+    restricts: List[Dict[str, Any]] = []
+    numeric: List[Dict[str, Any]] = []
+    for field, value in metadata.items():
+        if field in ("id", "content") or value is None or isinstance(value, (dict, list)):
+            continue
+        if isinstance(value, (str, bool, int)):
+            restricts.append({"namespace": field, "allow_list": [str(value)]})
+        epoch = to_epoch(value)
+        if epoch is not None:
+            numeric.append({"namespace": field, "value_double": epoch})
+    return restricts, numeric
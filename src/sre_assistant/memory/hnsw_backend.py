@@ -0,0 +1,384 @@
+# src/sre_assistant/memory/hnsw_backend.py
+"""
+此檔案實現了一個圖結構與向量皆存放在記憶體映射檔案中的持久化 HNSW 近似近鄰後端。
+
+`ChromaBackend` 在每次行程啟動時都要重建記憶體中的索引狀態，拉長了 Cloud Run
+實例的冷啟動時間。`HNSWBackend` 則直接以 `np.memmap` 開啟磁碟上的圖與向量，
+新的副本在 `mmap` 之後即可立即服務查詢，不需要任何重建 (warm start)：
+- **圖結構**: 第 0 層每個節點最多 `2 * M` 個鄰居；只有少數節點會出現在上層，
+  其鄰居存放在以「上層槽位」索引的另一個檔案中，避免為每個節點預留所有層的空間。
+- **增量插入**: 依 HNSW 演算法逐一插入節點，並以啟發式規則選擇鄰居。
+- **軟刪除**: 刪除只標記節點，節點仍參與圖的走訪以維持連通性，但不會出現在結果中。
+- **延遲統計**: `stats` 記錄累計的建置與查詢時間。
+"""
+
+import heapq
+import json
+import math
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import VectorBackend
+from .filters import MetadataFilter, matches
+from .mmap_store import load_state, open_memmap, save_state
+from ..config.config_manager import MemoryConfig
+
+
+class HNSWBackend(VectorBackend):
+    """
+    以記憶體映射檔案持久化的 HNSW 向量後端，支援增量插入、軟刪除與免重建的暖啟動。
+    """
+
+    # 檔案的初始容量 (節點數)，之後以倍增方式成長
+    INITIAL_CAPACITY = 4096
+    # 節點層級的上限
+    MAX_LEVEL = 16
+
+    def __init__(self, config: MemoryConfig):
+        """
+        開啟 (或創建) 位於 `config.hnsw_index_path` 的索引。
+
+        Args:
+            config (MemoryConfig): 包含索引路徑、維度與 M / ef_construction / ef_search 的配置。
+
+        Raises:
+            ValueError: 如果相似度度量不被支援，或既有索引的參數與配置不一致。
+        """
+        if config.similarity_metric not in ("cosine", "dot"):
+            raise ValueError(f"Unsupported similarity metric: {config.similarity_metric}")
+        self.path = config.hnsw_index_path
+        self.dimension = config.embedding_dimension
+        self.metric = config.similarity_metric
+        self.m = config.hnsw_m
+        self.ef_construction = config.hnsw_ef_construction
+        self.ef_search = config.hnsw_ef_search
+        self._level_multiplier = 1 / math.log(self.m)
+        self._rng = np.random.default_rng()
+        os.makedirs(self.path, exist_ok=True)
+
+        state = load_state(self.path)
+        for key, expected in (("dimension", self.dimension), ("m", self.m), ("metric", self.metric)):
+            if key in state and state[key] != expected:
+                raise ValueError(f"HNSW index at {self.path} was built with {key}={state[key]}, config has {expected}")
+        self._size = state.get("size", 0)
+        self._upper_size = state.get("upper_size", 0)
+        self._entry_point = state.get("entry_point", -1)
+        self._max_level = state.get("max_level", -1)
+
+        self._open_arrays(max(self.INITIAL_CAPACITY, self._size), max(self.INITIAL_CAPACITY // self.m, self._upper_size))
+        self._db = sqlite3.connect(os.path.join(self.path, "metadata.sqlite"))
+        self._db.execute("CREATE TABLE IF NOT EXISTS docs (row INTEGER PRIMARY KEY, id TEXT UNIQUE, metadata TEXT)")
+        self._db.commit()
+        self.stats = {"inserted": 0, "build_seconds": 0.0, "queries": 0, "query_seconds": 0.0}
+
+    def _open_arrays(self, capacity: int, upper_capacity: int):
+        """
+        以指定容量開啟所有映射檔案。
+
+        `np.memmap` 子類別的每次索引都有明顯的額外開銷，而圖的走訪會做大量的小索引，
+        因此演算法使用共享同一塊映射記憶體的一般 `ndarray` 視圖，`np.memmap` 只用於 flush。
+        """
+        self._maps = {
+            "vectors": open_memmap(self.path, "vectors", np.float32, capacity, self.dimension),
+            "levels": open_memmap(self.path, "levels", np.int8, capacity),
+            "deleted": open_memmap(self.path, "deleted", np.bool_, capacity),
+            # 第 0 層的鄰居，-1 表示空位
+            "links0": open_memmap(self.path, "links0", np.int32, capacity, 2 * self.m),
+            # 節點 -> 上層槽位 + 1 (0 表示只存在於第 0 層，與擴充檔案時的零填充一致)
+            "upper_slot": open_memmap(self.path, "upper_slot", np.int32, capacity),
+            "upper_links": open_memmap(self.path, "upper_links", np.int32, upper_capacity,
+                                       self.MAX_LEVEL * self.m),
+        }
+        views = {name: array.view(np.ndarray) for name, array in self._maps.items()}
+        self._vectors, self._levels, self._deleted = views["vectors"], views["levels"], views["deleted"]
+        self._links0, self._upper_slot, self._upper_links = views["links0"], views["upper_slot"], views["upper_links"]
+
+    def _ensure_capacity(self, capacity: int, upper_capacity: int):
+        """容量不足時以倍增方式擴充映射檔案。"""
+        current, current_upper = self._levels.shape[0], self._upper_links.shape[0]
+        if capacity <= current and upper_capacity <= current_upper:
+            return
+        self.flush()
+        self._open_arrays(max(current * 2, capacity) if capacity > current else current,
+                          max(current_upper * 2, upper_capacity) if upper_capacity > current_upper else current_upper)
+
+    def __len__(self) -> int:
+        """返回未被刪除的節點數量。"""
+        return self._size - int(self._deleted[:self._size].sum())
+
+    # --- 圖的存取 ---
+
+    def _neighbors(self, node: int, level: int) -> np.ndarray:
+        """返回節點在指定層的鄰居。"""
+        if level == 0:
+            links = self._links0[node]
+        else:
+            slot = self._upper_slot[node] - 1
+            links = self._upper_links[slot, (level - 1) * self.m:level * self.m]
+        return links[links >= 0]
+
+    def _set_neighbors(self, node: int, level: int, neighbors: List[int]):
+        """覆寫節點在指定層的鄰居列表。"""
+        if level == 0:
+            row, width = self._links0[node], 2 * self.m
+        else:
+            slot = self._upper_slot[node] - 1
+            row, width = self._upper_links[slot, (level - 1) * self.m:level * self.m], self.m
+        row[:] = -1
+        row[:len(neighbors)] = neighbors[:width]
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[Tuple[float, int]],
+                      ef: int, level: int) -> List[Tuple[float, int]]:
+        """
+        在單一層上執行 best-first 搜尋。
+
+        Args:
+            query (np.ndarray): 查詢向量。
+            entry_points (List[Tuple[float, int]]): 起始節點的 (相似度, 節點)。
+            ef (int): 動態候選列表的大小。
+            level (int): 搜尋的層。
+
+        Returns:
+            List[Tuple[float, int]]: 依相似度由高到低排列的 (相似度, 節點)。
+        """
+        visited = {node for _, node in entry_points}
+        candidates = [(-sim, node) for sim, node in entry_points]
+        heapq.heapify(candidates)
+        results = list(entry_points)
+        heapq.heapify(results)
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_sim < results[0][0]:
+                break
+            neighbors = [n for n in self._neighbors(node, level).tolist() if n not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            # 一次矩陣乘法計算所有未造訪鄰居的相似度
+            sims = self._vectors[neighbors] @ query
+            for sim, neighbor in zip(sims.tolist(), neighbors):
+                if len(results) < ef or sim > results[0][0]:
+                    heapq.heappush(candidates, (-sim, neighbor))
+                    heapq.heappush(results, (sim, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """
+        HNSW 的啟發式鄰居選擇：只有當候選與查詢的相似度高於它與所有已選鄰居的相似度時才選入，
+        讓鄰居分散在不同方向，提升群集資料上的召回率。不足 m 個時以剩餘的最近候選補滿。
+
+        Args:
+            candidates (List[Tuple[float, int]]): 依相似度由高到低排列的 (相似度, 節點)。
+            m (int): 要選出的鄰居數。
+
+        Returns:
+            List[int]: 選出的節點。
+        """
+        if len(candidates) <= m:
+            return [node for _, node in candidates]
+        nodes = [node for _, node in candidates]
+        vectors = self._vectors[nodes]
+        pairwise = vectors @ vectors.T
+        # 每個候選與「已選鄰居」之間的最大相似度，選入新鄰居時增量更新
+        closest_selected = np.full(len(nodes), -np.inf, dtype=np.float32)
+        selected: List[int] = []
+        skipped: List[int] = []
+        for i, (sim, _) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            if sim > closest_selected[i]:
+                selected.append(i)
+                np.maximum(closest_selected, pairwise[i], out=closest_selected)
+            else:
+                skipped.append(i)
+        selected.extend(skipped[:m - len(selected)])
+        return [nodes[i] for i in selected]
+
+    def _insert(self, node: int, vector: np.ndarray):
+        """
+        將一個已寫入向量檔的節點插入圖中。
+
+        Args:
+            node (int): 節點編號。
+            vector (np.ndarray): 節點的 (已正規化) 向量。
+        """
+        level = min(int(-math.log(1.0 - self._rng.random()) * self._level_multiplier), self.MAX_LEVEL)
+        self._levels[node] = level
+        self._links0[node] = -1
+        if level > 0:
+            self._ensure_capacity(node + 1, self._upper_size + 1)
+            self._upper_links[self._upper_size] = -1
+            self._upper_size += 1
+            self._upper_slot[node] = self._upper_size
+        if self._entry_point < 0:
+            self._entry_point, self._max_level = node, level
+            return
+
+        entry = [(float(self._vectors[self._entry_point] @ vector), self._entry_point)]
+        for current in range(self._max_level, level, -1):
+            entry = self._search_layer(vector, entry, 1, current)[:1]
+        for current in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(vector, entry, self.ef_construction, current)
+            max_links = 2 * self.m if current == 0 else self.m
+            neighbors = self._select_neighbors(found, self.m)
+            self._set_neighbors(node, current, neighbors)
+            for neighbor in neighbors:
+                links = self._neighbors(neighbor, current).tolist()
+                if len(links) < max_links:
+                    self._set_neighbors(neighbor, current, links + [node])
+                    continue
+                # 鄰居已滿：在原有鄰居與新節點中重新選擇
+                links.append(node)
+                sims = self._vectors[links] @ self._vectors[neighbor]
+                ranked = sorted(zip(sims.tolist(), links), reverse=True)
+                self._set_neighbors(neighbor, current, self._select_neighbors(ranked, max_links))
+            entry = found
+        if level > self._max_level:
+            self._entry_point, self._max_level = node, level
+
+    def _prepare(self, matrix: np.ndarray) -> np.ndarray:
+        """餘弦相似度時將向量正規化，使內積即為餘弦相似度。"""
+        if self.metric != "cosine":
+            return matrix
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    async def upsert(self, embeddings: List[List[float]],
+                    metadata: List[Dict[str, Any]]) -> bool:
+        """
+        增量插入向量；已存在的 ID 會軟刪除舊節點並插入新節點。
+
+        Args:
+            embeddings (List[List[float]]): 要插入的向量列表。
+            metadata (List[Dict[str, Any]]): 與每個向量對應的中繼資料列表。
+
+        Raises:
+            ValueError: 如果向量維度與索引不一致。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        if len(embeddings) != len(metadata):
+            raise ValueError("embeddings and metadata must have the same length")
+        if not len(embeddings):
+            return True
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension mismatch: expected {self.dimension}, got {matrix.shape[-1]}")
+        started = time.perf_counter()
+        matrix = self._prepare(matrix)
+        ids = [str(meta.get("id") or uuid.uuid4()) for meta in metadata]
+        await self.delete(ids)
+        self._ensure_capacity(self._size + len(ids), self._upper_size)
+        records = []
+        for vector, doc_id, meta in zip(matrix, ids, metadata):
+            node = self._size
+            self._vectors[node] = vector
+            self._deleted[node] = False
+            self._insert(node, vector)
+            self._size += 1
+            records.append((node, doc_id, json.dumps({**meta, "id": doc_id}, default=str)))
+        self._db.executemany("INSERT OR REPLACE INTO docs (row, id, metadata) VALUES (?, ?, ?)", records)
+        self._db.commit()
+        self.flush()
+        self.stats["inserted"] += len(ids)
+        self.stats["build_seconds"] += time.perf_counter() - started
+        return True
+
+    def _metadata(self, rows: List[int]) -> Dict[int, Dict[str, Any]]:
+        """從 SQLite 讀取指定節點的中繼資料。"""
+        if not rows:
+            return {}
+        fetched = self._db.execute(
+            f"SELECT row, metadata FROM docs WHERE row IN ({','.join('?' * len(rows))})", rows
+        ).fetchall()
+        return {row: json.loads(meta) for row, meta in fetched}
+
+    async def search(self, query_embedding: List[float],
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """
+        自頂層貪婪下降，再於第 0 層以 `ef_search` 執行 best-first 搜尋。
+
+        軟刪除或不符合過濾條件的節點不會出現在結果中；結果不足 k 筆時會以
+        更大的 ef 重新搜尋，直到涵蓋整個索引。
+
+        Args:
+            query_embedding (List[float]): 用於查詢的單個向量。
+            k (int): 要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            List[Dict[str, Any]]: 包含中繼資料、`id` 與 `similarity` 分數的結果列表。
+        """
+        if self._entry_point < 0 or k <= 0:
+            return []
+        started = time.perf_counter()
+        query = self._prepare(np.asarray([query_embedding], dtype=np.float32))[0]
+        entry = [(float(self._vectors[self._entry_point] @ query), self._entry_point)]
+        for level in range(self._max_level, 0, -1):
+            entry = self._search_layer(query, entry, 1, level)[:1]
+        ef = max(self.ef_search, k)
+        while True:
+            found = [(sim, node) for sim, node in self._search_layer(query, entry, ef, 0)
+                     if not self._deleted[node]]
+            metadata = self._metadata([node for _, node in found])
+            results = [{**metadata[node], "similarity": sim} for sim, node in found
+                       if node in metadata and (not filters or matches(metadata[node], filters))]
+            if len(results) >= k or ef >= self._size:
+                break
+            ef = min(ef * 4, self._size)
+        self.stats["queries"] += 1
+        self.stats["query_seconds"] += time.perf_counter() - started
+        return results[:k]
+
+    async def delete(self, ids: List[str]) -> bool:
+        """
+        軟刪除節點：節點仍留在圖中以維持連通性，但不再出現在搜尋結果中。
+
+        Args:
+            ids (List[str]): 要刪除的向量 ID 列表。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        ids = [str(doc_id) for doc_id in ids]
+        if not ids:
+            return True
+        placeholders = ",".join("?" * len(ids))
+        rows = [row for (row,) in self._db.execute(f"SELECT row FROM docs WHERE id IN ({placeholders})", ids)]
+        if rows:
+            self._deleted[np.asarray(rows)] = True
+            self._db.execute(f"DELETE FROM docs WHERE id IN ({placeholders})", ids)
+            self._db.commit()
+            self.flush()
+        return True
+
+    def flush(self):
+        """將映射檔案的變更與圖的狀態寫回磁碟，讓其他副本可以直接開啟。"""
+        for array in self._maps.values():
+            array.flush()
+        save_state(self.path, {
+            "dimension": self.dimension, "m": self.m, "metric": self.metric,
+            "size": self._size, "upper_size": self._upper_size,
+            "entry_point": self._entry_point, "max_level": self._max_level,
+        })
+
+    async def health_check(self) -> bool:
+        """
+        檢查中繼資料資料庫是否可用。
+
+        Returns:
+            bool: 如果可以查詢，返回 True。
+        """
+        try:
+            return self._db.execute("SELECT 1").fetchone() == (1,)
+        except sqlite3.Error:
+            return False
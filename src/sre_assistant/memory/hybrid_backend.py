@@ -0,0 +1,162 @@
+# src/sre_assistant/memory/hybrid_backend.py
+"""
+此檔案實現了結合 BM25 詞彙檢索與向量檢索的混合 (hybrid) 後端。
+
+`HybridBackend` 包裝任何一個 `VectorBackend`：在 upsert/delete 時同步維護
+一個 `BM25Index`，並提供 `hybrid_search`，以倒數排名融合
+(Reciprocal Rank Fusion, RRF) 合併兩種檢索的排名。這讓錯誤碼、Pod 名稱等
+精確 token 也能被可靠地召回，同時保留語義搜尋的能力。
+
+被包裝的向量後端若會持久化 (Weaviate、PostgreSQL、壓縮儲存等)，詞彙索引也應持久化
+(`memory.lexical_index_path`)，否則重新啟動後混合檢索會失去詞彙的一半。
+詞彙索引的評分與 SQLite 寫入是同步的 CPU/磁碟工作，一律在執行緒中執行，不阻塞事件迴圈。
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Dict, List, Optional
+
+from .base import VectorBackend
+from .filters import MetadataFilter
+from .lexical_index import BM25Index
+
+
+def result_id(result: Dict[str, Any]) -> Optional[str]:
+    """
+    從各種後端的搜尋結果中取出文件 ID。
+
+    不同後端的結果格式不一：有些把 `id` 放在頂層，有些放在 `metadata` 中；
+    若都沒有，則退回以內容雜湊作為 ID (與 `HybridBackend.upsert` 的規則一致)。
+
+    Args:
+        result (Dict[str, Any]): 單筆搜尋結果。
+
+    Returns:
+        Optional[str]: 文件 ID；無法判斷時返回 None。
+    """
+    if result.get("id") is not None:
+        return str(result["id"])
+    nested = result.get("metadata")
+    if isinstance(nested, dict) and nested.get("id") is not None:
+        return str(nested["id"])
+    content = result.get("content")
+    if content:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return None
+
+
+class HybridBackend(VectorBackend):
+    """
+    在任意向量後端旁並列一個 BM25 詞彙索引，並以 RRF 融合兩者的排名。
+    """
+
+    def __init__(self, backend: VectorBackend, lexical_index: Optional[BM25Index] = None,
+                 rrf_k: int = 60):
+        """
+        初始化混合後端。
+
+        Args:
+            backend (VectorBackend): 被包裝的向量後端。
+            lexical_index (Optional[BM25Index]): 詞彙索引；若為 None 則創建一個新的。
+            rrf_k (int): RRF 的平滑常數，越大代表越不偏重前幾名。
+        """
+        self.backend = backend
+        self.lexical_index = lexical_index if lexical_index is not None else BM25Index()
+        self.rrf_k = rrf_k
+
+    async def upsert(self, embeddings: List[List[float]],
+                    metadata: List[Dict[str, Any]]) -> bool:
+        """
+        寫入向量後端並同步更新詞彙索引。
+
+        缺少 `id` 的中繼資料會以內容雜湊補上 ID，確保兩個索引使用相同的鍵。
+
+        Args:
+            embeddings (List[List[float]]): 要插入的向量列表。
+            metadata (List[Dict[str, Any]]): 與每個向量對應的中繼資料列表。
+
+        Returns:
+            bool: 向量後端的操作是否成功。
+        """
+        metadata = [meta if meta.get("id") is not None else {**meta, "id": result_id(meta)}
+                    for meta in metadata]
+        ok = await self.backend.upsert(embeddings, metadata)
+        if ok:
+            await asyncio.to_thread(self.lexical_index.add_many,
+                                    [(str(meta["id"]), meta.get("content", ""), meta)
+                                     for meta in metadata if meta["id"] is not None])
+        return ok
+
+    async def search(self, query_embedding: List[float],
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """純向量搜尋，直接委派給被包裝的後端。"""
+        return await self.backend.search(query_embedding, k, filters)
+
+    async def search_batch(self, query_embeddings: List[List[float]],
+                          k: int = 10,
+                          filters: Optional[MetadataFilter] = None) -> List[List[Dict[str, Any]]]:
+        """批次向量搜尋，直接委派給被包裝的後端。"""
+        return await self.backend.search_batch(query_embeddings, k, filters)
+
+    async def hybrid_search(self, query_text: str,
+                            query_embedding: Optional[List[float]] = None,
+                            k: int = 10,
+                            filters: Optional[MetadataFilter] = None,
+                            candidates: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        同時執行詞彙與向量檢索，並以 RRF 融合排名。
+
+        Args:
+            query_text (str): 查詢文本，用於 BM25 檢索。
+            query_embedding (Optional[List[float]]): 查詢向量；若為 None 則只做詞彙檢索。
+            k (int): 要返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，同時套用於兩種檢索。
+            candidates (Optional[int]): 每種檢索取回的候選數量，預設為 `4 * k`。
+
+        Returns:
+            List[Dict[str, Any]]: 依 `rrf_score` 由高到低排列的結果，並附上
+            `lexical_rank` 與 `vector_rank` (未命中時為 None)。
+        """
+        pool = candidates or 4 * k
+        # 詞彙檢索在執行緒中與向量檢索並行
+        lexical = asyncio.to_thread(self.lexical_index.search, query_text, pool, filters)
+        rankings: Dict[str, List[Dict[str, Any]]] = {"lexical": [], "vector": []}
+        if query_embedding is not None:
+            rankings["lexical"], rankings["vector"] = await asyncio.gather(
+                lexical, self.backend.search(query_embedding, pool, filters))
+        else:
+            rankings["lexical"] = await lexical
+
+        fused: Dict[str, Dict[str, Any]] = {}
+        for source, results in rankings.items():
+            for rank, result in enumerate(results, start=1):
+                doc_id = result_id(result)
+                if doc_id is None:
+                    continue
+                entry = fused.get(doc_id)
+                if entry is None:
+                    entry = fused[doc_id] = {**result, "id": doc_id, "rrf_score": 0.0,
+                                             "lexical_rank": None, "vector_rank": None}
+                else:
+                    entry.update({key: value for key, value in result.items() if key not in entry})
+                entry[f"{source}_rank"] = rank
+                entry["rrf_score"] += 1.0 / (self.rrf_k + rank)
+        return sorted(fused.values(), key=lambda entry: entry["rrf_score"], reverse=True)[:k]
+
+    async def delete(self, ids: List[str]) -> bool:
+        """
+        從向量後端與詞彙索引中刪除文件。
+
+        Args:
+            ids (List[str]): 要刪除的文件 ID 列表。
+
+        Returns:
+            bool: 向量後端的操作是否成功。
+        """
+        await asyncio.to_thread(self.lexical_index.remove, [str(doc_id) for doc_id in ids])
+        return await self.backend.delete(ids)
+
+    async def health_check(self) -> bool:
+        """詞彙索引在行程內，健康狀態取決於被包裝的後端。"""
+        return await self.backend.health_check()
@@ -0,0 +1,394 @@
+# src/sre_assistant/memory/in_memory_backend.py
+"""
+此檔案實現了一個純記憶體、基於 NumPy 的向量數據庫後端。
+
+它不依賴任何外部服務，適合本地開發、CI 測試，並可作為其他
+`VectorBackend` 實現的基準參考引擎 (reference engine)：
+- 向量儲存在一個連續、可成長的 float32 矩陣中，並預先計算範數 (norm)。
+- 搜尋時以一次矩陣乘法完成批次評分，再用 `argpartition` 取出 top-k。
+- 刪除採用墓碑 (tombstone) 標記，當失效列比例過高時再進行壓縮 (compaction)。
+"""
+
+import uuid
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .base import VectorBackend
+from .filters import MetadataFilter, parse_filters, to_epoch
+from ..config.config_manager import MemoryConfig
+
+def _hashable(value: Any) -> bool:
+    """判斷值是否可作為字典鍵 (不可雜湊的過濾值不可能命中任何列)。"""
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class InMemoryBackend(VectorBackend):
+    """
+    一個純記憶體的向量後端，用於本地開發、快速測試和效能基準比較。
+    """
+
+    # 矩陣的初始容量 (列數)，之後以倍增方式成長
+    INITIAL_CAPACITY = 1024
+    # 當墓碑列佔已用列的比例超過此值時觸發壓縮
+    COMPACTION_RATIO = 0.25
+    # 墓碑數量低於此值時不壓縮，避免小資料量時頻繁搬移
+    MIN_TOMBSTONES_FOR_COMPACTION = 256
+    # 過濾後的候選列少於已用列的 1/DENSE_FILTER_RATIO 時，只對候選列評分
+    DENSE_FILTER_RATIO = 4
+
+    def __init__(self, config: Optional[MemoryConfig] = None):
+        """
+        初始化記憶體後端。
+
+        Args:
+            config (Optional[MemoryConfig]): 包含向量維度和相似度度量的配置。
+                若為 None，維度將由第一次 upsert 的向量推斷，並使用餘弦相似度。
+
+        Raises:
+            ValueError: 如果配置了不支援的相似度度量。
+        """
+        self.metric = config.similarity_metric if config else "cosine"
+        if self.metric not in ("cosine", "dot"):
+            raise ValueError(f"Unsupported similarity metric: {self.metric}")
+        self.dimension: Optional[int] = config.embedding_dimension if config else None
+
+        self._vectors: Optional[np.ndarray] = None  # shape: (capacity, dimension)
+        self._norms: Optional[np.ndarray] = None    # shape: (capacity,)
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._size = 0        # 已使用的列數 (包含墓碑)
+        self._tombstones = 0
+        # 過濾用的欄式視圖快取，upsert 與壓縮時失效 (刪除由 _alive 遮罩處理)
+        self._columns: Dict[tuple, Any] = {}
+
+    def __len__(self) -> int:
+        """返回目前存活 (未被刪除) 的向量數量。"""
+        return self._size - self._tombstones
+
+    def _ensure_capacity(self, dimension: int, required: int):
+        """
+        確保矩陣至少有 `required` 列的容量，不足時以倍增方式重新配置。
+
+        Args:
+            dimension (int): 向量維度。
+            required (int): 需要的總列數。
+
+        Raises:
+            ValueError: 如果向量維度與既有資料不一致。
+        """
+        if self._vectors is None:
+            if self.dimension is not None and self.dimension != dimension:
+                raise ValueError(f"Embedding dimension mismatch: expected {self.dimension}, got {dimension}")
+            self.dimension = dimension
+            capacity = max(self.INITIAL_CAPACITY, required)
+            self._vectors = np.zeros((capacity, dimension), dtype=np.float32)
+            self._norms = np.zeros(capacity, dtype=np.float32)
+            self._alive = np.zeros(capacity, dtype=bool)
+            return
+        if dimension != self.dimension:
+            raise ValueError(f"Embedding dimension mismatch: expected {self.dimension}, got {dimension}")
+        capacity = self._vectors.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(capacity * 2, required)
+        vectors = np.zeros((new_capacity, dimension), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        norms = np.zeros(new_capacity, dtype=np.float32)
+        norms[:self._size] = self._norms[:self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._vectors, self._norms, self._alive = vectors, norms, alive
+
+    async def upsert(self, embeddings: List[List[float]],
+                    metadata: List[Dict[str, Any]]) -> bool:
+        """
+        插入或更新向量及其中繼資料。
+
+        以中繼資料中的 `id` 作為唯一鍵：已存在的 ID 會被原地覆寫，
+        缺少 `id` 的項目則會自動產生一個 UUID。
+
+        Args:
+            embeddings (List[List[float]]): 要插入的向量列表。
+            metadata (List[Dict[str, Any]]): 與每個向量對應的中繼資料列表。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        if len(embeddings) != len(metadata):
+            raise ValueError("embeddings and metadata must have the same length")
+        if not embeddings:
+            return True
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2:
+            raise ValueError("embeddings must be a 2-D list of floats")
+        self._ensure_capacity(matrix.shape[1], self._size + len(matrix))
+
+        norms = np.linalg.norm(matrix, axis=1)
+        self._columns.clear()
+        for i, meta in enumerate(metadata):
+            doc_id = str(meta.get("id") or uuid.uuid4())
+            row = self._id_to_row.get(doc_id)
+            if row is None:
+                row = self._size
+                self._size += 1
+                self._ids.append(doc_id)
+                self._metadata.append(None)
+                self._id_to_row[doc_id] = row
+            self._vectors[row] = matrix[i]
+            self._norms[row] = norms[i]
+            self._alive[row] = True
+            self._metadata[row] = {**meta, "id": doc_id}
+        return True
+
+    def _score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        以一次矩陣乘法計算查詢向量與已用列 (或指定的候選列) 的相似度。
+
+        Args:
+            queries (np.ndarray): 形狀為 (q, dimension) 的查詢矩陣。
+            rows (Optional[np.ndarray]): 只對這些列評分 (過濾後的候選列)；None 表示全部已用列。
+
+        Returns:
+            np.ndarray: 形狀為 (q, len(rows) 或 size) 的分數矩陣，墓碑列的分數為 -inf。
+        """
+        vectors = self._vectors[:self._size] if rows is None else self._vectors[rows]
+        norms = self._norms[:self._size] if rows is None else self._norms[rows]
+        scores = queries @ vectors.T
+        if self.metric == "cosine":
+            query_norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            denominator = query_norms * norms
+            np.divide(scores, denominator, out=scores, where=denominator > 0)
+        if rows is None and self._tombstones:
+            scores[:, ~self._alive[:self._size]] = -np.inf
+        return scores
+
+    def _top_k(self, scores: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        使用 `argpartition` 從單列分數中選出前 k 個結果並排序。
+
+        Args:
+            scores (np.ndarray): 單個查詢的分數向量，-inf 代表應排除的列。
+            k (int): 要返回的結果數量。
+            rows (Optional[np.ndarray]): `scores` 每個位置對應的實際列號；None 表示位置即列號。
+
+        Returns:
+            List[Dict[str, Any]]: 依相似度由高到低排列的結果。
+        """
+        k = min(k, len(self), scores.shape[0])
+        if k <= 0:
+            return []
+        if k < scores.shape[0]:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.shape[0])
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        results = []
+        for position in ordered:
+            # 墓碑列的分數為 -inf
+            if scores[position] == -np.inf:
+                continue
+            row = position if rows is None else rows[position]
+            results.append({**self._metadata[row], "similarity": float(scores[position])})
+        return results
+
+    def _as_query_matrix(self, query_embeddings: List[List[float]]) -> np.ndarray:
+        """
+        將查詢向量轉換為 float32 矩陣並檢查維度。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+
+        Raises:
+            ValueError: 如果查詢維度與已儲存的向量不一致。
+
+        Returns:
+            np.ndarray: 形狀為 (q, dimension) 的查詢矩陣。
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[1] != self.dimension:
+            raise ValueError(f"Query dimension mismatch: expected {self.dimension}, got {queries.shape[-1]}")
+        return queries
+
+    def _codes(self, field: str) -> Tuple[np.ndarray, Dict[Any, int]]:
+        """
+        返回某個中繼資料欄位的字典編碼 (每個不同的值對應一個整數代碼)，
+        並快取到下一次 upsert 或壓縮為止。等值與成員比對因此只需比較整數陣列。
+
+        Args:
+            field (str): 欄位名稱。
+
+        Returns:
+            Tuple[np.ndarray, Dict[Any, int]]: (每列的代碼陣列, 值到代碼的對照表)；
+            缺值或不可雜湊的值代碼為 -1。
+        """
+        key = ("codes", field)
+        cached = self._columns.get(key)
+        if cached is None:
+            vocabulary: Dict[Any, int] = {}
+            codes = np.full(self._size, -1, dtype=np.int32)
+            for row, meta in enumerate(self._metadata):
+                value = meta.get(field) if meta is not None else None
+                if value is None:
+                    continue
+                try:
+                    codes[row] = vocabulary.setdefault(value, len(vocabulary))
+                except TypeError:
+                    continue
+            cached = self._columns[key] = (codes, vocabulary)
+        return cached
+
+    def _epochs(self, field: str) -> np.ndarray:
+        """
+        返回某個中繼資料欄位轉換為 epoch 秒數後的陣列 (用於範圍比較，缺值為 NaN)，
+        並快取到下一次 upsert 或壓縮為止。
+
+        Args:
+            field (str): 欄位名稱。
+
+        Returns:
+            np.ndarray: 長度為已用列數的 float64 陣列。
+        """
+        key = ("epochs", field)
+        column = self._columns.get(key)
+        if column is None:
+            epochs = (to_epoch(meta.get(field)) if meta is not None else None for meta in self._metadata)
+            column = self._columns[key] = np.array([np.nan if e is None else e for e in epochs],
+                                                   dtype=np.float64)
+        return column
+
+    def _filter_mask(self, filters: MetadataFilter) -> np.ndarray:
+        """
+        以欄式向量化比較計算符合過濾表達式的存活列遮罩。
+
+        Args:
+            filters (MetadataFilter): 過濾表達式。
+
+        Returns:
+            np.ndarray: 長度為已用列數的布林遮罩。
+        """
+        mask = self._alive[:self._size].copy()
+        for condition in parse_filters(filters):
+            if condition.op in ("$eq", "$in"):
+                codes, vocabulary = self._codes(condition.field)
+                values = condition.value if condition.op == "$in" else [condition.value]
+                wanted = [vocabulary[v] for v in values if _hashable(v) and v in vocabulary]
+                if not wanted:
+                    return np.zeros(self._size, dtype=bool)
+                mask &= codes == wanted[0] if len(wanted) == 1 else np.isin(codes, wanted)
+            else:
+                bound = to_epoch(condition.value)
+                if bound is None:
+                    return np.zeros(self._size, dtype=bool)
+                compare = {"$gt": np.greater, "$gte": np.greater_equal,
+                           "$lt": np.less, "$lte": np.less_equal}[condition.op]
+                with np.errstate(invalid="ignore"):
+                    mask &= compare(self._epochs(condition.field), bound)
+        return mask
+
+    async def search(self, query_embedding: List[float],
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """
+        執行精確的 (暴力法) 向量近鄰搜尋。
+
+        Args:
+            query_embedding (List[float]): 用於查詢的單個向量。
+            k (int): 要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式，在評分前套用。
+
+        Returns:
+            List[Dict[str, Any]]: 包含中繼資料、`id` 與 `similarity` 分數的結果列表。
+        """
+        return (await self.search_batch([query_embedding], k, filters))[0]
+
+    async def search_batch(self, query_embeddings: List[List[float]],
+                          k: int = 10,
+                          filters: Optional[MetadataFilter] = None) -> List[List[Dict[str, Any]]]:
+        """
+        以單次矩陣乘法同時評分所有查詢向量。
+
+        有過濾條件時採用預先過濾 (pre-filter)：先以欄式比較選出候選列，
+        只對候選列做矩陣乘法，因此過濾條件越嚴格，搜尋越快。
+
+        Args:
+            query_embeddings (List[List[float]]): 查詢向量列表。
+            k (int): 每個查詢要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            List[List[Dict[str, Any]]]: 與 `query_embeddings` 順序一致的結果列表。
+        """
+        if not len(self) or not query_embeddings:
+            return [[] for _ in query_embeddings]
+        queries = self._as_query_matrix(query_embeddings)
+        if not filters:
+            return [self._top_k(row_scores, k) for row_scores in self._score(queries)]
+        mask = self._filter_mask(filters)
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return [[] for _ in query_embeddings]
+        if len(rows) * self.DENSE_FILTER_RATIO > self._size:
+            # 候選列佔比高時，複製候選向量的成本高於直接對全部列評分再遮罩
+            scores = self._score(queries)
+            scores[:, ~mask] = -np.inf
+            return [self._top_k(row_scores, k) for row_scores in scores]
+        scores = self._score(queries, rows)
+        return [self._top_k(row_scores, k, rows) for row_scores in scores]
+
+    async def delete(self, ids: List[str]) -> bool:
+        """
+        以墓碑標記刪除向量，必要時觸發壓縮。
+
+        Args:
+            ids (List[str]): 要刪除的向量的唯一 ID 列表。
+
+        Returns:
+            bool: 操作是否成功。不存在的 ID 會被忽略。
+        """
+        for doc_id in ids:
+            row = self._id_to_row.pop(str(doc_id), None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            self._metadata[row] = None
+            self._ids[row] = None
+            self._tombstones += 1
+        if (self._tombstones >= self.MIN_TOMBSTONES_FOR_COMPACTION
+                and self._tombstones > self._size * self.COMPACTION_RATIO):
+            self.compact()
+        return True
+
+    def compact(self):
+        """
+        移除所有墓碑列，將存活的向量緊密排列到矩陣前端。
+        """
+        if not self._tombstones:
+            return
+        self._columns.clear()
+        live_rows = np.flatnonzero(self._alive[:self._size])
+        count = len(live_rows)
+        self._vectors[:count] = self._vectors[live_rows]
+        self._norms[:count] = self._norms[live_rows]
+        self._alive[:count] = True
+        self._alive[count:self._size] = False
+        self._ids = [self._ids[row] for row in live_rows]
+        self._metadata = [self._metadata[row] for row in live_rows]
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._size = count
+        self._tombstones = 0
+
+    async def health_check(self) -> bool:
+        """
+        記憶體後端沒有外部依賴，永遠視為健康。
+
+        Returns:
+            bool: 永遠返回 True。
+        """
+        return True
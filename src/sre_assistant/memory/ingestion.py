@@ -0,0 +1,370 @@
+# src/sre_assistant/memory/ingestion.py
+"""
+此檔案實現了長期記憶體 (RAG) 的文件攝取 (ingestion) 管線。
+
+它將磁碟上的 Markdown 運維手冊 (runbook)、事後檢討 (postmortem) 和
+日誌匯出檔轉換為向量並寫入任何 `VectorBackend`，設計重點如下：
+- **有界記憶體**: 檔案以逐行串流的方式讀取，並透過生成器逐步切塊，
+  不會將整個檔案或知識庫載入記憶體。
+- **依 token 切塊**: 遵循 `MemoryConfig.chunk_size` / `chunk_overlap`。
+- **內容去重**: 以區塊內容的 SHA-256 作為 ID，重複的區塊只嵌入一次。
+- **可續傳的檢查點**: 使用 SQLite 記錄已完成的檔案與已寫入的區塊，
+  重新執行時會跳過未變更的檔案與區塊，不會重新嵌入。
+- **移除過時區塊**: 檢查點記錄每個檔案的區塊雜湊；檔案修改後，舊版本中已不存在
+  (且未被其他檔案引用) 的區塊會在執行結束時從後端刪除。
+- **大量寫入**: 後端提供 `bulk_upsert` (例如 PostgreSQL COPY) 時以它寫入每一批。
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from pydantic import BaseModel
+
+from .base import VectorBackend
+from .embedding_service import EmbeddingService, get_embedding_service
+from ..config.config_manager import MemoryConfig
+
+# 以「非空白字元 + 其後的空白」作為一個 token，串接後可還原原始排版
+_TOKEN_PATTERN = re.compile(r"\S+\s*")
+
+DEFAULT_PATTERNS: Tuple[str, ...] = ("*.md", "*.markdown", "*.txt", "*.log", "*.jsonl")
+
+
+class IngestionStats(BaseModel):
+    """一次攝取執行的統計結果。"""
+    files_seen: int = 0
+    files_skipped: int = 0
+    chunks_seen: int = 0
+    chunks_duplicate: int = 0
+    chunks_embedded: int = 0
+    chunks_deleted: int = 0
+    batches_upserted: int = 0
+
+
+def iter_files(paths: Iterable[str], patterns: Sequence[str] = DEFAULT_PATTERNS) -> Iterator[Path]:
+    """
+    遞迴列出符合樣式的檔案，依路徑排序以確保執行結果可重現。
+
+    Args:
+        paths (Iterable[str]): 檔案或目錄路徑。
+        patterns (Sequence[str]): 檔名的 glob 樣式。
+
+    Yields:
+        Path: 符合條件的檔案路徑。
+    """
+    for raw_path in paths:
+        path = Path(raw_path)
+        if path.is_file():
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if any(Path(name).match(pattern) for pattern in patterns):
+                    yield Path(root) / name
+
+
+def infer_doc_type(path: Path) -> str:
+    """
+    根據路徑推斷文件類型，寫入區塊的中繼資料以便後續過濾。
+
+    Args:
+        path (Path): 檔案路徑。
+
+    Returns:
+        str: "log", "postmortem" 或 "runbook"。
+    """
+    if path.suffix in (".log", ".jsonl"):
+        return "log"
+    if "postmortem" in str(path).lower():
+        return "postmortem"
+    return "runbook"
+
+
+def iter_tokens(path: Path) -> Iterator[str]:
+    """
+    逐行串流讀取檔案並切分為 token。
+
+    Args:
+        path (Path): 檔案路徑。
+
+    Yields:
+        str: 含尾隨空白的 token。
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            yield from _TOKEN_PATTERN.findall(line)
+
+
+def chunk_tokens(tokens: Iterable[str], chunk_size: int, chunk_overlap: int) -> Iterator[str]:
+    """
+    將 token 流切分為固定大小、彼此重疊的文字區塊。
+
+    Args:
+        tokens (Iterable[str]): token 流。
+        chunk_size (int): 每個區塊的 token 數。
+        chunk_overlap (int): 相鄰區塊重疊的 token 數。
+
+    Raises:
+        ValueError: 如果 `chunk_overlap` 不小於 `chunk_size`。
+
+    Yields:
+        str: 區塊文字。
+    """
+    if chunk_size <= 0 or not 0 <= chunk_overlap < chunk_size:
+        raise ValueError("chunk_overlap must be >= 0 and smaller than chunk_size")
+    window: deque = deque()
+    fresh = 0  # 視窗中尚未出現在任何已輸出區塊內的 token 數
+    for token in tokens:
+        window.append(token)
+        fresh += 1
+        if len(window) == chunk_size:
+            yield "".join(window).strip()
+            for _ in range(chunk_size - chunk_overlap):
+                window.popleft()
+            fresh = 0
+    if fresh:
+        yield "".join(window).strip()
+
+
+class IngestionCheckpoint:
+    """
+    以 SQLite 儲存攝取進度，讓中斷的攝取可以續傳、重新執行時可以跳過未變更的內容。
+    資料儲存在磁碟上，因此記憶體使用量不隨知識庫大小成長。
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        開啟 (或創建) 檢查點資料庫。
+
+        Args:
+            path (str): SQLite 檔案路徑；預設為僅存在於記憶體中的資料庫。
+        """
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunks (hash TEXT PRIMARY KEY)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER)"
+        )
+        # 每個檔案目前版本的區塊，以及檔案修改後不再出現、待確認是否刪除的區塊
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_chunks (path TEXT, hash TEXT, PRIMARY KEY (path, hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS file_chunks_hash_idx ON file_chunks (hash)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stale_chunks (hash TEXT PRIMARY KEY)")
+        self._conn.commit()
+
+    def is_file_done(self, path: Path) -> bool:
+        """檢查檔案是否已完整攝取且之後未被修改。"""
+        stat = path.stat()
+        row = self._conn.execute("SELECT mtime, size FROM files WHERE path = ?", (str(path),)).fetchone()
+        return row is not None and row == (stat.st_mtime, stat.st_size)
+
+    def mark_files_done(self, files: List[Tuple[Path, Set[str]]]):
+        """
+        記錄檔案已完整攝取 (當下的修改時間與大小) 及其目前的區塊；
+        先前版本中已不存在的區塊記為待刪除。
+
+        Args:
+            files (List[Tuple[Path, Set[str]]]): 檔案路徑與其所有區塊的雜湊。
+        """
+        for path, hashes in files:
+            old = {row[0] for row in self._conn.execute("SELECT hash FROM file_chunks WHERE path = ?", (str(path),))}
+            self._conn.executemany("INSERT OR IGNORE INTO stale_chunks (hash) VALUES (?)",
+                                   [(h,) for h in old - hashes])
+            self._conn.execute("DELETE FROM file_chunks WHERE path = ?", (str(path),))
+            self._conn.executemany("INSERT INTO file_chunks (path, hash) VALUES (?, ?)",
+                                   [(str(path), h) for h in hashes])
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files (path, mtime, size) VALUES (?, ?, ?)",
+            [(str(p), p.stat().st_mtime, p.stat().st_size) for p, _ in files],
+        )
+        self._conn.commit()
+
+    def orphaned_chunks(self) -> List[str]:
+        """返回待刪除且已不被任何檔案引用的區塊。"""
+        return [row[0] for row in self._conn.execute(
+            "SELECT hash FROM stale_chunks WHERE hash NOT IN (SELECT hash FROM file_chunks)"
+        )]
+
+    def forget_chunks(self, hashes: List[str]):
+        """在區塊從後端刪除後移除其記錄 (之後再出現時會重新嵌入)，並清空待刪除清單。"""
+        self._conn.executemany("DELETE FROM chunks WHERE hash = ?", [(h,) for h in hashes])
+        self._conn.execute("DELETE FROM stale_chunks")
+        self._conn.commit()
+
+    def has_chunk(self, chunk_hash: str) -> bool:
+        """檢查區塊是否已寫入後端。"""
+        return self._conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (chunk_hash,)).fetchone() is not None
+
+    def mark_chunks_done(self, hashes: List[str]):
+        """記錄一批區塊已成功寫入後端。"""
+        self._conn.executemany("INSERT OR IGNORE INTO chunks (hash) VALUES (?)", [(h,) for h in hashes])
+        self._conn.commit()
+
+    def close(self):
+        """關閉資料庫連線。"""
+        self._conn.close()
+
+
+class IngestionPipeline:
+    """
+    將文件串流切塊、去重、批次嵌入並寫入向量後端的管線。
+    """
+
+    def __init__(self, backend: VectorBackend, embedding_service: EmbeddingService,
+                 chunk_size: int = 512, chunk_overlap: int = 50, batch_size: int = 64,
+                 checkpoint: Optional[IngestionCheckpoint] = None):
+        """
+        初始化攝取管線。
+
+        Args:
+            backend (VectorBackend): 寫入的目標向量後端。
+            embedding_service (EmbeddingService): 用於批次嵌入的服務。
+            chunk_size (int): 每個區塊的 token 數。
+            chunk_overlap (int): 相鄰區塊重疊的 token 數。
+            batch_size (int): 每次嵌入與 upsert 的區塊數。
+            checkpoint (Optional[IngestionCheckpoint]): 進度檢查點；
+                若為 None，僅在本次執行內去重。
+        """
+        self.backend = backend
+        self.embedding_service = embedding_service
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.checkpoint = checkpoint or IngestionCheckpoint()
+
+    @classmethod
+    def from_config(cls, config: MemoryConfig, checkpoint_path: Optional[str] = None,
+                    batch_size: int = 64) -> "IngestionPipeline":
+        """
+        根據配置創建管線，後端由 `MemoryBackendFactory.create` 決定。
+
+        Args:
+            config (MemoryConfig): 記憶體配置。
+            checkpoint_path (Optional[str]): 檢查點 SQLite 檔案路徑。
+            batch_size (int): 每次嵌入與 upsert 的區塊數。
+
+        Returns:
+            IngestionPipeline: 新的管線實例。
+        """
+        from .backend_factory import MemoryBackendFactory
+        return cls(
+            backend=MemoryBackendFactory.create(config),
+            embedding_service=get_embedding_service(config),
+            chunk_size=config.chunk_size,
+            chunk_overlap=config.chunk_overlap,
+            batch_size=batch_size,
+            checkpoint=IngestionCheckpoint(checkpoint_path) if checkpoint_path else None,
+        )
+
+    def iter_chunks(self, path: Path) -> Iterator[Dict[str, Any]]:
+        """
+        產生單一檔案的區塊中繼資料。
+
+        Args:
+            path (Path): 檔案路徑。
+
+        Yields:
+            Dict[str, Any]: 包含 `id` (內容雜湊), `content`, `source` 等欄位的中繼資料。
+        """
+        doc_type = infer_doc_type(path)
+        for index, text in enumerate(chunk_tokens(iter_tokens(path), self.chunk_size, self.chunk_overlap)):
+            if not text:
+                continue
+            yield {
+                "id": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+                "content": text,
+                "source": str(path),
+                "doc_type": doc_type,
+                "chunk_index": index,
+            }
+
+    async def _flush(self, batch: List[Dict[str, Any]], finished_files: List[Tuple[Path, Set[str]]],
+                     stats: IngestionStats):
+        """
+        嵌入並寫入一批區塊，成功後才更新檢查點。
+
+        Args:
+            batch (List[Dict[str, Any]]): 區塊中繼資料。
+            finished_files (List[Tuple[Path, Set[str]]]): 所有區塊都已在此批次 (或之前) 寫入的檔案及其區塊雜湊。
+            stats (IngestionStats): 要更新的統計。
+        """
+        if batch:
+            embeddings = await self.embedding_service.encode([chunk["content"] for chunk in batch])
+            bulk_upsert = getattr(self.backend, "bulk_upsert", None)
+            if bulk_upsert is not None:
+                await bulk_upsert(zip(embeddings, batch))
+            else:
+                await self.backend.upsert(embeddings, batch)
+            self.checkpoint.mark_chunks_done([chunk["id"] for chunk in batch])
+            stats.chunks_embedded += len(batch)
+            stats.batches_upserted += 1
+        if finished_files:
+            self.checkpoint.mark_files_done(finished_files)
+
+    async def ingest(self, paths: Iterable[str], patterns: Sequence[str] = DEFAULT_PATTERNS) -> IngestionStats:
+        """
+        攝取指定路徑下的所有文件。
+
+        Args:
+            paths (Iterable[str]): 檔案或目錄路徑。
+            patterns (Sequence[str]): 要攝取的檔名 glob 樣式。
+
+        Returns:
+            IngestionStats: 本次執行的統計結果。
+        """
+        stats = IngestionStats()
+        batch: List[Dict[str, Any]] = []
+        batch_hashes = set()
+        finished_files: List[Tuple[Path, Set[str]]] = []
+        for path in iter_files(paths, patterns):
+            stats.files_seen += 1
+            if self.checkpoint.is_file_done(path):
+                stats.files_skipped += 1
+                continue
+            file_hashes: Set[str] = set()
+            for chunk in self.iter_chunks(path):
+                stats.chunks_seen += 1
+                file_hashes.add(chunk["id"])
+                if chunk["id"] in batch_hashes or self.checkpoint.has_chunk(chunk["id"]):
+                    stats.chunks_duplicate += 1
+                    continue
+                batch.append(chunk)
+                batch_hashes.add(chunk["id"])
+                if len(batch) >= self.batch_size:
+                    await self._flush(batch, finished_files, stats)
+                    batch, batch_hashes, finished_files = [], set(), []
+            finished_files.append((path, file_hashes))
+        await self._flush(batch, finished_files, stats)
+
+        # 所有檔案的新版本都已記錄後，才刪除不再被任何檔案引用的舊區塊 (內容可能只是移到了另一個檔案)
+        orphaned = self.checkpoint.orphaned_chunks()
+        if orphaned:
+            await self.backend.delete(orphaned)
+            stats.chunks_deleted += len(orphaned)
+        self.checkpoint.forget_chunks(orphaned)
+        return stats
+
+
+if __name__ == "__main__":
+    """當此檔案作為主腳本執行時，將命令列指定的路徑攝取到配置的記憶體後端。"""
+    import argparse
+    import asyncio
+
+    from ..config.config_manager import config_manager
+
+    parser = argparse.ArgumentParser(description="Ingest runbooks, postmortems and logs into long-term memory.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--checkpoint", default=".ingestion_checkpoint.sqlite")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    pipeline = IngestionPipeline.from_config(
+        config_manager.get_memory_config(), checkpoint_path=args.checkpoint, batch_size=args.batch_size
+    )
+    print(asyncio.run(pipeline.ingest(args.paths)))
@@ -0,0 +1,72 @@
+# src/sre_assistant/memory/instrumented_backend.py
+"""
+此檔案實現了記錄向量後端操作延遲的包裝器。
+
+`InstrumentedBackend` 直接包裝具體後端 (在混合搜尋與查詢快取之內)，
+因此 `sre_vector_search_duration_seconds` 量測的是實際送到後端的搜尋，
+不包含快取命中。
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from ..observability.metrics import SREMetrics
+from .base import VectorBackend
+from .filters import MetadataFilter
+
+
+class InstrumentedBackend(VectorBackend):
+    """
+    以 Prometheus 直方圖記錄 search / search_batch / upsert 延遲的包裝器。
+    """
+
+    def __init__(self, backend: VectorBackend, name: str, metrics: SREMetrics):
+        """
+        初始化量測包裝器。
+
+        Args:
+            backend (VectorBackend): 被包裝的向量後端。
+            name (str): 後端名稱 (指標的 `backend` 標籤)。
+            metrics (SREMetrics): 指標集合。
+        """
+        self.backend = backend
+        self.name = name
+        # 預先取得子指標，每次操作只需一次 observe
+        self._search = metrics.vector_search_duration.get(name, "search")
+        self._search_batch = metrics.vector_search_duration.get(name, "search_batch")
+        self._upsert = metrics.vector_search_duration.get(name, "upsert")
+
+    def __getattr__(self, name: str) -> Any:
+        """未定義的屬性 (例如 `embed`) 委派給被包裝的後端。"""
+        if name == "backend":
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    async def upsert(self, embeddings: List[List[float]], metadata: List[Dict[str, Any]]) -> bool:
+        started = time.perf_counter()
+        try:
+            return await self.backend.upsert(embeddings, metadata)
+        finally:
+            self._upsert.observe(time.perf_counter() - started)
+
+    async def search(self, query_embedding: List[float], k: int = 10,
+                     filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        try:
+            return await self.backend.search(query_embedding, k, filters)
+        finally:
+            self._search.observe(time.perf_counter() - started)
+
+    async def search_batch(self, query_embeddings: List[List[float]], k: int = 10,
+                           filters: Optional[MetadataFilter] = None) -> List[List[Dict[str, Any]]]:
+        started = time.perf_counter()
+        try:
+            return await self.backend.search_batch(query_embeddings, k, filters)
+        finally:
+            self._search_batch.observe(time.perf_counter() - started)
+
+    async def delete(self, ids: List[str]) -> bool:
+        return await self.backend.delete(ids)
+
+    async def health_check(self) -> bool:
+        return await self.backend.health_check()
@@ -0,0 +1,288 @@
+# src/sre_assistant/memory/lexical_index.py
+"""
+此檔案實現了一個增量建立、以陣列儲存倒排列表 (postings) 的 BM25 詞彙索引。
+
+純向量搜尋容易漏掉錯誤碼、Pod 名稱、例外類別名稱 (例如 `NullPointerException`)
+這類需要精確比對的 token。此索引與向量後端並列，在文件 upsert 時同步更新：
+- 每個詞項的 postings 以 `array.array` 儲存 (文件序號與詞頻各一個緊湊陣列)，
+  查詢時以零複製的方式轉為 NumPy 陣列做向量化評分。
+- 刪除採用墓碑標記，失效文件過多時再重建 postings。
+- 記憶體中只保存文件 ID、長度與 postings；每份文件的詞頻與中繼資料 (包含內容) 存放在 SQLite，
+  查詢時只讀取候選文件的中繼資料。設定檔案路徑時索引持久化，重新啟動後從詞頻重建 postings，
+  不需要重新讀取或切詞原始文本。
+- 所有公開方法以一個可重入鎖序列化，可以安全地在執行緒中呼叫 (非同步呼叫者以
+  `asyncio.to_thread` 執行，避免評分與 SQLite 寫入阻塞事件迴圈)。
+"""
+
+import json
+import math
+import re
+import sqlite3
+import threading
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .filters import MetadataFilter, matches
+
+# 保留錯誤碼、Pod 名稱、類別名稱等常見的 SRE 識別字 (可含 . - : / 等連接字元)
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+(?:[.\-:/][A-Za-z0-9_]+)*")
+_SUBTOKEN_SPLIT = re.compile(r"[.\-:/_]+")
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    將文本切分為小寫的詞項。
+
+    含連接字元的識別字 (例如 `checkout-7f9c`) 會同時輸出完整形式與各個子片段，
+    讓 `checkout` 這類部分查詢也能命中。
+
+    Args:
+        text (str): 要切分的文本。
+
+    Yields:
+        str: 詞項。
+    """
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group(0).lower()
+        yield token
+        parts = _SUBTOKEN_SPLIT.split(token)
+        if len(parts) > 1:
+            yield from (part for part in parts if part)
+
+
+class BM25Index:
+    """
+    一個支援增量新增與刪除的 BM25 倒排索引。
+    """
+
+    # 墓碑文件佔全部文件的比例超過此值時觸發壓縮
+    COMPACTION_RATIO = 0.25
+    # 每次從 SQLite 讀取候選中繼資料的文件數
+    METADATA_FETCH_BATCH = 256
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, path: Optional[str] = None):
+        """
+        初始化索引；`path` 指向既有的索引檔時，從中載入文件並重建 postings。
+
+        Args:
+            k1 (float): BM25 的詞頻飽和參數。
+            b (float): BM25 的文件長度正規化參數。
+            path (Optional[str]): 持久化的 SQLite 檔案路徑；None 時只保存在本行程內。
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}  # 詞項 -> (文件序號, 詞頻)
+        # 詞項 -> 文件頻率；墓碑文件在壓縮前仍計入，避免為每份文件保存詞項清單
+        self._df: Dict[str, int] = {}
+        self._doc_lengths = array("i")
+        self._alive = bytearray()
+        self._doc_ids: List[Optional[str]] = []
+        self._id_to_ordinal: Dict[str, int] = {}
+        self._total_length = 0
+        self._tombstones = 0
+        self._lock = threading.RLock()
+
+        # 連線只在持有鎖時使用，因此允許在不同的執行緒中呼叫
+        self._db = sqlite3.connect(path or ":memory:", check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS lexical_docs (id TEXT PRIMARY KEY, terms TEXT, metadata TEXT)")
+        self._db.commit()
+        # 以寫入順序 (rowid) 重建，與增量新增時的文件序號順序一致
+        for doc_id, terms in self._db.execute("SELECT id, terms FROM lexical_docs ORDER BY rowid"):
+            self._index(doc_id, json.loads(terms))
+
+    def __len__(self) -> int:
+        """返回目前存活的文件數。"""
+        return len(self._doc_ids) - self._tombstones
+
+    def _index(self, doc_id: str, frequencies: Dict[str, int]):
+        """將一份文件的詞頻加入記憶體中的 postings。"""
+        ordinal = len(self._doc_ids)
+        for term, tf in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("i"), array("i"))
+            postings[0].append(ordinal)
+            postings[1].append(tf)
+            self._df[term] = self._df.get(term, 0) + 1
+        length = sum(frequencies.values())
+        self._doc_lengths.append(length)
+        self._alive.append(1)
+        self._doc_ids.append(doc_id)
+        self._id_to_ordinal[doc_id] = ordinal
+        self._total_length += length
+
+    def add(self, doc_id: str, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        新增或取代一份文件。
+
+        Args:
+            doc_id (str): 文件的唯一 ID。
+            text (str): 要索引的文本。
+            metadata (Optional[Dict[str, Any]]): 與文件一起返回的中繼資料，也用於過濾。
+        """
+        self.add_many([(doc_id, text, metadata)])
+
+    def add_many(self, documents: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        """
+        新增或取代多份文件，並以一次交易寫入索引檔。
+
+        Args:
+            documents (Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]): (文件 ID, 文本, 中繼資料)。
+        """
+        with self._lock:
+            self._add_many(documents)
+
+    def _add_many(self, documents: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        rows = []
+        for doc_id, text, metadata in documents:
+            if doc_id in self._id_to_ordinal:
+                self._remove(doc_id)
+            frequencies: Dict[str, int] = {}
+            for term in tokenize(text):
+                frequencies[term] = frequencies.get(term, 0) + 1
+            self._index(doc_id, frequencies)
+            rows.append((doc_id, json.dumps(frequencies), json.dumps({**(metadata or {}), "id": doc_id}, default=str)))
+        # 先刪除再插入，讓取代的文件取得新的 rowid (與新的文件序號順序一致)
+        self._db.executemany("DELETE FROM lexical_docs WHERE id = ?", [(row[0],) for row in rows])
+        self._db.executemany("INSERT INTO lexical_docs (id, terms, metadata) VALUES (?, ?, ?)", rows)
+        self._db.commit()
+        self._maybe_compact()
+
+    def _remove(self, doc_id: str) -> bool:
+        """在記憶體中以墓碑標記一份文件；不存在時返回 False。"""
+        ordinal = self._id_to_ordinal.pop(doc_id, None)
+        if ordinal is None:
+            return False
+        self._alive[ordinal] = 0
+        self._total_length -= self._doc_lengths[ordinal]
+        self._doc_ids[ordinal] = None
+        self._tombstones += 1
+        return True
+
+    def _maybe_compact(self):
+        if self._tombstones and self._tombstones > len(self._doc_ids) * self.COMPACTION_RATIO:
+            self._compact()
+
+    def remove(self, doc_ids: List[str]):
+        """
+        以墓碑標記刪除文件，必要時觸發壓縮。
+
+        Args:
+            doc_ids (List[str]): 要刪除的文件 ID。不存在的 ID 會被忽略。
+        """
+        with self._lock:
+            removed = [doc_id for doc_id in doc_ids if self._remove(doc_id)]
+            if removed:
+                self._db.executemany("DELETE FROM lexical_docs WHERE id = ?", [(doc_id,) for doc_id in removed])
+                self._db.commit()
+            self._maybe_compact()
+
+    def compact(self):
+        """
+        重建所有 postings，移除墓碑文件並重新編排文件序號。
+        """
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+        remap = np.full(len(alive), -1, dtype=np.int32)
+        remap[alive] = np.arange(int(alive.sum()), dtype=np.int32)
+        postings: Dict[str, Tuple[array, array]] = {}
+        df: Dict[str, int] = {}
+        for term, (docs, tfs) in self._postings.items():
+            doc_arr = np.frombuffer(docs, dtype=np.int32)
+            keep = alive[doc_arr]
+            if not keep.any():
+                continue
+            postings[term] = (
+                array("i", remap[doc_arr[keep]].tobytes()),
+                array("i", np.frombuffer(tfs, dtype=np.int32)[keep].tobytes()),
+            )
+            df[term] = int(keep.sum())
+            del doc_arr
+        lengths = np.frombuffer(self._doc_lengths, dtype=np.int32)[alive]
+        self._postings = postings
+        self._df = df
+        self._doc_lengths = array("i", lengths.tobytes())
+        self._alive = bytearray(b"\x01" * len(lengths))
+        self._doc_ids = [doc_id for doc_id in self._doc_ids if doc_id is not None]
+        self._id_to_ordinal = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+        self._tombstones = 0
+
+    def _metadata(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """從 SQLite 讀取候選文件的中繼資料。"""
+        fetched = self._db.execute(
+            f"SELECT id, metadata FROM lexical_docs WHERE id IN ({','.join('?' * len(doc_ids))})", doc_ids
+        ).fetchall()
+        return {doc_id: json.loads(meta) for doc_id, meta in fetched}
+
+    def search(self, query: str, k: int = 10,
+               filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """
+        以 BM25 評分搜尋文件。
+
+        Args:
+            query (str): 查詢文本。
+            k (int): 要返回的結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            List[Dict[str, Any]]: 依 BM25 分數由高到低排列、包含 `bm25_score` 的中繼資料。
+        """
+        with self._lock:
+            return self._search(query, k, filters)
+
+    def _search(self, query: str, k: int, filters: Optional[MetadataFilter]) -> List[Dict[str, Any]]:
+        live_docs = len(self)
+        if not live_docs or k <= 0:
+            return []
+        terms = set(tokenize(query))
+        scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+        doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.int32)
+        average_length = max(self._total_length / live_docs, 1.0)
+        for term in terms:
+            postings = self._postings.get(term)
+            df = min(self._df.get(term, 0), live_docs)
+            if postings is None or df == 0:
+                continue
+            idf = math.log(1 + (live_docs - df + 0.5) / (df + 0.5))
+            docs = np.frombuffer(postings[0], dtype=np.int32)
+            tfs = np.frombuffer(postings[1], dtype=np.int32).astype(np.float32)
+            # 同一詞項的 postings 中文件序號不重複，可直接以花式索引累加
+            length_norm = self.k1 * (1 - self.b + self.b * doc_lengths[docs] / average_length)
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + length_norm)
+            del docs
+        del doc_lengths
+        if self._tombstones:
+            scores[np.frombuffer(self._alive, dtype=np.uint8) == 0] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        # 先以 argpartition 取出較小的候選集；過濾後不足 k 筆時再逐步擴大
+        limit = k if not filters else k * 4
+        while True:
+            if limit < len(candidates):
+                top = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            else:
+                top = candidates
+            ordered = top[np.argsort(-scores[top], kind="stable")]
+            results = []
+            for start in range(0, len(ordered), self.METADATA_FETCH_BATCH):
+                chunk = ordered[start:start + self.METADATA_FETCH_BATCH]
+                metadata = self._metadata([self._doc_ids[ordinal] for ordinal in chunk])
+                for ordinal in chunk:
+                    meta = metadata.get(self._doc_ids[ordinal])
+                    if meta is None or (filters and not matches(meta, filters)):
+                        continue
+                    results.append({**meta, "bm25_score": float(scores[ordinal])})
+                    if len(results) >= k:
+                        return results
+            if len(top) == len(candidates):
+                return results
+            limit *= 4
+
+    def close(self):
+        """關閉索引檔。"""
+        with self._lock:
+            self._db.close()
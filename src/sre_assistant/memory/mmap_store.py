@@ -0,0 +1,69 @@
+# src/sre_assistant/memory/mmap_store.py
+"""
+此檔案提供本地磁碟型向量後端共用的記憶體映射 (memory-mapped) 檔案工具。
+
+以 `np.memmap` 開啟的陣列不需要在啟動時載入或重建：作業系統會在第一次存取時
+才把需要的頁面讀入，新的副本 (replica) 開啟檔案後即可立即服務查詢。
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+def open_memmap(directory: str, name: str, dtype, capacity: int, width: Optional[int] = None) -> np.memmap:
+    """
+    開啟 (必要時創建或擴充) 一個以列為單位成長的記憶體映射檔案。
+
+    Args:
+        directory (str): 檔案所在目錄。
+        name (str): 檔名 (不含副檔名)。
+        dtype: 元素型別。
+        capacity (int): 需要的列數；檔案較小時會以零填充擴充。
+        width (Optional[int]): 每列的元素數；None 表示一維陣列。
+
+    Returns:
+        np.memmap: 可讀寫的記憶體映射陣列。
+    """
+    file_path = os.path.join(directory, f"{name}.bin")
+    shape = (capacity,) if width is None else (capacity, width)
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    with open(file_path, "ab") as f:
+        if f.tell() < size:
+            f.truncate(size)
+    return np.memmap(file_path, dtype=dtype, mode="r+", shape=shape)
+
+
+def load_state(directory: str) -> Dict[str, Any]:
+    """
+    讀取儲存在 `state.json` 中的索引狀態。
+
+    Args:
+        directory (str): 索引目錄。
+
+    Returns:
+        Dict[str, Any]: 狀態字典；檔案不存在時返回空字典。
+    """
+    path = os.path.join(directory, "state.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(directory: str, state: Dict[str, Any]):
+    """
+    以「寫入暫存檔再改名」的方式原子性地儲存索引狀態，
+    讓同時開啟索引的其他行程不會讀到寫到一半的檔案。
+
+    Args:
+        directory (str): 索引目錄。
+        state (Dict[str, Any]): 要儲存的狀態。
+    """
+    path = os.path.join(directory, "state.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
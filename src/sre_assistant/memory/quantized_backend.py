@@ -0,0 +1,402 @@
+# src/sre_assistant/memory/quantized_backend.py
+"""
+此檔案實現了一個以壓縮碼儲存向量、適合大型知識庫的本地向量數據庫後端。
+
+768 維 float32 的 500 萬個區塊約需 15 GB 記憶體，超出 Cloud Run 的實例規格。
+`QuantizedBackend` 只將壓縮碼常駐在記憶體中：
+- **int8 純量量化**: 每個向量以自身的最大絕對值縮放為 int8，壓縮率 4 倍，不需訓練。
+- **乘積量化 (PQ)**: 將向量切為 m 個子向量，每個子向量以 256 個質心之一的索引 (1 byte) 表示，
+  壓縮率為 `4 * dimension / m` 倍 (例如 768 維、m=192 時為 16 倍)，需先以樣本訓練質心。
+  未明確呼叫 `train()` 時，先只寫入全精度向量 (搜尋時精確掃描)，累積到足以訓練的向量數後
+  自動以已寫入的向量訓練並編碼，因此可以經由小批次的攝取管線寫入。
+
+搜尋時以非對稱距離 (asymmetric distance，查詢向量保持全精度) 在 NumPy 中分塊掃描所有壓縮碼，
+再對前 `rerank_candidates` 個候選以全精度向量重新評分。全精度向量、壓縮碼與中繼資料都在磁碟上
+(`np.memmap` 與 SQLite)，只有重新評分時才會讀取少量的全精度向量。
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import VectorBackend
+from .filters import MetadataFilter, matches
+from .mmap_store import open_memmap
+from ..config.config_manager import MemoryConfig
+
+SUPPORTED_QUANTIZATIONS = ("int8", "pq")
+
+
+def train_pq_codebooks(vectors: np.ndarray, subvectors: int, centroids: int = 256,
+                       iterations: int = 12, seed: int = 0) -> np.ndarray:
+    """
+    以 k-means 為每個子空間訓練乘積量化的質心。
+
+    Args:
+        vectors (np.ndarray): 形狀為 (n, dimension) 的訓練樣本。
+        subvectors (int): 子向量數 m，`dimension` 必須可被其整除。
+        centroids (int): 每個子空間的質心數 (最多 256，使碼可以存成 uint8)。
+        iterations (int): Lloyd 迭代次數。
+        seed (int): 亂數種子。
+
+    Raises:
+        ValueError: 如果維度無法整除或樣本數少於質心數。
+
+    Returns:
+        np.ndarray: 形狀為 (m, centroids, dimension / m) 的質心。
+    """
+    n, dimension = vectors.shape
+    if dimension % subvectors:
+        raise ValueError(f"embedding_dimension {dimension} is not divisible by pq_subvectors {subvectors}")
+    if n < centroids:
+        raise ValueError(f"PQ training needs at least {centroids} vectors, got {n}")
+    rng = np.random.default_rng(seed)
+    width = dimension // subvectors
+    codebooks = np.empty((subvectors, centroids, width), dtype=np.float32)
+    for j in range(subvectors):
+        data = vectors[:, j * width:(j + 1) * width]
+        centers = data[rng.choice(n, centroids, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = _nearest(data, centers)
+            counts = np.bincount(assignment, minlength=centroids)
+            sums = np.stack([np.bincount(assignment, weights=data[:, d], minlength=centroids)
+                             for d in range(width)], axis=1)
+            empty = counts == 0
+            centers[~empty] = (sums[~empty] / counts[~empty, None]).astype(np.float32)
+            # 空的群集以隨機樣本重新播種，避免質心浪費
+            centers[empty] = data[rng.choice(n, int(empty.sum()), replace=False)]
+        codebooks[j] = centers
+    return codebooks
+
+
+def _nearest(data: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """返回每個資料點最近 (歐氏距離) 的質心索引；資料點自身的範數不影響排序，故省略。"""
+    return (data @ (-2 * centers.T) + (centers ** 2).sum(1)).argmin(1)
+
+
+class QuantizedBackend(VectorBackend):
+    """
+    以 int8 或 PQ 壓縮碼儲存向量、並以全精度向量重新評分的本地向量後端。
+    """
+
+    # 檔案的初始容量 (列數)，之後以倍增方式成長
+    INITIAL_CAPACITY = 4096
+    # 每次非對稱距離掃描的列數：int8 需轉為 float32 暫存，區塊小一點可留在 CPU 快取中
+    INT8_SCAN_CHUNK_ROWS = 2048
+    PQ_SCAN_CHUNK_ROWS = 16384
+    # 訓練 PQ 質心時使用的最大樣本數 (約為每個質心 40 個樣本)
+    PQ_TRAINING_SAMPLE = 10240
+    # 每個子空間的質心數，也是自動訓練前需要累積的最少向量數
+    PQ_CENTROIDS = 256
+    # 訓練後重新編碼已寫入向量時，每次讀入記憶體的列數
+    ENCODE_CHUNK_ROWS = 65536
+
+    def __init__(self, config: MemoryConfig):
+        """
+        初始化 (或重新開啟) 壓縮向量儲存。
+
+        Args:
+            config (MemoryConfig): 包含維度、儲存路徑與量化參數的配置。
+
+        Raises:
+            ValueError: 如果量化方式、相似度度量或 PQ 參數不被支援。
+        """
+        if config.quantization not in SUPPORTED_QUANTIZATIONS:
+            raise ValueError(f"Unsupported quantization: {config.quantization}")
+        if config.similarity_metric not in ("cosine", "dot"):
+            raise ValueError(f"Unsupported similarity metric: {config.similarity_metric}")
+        if config.quantization == "pq" and config.embedding_dimension % config.pq_subvectors:
+            raise ValueError("embedding_dimension must be divisible by pq_subvectors")
+
+        self.path = config.quantized_store_path
+        self.dimension = config.embedding_dimension
+        self.metric = config.similarity_metric
+        self.quantization = config.quantization
+        self.subvectors = config.pq_subvectors
+        self.rerank_candidates = config.rerank_candidates
+        self.code_size = self.dimension if self.quantization == "int8" else self.subvectors
+        os.makedirs(self.path, exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(self.path, "metadata.sqlite"))
+        self._db.execute("CREATE TABLE IF NOT EXISTS docs (row INTEGER PRIMARY KEY, id TEXT UNIQUE, metadata TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+        state = dict(self._db.execute("SELECT key, value FROM state").fetchall())
+        self._size = int(state.get("size", 0))
+        capacity = max(self.INITIAL_CAPACITY, self._size)
+
+        self._codes = self._open("codes", np.int8 if self.quantization == "int8" else np.uint8,
+                                 capacity, self.code_size)
+        self._scales = self._open("scales", np.float32, capacity)
+        self._alive = self._open("alive", np.bool_, capacity)
+        self._vectors = self._open("vectors", np.float32, capacity, self.dimension)
+
+        codebook_path = os.path.join(self.path, "codebooks.npy")
+        self.codebooks: Optional[np.ndarray] = np.load(codebook_path) if os.path.exists(codebook_path) else None
+
+    def _open(self, name: str, dtype, capacity: int, width: Optional[int] = None) -> np.memmap:
+        """開啟此儲存目錄下的一個記憶體映射檔案。"""
+        return open_memmap(self.path, name, dtype, capacity, width)
+
+    def _ensure_capacity(self, required: int):
+        """容量不足時以倍增方式擴充所有映射檔案。"""
+        capacity = self._alive.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(capacity * 2, required)
+        for array in (self._codes, self._scales, self._alive, self._vectors):
+            array.flush()
+        self._codes = self._open("codes", self._codes.dtype, new_capacity, self.code_size)
+        self._scales = self._open("scales", np.float32, new_capacity)
+        self._alive = self._open("alive", np.bool_, new_capacity)
+        self._vectors = self._open("vectors", np.float32, new_capacity, self.dimension)
+
+    def __len__(self) -> int:
+        """返回目前存活的向量數量。"""
+        return int(self._alive[:self._size].sum())
+
+    @property
+    def memory_bytes(self) -> int:
+        """掃描時需要常駐於記憶體的資料大小 (位元組)，不含磁碟上的全精度向量。"""
+        scale_bytes = 4 if self.quantization == "int8" else 0
+        return self._size * (self.code_size + scale_bytes + 1)
+
+    def train(self, vectors: List[List[float]]):
+        """
+        以樣本訓練 PQ 質心並儲存到磁碟，再以新的質心編碼已寫入的向量；int8 量化不需要訓練。
+
+        Args:
+            vectors (List[List[float]]): 訓練樣本，建議數萬筆、與實際資料同分佈。
+
+        Raises:
+            ValueError: 如果樣本數少於 `PQ_CENTROIDS`。
+        """
+        if self.quantization != "pq":
+            return
+        sample = np.asarray(vectors, dtype=np.float32)
+        if len(sample) > self.PQ_TRAINING_SAMPLE:
+            rng = np.random.default_rng(0)
+            sample = sample[rng.choice(len(sample), self.PQ_TRAINING_SAMPLE, replace=False)]
+        self.codebooks = train_pq_codebooks(self._prepare(sample), self.subvectors, self.PQ_CENTROIDS)
+        np.save(os.path.join(self.path, "codebooks.npy"), self.codebooks)
+        # 分塊重新編碼已寫入的向量，避免把整個全精度記憶體映射檔讀入記憶體
+        for start in range(0, self._size, self.ENCODE_CHUNK_ROWS):
+            end = min(start + self.ENCODE_CHUNK_ROWS, self._size)
+            self._codes[start:end] = self._encode(np.asarray(self._vectors[start:end]))[0]
+
+    def _train_from_stored(self):
+        """PQ 尚未訓練且已累積足夠的向量時，以已寫入的存活向量訓練質心。"""
+        if self.quantization != "pq" or self.codebooks is not None:
+            return
+        alive = np.flatnonzero(self._alive[:self._size])
+        if len(alive) >= self.PQ_CENTROIDS:
+            if len(alive) > self.PQ_TRAINING_SAMPLE:
+                alive = np.sort(np.random.default_rng(0).choice(alive, self.PQ_TRAINING_SAMPLE, replace=False))
+            self.train(np.asarray(self._vectors[alive]))
+
+    def _prepare(self, matrix: np.ndarray) -> np.ndarray:
+        """餘弦相似度時將向量正規化，使內積即為餘弦相似度。"""
+        if self.metric != "cosine":
+            return matrix
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    def _encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        將向量編碼為壓縮碼。
+
+        Args:
+            matrix (np.ndarray): 已正規化的向量矩陣。
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (壓縮碼, int8 的每向量縮放係數；PQ 時為 1)。
+        """
+        if self.quantization == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        width = self.dimension // self.subvectors
+        codes = np.empty((len(matrix), self.subvectors), dtype=np.uint8)
+        for j in range(self.subvectors):
+            codes[:, j] = _nearest(matrix[:, j * width:(j + 1) * width], self.codebooks[j])
+        return codes, np.ones(len(matrix), dtype=np.float32)
+
+    async def upsert(self, embeddings: List[List[float]],
+                    metadata: List[Dict[str, Any]]) -> bool:
+        """
+        插入或更新向量；PQ 模式尚未訓練時只寫入全精度向量，累積到 `PQ_CENTROIDS` 筆後自動訓練並編碼。
+
+        Args:
+            embeddings (List[List[float]]): 要插入的向量列表。
+            metadata (List[Dict[str, Any]]): 與每個向量對應的中繼資料列表。
+
+        Raises:
+            ValueError: 如果向量維度不符。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        if len(embeddings) != len(metadata):
+            raise ValueError("embeddings and metadata must have the same length")
+        if not len(embeddings):
+            return True
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != self.dimension:
+            raise ValueError(f"Embedding dimension mismatch: expected {self.dimension}, got {matrix.shape[-1]}")
+        matrix = self._prepare(matrix)
+
+        ids = [str(meta.get("id") or uuid.uuid4()) for meta in metadata]
+        existing = dict(self._db.execute(
+            f"SELECT id, row FROM docs WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall())
+        rows = []
+        for doc_id in ids:
+            row = existing.get(doc_id)
+            if row is None:
+                row = existing[doc_id] = self._size
+                self._size += 1
+            rows.append(row)
+        self._ensure_capacity(self._size)
+
+        rows_array = np.asarray(rows)
+        if self.quantization == "int8" or self.codebooks is not None:
+            codes, scales = self._encode(matrix)
+            self._codes[rows_array] = codes
+            self._scales[rows_array] = scales
+        self._vectors[rows_array] = matrix
+        self._alive[rows_array] = True
+        self._db.executemany(
+            "INSERT OR REPLACE INTO docs (row, id, metadata) VALUES (?, ?, ?)",
+            [(row, doc_id, json.dumps({**meta, "id": doc_id}, default=str))
+             for row, doc_id, meta in zip(rows, ids, metadata)],
+        )
+        self._db.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('size', ?)", (str(self._size),))
+        self._db.commit()
+        self._train_from_stored()
+        return True
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        以非對稱距離分塊掃描所有壓縮碼，返回近似的內積分數。
+
+        Args:
+            query (np.ndarray): 已正規化的全精度查詢向量。
+
+        Returns:
+            np.ndarray: 每個已用列的近似分數，已刪除的列為 -inf；PQ 尚未訓練時為全精度的精確分數。
+        """
+        scores = np.empty(self._size, dtype=np.float32)
+        if self.quantization == "pq" and self.codebooks is None:
+            # 尚未累積足以訓練的向量，資料量很小，直接精確掃描全精度向量
+            scores[:] = np.asarray(self._vectors[:self._size]) @ query
+        elif self.quantization == "int8":
+            buffer = np.empty((self.INT8_SCAN_CHUNK_ROWS, self.dimension), dtype=np.float32)
+            for start in range(0, self._size, self.INT8_SCAN_CHUNK_ROWS):
+                end = min(start + self.INT8_SCAN_CHUNK_ROWS, self._size)
+                block = buffer[:end - start]
+                np.copyto(block, self._codes[start:end], casting="unsafe")
+                scores[start:end] = (block @ query) * self._scales[start:end]
+        else:
+            width = self.dimension // self.subvectors
+            # 查詢表：每個子空間中查詢子向量與 256 個質心的內積
+            lut = np.einsum("mcw,mw->mc", self.codebooks, query.reshape(self.subvectors, width))
+            for start in range(0, self._size, self.PQ_SCAN_CHUNK_ROWS):
+                end = min(start + self.PQ_SCAN_CHUNK_ROWS, self._size)
+                # 轉置為子空間優先的連續陣列，讓每次查表都是連續讀取
+                codes = np.ascontiguousarray(self._codes[start:end].T)
+                chunk = np.zeros(end - start, dtype=np.float32)
+                for j in range(self.subvectors):
+                    chunk += lut[j].take(codes[j])
+                scores[start:end] = chunk
+        scores[~np.asarray(self._alive[:self._size])] = -np.inf
+        return scores
+
+    def _metadata(self, rows: List[int]) -> Dict[int, Dict[str, Any]]:
+        """從 SQLite 讀取指定列的中繼資料。"""
+        if not rows:
+            return {}
+        fetched = self._db.execute(
+            f"SELECT row, metadata FROM docs WHERE row IN ({','.join('?' * len(rows))})", rows
+        ).fetchall()
+        return {row: json.loads(meta) for row, meta in fetched}
+
+    async def search(self, query_embedding: List[float],
+                    k: int = 10,
+                    filters: Optional[MetadataFilter] = None) -> List[Dict[str, Any]]:
+        """
+        以壓縮碼找出候選，再以全精度向量重新評分。
+
+        中繼資料存放在磁碟上，因此過濾條件在候選集上套用；候選不足 k 筆時
+        會逐步擴大候選集，直到掃描完所有符合近似分數的列。
+
+        Args:
+            query_embedding (List[float]): 用於查詢的單個向量。
+            k (int): 要返回的相似結果數量。
+            filters (Optional[MetadataFilter]): 中繼資料過濾表達式。
+
+        Returns:
+            List[Dict[str, Any]]: 包含中繼資料、`id` 與 `similarity` 分數的結果列表。
+        """
+        if not self._size or k <= 0:
+            return []
+        query = self._prepare(np.asarray([query_embedding], dtype=np.float32))[0]
+        scores = self._approximate_scores(query)
+        live = int(np.isfinite(scores).sum())
+        pool = min(max(self.rerank_candidates, k), live)
+        while pool > 0:
+            candidates = np.argpartition(-scores, pool - 1)[:pool] if pool < len(scores) else np.arange(len(scores))
+            candidates = np.sort(candidates[np.isfinite(scores[candidates])])
+            metadata = self._metadata(candidates.tolist())
+            if filters:
+                candidates = np.asarray([row for row in candidates if matches(metadata[row], filters)], dtype=np.int64)
+            if len(candidates) >= k or pool >= live:
+                break
+            pool = min(pool * 4, live)
+        if not len(candidates):
+            return []
+        # 重新評分：只讀取候選列的全精度向量 (依列號排序以利順序讀取)
+        exact = np.asarray(self._vectors[candidates]) @ query
+        order = np.argsort(-exact, kind="stable")[:k]
+        return [{**metadata[int(candidates[i])], "similarity": float(exact[i])} for i in order]
+
+    async def delete(self, ids: List[str]) -> bool:
+        """
+        刪除向量：標記為失效並移除其中繼資料 (磁碟空間在重新建立索引前不會回收)。
+
+        Args:
+            ids (List[str]): 要刪除的向量 ID 列表。
+
+        Returns:
+            bool: 操作是否成功。
+        """
+        ids = [str(doc_id) for doc_id in ids]
+        if not ids:
+            return True
+        placeholders = ",".join("?" * len(ids))
+        rows = [row for (row,) in self._db.execute(f"SELECT row FROM docs WHERE id IN ({placeholders})", ids)]
+        if rows:
+            self._alive[np.asarray(rows)] = False
+        self._db.execute(f"DELETE FROM docs WHERE id IN ({placeholders})", ids)
+        self._db.commit()
+        return True
+
+    def flush(self):
+        """將映射檔案的變更寫回磁碟。"""
+        for array in (self._codes, self._scales, self._alive, self._vectors):
+            array.flush()
+
+    async def health_check(self) -> bool:
+        """
+        檢查中繼資料資料庫是否可用。
+
+        Returns:
+            bool: 如果可以查詢，返回 True。
+        """
+        try:
+            return self._db.execute("SELECT 1").fetchone() == (1,)
+        except sqlite3.Error:
+            return False
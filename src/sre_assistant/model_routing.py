@@ -0,0 +1,233 @@
+# src/sre_assistant/model_routing.py
+"""
+此檔案實現了工作流程中各 LLM 代理的模型分級與路由 `ModelRouter`。
+
+分析與驗證代理處理的是大量、格式固定的摘要工作，快速經濟的模型已足夠；
+只有少數決策 (例如 P0 事件的分診) 值得使用較大的模型。路由分為兩層：
+- **靜態分級**: 建立代理時，依 `agent_tiers` (未列出者為 `default_tier`) 決定代理的預設模型。
+- **逐請求路由**: 以 ADK 的 `before_model_callback` 讀取會話狀態，覆寫 `llm_request.model`：
+  - `incident_severity` 命中 `severity_overrides` 時改用覆寫的分級 (例如 P0 的分診器使用 pro)。
+  - 代理名稱出現在 `model_escalation` 狀態中時改用 `escalation_tier`；
+    分診器只在 LLM 分診決策的信心不足時設定此狀態，重新分診一次。
+
+每次完整回應以 `after_model_callback` 記錄該路由 (代理 × 分級) 的延遲，
+並依 token 用量與 `model_costs` 估算成本，匯出為
+`sre_llm_route_duration_seconds{agent,tier}` 與 `sre_llm_route_cost_usd{agent,tier}`。
+"""
+
+import time
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from google.adk.models import LlmRequest, LlmResponse
+from opentelemetry import trace
+
+from .observability.metrics import metrics as default_metrics
+
+# 工作流程執行時寫入事件嚴重程度 (SeverityLevel 的值，例如 "P0") 的狀態鍵
+SEVERITY_STATE_KEY = "incident_severity"
+# 需要升級模型的代理名稱清單的狀態鍵
+ESCALATION_STATE_KEY = "model_escalation"
+# 等待 before/after 配對的呼叫上限 (模型呼叫拋出例外或快取命中時不會呼叫 after 回呼)
+MAX_PENDING_CALLS = 1024
+
+
+class ModelRouter:
+    """
+    依代理、事件嚴重程度與升級狀態選擇模型的路由器。
+    """
+
+    def __init__(self, tiers: Mapping[str, str], default_tier: str = "fast",
+                 agent_tiers: Optional[Mapping[str, str]] = None,
+                 severity_overrides: Optional[Mapping[str, Mapping[str, str]]] = None,
+                 escalation_tier: Optional[str] = None,
+                 model_costs: Optional[Mapping[str, Mapping[str, float]]] = None,
+                 enabled: bool = True, metrics=None):
+        """
+        初始化路由器。
+
+        Args:
+            tiers (Mapping[str, str]): 分級名稱到模型名稱。
+            default_tier (str): 未列在 `agent_tiers` 的代理使用的分級。
+            agent_tiers (Optional[Mapping[str, str]]): 代理名稱到分級。
+            severity_overrides (Optional[Mapping[str, Mapping[str, str]]]): 嚴重程度到 (代理名稱到分級) 的覆寫。
+            escalation_tier (Optional[str]): 升級使用的分級；None 表示不升級。
+            model_costs (Optional[Mapping[str, Mapping[str, float]]]): 模型名稱到每百萬 token 的
+                `input` / `output` 美元價格；未列出的模型不估算成本。
+            enabled (bool): 是否啟用逐請求路由；停用時代理只使用靜態分級的模型。
+            metrics (SREMetrics): 指標集合；預設為服務的指標單例。
+
+        Raises:
+            ValueError: 如果引用了未定義的分級。
+        """
+        self.tiers = dict(tiers)
+        self.default_tier = default_tier
+        self.agent_tiers = dict(agent_tiers or {})
+        self.severity_overrides = {k: dict(v) for k, v in (severity_overrides or {}).items()}
+        self.escalation_tier = escalation_tier
+        self.model_costs = {k: dict(v) for k, v in (model_costs or {}).items()}
+        self.enabled = enabled
+        self.metrics = metrics or default_metrics
+
+        referenced = {default_tier, *self.agent_tiers.values()}
+        referenced.update(t for overrides in self.severity_overrides.values() for t in overrides.values())
+        if escalation_tier:
+            referenced.add(escalation_tier)
+        if unknown := referenced - set(self.tiers):
+            raise ValueError(f"Unknown model tiers: {sorted(unknown)}")
+
+        self._pending: Dict[Tuple[str, str], Tuple[str, str, float]] = {}
+        self.stats = {"requests": 0, "severity_overrides": 0, "escalations": 0, "cost_usd": 0.0}
+
+    @classmethod
+    def from_config(cls, config, default_model: str) -> "ModelRouter":
+        """
+        根據 `ModelRoutingConfig` 創建路由器。
+
+        Args:
+            config (ModelRoutingConfig): 模型路由配置。
+            default_model (str): 未指定模型的分級使用的模型 (頂層的 `llm_model`)。
+
+        Returns:
+            ModelRouter: 路由器實例。
+        """
+        return cls(
+            tiers={tier: model or default_model for tier, model in config.tiers.items()},
+            default_tier=config.default_tier,
+            agent_tiers=config.agent_tiers,
+            severity_overrides=config.severity_overrides,
+            escalation_tier=config.escalation_tier,
+            model_costs=config.model_costs,
+            enabled=config.enabled,
+        )
+
+    # --- 路由 ---
+
+    def tier_for(self, agent_name: str, state: Optional[Mapping[str, Any]] = None) -> Tuple[str, str]:
+        """
+        決定代理此次請求使用的分級。
+
+        Args:
+            agent_name (str): 代理名稱。
+            state (Optional[Mapping[str, Any]]): 會話狀態；None 時只依靜態分級決定。
+
+        Returns:
+            Tuple[str, str]: (分級, 原因)；原因為 "static"、"severity" 或 "escalation"。
+        """
+        tier, reason = self.agent_tiers.get(agent_name, self.default_tier), "static"
+        if state is None:
+            return tier, reason
+        severity = state.get(SEVERITY_STATE_KEY)
+        override = self.severity_overrides.get(str(severity), {}).get(agent_name) if severity else None
+        if override is not None:
+            tier, reason = override, "severity"
+        if self.escalation_tier and agent_name in (state.get(ESCALATION_STATE_KEY) or ()):
+            tier, reason = self.escalation_tier, "escalation"
+        return tier, reason
+
+    def model_for(self, agent_name: str) -> str:
+        """代理的預設 (靜態分級) 模型，用於建立代理。"""
+        return self.tiers[self.tier_for(agent_name)[0]]
+
+    def cost(self, model: str, usage: Any) -> float:
+        """
+        依 token 用量估算一次呼叫的成本。
+
+        Args:
+            model (str): 模型名稱。
+            usage (Any): 回應的 `usage_metadata`；None 時成本為 0。
+
+        Returns:
+            float: 估算的美元成本。
+        """
+        price = self.model_costs.get(model)
+        if price is None or usage is None:
+            return 0.0
+        return ((usage.prompt_token_count or 0) * price.get("input", 0.0)
+                + (usage.candidates_token_count or 0) * price.get("output", 0.0)) / 1_000_000
+
+    # --- 掛載 ---
+
+    def attach(self, agent) -> bool:
+        """
+        為一個 LLM 代理掛上路由回呼 (放在既有模型回呼之前，快取以路由後的模型計算鍵)。
+
+        Args:
+            agent (LlmAgent): 要路由的代理。
+
+        Returns:
+            bool: 是否已掛上；停用路由或非 LLM 代理返回 False。
+        """
+        if not self.enabled or not hasattr(agent, "before_model_callback"):
+            return False
+        for field, callback in (("before_model_callback", self.before_model_callback),
+                                ("after_model_callback", self.after_model_callback)):
+            existing = getattr(agent, field, None)
+            callbacks = list(existing) if isinstance(existing, list) else ([existing] if existing else [])
+            if callback not in callbacks:
+                setattr(agent, field, [callback] + callbacks)
+        return True
+
+    def attach_to_tree(self, root) -> List[str]:
+        """
+        為代理樹中所有 LLM 代理掛上路由回呼。
+
+        Args:
+            root (BaseAgent): 代理樹的根。
+
+        Returns:
+            List[str]: 已掛上路由的代理名稱。
+        """
+        attached = []
+        stack = [root]
+        while stack:
+            agent = stack.pop()
+            if self.attach(agent):
+                attached.append(agent.name)
+            stack.extend(getattr(agent, "sub_agents", None) or [])
+        return attached
+
+    # --- ADK 模型回呼 ---
+
+    def before_model_callback(self, callback_context, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        """ADK `before_model_callback`：依會話狀態覆寫請求的模型；返回 None 讓模型照常呼叫。"""
+        agent = callback_context.agent_name
+        tier, reason = self.tier_for(agent, callback_context.state)
+        model = self.tiers[tier]
+        if reason != "static":
+            self.stats["escalations" if reason == "escalation" else "severity_overrides"] += 1
+            print(f"ModelRouter: '{agent}' routed to {tier} ({model}) by {reason}.")
+        llm_request.model = model
+        self.stats["requests"] += 1
+        span = trace.get_current_span()
+        span.set_attribute("sre.llm.tier", tier)
+        span.set_attribute("sre.llm.route_reason", reason)
+        if len(self._pending) >= MAX_PENDING_CALLS:
+            self._pending.clear()
+        self._pending[(callback_context.invocation_id, agent)] = (tier, model, time.monotonic())
+        return None
+
+    def after_model_callback(self, callback_context, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        """ADK `after_model_callback`：完整回應時記錄路由的延遲與成本；返回 None 保留原本的回應。"""
+        if llm_response.partial:
+            return None
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if pending is None:
+            return None
+        tier, model, started = pending
+        cost = self.cost(model, llm_response.usage_metadata)
+        self.stats["cost_usd"] += cost
+        self.metrics.observe_model_route(callback_context.agent_name, tier, time.monotonic() - started, cost)
+        return None
+
+
+def severity_state(severity: Optional[str]) -> Dict[str, Any]:
+    """
+    產生執行開始時寫入會話狀態的事件嚴重程度。
+
+    Args:
+        severity (Optional[str]): SeverityLevel 的值 (例如 "P0")；None 時清除先前事件留下的值。
+
+    Returns:
+        Dict[str, Any]: 傳給 `Runner.run_async(state_delta=...)` 的狀態差異。
+    """
+    return {SEVERITY_STATE_KEY: severity, ESCALATION_STATE_KEY: []}
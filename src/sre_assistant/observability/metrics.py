@@ -0,0 +1,314 @@
+# src/sre_assistant/observability/metrics.py
+"""
+此檔案定義了 SRE Assistant 以 Prometheus 格式匯出的指標。
+
+涵蓋 HTTP 請求延遲、工作流程執行時間、各代理 (階段) 的時間、工具呼叫延遲、
+各後端的向量搜尋延遲、佇列深度與執行中的執行數、LLM token 計數，
+分診快速路徑的命中率與節省的延遲、LLM 回應快取的命中率與節省的 token，
+以及各模型路由 (代理 × 分級) 的延遲與估算成本。
+
+為了讓量測的成本遠低於被量測的工作：
+- 子指標 (一組標籤值) 在 `_Children` 中快取，已知的標籤組合在建構時預先建立；
+  熱路徑上只有一次字典查詢與一次 `observe`，不會每次呼叫 `labels()` (加鎖與字串轉換)。
+- 佇列深度與執行中的執行數以回呼量測 (`Gauge.set_function`)，只在 Prometheus 抓取時計算。
+- 各代理的時間由執行登錄已記錄的階段時間在執行結束時一次寫入，不在每個串流事件上量測。
+- HTTP 中介層為純 ASGI 中介層，路由標籤使用路由樣板 (例如 `/runs/{run_id}`) 以限制基數。
+
+多工作行程 (`server.serve`) 時，每個工作行程各有自己的計數器，`/metrics` 只會回到其中一個行程。
+設定 `PROMETHEUS_MULTIPROC_DIR` 環境變數 (必須在行程啟動前設定，prometheus_client 在匯入時決定)
+即啟用 prometheus_client 的多行程模式：各行程將數值寫入該目錄，匯出時以 `MultiProcessCollector`
+彙總所有工作行程。量規 (gauge) 無法在多行程模式下以回呼量測，改由背景工作定期寫入。
+"""
+
+import asyncio
+import glob
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+
+# 請求、工具與向量搜尋的延遲桶 (秒)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 工作流程與代理階段的時間桶 (秒)：LLM 驅動的階段從數秒到數分鐘
+RUN_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+RUN_STATUSES = ("succeeded", "failed")
+TOKEN_TYPES = ("prompt", "completion")
+VECTOR_OPERATIONS = ("search", "search_batch", "upsert")
+DISPATCH_PATHS = ("fast_path", "llm")
+LLM_CACHE_RESULTS = ("exact", "semantic", "coalesced", "miss")
+
+# 工具計時中尚未結束的呼叫上限 (工具拋出例外時不會呼叫 after 回呼)
+MAX_PENDING_TOOL_CALLS = 1024
+# 多行程模式下，背景寫入佇列量規的間隔 (秒)
+GAUGE_REFRESH_SECONDS = 5.0
+
+
+def multiprocess_dir() -> Optional[str]:
+    """返回 prometheus_client 多行程模式的目錄；未啟用時返回 None。"""
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def clear_stale_metrics():
+    """
+    在 fork 工作行程之前移除先前行程留下的指標檔 (例如容器重新啟動後沿用的目錄)，
+    避免已結束行程的計數被重複彙總。本行程的檔案保留。
+    """
+    path = multiprocess_dir()
+    if path is None:
+        return
+    own = f"_{os.getpid()}.db"
+    for file in glob.glob(os.path.join(path, "*.db")):
+        if not file.endswith(own):
+            os.remove(file)
+
+
+def mark_worker_dead(pid: int):
+    """工作行程結束時移除其即時 (live) 量規的數值；計數器與直方圖保留，讓總數不會倒退。"""
+    if multiprocess_dir() is not None:
+        multiprocess.mark_process_dead(pid)
+
+
+class _Children:
+    """以標籤值元組快取子指標；預先建立已知的標籤組合。"""
+
+    def __init__(self, metric, preallocate: Iterable[Tuple] = ()):
+        self.metric = metric
+        self._cache: Dict[Tuple, Any] = {}
+        for labels in preallocate:
+            self.get(*labels)
+
+    def get(self, *labels):
+        child = self._cache.get(labels)
+        if child is None:
+            child = self._cache[labels] = self.metric.labels(*labels)
+        return child
+
+
+class SREMetrics:
+    """
+    SRE Assistant 的 Prometheus 指標集合。
+    """
+
+    def __init__(self, registry: Optional[CollectorRegistry] = None, agents: Iterable[str] = (),
+                 backends: Iterable[str] = ()):
+        """
+        建立指標並預先配置已知的標籤組合。
+
+        Args:
+            registry (Optional[CollectorRegistry]): 指標註冊表；預設建立獨立的註冊表。
+            agents (Iterable[str]): 預先配置的代理名稱。
+            backends (Iterable[str]): 預先配置的向量後端名稱。
+        """
+        self.registry = registry or CollectorRegistry()
+        agents, backends = tuple(agents), tuple(backends)
+
+        self.http_request_duration = _Children(Histogram(
+            "sre_http_request_duration_seconds", "HTTP request latency.",
+            ["method", "route", "status"], buckets=LATENCY_BUCKETS, registry=self.registry))
+        self.run_duration = _Children(Histogram(
+            "sre_workflow_run_duration_seconds", "Workflow run duration from start to finish.",
+            ["status"], buckets=RUN_BUCKETS, registry=self.registry), [(s,) for s in RUN_STATUSES])
+        self.phase_duration = _Children(Histogram(
+            "sre_agent_phase_duration_seconds", "Duration of each agent (phase) inside a workflow run.",
+            ["agent"], buckets=RUN_BUCKETS, registry=self.registry), [(a,) for a in agents])
+        self.tool_call_duration = _Children(Histogram(
+            "sre_tool_call_duration_seconds", "Tool call latency.",
+            ["tool", "outcome"], buckets=LATENCY_BUCKETS, registry=self.registry))
+        self.vector_search_duration = _Children(Histogram(
+            "sre_vector_search_duration_seconds", "Vector backend operation latency.",
+            ["backend", "operation"], buckets=LATENCY_BUCKETS, registry=self.registry),
+            [(b, op) for b in backends for op in VECTOR_OPERATIONS])
+        self.llm_tokens = _Children(Counter(
+            "sre_llm_tokens", "LLM tokens consumed.",
+            ["agent", "type"], registry=self.registry), [(a, t) for a in agents for t in TOKEN_TYPES])
+        self.dispatch_duration = _Children(Histogram(
+            "sre_dispatch_duration_seconds", "Dispatcher phase duration by path (rule-table fast path or LLM).",
+            ["path"], buckets=LATENCY_BUCKETS, registry=self.registry), [(p,) for p in DISPATCH_PATHS])
+        self.dispatch_latency_saved = Counter(
+            "sre_dispatch_latency_saved_seconds", "Estimated dispatcher latency saved by the fast path.",
+            registry=self.registry)
+        self.llm_cache_lookups = _Children(Counter(
+            "sre_llm_cache_lookups", "LLM response cache lookups by result (exact / semantic / coalesced hit, miss).",
+            ["agent", "result"], registry=self.registry), [(a, r) for a in agents for r in LLM_CACHE_RESULTS])
+        self.llm_cache_tokens_saved = _Children(Counter(
+            "sre_llm_cache_tokens_saved", "LLM tokens (prompt + completion) not spent thanks to cache hits.",
+            ["agent"], registry=self.registry), [(a,) for a in agents])
+        self.llm_route_duration = _Children(Histogram(
+            "sre_llm_route_duration_seconds", "LLM call latency by agent and model tier.",
+            ["agent", "tier"], buckets=LATENCY_BUCKETS, registry=self.registry))
+        self.llm_route_cost = _Children(Counter(
+            "sre_llm_route_cost_usd", "Estimated LLM cost (USD) by agent and model tier.",
+            ["agent", "tier"], registry=self.registry))
+        # 佇列深度來自共用的工作儲存，取最近一次寫入；執行中的執行數為所有工作行程的總和
+        self.queue_depth = Gauge("sre_job_queue_depth", "Queued jobs last observed in the job store.",
+                                 registry=self.registry, multiprocess_mode="livemostrecent")
+        self.runs_in_flight = Gauge("sre_runs_in_flight", "Workflow runs executing on this replica.",
+                                    registry=self.registry, multiprocess_mode="livesum")
+        self._tool_starts: Dict[str, float] = {}
+        self._gauge_refresher: Optional[asyncio.Task] = None
+
+    # --- 記錄 ---
+
+    def observe_http(self, method: str, route: str, status: int, seconds: float):
+        self.http_request_duration.get(method, route, status).observe(seconds)
+
+    def observe_run(self, status: str, seconds: float):
+        self.run_duration.get(status).observe(seconds)
+
+    def observe_phase(self, agent: str, seconds: float):
+        self.phase_duration.get(agent).observe(seconds)
+
+    def observe_vector(self, backend: str, operation: str, seconds: float):
+        self.vector_search_duration.get(backend, operation).observe(seconds)
+
+    def observe_dispatch(self, path: str, seconds: float, saved_seconds: float = 0.0):
+        """
+        記錄一次分診的耗時；快速路徑命中時累加估算節省的延遲。
+
+        Args:
+            path (str): "fast_path" 或 "llm"；依路徑的計數即快速路徑命中率。
+            seconds (float): 分診耗時。
+            saved_seconds (float): 相較呼叫 LLM 分診器估算節省的秒數。
+        """
+        self.dispatch_duration.get(path).observe(seconds)
+        if saved_seconds > 0:
+            self.dispatch_latency_saved.inc(saved_seconds)
+
+    def observe_llm_cache(self, agent: str, result: str, tokens_saved: int = 0):
+        """
+        記錄一次 LLM 回應快取查詢。
+
+        Args:
+            agent (str): 發出請求的代理。
+            result (str): "exact"、"semantic"、"coalesced" (命中) 或 "miss"。
+            tokens_saved (int): 命中時，原回應消耗的 token 數。
+        """
+        self.llm_cache_lookups.get(agent, result).inc()
+        if tokens_saved:
+            self.llm_cache_tokens_saved.get(agent).inc(tokens_saved)
+
+    def observe_model_route(self, agent: str, tier: str, seconds: float, cost_usd: float = 0.0):
+        """
+        記錄一次經模型路由的 LLM 呼叫。
+
+        Args:
+            agent (str): 發出請求的代理。
+            tier (str): 路由選擇的模型分級。
+            seconds (float): 從送出請求到完整回應的耗時。
+            cost_usd (float): 依 token 用量與模型價格估算的成本。
+        """
+        self.llm_route_duration.get(agent, tier).observe(seconds)
+        if cost_usd > 0:
+            self.llm_route_cost.get(agent, tier).inc(cost_usd)
+
+    def add_tokens(self, agent: str, usage: Any):
+        """
+        累加一個 LLM 回應的 token 用量。
+
+        Args:
+            agent (str): 產生回應的代理。
+            usage (Any): ADK 事件的 `usage_metadata` (GenerateContentResponseUsageMetadata)。
+        """
+        if usage.prompt_token_count:
+            self.llm_tokens.get(agent, "prompt").inc(usage.prompt_token_count)
+        if usage.candidates_token_count:
+            self.llm_tokens.get(agent, "completion").inc(usage.candidates_token_count)
+
+    def bind_queue(self, snapshot: Callable[[], Dict[str, Any]]):
+        """
+        以工作佇列的統計回呼量測佇列深度與執行中的執行數 (只在抓取時計算)。
+
+        多行程模式下改由背景工作每 `GAUGE_REFRESH_SECONDS` 秒寫入一次 (需要執行中的事件迴圈)。
+
+        Args:
+            snapshot (Callable): 返回 `JobQueue.snapshot()` 格式統計的函式。
+        """
+        if multiprocess_dir() is None:
+            self.queue_depth.set_function(lambda: snapshot()["pending"])
+            self.runs_in_flight.set_function(lambda: snapshot()["running"])
+            return
+
+        async def refresh():
+            while True:
+                stats = snapshot()
+                self.queue_depth.set(stats["pending"])
+                self.runs_in_flight.set(stats["running"])
+                await asyncio.sleep(GAUGE_REFRESH_SECONDS)
+
+        if self._gauge_refresher is not None:
+            self._gauge_refresher.cancel()
+        self._gauge_refresher = asyncio.get_running_loop().create_task(refresh())
+
+    # --- ADK 工具回呼 ---
+
+    def before_tool_callback(self, tool, args, tool_context):
+        """ADK `before_tool_callback`：記錄工具呼叫的開始時間；返回 None 讓工具照常執行。"""
+        if len(self._tool_starts) >= MAX_PENDING_TOOL_CALLS:
+            self._tool_starts.clear()
+        self._tool_starts[tool_context.function_call_id] = time.perf_counter()
+        return None
+
+    def after_tool_callback(self, tool, args, tool_context, tool_response):
+        """ADK `after_tool_callback`：記錄工具呼叫延遲；返回 None 保留原本的工具回應。"""
+        started = self._tool_starts.pop(tool_context.function_call_id, None)
+        if started is not None:
+            outcome = "error" if isinstance(tool_response, dict) and tool_response.get("error") else "ok"
+            self.tool_call_duration.get(tool.name, outcome).observe(time.perf_counter() - started)
+        return None
+
+    # --- 匯出 ---
+
+    def render(self) -> Tuple[bytes, str]:
+        """
+        以 Prometheus 文字格式匯出所有指標；多行程模式下彙總所有工作行程。
+
+        Returns:
+            Tuple[bytes, str]: 內容與 Content-Type。
+        """
+        path = multiprocess_dir()
+        if path is None:
+            return generate_latest(self.registry), CONTENT_TYPE_LATEST
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=path)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    記錄每個 HTTP 請求延遲的純 ASGI 中介層。
+    """
+
+    def __init__(self, app, metrics: SREMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.metrics.observe_http(scope["method"], getattr(route, "path", "unmatched"), status_code,
+                                      time.perf_counter() - started)
+
+
+# 服務使用的指標單例；預先配置工作流程的代理與支援的向量後端
+metrics = SREMetrics(
+    agents=("MetricsAnalyzer", "LogAnalyzer", "TraceAnalyzer", "IntelligentDispatcher", "RemediationExecutor",
+            "HealthCheckAgent", "SLOValidationAgent", "EnhancedSREWorkflow"),
+    backends=("weaviate", "postgresql", "vertex_ai", "memory", "quantized", "hnsw", "chroma"),
+)
@@ -0,0 +1,317 @@
+# src/sre_assistant/observability/tracing.py
+"""
+此檔案實現了 SRE Assistant 的 OpenTelemetry 端到端追蹤 (SPEC 7.5)。
+
+ADK 本身已為每次執行建立 `invocation`、`agent_run [代理]`、`call_llm` 與 `execute_tool` 跨度；
+本模組在此基礎上：
+- **根跨度**: 每次工作流程執行建立 `sre.workflow.run` 跨度，並接續來自 HTTP 請求
+  (W3C `traceparent`) 或 `SRERequest.trace_id` 的追蹤上下文。工作會先排入佇列，
+  因此上下文以載體 (carrier) 字典隨工作 payload 傳遞。
+- **ADK 回呼**: 透過 before/after agent、model、tool 回呼為 ADK 的跨度加上屬性：
+  代理名稱、LLM 的首個 token 時間 (TTFT)、總延遲、token 數與錯誤狀態。
+- **批次匯出與頭尾取樣**: 以 `BatchSpanProcessor` 批次匯出；頭部取樣依追蹤 ID 保留固定比例，
+  尾部取樣在本地根跨度結束時，保留含錯誤或超過延遲門檻的追蹤，讓追蹤在生產環境中可以常駐。
+"""
+
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON
+from opentelemetry.trace import NonRecordingSpan, SpanContext, Status, StatusCode, TraceFlags
+
+from ..config.config_manager import TracingConfig
+
+tracer = trace.get_tracer("sre_assistant")
+
+# 屬性值的長度上限 (例如工具參數)，避免跨度過大
+MAX_ATTRIBUTE_LENGTH = 1024
+# 追蹤中尚未結束的 LLM 呼叫上限 (LLM 拋出例外時不會呼叫 after 回呼)
+MAX_PENDING_LLM_CALLS = 1024
+# 64 位元的 TraceIdRatioBased 取樣邊界
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+
+class TailSamplingSpanProcessor(BatchSpanProcessor):
+    """
+    結合頭部與尾部取樣的批次跨度處理器。
+
+    - 頭部取樣的追蹤 (依追蹤 ID 決定，所有副本結果一致) 與上游已取樣的追蹤直接進入批次匯出。
+      上游是否已取樣在本地根跨度開始時對整個追蹤記錄一次，其本地子跨度也隨之匯出。
+    - 其餘追蹤的跨度先暫存，本地根跨度結束時，若任一跨度為錯誤或根跨度超過延遲門檻則整批匯出，否則丟棄。
+    """
+
+    def __init__(self, exporter: SpanExporter, head_sample_ratio: float = 0.1,
+                 latency_threshold_ms: float = 15000.0, max_buffered_traces: int = 1024,
+                 **batch_options):
+        """
+        初始化取樣處理器。
+
+        Args:
+            exporter (SpanExporter): 跨度匯出器。
+            head_sample_ratio (float): 頭部取樣比例 (0.0 - 1.0)。
+            latency_threshold_ms (float): 根跨度超過此延遲時保留整個追蹤。
+            max_buffered_traces (int): 暫存中的追蹤上限，超過時丟棄最舊者。
+            **batch_options: 傳給 `BatchSpanProcessor` 的批次參數。
+        """
+        super().__init__(exporter, **batch_options)
+        self.head_bound = round(head_sample_ratio * _TRACE_ID_LIMIT)
+        self.latency_threshold_ns = latency_threshold_ms * 1e6
+        self.max_buffered_traces = max_buffered_traces
+        self._buffers: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        # 本地根跨度的遠端父跨度已被上游取樣的追蹤 ID
+        self._remote_sampled: "OrderedDict[int, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"head_sampled": 0, "tail_sampled": 0, "dropped": 0}
+
+    def on_start(self, span, parent_context=None) -> None:
+        if span.parent is not None and span.parent.is_remote and span.parent.trace_flags.sampled:
+            with self._lock:
+                self._remote_sampled[span.context.trace_id] = None
+                self._remote_sampled.move_to_end(span.context.trace_id)
+                while len(self._remote_sampled) > self.max_buffered_traces:
+                    self._remote_sampled.popitem(last=False)
+        super().on_start(span, parent_context)
+
+    def _head_sampled(self, span: ReadableSpan) -> bool:
+        """與 `TraceIdRatioBased` 相同的判斷；由上游已取樣的遠端父跨度開始的追蹤也視為保留。"""
+        if span.context.trace_id in self._remote_sampled:
+            return True
+        return (span.context.trace_id & _TRACE_ID_LIMIT) < self.head_bound
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if self._head_sampled(span):
+            if span.parent is None or span.parent.is_remote:
+                self.stats["head_sampled"] += 1
+            super().on_end(span)
+            return
+        trace_id = span.context.trace_id
+        with self._lock:
+            spans = self._buffers.get(trace_id)
+            if spans is None:
+                spans = self._buffers[trace_id] = []
+                while len(self._buffers) > self.max_buffered_traces:
+                    self._buffers.popitem(last=False)
+                    self.stats["dropped"] += 1
+            spans.append(span)
+            if span.parent is not None and not span.parent.is_remote:
+                return
+            # 本地根跨度結束：做尾部取樣決定
+            del self._buffers[trace_id]
+        keep = (span.end_time - span.start_time >= self.latency_threshold_ns
+                or any(s.status.status_code == StatusCode.ERROR for s in spans))
+        if not keep:
+            self.stats["dropped"] += 1
+            return
+        self.stats["tail_sampled"] += 1
+        for buffered in spans:
+            super().on_end(buffered)
+
+
+def _create_exporter(config: TracingConfig) -> SpanExporter:
+    """根據配置創建匯出器；OTLP 匯出器只在選用時才匯入。"""
+    if config.exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter(endpoint=config.otlp_endpoint) if config.otlp_endpoint else OTLPSpanExporter()
+    if config.exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    raise ValueError(f"Unsupported trace exporter: {config.exporter}")
+
+
+def setup_tracing(config: TracingConfig, exporter: Optional[SpanExporter] = None) -> Optional[TracerProvider]:
+    """
+    根據配置安裝全域的 TracerProvider (ADK 的跨度也會經由它匯出)。
+
+    取樣器記錄所有跨度 (包含上游未取樣者，讓錯誤與慢速的追蹤仍能被尾部取樣保留)，
+    實際保留哪些追蹤由 `TailSamplingSpanProcessor` 決定。
+
+    Args:
+        config (TracingConfig): 追蹤配置。
+        exporter (Optional[SpanExporter]): 覆寫配置的匯出器 (例如測試用的記憶體匯出器)。
+
+    Raises:
+        ValueError: 如果配置了不受支援的匯出器。
+
+    Returns:
+        Optional[TracerProvider]: 已安裝的 provider；追蹤停用時返回 None。
+    """
+    if not config.enabled:
+        return None
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": config.service_name}),
+        sampler=ALWAYS_ON,
+    )
+    provider.add_span_processor(TailSamplingSpanProcessor(
+        exporter or _create_exporter(config),
+        head_sample_ratio=config.head_sample_ratio,
+        latency_threshold_ms=config.tail_latency_threshold_ms,
+        max_buffered_traces=config.max_buffered_traces,
+        max_queue_size=config.max_queue_size,
+        max_export_batch_size=config.max_export_batch_size,
+        schedule_delay_millis=config.schedule_delay_millis,
+    ))
+    trace.set_tracer_provider(provider)
+    print(f"Tracing enabled: exporter={config.exporter}, head_sample_ratio={config.head_sample_ratio}, "
+          f"tail_latency_threshold_ms={config.tail_latency_threshold_ms}")
+    return provider
+
+
+# --- 追蹤上下文的傳遞 ---
+
+def trace_carrier(headers: Optional[Dict[str, str]] = None, trace_id: Optional[str] = None) -> Dict[str, str]:
+    """
+    產生隨工作 payload 傳遞的追蹤上下文載體。
+
+    優先使用 HTTP 標頭中的 W3C `traceparent`；沒有時以 `SRERequest.trace_id`
+    (32 位十六進位，可含連字號) 作為追蹤 ID，讓執行的跨度併入上游的追蹤。
+
+    Args:
+        headers (Optional[Dict[str, str]]): 請求標頭。
+        trace_id (Optional[str]): 呼叫端提供的追蹤 ID。
+
+    Returns:
+        Dict[str, str]: W3C 追蹤上下文載體；沒有上下文時為空字典。
+    """
+    ctx = propagate.extract(headers or {})
+    if not trace.get_current_span(ctx).get_span_context().is_valid and trace_id:
+        try:
+            trace_id_int = int(trace_id.replace("-", ""), 16)
+        except ValueError:
+            trace_id_int = 0
+        if 0 < trace_id_int < (1 << 128):
+            parent = SpanContext(trace_id=trace_id_int, span_id=random.getrandbits(64), is_remote=True,
+                                 trace_flags=TraceFlags(TraceFlags.DEFAULT))
+            ctx = trace.set_span_in_context(NonRecordingSpan(parent))
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier, context=ctx)
+    return carrier
+
+
+def context_from_carrier(carrier: Optional[Dict[str, str]]) -> otel_context.Context:
+    """由載體還原追蹤上下文。"""
+    return propagate.extract(carrier or {})
+
+
+def record_error(span: trace.Span, error: BaseException):
+    """將例外記錄到跨度並標記為錯誤 (尾部取樣會保留此追蹤)。"""
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+def _truncate(value: Any) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return text[:MAX_ATTRIBUTE_LENGTH]
+
+
+# --- ADK 回呼 ---
+
+class ADKTracingCallbacks:
+    """
+    為 ADK 的代理、模型與工具跨度加上屬性的回呼集合。
+
+    ADK 在呼叫 agent / tool 回呼時，對應的 `agent_run` / `execute_tool` 跨度已是目前跨度；
+    after_model 回呼在 `call_llm` 跨度內被呼叫，before_model 則在其外，因此 LLM 呼叫的
+    開始時間以 (invocation_id, 代理名稱) 為鍵暫存。
+    """
+
+    def __init__(self):
+        self._llm_calls: Dict[Tuple[str, str], List[Optional[float]]] = {}
+
+    def before_agent_callback(self, callback_context):
+        span = trace.get_current_span()
+        span.set_attribute("sre.agent.name", callback_context.agent_name)
+        span.set_attribute("sre.invocation_id", callback_context.invocation_id)
+        return None
+
+    def after_agent_callback(self, callback_context):
+        trace.get_current_span().add_event("sre.agent.completed", {"sre.agent.name": callback_context.agent_name})
+        return None
+
+    def before_model_callback(self, callback_context, llm_request):
+        if len(self._llm_calls) >= MAX_PENDING_LLM_CALLS:
+            self._llm_calls.clear()
+        # [開始時間, 首個回應時間]
+        self._llm_calls[(callback_context.invocation_id, callback_context.agent_name)] = [time.perf_counter(), None]
+        return None
+
+    def after_model_callback(self, callback_context, llm_response):
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        timing = self._llm_calls.get(key)
+        span = trace.get_current_span()
+        now = time.perf_counter()
+        if timing is not None and timing[1] is None:
+            timing[1] = now
+            span.set_attribute("sre.llm.ttft_ms", (now - timing[0]) * 1000)
+        if getattr(llm_response, "error_code", None):
+            span.set_status(Status(StatusCode.ERROR, f"{llm_response.error_code}: {llm_response.error_message}"))
+        if getattr(llm_response, "partial", False):
+            return None
+        self._llm_calls.pop(key, None)
+        span.set_attribute("sre.agent.name", callback_context.agent_name)
+        if timing is not None:
+            span.set_attribute("sre.llm.duration_ms", (now - timing[0]) * 1000)
+        usage = getattr(llm_response, "usage_metadata", None)
+        if usage is not None:
+            span.set_attribute("sre.llm.prompt_tokens", usage.prompt_token_count or 0)
+            span.set_attribute("sre.llm.completion_tokens", usage.candidates_token_count or 0)
+        return None
+
+    def before_tool_callback(self, tool, args, tool_context):
+        span = trace.get_current_span()
+        span.set_attribute("sre.tool.name", tool.name)
+        span.set_attribute("sre.tool.args", _truncate(args))
+        return None
+
+    def after_tool_callback(self, tool, args, tool_context, tool_response):
+        if isinstance(tool_response, dict) and tool_response.get("error"):
+            trace.get_current_span().set_status(Status(StatusCode.ERROR, _truncate(tool_response["error"])))
+        return None
+
+
+def _append_callback(agent, field: str, callback):
+    """將回呼附加到代理既有的回呼之後 (重複附加時忽略)。"""
+    existing = getattr(agent, field, None)
+    callbacks = list(existing) if isinstance(existing, list) else ([existing] if existing else [])
+    if callback not in callbacks:
+        callbacks.append(callback)
+        setattr(agent, field, callbacks)
+
+
+def instrument_agent_tree(root, callbacks: "ADKTracingCallbacks") -> int:
+    """
+    為代理樹中的每個代理附加追蹤回呼；LLM 代理另外附加 model 與 tool 回呼。
+
+    Args:
+        root (BaseAgent): 代理樹的根 (例如 `EnhancedSREWorkflow`)。
+        callbacks (ADKTracingCallbacks): 追蹤回呼。
+
+    Returns:
+        int: 被附加回呼的代理數。
+    """
+    count = 0
+    stack = [root]
+    while stack:
+        agent = stack.pop()
+        _append_callback(agent, "before_agent_callback", callbacks.before_agent_callback)
+        _append_callback(agent, "after_agent_callback", callbacks.after_agent_callback)
+        if hasattr(agent, "before_model_callback"):
+            _append_callback(agent, "before_model_callback", callbacks.before_model_callback)
+            _append_callback(agent, "after_model_callback", callbacks.after_model_callback)
+            _append_callback(agent, "before_tool_callback", callbacks.before_tool_callback)
+            _append_callback(agent, "after_tool_callback", callbacks.after_tool_callback)
+        count += 1
+        stack.extend(getattr(agent, "sub_agents", None) or [])
+    return count
+
+
+# 工作流程使用的追蹤回呼單例
+adk_tracing = ADKTracingCallbacks()
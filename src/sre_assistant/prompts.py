@@ -46,3 +46,20 @@ GLOBAL_SRE_PROMPT = """
 
 你的目標是確保整個流程順暢、高效且安全地執行。在每個步驟中，你都需要清晰地傳遞上下文資訊給下一個專家，並記錄下關鍵決策。
 """
+
+
+# --- 診斷代理提示 (Diagnostic Agent Prompts) ---
+
+# DIAGNOSTIC_FINDINGS_FORMAT
+#
+# 目標 (Goal):
+#   要求指標、日誌與追蹤分析代理以結構化的 JSON 回報發現，讓診斷聚合
+#   (`sub_agents/diagnostic_aggregation.py`) 能去重、合併互相佐證的發現並依嚴重程度排序。
+#
+# 用法 (Usage):
+#   附加在各分析代理的指令之後。聚合器無法解析 JSON 時會退回逐行解析純文字。
+DIAGNOSTIC_FINDINGS_FORMAT = """
+只輸出一個 JSON 物件，不要加上其他說明文字，格式如下：
+{"findings": [{"summary": "一句話描述的發現", "severity": "P0|P1|P2|P3", "component": "受影響的服務或元件", "evidence": ["支持此發現的具體數據、日誌行或追蹤片段"]}]}
+每項發現只描述一個問題，依嚴重程度由高到低排列，最多五項。
+"""
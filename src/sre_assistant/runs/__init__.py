@@ -0,0 +1 @@
+# 此檔案為空，用以將目錄標記為一個 Python 套件。
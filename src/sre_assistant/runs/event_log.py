@@ -0,0 +1,220 @@
+# src/sre_assistant/runs/event_log.py
+"""
+此檔案實現了跨行程共用的執行事件日誌，讓 `RunEventBroker` 的觀看者不必連到執行該工作的行程。
+
+預先 fork 的工作行程 (以及多個副本) 各自執行不同的工作，觀看者的請求通常落在另一個行程上。
+執行工作的行程在本地扇出之外，也把事件批次寫入共用的日誌；其他行程的訂閱者輪詢日誌讀取：
+- **SQLite** (`SQLiteRunEventLog`): 同一主機上的工作行程共用一個 WAL 模式的檔案。
+- **Redis Streams** (`RedisRunEventLog`): 跨副本共用；每個執行一個串流，以事件序號作為串流 ID。
+
+事件序號與本地日誌相同，`Last-Event-ID` 續傳與 `gap` 事件的語意不變。
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+from .events import RunEvent
+
+# SQLite 日誌清除過期事件的最短間隔 (秒)
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+class RunEventLog:
+    """
+    執行事件日誌的介面。
+    """
+
+    async def append(self, events: List[RunEvent]):
+        """依序寫入一批事件 (可能屬於不同的執行)。"""
+        raise NotImplementedError
+
+    async def read(self, run_id: str, from_id: int, limit: int) -> List[RunEvent]:
+        """
+        讀取一個執行中序號不小於 `from_id` 的事件。
+
+        Args:
+            run_id (str): 執行 ID。
+            from_id (int): 第一個要讀取的序號。
+            limit (int): 最多讀取的事件數。
+
+        Returns:
+            List[RunEvent]: 依序號排序的事件；較舊的事件被裁剪時，第一個事件的序號會大於 `from_id`。
+        """
+        raise NotImplementedError
+
+    async def last_id(self, run_id: str) -> Optional[int]:
+        """返回一個執行最後一個事件的序號；沒有事件時返回 None。"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class SQLiteRunEventLog(RunEventLog):
+    """
+    以 SQLite 檔案在同一主機的工作行程之間共用事件。
+    """
+
+    def __init__(self, path: str, retention_seconds: float = 900.0):
+        """
+        初始化 SQLite 事件日誌；連線在第一次使用時 (fork 之後) 建立。
+
+        Args:
+            path (str): SQLite 檔案路徑。
+            retention_seconds (float): 事件的保留秒數。
+        """
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._next_purge = 0.0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """返回本行程的連線；fork 出的工作行程第一次使用時重新連線。"""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS run_events (run_id TEXT NOT NULL, id INTEGER NOT NULL, "
+                "type TEXT NOT NULL, data TEXT NOT NULL, timestamp REAL NOT NULL, PRIMARY KEY (run_id, id))"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS run_events_ts_idx ON run_events (timestamp)")
+        return self._connection
+
+    async def _run(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    async def append(self, events: List[RunEvent]):
+        now = time.time()
+        purge_before = now - self.retention_seconds if now >= self._next_purge else None
+        if purge_before is not None:
+            self._next_purge = now + PURGE_INTERVAL_SECONDS
+
+        def insert():
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO run_events VALUES (?, ?, ?, ?, ?)",
+                    [(e.run_id, e.id, e.type, json.dumps(e.data, default=str), e.timestamp) for e in events])
+                if purge_before is not None:
+                    self._conn.execute("DELETE FROM run_events WHERE timestamp < ?", (purge_before,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        await self._run(insert)
+
+    async def read(self, run_id: str, from_id: int, limit: int) -> List[RunEvent]:
+        def query():
+            return self._conn.execute(
+                "SELECT id, type, data, timestamp FROM run_events WHERE run_id = ? AND id >= ? ORDER BY id LIMIT ?",
+                (run_id, from_id, limit)).fetchall()
+        return [RunEvent(id=row[0], run_id=run_id, type=row[1], data=json.loads(row[2]), timestamp=row[3])
+                for row in await self._run(query)]
+
+    async def last_id(self, run_id: str) -> Optional[int]:
+        def query():
+            return self._conn.execute("SELECT MAX(id) FROM run_events WHERE run_id = ?", (run_id,)).fetchone()
+        return (await self._run(query))[0]
+
+    async def close(self):
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+
+
+class RedisRunEventLog(RunEventLog):
+    """
+    以 Redis Streams 在副本之間共用事件。
+    同步的 Redis 客戶端在執行緒中呼叫，避免阻塞事件迴圈。
+    """
+
+    def __init__(self, client: Any, max_events_per_run: int = 2000, retention_seconds: float = 900.0,
+                 prefix: str = "sre:run-events"):
+        """
+        初始化 Redis 事件日誌。
+
+        Args:
+            client (Any): `redis.Redis` 客戶端。
+            max_events_per_run (int): 每個執行的串流保留的事件數上限。
+            retention_seconds (float): 串流在最後一次寫入後的保留秒數。
+            prefix (str): 串流鍵的前綴。
+        """
+        self.redis = client
+        self.max_events_per_run = max_events_per_run
+        self.retention_seconds = retention_seconds
+        self.prefix = prefix
+
+    def _key(self, run_id: str) -> str:
+        return f"{self.prefix}:{run_id}"
+
+    @staticmethod
+    def _stream_id(event_id: int) -> str:
+        # 事件序號作為串流 ID 的序列部分 (0-0 不是合法的串流 ID，因此加 1)
+        return f"0-{event_id + 1}"
+
+    async def append(self, events: List[RunEvent]):
+        def write():
+            pipe = self.redis.pipeline()
+            for e in events:
+                pipe.xadd(self._key(e.run_id),
+                          {"type": e.type, "data": json.dumps(e.data, default=str), "timestamp": e.timestamp},
+                          id=self._stream_id(e.id), maxlen=self.max_events_per_run, approximate=True)
+            for run_id in {e.run_id for e in events}:
+                pipe.expire(self._key(run_id), int(self.retention_seconds))
+            pipe.execute()
+        await asyncio.to_thread(write)
+
+    async def read(self, run_id: str, from_id: int, limit: int) -> List[RunEvent]:
+        entries = await asyncio.to_thread(self.redis.xrange, self._key(run_id), self._stream_id(from_id), "+", limit)
+        events = []
+        for stream_id, fields in entries:
+            fields = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+                      for k, v in fields.items()}
+            stream_id = stream_id.decode() if isinstance(stream_id, bytes) else stream_id
+            events.append(RunEvent(id=int(stream_id.split("-")[1]) - 1, run_id=run_id, type=fields["type"],
+                                   data=json.loads(fields["data"]), timestamp=float(fields["timestamp"])))
+        return events
+
+    async def last_id(self, run_id: str) -> Optional[int]:
+        entries = await asyncio.to_thread(self.redis.xrevrange, self._key(run_id), "+", "-", 1)
+        if not entries:
+            return None
+        stream_id = entries[0][0]
+        stream_id = stream_id.decode() if isinstance(stream_id, bytes) else stream_id
+        return int(stream_id.split("-")[1]) - 1
+
+    async def close(self):
+        await asyncio.to_thread(self.redis.close)
+
+
+def create_run_event_log(config) -> Optional[RunEventLog]:
+    """
+    根據配置創建事件日誌。
+
+    Args:
+        config (RunStoreConfig): 執行登錄配置。
+
+    Returns:
+        Optional[RunEventLog]: 事件日誌；`events_backend` 為 memory 時返回 None (事件只在執行工作的行程內)。
+    """
+    from ..config.config_manager import RunEventBackend
+
+    if config.events_backend == RunEventBackend.SQLITE:
+        return SQLiteRunEventLog(config.events_sqlite_path, config.events_retention_seconds)
+    if config.events_backend == RunEventBackend.REDIS:
+        from redis import Redis
+        return RedisRunEventLog(Redis.from_url(config.events_redis_url),
+                                retention_seconds=config.events_retention_seconds)
+    return None
@@ -0,0 +1,392 @@
+# src/sre_assistant/runs/events.py
+"""
+此檔案實現了工作流程執行事件的發布/訂閱中心，供 SSE 與 WebSocket 端點串流使用。
+
+每個執行 (run) 有一份有界、僅附加的事件日誌，事件以遞增的序號編號：
+- **扇出 (fan-out)**: 多個觀看者共享同一份日誌，工作流程只執行一次。
+- **背壓 (backpressure)**: 發布者從不等待訂閱者；每個訂閱者只持有自己的讀取游標，
+  依自己的速度消費。落後超過日誌保留範圍的訂閱者會收到 `gap` 事件後跳到最舊的事件，
+  因此慢速客戶端不會讓記憶體無限成長，也不會拖慢工作流程。
+- **斷線續傳**: 客戶端以 `Last-Event-ID` 帶回最後收到的序號，即可從下一個事件繼續。
+- **跨行程**: 設定共用的事件日誌 (`runs.events_backend`) 時，發布者在背景將事件批次寫入日誌，
+  訂閱者從日誌讀取，因此觀看者的請求落在未執行該工作的工作行程或副本上也能收到事件。
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from .event_log import RunEventLog
+
+# 每次從事件日誌讀取的事件數上限
+LOG_READ_BATCH = 500
+# 寫入事件日誌失敗後重試的初始與最長等待秒數 (指數退避)
+FLUSH_RETRY_INITIAL_SECONDS = 0.1
+FLUSH_RETRY_MAX_SECONDS = 5.0
+# 事件日誌持續無法寫入時，待寫入事件的上限；超過時丟棄最舊的非終止事件 (訂閱者會收到 gap 事件)
+MAX_OUTBOX_EVENTS = 10000
+
+
+class RunEvent(BaseModel):
+    """串流給客戶端的一個執行事件。"""
+    id: int
+    run_id: str
+    type: str
+    data: Dict[str, Any] = Field(default_factory=dict)
+    timestamp: float = Field(default_factory=time.time)
+
+    def to_sse(self) -> str:
+        """格式化為 Server-Sent Events 訊框。"""
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=str)}\n\n"
+
+
+class _RunStream:
+    """單一執行的事件日誌與喚醒機制。"""
+
+    def __init__(self, max_events: int):
+        self.events: Deque[RunEvent] = deque(maxlen=max_events)
+        self.next_id = 0
+        self.closed = False
+        self.closed_at: Optional[float] = None
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.touched_at = time.time()
+
+    @property
+    def first_id(self) -> int:
+        return self.events[0].id if self.events else self.next_id
+
+    def notify(self):
+        """喚醒目前所有等待中的訂閱者；之後的等待者使用新的 Event。"""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class RunEventBroker:
+    """
+    執行事件中心；未設定事件日誌時只在行程內傳遞事件。
+    """
+
+    def __init__(self, max_events_per_run: int = 2000, max_closed_runs: int = 1000,
+                 retention_seconds: float = 900.0, log: Optional["RunEventLog"] = None,
+                 poll_seconds: float = 0.25, idle_seconds: float = 600.0):
+        """
+        初始化事件中心。
+
+        Args:
+            max_events_per_run (int): 每個執行保留的事件數上限 (續傳的最大範圍)。
+            max_closed_runs (int): 保留的已結束執行數上限，超過時淘汰最早結束者。
+            retention_seconds (float): 已結束執行的事件保留秒數，供晚到的觀看者重播。
+            log (Optional[RunEventLog]): 跨行程共用的事件日誌；None 時事件只在本行程內。
+            poll_seconds (float): 使用事件日誌時，訂閱者輪詢日誌的間隔。
+            idle_seconds (float): 只被訂閱、從未發布事件的未結束串流在沒有訂閱者後的保留秒數。
+        """
+        self.max_events_per_run = max_events_per_run
+        self.max_closed_runs = max_closed_runs
+        self.retention_seconds = retention_seconds
+        self.log = log
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self._streams: "OrderedDict[str, _RunStream]" = OrderedDict()
+        self._outbox: List[RunEvent] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, config) -> "RunEventBroker":
+        """
+        根據 `RunStoreConfig` 創建事件中心。
+
+        Args:
+            config (RunStoreConfig): 執行登錄配置。
+
+        Returns:
+            RunEventBroker: 事件中心實例。
+        """
+        from .event_log import create_run_event_log
+        return cls(retention_seconds=config.events_retention_seconds, log=create_run_event_log(config),
+                   poll_seconds=config.events_poll_seconds, idle_seconds=config.events_idle_seconds)
+
+    def _stream(self, run_id: str) -> _RunStream:
+        stream = self._streams.get(run_id)
+        if stream is None:
+            stream = self._streams[run_id] = _RunStream(self.max_events_per_run)
+        return stream
+
+    def _evict(self):
+        """
+        淘汰過期或超出數量上限的已結束執行，以及閒置的未結束串流。
+
+        觀看者訂閱了一個不在本行程執行 (因此不會在本行程結束) 的執行時，串流只被訂閱、從未發布事件；
+        沒有訂閱者且閒置超過 `idle_seconds` 後即淘汰。已發布事件的未結束串流屬於本行程執行中的工作，
+        保留到工作結束，以免序號重新從 0 開始。
+        """
+        now = time.time()
+        closed = [run_id for run_id, s in self._streams.items() if s.closed]
+        excess = len(closed) - self.max_closed_runs
+        for i, run_id in enumerate(closed):
+            if i < excess or now - self._streams[run_id].closed_at > self.retention_seconds:
+                del self._streams[run_id]
+        idle = [run_id for run_id, s in self._streams.items()
+                if not s.closed and s.next_id == 0 and s.subscribers == 0 and now - s.touched_at > self.idle_seconds]
+        for run_id in idle:
+            del self._streams[run_id]
+
+    def publish(self, run_id: str, event_type: str, data: Optional[Dict[str, Any]] = None) -> RunEvent:
+        """
+        發布一個事件給該執行的所有訂閱者。
+
+        Args:
+            run_id (str): 執行 ID。
+            event_type (str): 事件類型，例如 "event"、"status"。
+            data (Optional[Dict[str, Any]]): 事件內容，必須可序列化為 JSON。
+
+        Raises:
+            ValueError: 如果該執行已經結束。
+
+        Returns:
+            RunEvent: 帶有序號的事件。
+        """
+        stream = self._stream(run_id)
+        if stream.closed:
+            raise ValueError(f"Run '{run_id}' is already closed")
+        event = RunEvent(id=stream.next_id, run_id=run_id, type=event_type, data=data or {})
+        stream.next_id += 1
+        stream.touched_at = event.timestamp
+        if self.log is None:
+            stream.events.append(event)
+            stream.notify()
+        else:
+            # 訂閱者從日誌讀取；寫入日誌後才喚醒本行程的訂閱者
+            self._outbox.append(event)
+            self._schedule_flush()
+        return event
+
+    def _schedule_flush(self):
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+        except RuntimeError:
+            # 沒有執行中的事件迴圈 (同步呼叫)：留在待寫入清單，由下一次發布或 flush() 寫入
+            pass
+
+    async def _flush(self):
+        """
+        依序將待寫入的事件批次寫入日誌；同一時間只有一個寫入工作，保持事件順序。
+        寫入失敗的事件放回待寫入清單並以指數退避重試，終止事件不會遺失
+        (否則從日誌讀取的訂閱者永遠等不到 `end`)。
+        """
+        delay = FLUSH_RETRY_INITIAL_SECONDS
+        while self._outbox:
+            batch, self._outbox = self._outbox, []
+            try:
+                await self.log.append(batch)
+            except Exception as e:
+                self._outbox = self._trim_outbox(batch + self._outbox)
+                print(f"RunEventBroker: failed to write {len(batch)} event(s) to the event log, "
+                      f"retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, FLUSH_RETRY_MAX_SECONDS)
+                continue
+            delay = FLUSH_RETRY_INITIAL_SECONDS
+            for run_id in {event.run_id for event in batch}:
+                if run_id in self._streams:
+                    self._streams[run_id].notify()
+
+    @staticmethod
+    def _trim_outbox(events: List[RunEvent]) -> List[RunEvent]:
+        """待寫入事件超過上限時，丟棄最舊的非終止事件。"""
+        excess = len(events) - MAX_OUTBOX_EVENTS
+        if excess <= 0:
+            return events
+        print(f"RunEventBroker: event log unavailable; dropping {excess} buffered event(s)")
+        kept = []
+        for event in events:
+            if excess > 0 and event.type != "end":
+                excess -= 1
+                continue
+            kept.append(event)
+        return kept
+
+    async def flush(self):
+        """等待所有已發布的事件寫入事件日誌。"""
+        if self.log is None:
+            return
+        while self._outbox or (self._flusher is not None and not self._flusher.done()):
+            if self._flusher is None or self._flusher.done():
+                self._flusher = asyncio.create_task(self._flush())
+            await asyncio.shield(self._flusher)
+
+    async def prepare(self, run_id: str):
+        """
+        在本行程開始 (或重新) 執行一個工作前呼叫：從事件日誌接續序號。
+
+        被放回佇列的工作可能在另一個行程繼續執行，新的事件必須接在先前的事件之後，
+        續傳的游標才會繼續有效。
+
+        Args:
+            run_id (str): 執行 ID。
+        """
+        if self.log is None:
+            return
+        last_id = await self.log.last_id(run_id)
+        stream = self._stream(run_id)
+        if last_id is not None and not stream.closed:
+            stream.next_id = max(stream.next_id, last_id + 1)
+
+    async def has_events(self, run_id: str) -> bool:
+        """判斷本行程或事件日誌是否持有該執行的事件。"""
+        if self.has_run(run_id):
+            return True
+        return self.log is not None and await self.log.last_id(run_id) is not None
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        寫入剩餘的事件並關閉事件日誌。
+
+        Args:
+            timeout (float): 等待剩餘事件寫入的秒數；事件日誌持續無法寫入時放棄剩餘的事件。
+        """
+        if self.log is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"RunEventBroker: gave up writing {len(self._outbox)} event(s) to the event log")
+            if self._flusher is not None:
+                self._flusher.cancel()
+        await self.log.close()
+
+    def close(self, run_id: str, status: str, data: Optional[Dict[str, Any]] = None):
+        """
+        發布終止事件並結束該執行的串流；訂閱者在讀完所有事件後結束。
+
+        Args:
+            run_id (str): 執行 ID。
+            status (str): 最終狀態，例如 "succeeded" 或 "failed"。
+            data (Optional[Dict[str, Any]]): 附加在終止事件上的內容。
+        """
+        if self._stream(run_id).closed:
+            return
+        self.publish(run_id, "end", {"status": status, **(data or {})})
+        stream = self._streams[run_id]
+        stream.closed = True
+        stream.closed_at = time.time()
+        stream.notify()
+        self._evict()
+
+    async def subscribe(self, run_id: str, last_event_id: Optional[int] = None,
+                        heartbeat_seconds: float = 15.0) -> AsyncIterator[Optional[RunEvent]]:
+        """
+        訂閱一個執行的事件。
+
+        執行尚未開始 (例如仍在排隊) 時也可以訂閱，事件產生後立即送出。
+
+        Args:
+            run_id (str): 執行 ID。
+            last_event_id (Optional[int]): 客戶端最後收到的事件序號；None 表示從頭重播。
+            heartbeat_seconds (float): 沒有新事件時，每隔多久產出一次 None 作為心跳，
+                讓呼叫端可以送出保持連線的訊框並偵測斷線。
+
+        Yields:
+            Optional[RunEvent]: 事件，或代表心跳的 None。
+        """
+        cursor = 0 if last_event_id is None else last_event_id + 1
+        if self.log is not None:
+            async for event in self._subscribe_log(run_id, cursor, heartbeat_seconds):
+                yield event
+            return
+        stream = self._stream(run_id)
+        stream.subscribers += 1
+        try:
+            while True:
+                if cursor < stream.first_id:
+                    # 落後超過保留範圍：告知客戶端遺漏的範圍後跳到最舊的事件
+                    yield RunEvent(id=stream.first_id - 1, run_id=run_id, type="gap",
+                                   data={"missed_from": cursor, "missed_to": stream.first_id - 1})
+                    cursor = stream.first_id
+                changed = stream.changed
+                if cursor < stream.next_id:
+                    event = stream.events[cursor - stream.first_id]
+                    cursor += 1
+                    yield event
+                    continue
+                if stream.closed:
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            stream.subscribers -= 1
+            stream.touched_at = time.time()
+            self._evict()
+
+    async def _subscribe_log(self, run_id: str, cursor: int,
+                             heartbeat_seconds: float) -> AsyncIterator[Optional[RunEvent]]:
+        """
+        從事件日誌讀取事件，直到讀到終止事件。
+
+        在本行程執行的工作寫入日誌後會立即喚醒訂閱者，其他行程的事件則以 `poll_seconds` 輪詢。
+        """
+        idle = 0.0
+        while True:
+            events = await self.log.read(run_id, cursor, LOG_READ_BATCH)
+            if events:
+                idle = 0.0
+                if events[0].id > cursor:
+                    # 較舊的事件已從日誌裁剪
+                    yield RunEvent(id=events[0].id - 1, run_id=run_id, type="gap",
+                                   data={"missed_from": cursor, "missed_to": events[0].id - 1})
+                for event in events:
+                    cursor = event.id + 1
+                    yield event
+                    if event.type == "end":
+                        return
+                continue
+            local = self._streams.get(run_id)
+            wait = min(self.poll_seconds, heartbeat_seconds - idle)
+            started = time.monotonic()
+            try:
+                if local is not None:
+                    await asyncio.wait_for(local.changed.wait(), timeout=wait)
+                else:
+                    await asyncio.sleep(wait)
+            except asyncio.TimeoutError:
+                pass
+            idle += time.monotonic() - started
+            if idle >= heartbeat_seconds:
+                idle = 0.0
+                yield None
+
+    def has_run(self, run_id: str) -> bool:
+        """判斷事件中心是否持有該執行的事件。"""
+        return run_id in self._streams
+
+
+def adk_event_payload(event: Any) -> Dict[str, Any]:
+    """
+    將 ADK `Event` 轉換為可序列化的事件內容。
+
+    Args:
+        event (Any): ADK 事件。
+
+    Returns:
+        Dict[str, Any]: 包含作者、文字、是否為部分 (串流) 回應等欄位的字典。
+    """
+    text = ""
+    if event.content and event.content.parts:
+        text = "".join(part.text or "" for part in event.content.parts)
+    return {
+        "event_id": getattr(event, "id", None),
+        "invocation_id": getattr(event, "invocation_id", None),
+        "author": event.author,
+        "text": text,
+        "partial": bool(getattr(event, "partial", False)),
+        "is_final": bool(event.is_final_response()) if hasattr(event, "is_final_response") else False,
+    }
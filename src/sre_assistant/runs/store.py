@@ -0,0 +1,287 @@
+# src/sre_assistant/runs/store.py
+"""
+此檔案實現了工作流程執行的狀態與結果登錄 (run registry)。
+
+每個執行以產生的執行 ID (即工作 ID) 為鍵，記錄狀態、各階段 (代理) 的時間與最終輸出：
+- **行程內 LRU**: 最近的執行保存在記憶體中，查詢不需要存取資料庫。
+- **可選的持久化後端**: 建立與結束時寫入 SQLite，讓其他副本與重啟後仍可查詢結果。
+- **有界保留**: 記憶體依項目數淘汰最久未使用者；已結束的執行超過保留時間後從兩層都移除。
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, computed_field
+
+from ..config.config_manager import RunStoreConfig
+
+
+class PhaseTiming(BaseModel):
+    """一個階段 (產生事件的代理) 的時間紀錄。"""
+    started_at: float
+    finished_at: float
+    events: int = 0
+
+    @computed_field
+    @property
+    def duration_ms(self) -> float:
+        return (self.finished_at - self.started_at) * 1000
+
+
+class RunRecord(BaseModel):
+    """一次工作流程執行的狀態、時間與結果。"""
+    run_id: str
+    tenant_id: str
+    session_id: str
+    user_query: str = ""
+    status: str = "queued"
+    created_at: float = Field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    phases: Dict[str, PhaseTiming] = Field(default_factory=dict)
+    final_response: Optional[str] = None
+    error: Optional[str] = None
+
+    @computed_field
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+
+class SQLiteRunBackend:
+    """
+    以 SQLite 持久化執行紀錄 (整筆紀錄以 JSON 儲存)。
+    """
+
+    def __init__(self, path: str):
+        """
+        開啟 (或創建) 執行紀錄資料庫。
+
+        Args:
+            path (str): SQLite 檔案路徑。
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._conn  # 立即建立資料表，讓錯誤的路徑在啟動時就失敗
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """返回本行程的連線；fork 出的工作行程第一次使用時重新連線。"""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, finished_at REAL, record TEXT NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS runs_finished_idx ON runs (finished_at)")
+        return self._connection
+
+    async def _run(self, fn, *args):
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    async def save(self, record: RunRecord):
+        await self._run(self._conn.execute, "INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                        (record.run_id, record.finished_at, record.model_dump_json()))
+
+    async def save_many(self, records: List[RunRecord]):
+        def insert():
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?)",
+                                       [(r.run_id, r.finished_at, r.model_dump_json()) for r in records])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        await self._run(insert)
+
+    async def load(self, run_id: str) -> Optional[RunRecord]:
+        def query():
+            return self._conn.execute("SELECT record FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        row = await self._run(query)
+        return RunRecord.model_validate_json(row[0]) if row else None
+
+    async def purge(self, finished_before: float) -> int:
+        cursor = await self._run(self._conn.execute, "DELETE FROM runs WHERE finished_at < ?", (finished_before,))
+        return cursor.rowcount
+
+    async def close(self):
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+
+
+class RunRegistry:
+    """
+    執行紀錄的兩層 (LRU + 可選持久化) 登錄。
+    """
+
+    def __init__(self, max_entries: int = 1000, retention_seconds: float = 7 * 24 * 3600,
+                 backend: Optional[SQLiteRunBackend] = None):
+        """
+        初始化執行登錄。
+
+        Args:
+            max_entries (int): 記憶體中保留的執行數上限。
+            retention_seconds (float): 已結束執行的保留秒數。
+            backend (Optional[SQLiteRunBackend]): 持久化後端；None 表示只保存在記憶體中。
+        """
+        self.max_entries = max_entries
+        self.retention_seconds = retention_seconds
+        self.backend = backend
+        self._records: "OrderedDict[str, RunRecord]" = OrderedDict()
+        self._next_purge = 0.0
+
+    def _remember(self, record: RunRecord):
+        """放入 LRU 並淘汰最久未使用的項目；執行中的項目優先保留。"""
+        self._records[record.run_id] = record
+        self._records.move_to_end(record.run_id)
+        while len(self._records) > self.max_entries:
+            victim = next((run_id for run_id, r in self._records.items() if r.finished), None)
+            self._records.pop(victim if victim is not None else next(iter(self._records)))
+
+    def _expired(self, record: RunRecord) -> bool:
+        return record.finished and time.time() - record.finished_at > self.retention_seconds
+
+    async def create(self, run_id: str, tenant_id: str, session_id: str, user_query: str = "") -> RunRecord:
+        """
+        登錄一個新的排隊中執行；已登錄 (例如工作者已先開始執行) 時返回既有紀錄。
+
+        Returns:
+            RunRecord: 執行紀錄。
+        """
+        if run_id in self._records:
+            return self._records[run_id]
+        record = RunRecord(run_id=run_id, tenant_id=tenant_id, session_id=session_id, user_query=user_query)
+        self._remember(record)
+        if self.backend:
+            await self.backend.save(record)
+        return record
+
+    async def create_many(self, records: List[RunRecord]):
+        """
+        以一次持久化寫入登錄多個排隊中執行 (例如告警 webhook 批次)。
+
+        Args:
+            records (List[RunRecord]): 新的執行紀錄。
+        """
+        records = [r for r in records if r.run_id not in self._records]
+        for record in records:
+            self._remember(record)
+        if self.backend and records:
+            await self.backend.save_many(records)
+
+    async def _record(self, run_id: str) -> Optional[RunRecord]:
+        """讀取可修改的紀錄 (必要時從持久化後端載入)。"""
+        record = self._records.get(run_id)
+        if record is None and self.backend:
+            record = await self.backend.load(run_id)
+            if record is not None:
+                self._remember(record)
+        return record
+
+    async def start(self, run_id: str):
+        """將執行標記為執行中 (重新嘗試時清除前一次的階段紀錄)。"""
+        record = await self._record(run_id)
+        if record is not None:
+            record.status = "running"
+            record.started_at = time.time()
+            record.phases = {}
+            if self.backend:
+                await self.backend.save(record)
+
+    def record_event(self, run_id: str, phase: str):
+        """
+        記錄一個階段產生了事件；第一個事件開始計時，最後一個事件結束計時。
+        同步且只更新記憶體，可在每個串流事件上呼叫。
+        """
+        record = self._records.get(run_id)
+        if record is None or not phase:
+            return
+        now = time.time()
+        timing = record.phases.get(phase)
+        if timing is None:
+            timing = record.phases[phase] = PhaseTiming(started_at=now, finished_at=now)
+        timing.finished_at = now
+        timing.events += 1
+
+    async def finish(self, run_id: str, status: str, final_response: Optional[str] = None,
+                     error: Optional[str] = None):
+        """
+        記錄執行結果並寫入持久化後端。
+
+        Args:
+            run_id (str): 執行 ID。
+            status (str): "succeeded" 或 "failed"。
+            final_response (Optional[str]): 工作流程的最終回應。
+            error (Optional[str]): 失敗原因。
+        """
+        record = await self._record(run_id)
+        if record is None:
+            return
+        record.status = status
+        record.finished_at = time.time()
+        record.final_response = final_response
+        record.error = error
+        if self.backend:
+            await self.backend.save(record)
+            await self._purge()
+
+    async def _purge(self):
+        """定期從持久化後端刪除超過保留時間的執行。"""
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + min(self.retention_seconds, 3600)
+        await self.backend.purge(time.time() - self.retention_seconds)
+
+    async def get(self, run_id: str) -> Optional[RunRecord]:
+        """
+        讀取執行紀錄。
+
+        Returns:
+            Optional[RunRecord]: 紀錄的複本；不存在或已超過保留時間時返回 None。
+        """
+        record = await self._record(run_id)
+        if record is None:
+            return None
+        if self._expired(record):
+            self._records.pop(run_id, None)
+            return None
+        self._records.move_to_end(run_id)
+        return record.model_copy(deep=True)
+
+    async def close(self):
+        if self.backend:
+            await self.backend.close()
+
+
+def create_run_registry(config: RunStoreConfig) -> RunRegistry:
+    """
+    根據配置創建執行登錄。
+
+    Args:
+        config (RunStoreConfig): 執行登錄配置。
+
+    Returns:
+        RunRegistry: 執行登錄實例。
+    """
+    backend = SQLiteRunBackend(config.sqlite_path) if config.sqlite_path else None
+    return RunRegistry(config.max_entries, config.retention_seconds, backend)
@@ -0,0 +1,232 @@
+# src/sre_assistant/server.py
+"""
+此檔案實現了 SRE Assistant 的生產模式啟動器。
+
+與開發用的 `uvicorn.run(..., reload=True)` 不同：
+- **工作行程數** 依 `DeploymentConfig.cpu` 推算 (不超過主機 CPU 數)，並將
+  `DeploymentConfig.concurrency` 平均分配為每個工作行程的並行上限。
+- 可用時使用 **uvloop / httptools**，否則退回到 asyncio / h11。
+- **預先載入 (pre-fork)**: 主行程先匯入應用程式與重量級模組 (ADK、代理與工具的程式碼)，
+  再 fork 出工作行程，讓已載入的模組以寫入時複製 (copy-on-write) 共用記憶體。
+  `EnhancedSREWorkflow`、Runner 與各後端的連線則由每個工作行程在 lifespan 啟動時各自建構
+  (連線與事件迴圈無法跨 fork 共用，且就緒檢查需反映每個行程自己的初始化)。
+- **優雅關閉**: 收到 SIGTERM / SIGINT 時轉送給所有工作行程；每個工作行程收到訊號時立即停止取用新工作
+  並開始一個共同的排空期限 (`drain_timeout_seconds`)，HTTP 連線的排空與執行中工作流程 (包含等待
+  `HumanApprovalTool` 的執行) 的排空共用這個期限，逾時的工作會被放回持久化佇列，由其他副本接手。
+  超過期限 (加上結束 lifespan 的寬限) 仍未結束的行程才會被強制終止。
+- **指標**: 多工作行程時需設定 `PROMETHEUS_MULTIPROC_DIR`，`/metrics` 才會彙總所有工作行程
+  (見 `observability.metrics`)；啟動時清除先前行程留下的指標檔，工作行程結束時移除其即時量規。
+"""
+
+import gc
+import importlib.util
+import math
+import os
+import signal
+import socket
+import time
+from typing import Any, Dict, Optional, Union
+
+import uvicorn
+from pydantic import BaseModel
+from uvicorn.importer import import_from_string
+
+from .config.config_manager import DeploymentConfig
+from .lifecycle import shutdown
+from .observability.metrics import clear_stale_metrics, mark_worker_dead, multiprocess_dir
+
+# 工作行程異常結束後，重新啟動前的等待秒數 (避免崩潰迴圈佔滿 CPU)
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+class ServerPlan(BaseModel):
+    """生產模式的伺服器參數。"""
+    workers: int
+    limit_concurrency: Optional[int]
+    loop: str
+    http: str
+
+
+def parse_cpu(cpu: str) -> float:
+    """
+    解析 Kubernetes / Cloud Run 風格的 CPU 數量。
+
+    Args:
+        cpu (str): 例如 "2"、"1.5" 或 "500m"。
+
+    Raises:
+        ValueError: 如果格式無法解析。
+
+    Returns:
+        float: CPU 核心數。
+    """
+    cpu = str(cpu).strip()
+    if cpu.endswith("m"):
+        return float(cpu[:-1]) / 1000
+    return float(cpu)
+
+
+def plan_server(config: DeploymentConfig, available_cpus: Optional[int] = None) -> ServerPlan:
+    """
+    根據部署配置決定工作行程數、每個行程的並行上限與事件迴圈實作。
+
+    工作流程主要在等待 LLM 與外部 API (I/O 密集)，每個核心一個工作行程即可，
+    因此工作行程數為 `ceil(cpu)`，並以主機實際的 CPU 數為上限。
+
+    Args:
+        config (DeploymentConfig): 部署配置。
+        available_cpus (Optional[int]): 主機 CPU 數，預設為 `os.cpu_count()`。
+
+    Returns:
+        ServerPlan: 伺服器參數。
+    """
+    available_cpus = available_cpus or os.cpu_count() or 1
+    workers = config.workers or min(available_cpus, max(1, math.ceil(parse_cpu(config.cpu))))
+    limit = math.ceil(config.concurrency / workers) if config.concurrency else None
+    return ServerPlan(
+        workers=workers,
+        limit_concurrency=limit,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+    )
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    """建立所有工作行程共用的監聽 socket。"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class _DrainingServer(uvicorn.Server):
+    """收到結束訊號時先開始共同的排空期限 (停止取用新工作)，再交給 uvicorn 排空連線。"""
+
+    def __init__(self, config: uvicorn.Config, drain_seconds: float):
+        super().__init__(config)
+        self.drain_seconds = drain_seconds
+
+    def handle_exit(self, sig, frame):
+        shutdown.begin(self.drain_seconds)
+        super().handle_exit(sig, frame)
+
+
+def _serve_worker(app, sock: socket.socket, config: DeploymentConfig, plan: ServerPlan):
+    """
+    在目前行程中以共用 socket 執行 uvicorn。
+
+    HTTP 排空最多等待 `drain_timeout_seconds`，之後 lifespan 關閉只以同一期限剩餘的時間排空工作，
+    整個關閉不超過 `drain_timeout_seconds`。
+    """
+    server = _DrainingServer(uvicorn.Config(
+        app,
+        loop=plan.loop,
+        http=plan.http,
+        lifespan="on",
+        limit_concurrency=plan.limit_concurrency,
+        timeout_graceful_shutdown=math.ceil(config.drain_timeout_seconds),
+        access_log=config.debug,
+    ), drain_seconds=config.drain_timeout_seconds)
+    server.run(sockets=[sock])
+
+
+class _Supervisor:
+    """fork 並監督工作行程的主行程。"""
+
+    def __init__(self, app, sock: socket.socket, config: DeploymentConfig, plan: ServerPlan):
+        self.app = app
+        self.sock = sock
+        self.config = config
+        self.plan = plan
+        self.children: Dict[int, int] = {}  # pid -> 工作行程編號
+        self.stopping = False
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            # 子行程：恢復預設的訊號處理，交給 uvicorn 安裝自己的處理器
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                _serve_worker(self.app, self.sock, self.config, self.plan)
+            finally:
+                os._exit(0)
+        self.children[pid] = index
+
+    def _stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        print(f"Received signal {signum}; draining {len(self.children)} worker(s)")
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _reap(self) -> bool:
+        """回收已結束的工作行程；返回是否有行程結束。"""
+        reaped = False
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            index = self.children.pop(pid, None)
+            reaped = True
+            mark_worker_dead(pid)
+            if not self.stopping and index is not None:
+                print(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+                time.sleep(RESPAWN_DELAY_SECONDS)
+                self._spawn(index)
+        return reaped
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.plan.workers):
+            self._spawn(index)
+        print(f"Serving on {self.config.host}:{self.config.port} with {self.plan.workers} worker(s), "
+              f"loop={self.plan.loop}, http={self.plan.http}, limit_concurrency={self.plan.limit_concurrency}")
+
+        while not self.stopping:
+            if not self._reap():
+                time.sleep(0.5)
+
+        # 工作行程的 HTTP 與工作排空共用 drain_timeout_seconds 的期限，再加上一點結束 lifespan 的寬限
+        deadline = time.monotonic() + self.config.drain_timeout_seconds + 5
+        while self.children and time.monotonic() < deadline:
+            if not self._reap():
+                time.sleep(0.2)
+        for pid in list(self.children):
+            print(f"Worker pid {pid} did not drain in time; killing")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.sock.close()
+
+
+def serve(app: Union[str, Any], config: DeploymentConfig):
+    """
+    以生產模式啟動應用程式。
+
+    Args:
+        app (Union[str, Any]): ASGI 應用程式，或其匯入路徑 (例如 "sre_assistant.main:app")。
+        config (DeploymentConfig): 部署配置。
+    """
+    plan = plan_server(config)
+    # 在 fork 之前匯入應用程式，已載入的模組由所有工作行程共用；工作流程在各工作行程的 lifespan 中建構
+    if isinstance(app, str):
+        app = import_from_string(app)
+    # 將預先載入的物件移出垃圾回收的追蹤，避免 GC 觸碰它們而破壞寫入時複製的共用頁面
+    gc.freeze()
+    sock = _bind(config.host, config.port)
+    if plan.workers == 1 or not hasattr(os, "fork"):
+        _serve_worker(app, sock, config, plan)
+        return
+    if multiprocess_dir() is None:
+        print(f"PROMETHEUS_MULTIPROC_DIR is not set; /metrics will only report the worker that serves "
+              f"each scrape ({plan.workers} workers)")
+    clear_stale_metrics()
+    _Supervisor(app, sock, config, plan).run()
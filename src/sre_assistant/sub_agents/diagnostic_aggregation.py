@@ -0,0 +1,249 @@
+# src/sre_assistant/sub_agents/diagnostic_aggregation.py
+"""
+此檔案實現了診斷結果的聚合：將各分析代理的輸出整合成一份精簡的診斷摘要。
+
+流程：
+1. **解析**：分析代理被要求以 JSON 輸出結構化的發現 (見 `prompts.DIAGNOSTIC_FINDINGS_FORMAT`)；
+   無法解析時退回為逐行解析純文字，並以關鍵字推斷嚴重程度。
+2. **去重與分群**：摘要詞彙重疊 (重疊係數，較短的摘要大部分詞彙都出現在另一項中) 且元件相容的發現
+   合併為一項，保留最高的嚴重程度並合併來源代理與證據 — 多個代理互相佐證的發現因此排名較高。
+3. **排序**：依嚴重程度、佐證的代理數與證據數排序。
+4. **預算**：依 token 預算渲染摘要，超出預算的低優先發現只以數量帶過，
+   使分診器 (IntelligentDispatcher) 的提示保持精簡。
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from ..contracts import SeverityLevel
+
+SEVERITY_RANK = {SeverityLevel.P0: 0, SeverityLevel.P1: 1, SeverityLevel.P2: 2, SeverityLevel.P3: 3}
+SEVERITY_ALIASES = {
+    "critical": SeverityLevel.P0, "sev0": SeverityLevel.P0, "sev1": SeverityLevel.P0,
+    "high": SeverityLevel.P1, "sev2": SeverityLevel.P1, "error": SeverityLevel.P1,
+    "medium": SeverityLevel.P2, "warning": SeverityLevel.P2, "warn": SeverityLevel.P2,
+    "low": SeverityLevel.P3, "info": SeverityLevel.P3,
+}
+# 純文字退回解析時，用以推斷嚴重程度的關鍵字 (依序比對，先符合者為準)
+SEVERITY_KEYWORDS = (
+    (SeverityLevel.P0, ("outage", "down", "unavailable", "crash", "data loss", "中斷", "宕機", "無法使用")),
+    (SeverityLevel.P1, ("error", "exception", "timeout", "oom", "saturat", "latency", "5xx", "錯誤", "逾時", "延遲", "飽和")),
+)
+MAX_EVIDENCE_PER_FINDING = 2
+MAX_FIELD_CHARS = 200
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_WORD = re.compile(r"[a-z0-9_]+")
+_CJK = re.compile(r"[一-鿿]+")
+# 不參與相似度比對的常見英文虛詞
+_STOPWORDS = frozenset(("a", "an", "the", "in", "on", "at", "of", "to", "for", "by", "is", "are", "was", "and", "or",
+                        "with", "from"))
+
+
+class DiagnosticFinding(BaseModel):
+    """一項診斷發現。"""
+    summary: str
+    severity: SeverityLevel = SeverityLevel.P2
+    component: Optional[str] = None
+    evidence: List[str] = Field(default_factory=list)
+    sources: List[str] = Field(default_factory=list)
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def normalize_severity(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            v = v.strip()
+            if v.lower() in SEVERITY_ALIASES:
+                return SEVERITY_ALIASES[v.lower()]
+            # 無法辨識的嚴重程度視為中等，而不是丟棄整項發現
+            return v.upper() if v.upper() in SeverityLevel.__members__ else SeverityLevel.P2
+        return v
+
+    @field_validator("evidence", mode="before")
+    @classmethod
+    def normalize_evidence(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            return [v]
+        return v or []
+
+
+class AggregatedDiagnosis(BaseModel):
+    """聚合後的診斷結果。"""
+    summary: str
+    findings: List[DiagnosticFinding] = Field(default_factory=list)
+    omitted: int = 0
+    missed: List[str] = Field(default_factory=list)
+    partial: bool = False
+
+
+def estimate_tokens(text: str) -> int:
+    """粗估 token 數：中日韓文字約一字一個 token，其他文字約四個字元一個 token。"""
+    cjk = sum(len(m) for m in _CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _infer_severity(text: str) -> SeverityLevel:
+    lowered = text.lower()
+    for severity, keywords in SEVERITY_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return severity
+    return SeverityLevel.P2
+
+
+def parse_findings(source: str, text: str) -> List[DiagnosticFinding]:
+    """
+    解析一個分析代理的輸出。
+
+    Args:
+        source (str): 分析代理的名稱。
+        text (str): 代理的最終回應；預期為 `{"findings": [...]}` 或發現列表的 JSON。
+
+    Returns:
+        List[DiagnosticFinding]: 解析出的發現 (JSON 可以解析時即使為空也直接返回)；
+            無法解析為 JSON 時逐行解析純文字，略過程式碼區塊的圍欄行。
+    """
+    try:
+        data = json.loads(_FENCE.sub("", text.strip()))
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        data = data.get("findings", [data])
+    if isinstance(data, list):
+        findings = []
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            try:
+                finding = DiagnosticFinding.model_validate({**item, "sources": [source]})
+            except ValidationError:
+                continue
+            findings.append(finding)
+        return findings
+
+    findings = []
+    for line in text.splitlines():
+        if line.strip().startswith("```"):
+            continue
+        line = _BULLET.sub("", line).strip()
+        if line and not line.startswith("#"):
+            findings.append(DiagnosticFinding(summary=line, severity=_infer_severity(line), sources=[source]))
+    return findings
+
+
+def _terms(text: str) -> Set[str]:
+    """摘要的比對詞彙：英數字詞，加上中日韓文字的雙字組。"""
+    lowered = text.lower()
+    terms = set(_WORD.findall(lowered)) - _STOPWORDS
+    for run in _CJK.findall(lowered):
+        terms.update(run[i:i + 2] for i in range(max(1, len(run) - 1)))
+    return terms
+
+
+def _similar(a: Set[str], b: Set[str], threshold: float) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / min(len(a), len(b)) >= threshold
+
+
+def _merge_unique(target: List[str], items: Iterable[str]):
+    for item in items:
+        if item not in target:
+            target.append(item)
+
+
+def cluster_findings(findings: List[DiagnosticFinding], similarity: float = 0.5) -> List[DiagnosticFinding]:
+    """
+    合併重複或重疊的發現。
+
+    Args:
+        findings (List[DiagnosticFinding]): 所有代理的發現。
+        similarity (float): 摘要詞彙的重疊係數門檻。
+
+    Returns:
+        List[DiagnosticFinding]: 合併後的發現；每群保留最嚴重一項的摘要與元件。
+    """
+    ordered = sorted(findings, key=lambda f: (SEVERITY_RANK[f.severity], -len(f.evidence)))
+    clusters: List[DiagnosticFinding] = []
+    cluster_terms: List[Set[str]] = []
+    for finding in ordered:
+        terms = _terms(finding.summary)
+        for cluster, existing in zip(clusters, cluster_terms):
+            compatible = not finding.component or not cluster.component or finding.component == cluster.component
+            if compatible and _similar(terms, existing, similarity):
+                _merge_unique(cluster.sources, finding.sources)
+                _merge_unique(cluster.evidence, finding.evidence)
+                cluster.component = cluster.component or finding.component
+                existing |= terms
+                break
+        else:
+            clusters.append(finding.model_copy(deep=True))
+            cluster_terms.append(terms)
+    return clusters
+
+
+def rank_findings(findings: List[DiagnosticFinding]) -> List[DiagnosticFinding]:
+    """依嚴重程度、佐證的代理數與證據數排序 (穩定排序)。"""
+    return sorted(findings, key=lambda f: (SEVERITY_RANK[f.severity], -len(f.sources), -len(f.evidence)))
+
+
+def _clip(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= MAX_FIELD_CHARS else text[:MAX_FIELD_CHARS - 1] + "…"
+
+
+def _render_finding(finding: DiagnosticFinding) -> str:
+    line = f"- [{finding.severity.value}]"
+    if finding.component:
+        line += f" {finding.component}:"
+    line += f" {_clip(finding.summary)} (來源: {', '.join(finding.sources)}"
+    if finding.evidence:
+        line += "; 證據: " + "; ".join(_clip(e) for e in finding.evidence[:MAX_EVIDENCE_PER_FINDING])
+    return line + ")"
+
+
+def aggregate_diagnostics(diagnostic_results: Dict[str, Any], token_budget: int = 600,
+                          similarity: float = 0.5) -> AggregatedDiagnosis:
+    """
+    將診斷階段寫入狀態的結果聚合成精簡摘要。
+
+    Args:
+        diagnostic_results (Dict[str, Any]): `DeadlineParallelAgent` 寫入的 `diagnostic_results`
+            (`results` 為代理名稱對最終回應的映射，`missed` 為未完成的代理)。
+        token_budget (int): 摘要的 token 預算 (粗估)。
+        similarity (float): 去重的相似度門檻。
+
+    Returns:
+        AggregatedDiagnosis: 排序後的發現與渲染後的摘要。
+    """
+    findings: List[DiagnosticFinding] = []
+    for source, text in (diagnostic_results.get("results") or {}).items():
+        findings.extend(parse_findings(source, text))
+    ranked = rank_findings(cluster_findings(findings, similarity))
+    missed = list(diagnostic_results.get("missed") or [])
+
+    lines = ["綜合診斷報告"]
+    if missed:
+        lines.append(f"注意: {', '.join(missed)} 未在截止時間內完成，診斷可能不完整")
+    if not ranked:
+        lines.append("- 沒有分析代理回報發現")
+    used = estimate_tokens("\n".join(lines))
+    kept: List[DiagnosticFinding] = []
+    for finding in ranked:
+        line = _render_finding(finding)
+        cost = estimate_tokens(line) + 1
+        # 至少保留最嚴重的一項，即使它本身超出預算
+        if kept and used + cost > token_budget:
+            break
+        lines.append(line)
+        kept.append(finding)
+        used += cost
+    omitted = len(ranked) - len(kept)
+    if omitted:
+        lines.append(f"- 另有 {omitted} 項較低優先的發現未列出")
+
+    return AggregatedDiagnosis(summary="\n".join(lines), findings=ranked, omitted=omitted,
+                               missed=missed, partial=bool(missed))
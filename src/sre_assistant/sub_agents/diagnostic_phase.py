@@ -0,0 +1,176 @@
+# src/sre_assistant/sub_agents/diagnostic_phase.py
+"""
+此檔案實現了具截止時間的並行診斷階段 `DeadlineParallelAgent`。
+
+ADK 1.12 的 `ParallelAgent` 沒有逾時或聚合策略，最慢的分析代理 (通常是 TraceAnalyzer)
+決定整個階段的時間。此代理沿用 `ParallelAgent` 的分支隔離與逐事件背壓，並加上：
+- **各代理截止時間** 與 **整體截止時間**：逾時的代理被取消 (在其執行任務中關閉事件產生器)，
+  不再拖住整個階段。
+- **聚合策略**：
+  - `all_or_timeout`：等待所有代理完成，或到達整體截止時間為止。
+  - `first_n`：前 N 個代理完成後即取消其餘代理。
+- **部分結果**：階段結束時以 `state_delta` 將已完成代理的結果、錯過的代理與 `partial` 旗標
+  寫入會話狀態，後續階段可據此判斷診斷是否完整。
+"""
+
+import asyncio
+import time
+from enum import Enum
+from typing import AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+from pydantic import Field
+
+
+class AggregationStrategy(str, Enum):
+    ALL_OR_TIMEOUT = "all_or_timeout"
+    FIRST_N = "first_n"
+
+
+def _create_branch_ctx(agent: BaseAgent, sub_agent: BaseAgent, ctx: InvocationContext) -> InvocationContext:
+    """與 `ParallelAgent` 相同：為每個子代理建立獨立的分支，使同層代理看不到彼此的對話歷史。"""
+    branch_ctx = ctx.model_copy()
+    branch_suffix = f"{agent.name}.{sub_agent.name}"
+    branch_ctx.branch = f"{ctx.branch}.{branch_suffix}" if ctx.branch else branch_suffix
+    return branch_ctx
+
+
+def _final_text(event: Event) -> Optional[str]:
+    """返回事件的完整文字回應；串流中的部分事件或不含文字的事件返回 None。"""
+    if event.partial or not event.content or not event.content.parts:
+        return None
+    text = "".join(part.text for part in event.content.parts if part.text)
+    return text or None
+
+
+class DeadlineParallelAgent(BaseAgent):
+    """
+    並行執行子代理，並以截止時間與聚合策略限制階段的總時間。
+    """
+
+    timeout_seconds: float = Field(12.0, gt=0)
+    """整個階段的截止時間 (秒)。"""
+    agent_timeout_seconds: Optional[float] = Field(None, gt=0)
+    """每個子代理的預設截止時間 (秒)；None 表示只受整體截止時間限制。"""
+    agent_timeouts: Dict[str, float] = Field(default_factory=dict)
+    """個別子代理的截止時間 (秒)，覆寫 `agent_timeout_seconds`。"""
+    aggregation_strategy: AggregationStrategy = AggregationStrategy.ALL_OR_TIMEOUT
+    min_results: int = Field(1, ge=1)
+    """`first_n` 策略下，完成多少個子代理後即結束階段 (上限為子代理數)。"""
+    state_key: str = "diagnostic_results"
+    """部分結果寫入會話狀態的鍵。"""
+
+    def _deadline_for(self, name: str, started: float) -> float:
+        timeout = self.agent_timeouts.get(name, self.agent_timeout_seconds)
+        overall = started + self.timeout_seconds
+        return overall if timeout is None else min(overall, started + timeout)
+
+    async def _pump(self, name: str, agent: BaseAgent, ctx: InvocationContext, queue: asyncio.Queue):
+        """
+        在單一任務中執行一個子代理，將事件交給合併迴圈；事件被上游處理完畢後才繼續
+        (與 ParallelAgent 相同的背壓)。整個產生器在同一個任務 (同一個 contextvars 環境) 中執行與關閉，
+        取消時子代理的追蹤跨度也能正確結束。
+        """
+        try:
+            async with Aclosing(agent.run_async(_create_branch_ctx(self, agent, ctx))) as agen:
+                async for event in agen:
+                    resume = asyncio.Event()
+                    await queue.put((name, event, resume))
+                    await resume.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put((name, e, None))
+            return
+        await queue.put((name, None, None))
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        started = time.monotonic()
+        agents = list(self.sub_agents)
+        required = len(agents)
+        if self.aggregation_strategy == AggregationStrategy.FIRST_N:
+            required = min(self.min_results, len(agents))
+
+        queue: asyncio.Queue = asyncio.Queue()
+        deadlines = {a.name: self._deadline_for(a.name, started) for a in agents}
+        tasks = {a.name: asyncio.create_task(self._pump(a.name, a, ctx, queue)) for a in agents}
+        results: Dict[str, str] = {}
+        completed: List[str] = []
+        failed: Dict[str, str] = {}
+        timed_out: List[str] = []
+        cancelled: List[str] = []
+        # 跨迴圈保留的取項任務：逾時時不取消，避免遺失剛好送達的項目
+        getter: Optional[asyncio.Task] = None
+
+        async def stop(name: str):
+            task = tasks.pop(name)
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+        try:
+            while tasks and len(completed) < required:
+                now = time.monotonic()
+                # 截止時間已過的代理：取消並記錄為逾時
+                for name in [n for n in tasks if deadlines[n] <= now]:
+                    await stop(name)
+                    timed_out.append(name)
+                if not tasks:
+                    break
+
+                wait = max(0.0, min(deadlines[n] for n in tasks) - now)
+                if getter is None:
+                    getter = asyncio.create_task(queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=wait)
+                if not done:
+                    continue
+                name, item, resume = getter.result()
+                getter = None
+                if name not in tasks:
+                    continue  # 已被取消的代理在取消前送出的項目
+                if item is None:
+                    tasks.pop(name)
+                    completed.append(name)
+                elif isinstance(item, Exception):
+                    tasks.pop(name)
+                    failed[name] = f"{type(item).__name__}: {item}"
+                else:
+                    text = _final_text(item)
+                    if text is not None:
+                        results[name] = text
+                    yield item
+                    resume.set()
+        finally:
+            if getter is not None:
+                getter.cancel()
+            # 策略已滿足 (first_n) 或上游中止：取消其餘仍在執行的代理
+            for name in list(tasks):
+                await stop(name)
+                cancelled.append(name)
+
+        missed = [a.name for a in agents if a.name not in completed]
+        summary = {
+            "strategy": self.aggregation_strategy.value,
+            "results": results,
+            "completed": completed,
+            "timed_out": timed_out,
+            "failed": failed,
+            "cancelled": cancelled,
+            "missed": missed,
+            "partial": bool(missed),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        if missed:
+            print(f"{self.name}: finished with partial results; missed={missed} "
+                  f"(timed_out={timed_out}, failed={list(failed)}, cancelled={cancelled})")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.state_key: summary}),
+        )
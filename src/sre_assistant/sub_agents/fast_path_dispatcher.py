@@ -0,0 +1,262 @@
+# src/sre_assistant/sub_agents/fast_path_dispatcher.py
+"""
+此檔案實現了分診階段的快速路徑 `FastPathDispatcher`。
+
+大部分事件屬於少數已知的型態 (例如「高延遲 + 逾時」→ 擴展、「500 錯誤 + NullPointerException」→ 回滾)，
+為這些事件呼叫 LLM 分診器只會增加延遲與成本。`FastPathDispatcher` 包裝 LLM 分診器：
+- 以診斷聚合寫入的結構化發現 (`diagnostic_findings`) 與分析結果組成 **診斷簽章** 文字。
+- 以預先編譯的 **規則表** 比對簽章；命中且信心達到門檻時，直接輸出 `DispatchDecision`，不呼叫 LLM。
+- 多條指向不同專家的規則同時命中時降低信心，交由 LLM 判斷。
+- 未命中或信心不足時，照常執行 LLM 分診器；LLM 分診決策 (`DispatchDecision`) 的信心仍低於
+  `escalate_below_confidence` 時，在 `model_escalation` 狀態標記分診器後重新分診一次，
+  由模型路由 (`ModelRouter`) 改用較大的模型。
+
+每次分診以 `sre_dispatch_duration_seconds{path}` 記錄耗時 (依路徑的計數即命中率)，
+快速路徑命中時以 LLM 分診器耗時的移動平均估算節省的延遲，累加到 `sre_dispatch_latency_saved_seconds`。
+"""
+
+import json
+import re
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Pattern, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+from google.genai import types
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
+
+from ..contracts import DispatchDecision
+from ..observability.metrics import metrics
+
+# 組成診斷簽章時讀取的結構化分析結果 (例如評估案例中的 metrics_analysis / logs_analysis)
+ANALYSIS_STATE_KEYS = ("metrics_analysis", "logs_analysis", "trace_analysis")
+# LLM 分診器耗時移動平均的權重
+LLM_LATENCY_SMOOTHING = 0.2
+
+
+class DispatchRule(BaseModel):
+    """一條分診規則：所有 `all_of`、至少一個 `any_of` 且沒有任何 `none_of` 樣式出現在簽章中時命中。"""
+    name: str
+    experts: List[str]
+    all_of: List[str] = Field(default_factory=list)
+    any_of: List[str] = Field(default_factory=list)
+    none_of: List[str] = Field(default_factory=list)
+    confidence: float = Field(0.9, ge=0.0, le=1.0)
+    reasoning: str = ""
+
+
+DEFAULT_DISPATCH_RULES: List[DispatchRule] = [
+    DispatchRule(
+        name="latency_with_timeouts",
+        experts=["scaling_fix"],
+        all_of=[r"latency|延遲|slow|p9[59]", r"time[sd]?[\s_-]?out|逾時"],
+        none_of=[r"NullPointerException|\bNPE\b"],
+        confidence=0.9,
+        reasoning="高延遲伴隨逾時，典型的容量不足，擴展可最快緩解",
+    ),
+    DispatchRule(
+        name="server_errors_with_null_pointer",
+        experts=["rollback_fix"],
+        all_of=[r"NullPointerException|\bNPE\b"],
+        any_of=[r"\b5\d\d\b|5xx|error_rate|critical_errors|internal server error|錯誤"],
+        confidence=0.92,
+        reasoning="大量伺服器錯誤伴隨 NullPointerException，通常是有缺陷的新版本，回滾風險最低",
+    ),
+    DispatchRule(
+        name="crash_loop_after_rollout",
+        experts=["rollback_fix"],
+        all_of=[r"CrashLoopBackOff|crash[\s_-]?loop", r"deploy|release|rollout|部署|發布"],
+        confidence=0.88,
+        reasoning="部署後容器反覆崩潰，回滾至上一個版本",
+    ),
+    DispatchRule(
+        name="out_of_memory",
+        experts=["scaling_fix"],
+        all_of=[r"OOMKilled|out[\s_-]?of[\s_-]?memory|OutOfMemoryError|記憶體不足"],
+        none_of=[r"deploy|release|rollout|部署|發布"],
+        confidence=0.8,
+        reasoning="記憶體不足且與部署無關，提高資源配置或擴展副本",
+    ),
+]
+
+
+class _CompiledRule:
+    """預先編譯規則的樣式 (不分大小寫)。"""
+
+    def __init__(self, rule: DispatchRule):
+        self.rule = rule
+        self.all_of: List[Pattern] = [re.compile(p, re.IGNORECASE) for p in rule.all_of]
+        self.any_of: List[Pattern] = [re.compile(p, re.IGNORECASE) for p in rule.any_of]
+        self.none_of: List[Pattern] = [re.compile(p, re.IGNORECASE) for p in rule.none_of]
+
+    def matches(self, signature: str) -> bool:
+        return (all(p.search(signature) for p in self.all_of)
+                and (not self.any_of or any(p.search(signature) for p in self.any_of))
+                and not any(p.search(signature) for p in self.none_of))
+
+
+class DispatchRuleTable:
+    """
+    預先編譯的分診規則表。
+    """
+
+    def __init__(self, rules: List[DispatchRule]):
+        """
+        編譯規則；規則依信心由高到低比對。
+
+        Args:
+            rules (List[DispatchRule]): 分診規則。
+        """
+        self._rules = sorted((_CompiledRule(r) for r in rules), key=lambda c: -c.rule.confidence)
+
+    def match(self, signature: str) -> Optional[Tuple[DispatchRule, DispatchDecision]]:
+        """
+        以規則表比對診斷簽章。
+
+        Args:
+            signature (str): 診斷簽章文字。
+
+        Returns:
+            Optional[Tuple[DispatchRule, DispatchDecision]]: 信心最高的命中規則與其決策；沒有規則命中時返回 None。
+                指向不同專家的規則同時命中時，決策信心扣除衝突規則信心的一半。
+        """
+        matched = [c.rule for c in self._rules if c.matches(signature)]
+        if not matched:
+            return None
+        best = matched[0]
+        conflicts = [r for r in matched[1:] if set(r.experts) != set(best.experts)]
+        confidence = best.confidence - (conflicts[0].confidence / 2 if conflicts else 0.0)
+        reasoning = f"[規則 {best.name}] {best.reasoning}"
+        if conflicts:
+            reasoning += f"；與規則 {', '.join(r.name for r in conflicts)} 衝突"
+        return best, DispatchDecision(selected_experts=list(best.experts), reasoning=reasoning,
+                                      confidence=max(0.0, confidence))
+
+
+def diagnostic_signature(state: Dict[str, Any]) -> str:
+    """
+    以會話狀態中的診斷結果組成比對用的簽章文字。
+
+    Args:
+        state (Dict[str, Any]): 會話狀態；讀取 `diagnostic_findings` 與結構化的分析結果，
+            兩者皆無時退回使用 `aggregated_diagnosis`。
+
+    Returns:
+        str: 每行一項發現或分析結果的簽章文字。
+    """
+    lines = []
+    for finding in state.get("diagnostic_findings") or []:
+        parts = [finding.get("severity") or "", finding.get("component") or "", finding.get("summary") or ""]
+        parts.extend(finding.get("evidence") or [])
+        lines.append(" ".join(p for p in parts if p))
+    for key in ANALYSIS_STATE_KEYS:
+        if (analysis := state.get(key)) is not None:
+            lines.append(f"{key}: {json.dumps(analysis, ensure_ascii=False, default=str)}")
+    if not lines and state.get("aggregated_diagnosis"):
+        lines.append(str(state["aggregated_diagnosis"]))
+    return "\n".join(lines)
+
+
+def _as_decision(value: Any) -> Optional[DispatchDecision]:
+    """將 LLM 分診器寫入狀態的輸出 (dict 或 JSON 文字) 轉為 `DispatchDecision`；無法解析時返回 None。"""
+    try:
+        if isinstance(value, dict):
+            return DispatchDecision.model_validate(value)
+        if isinstance(value, str):
+            return DispatchDecision.model_validate_json(value)
+    except ValidationError:
+        pass
+    return None
+
+
+class FastPathDispatcher(BaseAgent):
+    """
+    以規則表處理已知事件型態的分診階段；信心不足時交給唯一的子代理 (LLM 分診器)。
+    """
+
+    rules: List[DispatchRule] = Field(default_factory=lambda: list(DEFAULT_DISPATCH_RULES))
+    confidence_threshold: float = Field(0.8, ge=0.0, le=1.0)
+    """快速路徑決策的最低信心；低於此值時呼叫 LLM 分診器。"""
+    enabled: bool = True
+    expected_llm_seconds: float = Field(2.0, ge=0.0)
+    """尚未觀察到 LLM 分診器耗時前，用以估算節省延遲的初始值。"""
+    decision_key: str = "dispatch_decision"
+    """決策 (含路徑與規則) 寫入會話狀態的鍵。"""
+    output_key: str = "remediation_decision"
+    """與 LLM 分診器的 `output_key` 相同，快速路徑也寫入 `DispatchDecision`。"""
+    escalate_below_confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
+    """LLM 分診決策的信心低於此值時以升級的模型重新分診一次；None 表示不升級。"""
+    escalation_key: str = "model_escalation"
+    """標記需要升級模型的代理名稱的狀態鍵 (由 `ModelRouter` 讀取)。"""
+
+    _table: DispatchRuleTable = PrivateAttr()
+    _llm_seconds: float = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._table = DispatchRuleTable(self.rules)
+        self._llm_seconds = self.expected_llm_seconds
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        started = time.perf_counter()
+        match = self._table.match(diagnostic_signature(ctx.session.state)) if self.enabled else None
+        if match is not None and match[1].confidence >= self.confidence_threshold:
+            rule, decision = match
+            elapsed = time.perf_counter() - started
+            metrics.observe_dispatch("fast_path", elapsed, saved_seconds=max(0.0, self._llm_seconds - elapsed))
+            experts = ", ".join(decision.selected_experts)
+            print(f"{self.name}: fast path matched rule '{rule.name}' -> {experts} "
+                  f"(confidence {decision.confidence:.2f})")
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=experts)]),
+                actions=EventActions(state_delta={
+                    self.output_key: decision.model_dump(),
+                    self.decision_key: {**decision.model_dump(), "path": "fast_path", "rule": rule.name},
+                }),
+            )
+            return
+
+        llm_dispatcher = self.sub_agents[0]
+        async with Aclosing(llm_dispatcher.run_async(ctx)) as agen:
+            async for event in agen:
+                yield event
+        decision = _as_decision(ctx.session.state.get(self.output_key))
+        escalated = (decision is not None and self.escalate_below_confidence is not None
+                     and decision.confidence < self.escalate_below_confidence)
+        if escalated:
+            print(f"{self.name}: LLM dispatch confidence {decision.confidence:.2f} below "
+                  f"{self.escalate_below_confidence:.2f}, re-dispatching with an escalated model")
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={self.escalation_key: [llm_dispatcher.name]}),
+            )
+            async with Aclosing(llm_dispatcher.run_async(ctx)) as agen:
+                async for event in agen:
+                    yield event
+            decision = _as_decision(ctx.session.state.get(self.output_key)) or decision
+        elapsed = time.perf_counter() - started
+        self._llm_seconds += LLM_LATENCY_SMOOTHING * (elapsed - self._llm_seconds)
+        metrics.observe_dispatch("llm", elapsed)
+        state_delta = {self.decision_key: {
+            **(decision.model_dump() if decision else {}),
+            "path": "llm",
+            "rule": match[0].name if match else None,
+            "rule_confidence": match[1].confidence if match else None,
+            "escalated": escalated,
+        }}
+        if escalated:
+            # 升級只適用於這次分診
+            state_delta[self.escalation_key] = []
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
@@ -7,53 +7,64 @@ SRE Assistant - 核心工作流程
 
 from typing import Dict, Any, List, Optional
 
+from pydantic import PrivateAttr
+
 from google.adk.agents import (
     LlmAgent,
     SequentialAgent,
-    ParallelAgent,
     BaseAgent
 )
 from google.adk.agents.callback_context import CallbackContext
+from google.adk.plugins import BasePlugin
 from google.adk.agents.invocation_context import InvocationContext
 from google.genai import types
-from pydantic import BaseModel, Field
 
 # Import the new tool
 from .tools.human_approval_tool import HumanApprovalTool
+from .config.config_manager import config_manager
+from .sub_agents.diagnostic_phase import DeadlineParallelAgent
+from .sub_agents.diagnostic_aggregation import aggregate_diagnostics
+from .sub_agents.fast_path_dispatcher import DEFAULT_DISPATCH_RULES, DispatchRule, FastPathDispatcher
+from .contracts import DispatchDecision
+from .prompts import DIAGNOSTIC_FINDINGS_FORMAT
+from .observability.metrics import metrics
+from .observability.tracing import adk_tracing, instrument_agent_tree
+from .llm_cache import LLMCacheErrorPlugin, LLMResponseCache
+from .model_routing import ModelRouter
 
 
 # --- 1. 定義結構化輸出 (Pydantic Models) ---
-
-class DispatchDecision(BaseModel):
-    """
-    定義智能分診器 (IntelligentDispatcher) 的決策輸出格式,
-    這確保了 LLM 的輸出是可預測和可用的
-    """
-    selected_experts: List[str] = Field(description="根據診斷結果，選擇最合適的專家代理名稱列表")
-    reasoning: str = Field(description="解釋為什麼選擇這些專家代理的簡要理由")
-    confidence: float = Field(description="對此決策的信心指數 (0.0 到 1.0)")
+# 分診決策 `DispatchDecision` 定義於 contracts.py，由快速路徑分診器與 LLM 分診器共用
 
 
 # --- 2. 定義各階段的佔位符代理 (Placeholder Agents) ---
 # 在後續的開發任務中，這些簡單的 LlmAgent 將被替換為功能完備的真實代理
 
+# 各代理的模型分級 (預設為快速且經濟的模型)；執行時再依事件嚴重程度與分診信心逐請求路由
+model_router = ModelRouter.from_config(config_manager.get_model_routing_config(), config_manager.config.llm_model)
+
+
 def _create_placeholder_agent(name: str, instruction: str, tools: List[Any] = None) -> LlmAgent:
     """一個用於創建簡單佔位符代理的輔助函式"""
     return LlmAgent(
         name=name,
         instruction=instruction,
-        model="gemini-1.5-flash",  # 使用一個快速且經濟的模型
-        tools=tools or []
+        model=model_router.model_for(name),
+        tools=tools or [],
+        # 記錄工具呼叫延遲 (Prometheus)
+        before_tool_callback=metrics.before_tool_callback,
+        after_tool_callback=metrics.after_tool_callback,
     )
 
+# 分析代理以結構化的 JSON 回報發現，供診斷聚合去重與排序
 MetricsAnalyzer = _create_placeholder_agent(
-    "MetricsAnalyzer", "分析指標數據並總結發現"
+    "MetricsAnalyzer", "分析指標數據並總結發現" + DIAGNOSTIC_FINDINGS_FORMAT
 )
 LogAnalyzer = _create_placeholder_agent(
-    "LogAnalyzer", "分析日誌數據並找出異常錯誤"
+    "LogAnalyzer", "分析日誌數據並找出異常錯誤" + DIAGNOSTIC_FINDINGS_FORMAT
 )
 TraceAnalyzer = _create_placeholder_agent(
-    "TraceAnalyzer", "分析追蹤數據以確定延遲瓶頸"
+    "TraceAnalyzer", "分析追蹤數據以確定延遲瓶頸" + DIAGNOSTIC_FINDINGS_FORMAT
 )
 
 # The new RemediationExecutor agent
@@ -87,6 +98,8 @@ class EnhancedSREWorkflow(SequentialAgent):
     這是一個由多個階段性子代理組成的序列，用於處理從診斷到修復的完整流程
     """
 
+    _llm_cache: Optional[LLMResponseCache] = PrivateAttr(default=None)
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         # 步驟 1: 創建工作流程的各個階段
         diagnostic_phase = self._create_diagnostic_phase()
@@ -107,51 +120,99 @@ class EnhancedSREWorkflow(SequentialAgent):
             before_agent_callback=self._workflow_pre_check,
             after_agent_callback=self._workflow_post_process
         )
+        # 步驟 3: 為啟用的代理掛上 LLM 回應快取 (放在追蹤回呼之前，命中時不產生模型跨度屬性)
+        llm_cache = LLMResponseCache.from_config(
+            config_manager.get_llm_cache_config(), config_manager.get_memory_config())
+        cached_agents = llm_cache.attach_to_tree(self)
+        self._llm_cache = llm_cache
+        print(f"LLM response cache enabled for: {cached_agents}")
+        # 步驟 4: 掛上模型路由 (放在快取之前，快取以路由後的模型計算鍵，升級的請求不會命中原本的回應)
+        routed_agents = model_router.attach_to_tree(self)
+        print(f"Model routing enabled for: {routed_agents}")
+        # 步驟 5: 為整棵代理樹掛上追蹤回呼 (代理、模型與工具跨度的屬性)
+        instrument_agent_tree(self, adk_tracing)
         print("EnhancedSREWorkflow initialized.")
 
-    def _create_diagnostic_phase(self) -> ParallelAgent:
+    def plugins(self) -> List[BasePlugin]:
+        """返回 Runner 需要註冊的外掛 (模型錯誤時釋放 LLM 回應快取的合併等待者)。"""
+        return [LLMCacheErrorPlugin(self._llm_cache)] if self._llm_cache is not None else []
+
+    def _create_diagnostic_phase(self) -> DeadlineParallelAgent:
         """
         創建並行診斷階段,
-        此階段會同時運行多個分析代理，以最快速度收集資訊
+        此階段會同時運行多個分析代理，並以截止時間與聚合策略限制階段的總時間；
+        逾時或失敗的代理會被取消，已完成的結果與錯過的代理寫入 `diagnostic_results` 狀態
         """
         print("Creating DiagnosticPhase...")
-        # TODO: The 'EnhancedSREWorkflow' blueprint from salvaged_code.md uses
-        #       parameters (aggregation_strategy, etc.) not available in the
-        #       current ADK version (^1.12.0). Reverting to a simpler ParallelAgent
-        #       for now and will revisit advanced parallel execution patterns later.
-        return ParallelAgent(
+        diagnostic_config = config_manager.get_diagnostic_config()
+        return DeadlineParallelAgent(
             name="DiagnosticPhase",
             sub_agents=[
                 MetricsAnalyzer,
                 LogAnalyzer,
                 TraceAnalyzer,
             ],
+            timeout_seconds=diagnostic_config.timeout_seconds,
+            agent_timeout_seconds=diagnostic_config.agent_timeout_seconds,
+            agent_timeouts=diagnostic_config.agent_timeouts,
+            aggregation_strategy=diagnostic_config.aggregation_strategy,
+            min_results=diagnostic_config.min_results,
+            # 階段結束後將各代理的發現聚合成 `aggregated_diagnosis`，供分診器使用
+            after_agent_callback=self._aggregate_diagnostics,
         )
 
-    def _aggregate_diagnostics(self, results: List[Dict]) -> Dict:
+    def _aggregate_diagnostics(self, callback_context: CallbackContext) -> Optional[types.Content]:
         """
-        自定義的聚合函式，用於將多個診斷代理的輸出整合成一個全面的報告
+        診斷階段完成後的回呼，將多個診斷代理的輸出整合成一個全面的報告,
+        去重並依嚴重程度排序後，以 token 預算內的摘要寫入 `aggregated_diagnosis`，
+        結構化的發現寫入 `diagnostic_findings`
         """
         print("Aggregating diagnostic results...")
-        # 在真實場景中，這裡會有更複雜的邏輯來融合和去重資訊
-        combined_details = "\n".join([str(r) for r in results])
-        return {"summary": "綜合診斷報告", "details": combined_details}
+        diagnostic_config = config_manager.get_diagnostic_config()
+        aggregated = aggregate_diagnostics(
+            callback_context.state.get("diagnostic_results") or {},
+            token_budget=diagnostic_config.summary_token_budget,
+            similarity=diagnostic_config.dedup_similarity,
+        )
+        callback_context.state["aggregated_diagnosis"] = aggregated.summary
+        callback_context.state["diagnostic_findings"] = [f.model_dump(mode="json") for f in aggregated.findings]
+        return None
 
-    def _create_dispatcher_phase(self) -> LlmAgent:
+    def _create_dispatcher_phase(self) -> FastPathDispatcher:
         """
         創建智能分診修復階段,
-        此階段使用一個 LLM 來根據診斷結果，動態地選擇合適的修復專家
+        已知的事件型態由規則表直接決定修復專家 (快速路徑)，
+        其餘情況使用一個 LLM 來根據診斷結果，動態地選擇合適的修復專家；
+        LLM 決策的信心不足時，以升級的模型重新分診一次
         """
         print("Creating DispatcherPhase...")
-        # 這裡我們使用一個 LlmAgent 來模擬分診器
-        return LlmAgent(
+        dispatch_config = config_manager.get_dispatch_config()
+        routing_config = config_manager.get_model_routing_config()
+        # 這裡我們使用一個 LlmAgent 來模擬分診器，以 DispatchDecision 結構輸出決策與信心
+        llm_dispatcher = LlmAgent(
             name="IntelligentDispatcher",
+            model=model_router.model_for("IntelligentDispatcher"),
             instruction=(
                 "請仔細分析來自 {aggregated_diagnosis} 的診斷報告, "
                 "然後假裝你選擇了 'KubernetesRemediationAgent' 來解決問題, "
-                "你的輸出應該只有 'KubernetesRemediationAgent' 這個詞"
+                "輸出 selected_experts、reasoning 與 confidence (0.0 到 1.0); "
+                "診斷證據不足或互相矛盾時, 應給出較低的 confidence"
             ),
-            output_key="remediation_decision"
+            output_schema=DispatchDecision,
+            output_key="remediation_decision",
+            disallow_transfer_to_parent=True,
+            disallow_transfer_to_peers=True,
+        )
+        return FastPathDispatcher(
+            name="DispatcherPhase",
+            sub_agents=[llm_dispatcher],
+            # 配置中的規則附加在內建規則之後
+            rules=DEFAULT_DISPATCH_RULES + [DispatchRule(**rule) for rule in dispatch_config.extra_rules],
+            confidence_threshold=dispatch_config.confidence_threshold,
+            enabled=dispatch_config.fast_path_enabled,
+            expected_llm_seconds=dispatch_config.expected_llm_seconds,
+            escalate_below_confidence=(routing_config.escalate_below_confidence
+                                       if routing_config.enabled and routing_config.escalation_tier else None),
         )
 
     def _create_remediation_phase(self) -> BaseAgent:
@@ -0,0 +1,173 @@
+# tests/test_alert_dedup.py
+import asyncio
+
+import pytest
+
+from sre_assistant.alerts.dedup import AlertCoalescer
+from sre_assistant.contracts import SRERequest
+from sre_assistant.jobs.models import Job, QueueFullError
+
+
+def _alert(pod: str, alertname: str = "HighCPU", service: str = "checkout") -> SRERequest:
+    return SRERequest(
+        incident_id=f"{alertname}-{pod}", severity="P1", input=f"{alertname} on {pod}",
+        affected_services=[service], context={"labels": {"alertname": alertname, "pod": pod}},
+    )
+
+
+class RecordingSubmit:
+    def __init__(self, delay: float = 0.0):
+        self.jobs = []
+        self.delay = delay
+
+    async def __call__(self, tenant_id, payload):
+        await asyncio.sleep(self.delay)
+        job = Job(tenant_id=tenant_id, payload=payload)
+        self.jobs.append(job)
+        return job
+
+
+async def test_storm_of_pod_alerts_becomes_one_run():
+    """
+    測試目的：驗證 200 個 Pod 同時觸發的同一告警 (包含提交尚未完成時到達者) 只啟動一次執行。
+    """
+    submit = RecordingSubmit(delay=0.01)
+    coalescer = AlertCoalescer(submit, ignored_labels=["pod"])
+
+    results = await asyncio.gather(*(coalescer.ingest("t", _alert(f"pod-{i}")) for i in range(200)))
+
+    assert len(submit.jobs) == 1
+    assert {r.run_id for r in results} == {submit.jobs[0].job_id}
+    assert sum(not r.coalesced for r in results) == 1
+    stats = coalescer.snapshot()
+    assert stats["suppressed"] == 199
+    assert stats["top_incidents"][0]["instances"] == 50
+
+
+async def test_different_alerts_tenants_and_expired_windows_start_new_runs():
+    """
+    測試目的：驗證不同告警、不同租戶，以及視窗結束後的告警都會啟動新的執行。
+    """
+    submit = RecordingSubmit()
+    coalescer = AlertCoalescer(submit, window_seconds=60, ignored_labels=["pod"])
+
+    a = await coalescer.ingest("t", _alert("pod-1"))
+    b = await coalescer.ingest("t", _alert("pod-1", alertname="HighMemory"))
+    c = await coalescer.ingest("other", _alert("pod-1"))
+    assert len({a.run_id, b.run_id, c.run_id}) == 3
+
+    coalescer.window_seconds = 0
+    await asyncio.sleep(0.001)
+    d = await coalescer.ingest("t", _alert("pod-2"))
+    assert not d.coalesced and d.run_id != a.run_id
+
+
+async def test_rejected_submission_is_not_remembered():
+    """
+    測試目的：驗證提交被佇列拒絕時例外會傳遞出去，且之後的相同告警可以重新提交。
+    """
+    calls = []
+
+    async def reject_once(tenant_id, payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise QueueFullError("full", retry_after=5)
+        return Job(tenant_id=tenant_id, payload=payload)
+
+    coalescer = AlertCoalescer(reject_once, ignored_labels=["pod"])
+    with pytest.raises(QueueFullError):
+        await coalescer.ingest("t", _alert("pod-1"))
+    result = await coalescer.ingest("t", _alert("pod-2"))
+    assert not result.coalesced
+    assert coalescer.stats["rejected"] == 1
+
+
+async def test_window_is_anchored_at_first_alert_and_failed_runs_are_not_reused():
+    """
+    測試目的：驗證持續觸發的告警不會讓視窗一直延長 (視窗結束後重新診斷)，
+    且重複告警不會併入已失敗的執行。
+    """
+    from sre_assistant.jobs.models import JobStatus
+
+    submit = RecordingSubmit()
+    statuses = {}
+
+    async def get_job(run_id):
+        job = next(job for job in submit.jobs if job.job_id == run_id)
+        return job.model_copy(update={"status": statuses.get(run_id, JobStatus.RUNNING)})
+
+    coalescer = AlertCoalescer(submit, window_seconds=0.05, ignored_labels=["pod"], get_job=get_job)
+    first = await coalescer.ingest("t", _alert("pod-0"))
+    for i in range(1, 4):
+        await asyncio.sleep(0.02)
+        result = await coalescer.ingest("t", _alert(f"pod-{i}"))
+    assert result.run_id != first.run_id and not result.coalesced
+
+    coalescer.window_seconds = 60
+    statuses[result.run_id] = JobStatus.FAILED
+    retried = await coalescer.ingest("t", _alert("pod-4"))
+    assert not retried.coalesced and retried.run_id != result.run_id
+    statuses[retried.run_id] = JobStatus.SUCCEEDED
+    assert (await coalescer.ingest("t", _alert("pod-5"))).run_id == retried.run_id
+    assert len(submit.jobs) == 3
+
+
+class FakeRedis:
+    """只實作指紋登錄用到的命令 (忽略過期時間)。"""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def register_script(self, script):
+        def swap(keys, args):
+            expected, value, _ = args
+            if self.data.get(keys[0]) != expected:
+                return 0
+            if value:
+                self.data[keys[0]] = value
+            else:
+                self.data.pop(keys[0], None)
+            return 1
+        return swap
+
+
+async def test_shared_registry_coalesces_across_workers():
+    """
+    測試目的：驗證兩個工作行程共用指紋登錄時，同時到達的告警風暴在整個部署只啟動一次執行，
+    執行失敗後由任一工作行程接手並啟動新的執行。
+    """
+    from sre_assistant.alerts.dedup import RedisIncidentRegistry
+    from sre_assistant.jobs.models import JobStatus
+
+    redis = FakeRedis()
+    submit = RecordingSubmit(delay=0.01)
+    statuses = {}
+
+    async def get_job(run_id):
+        job = next(job for job in submit.jobs if job.job_id == run_id)
+        return job.model_copy(update={"status": statuses.get(run_id, JobStatus.RUNNING)})
+
+    workers = [
+        AlertCoalescer(submit, ignored_labels=["pod"], get_job=get_job,
+                       registry=RedisIncidentRegistry(redis, poll_interval_seconds=0.001))
+        for _ in range(2)
+    ]
+    results = await asyncio.gather(*(workers[i % 2].ingest("t", _alert(f"pod-{i}")) for i in range(20)))
+    assert len(submit.jobs) == 1
+    assert {r.run_id for r in results} == {submit.jobs[0].job_id}
+    assert sum(not r.coalesced for r in results) == 1
+
+    statuses[submit.jobs[0].job_id] = JobStatus.FAILED
+    workers[0]._incidents.clear()
+    retried = await workers[0].ingest("t", _alert("pod-99"))
+    assert not retried.coalesced and len(submit.jobs) == 2
+    assert (await workers[1].ingest("t", _alert("pod-100"))).run_id == retried.run_id
@@ -0,0 +1,85 @@
+# tests/test_alert_webhooks.py
+import pytest
+
+from sre_assistant.alerts.dedup import AlertCoalescer
+from sre_assistant.alerts.webhooks import parse_alert_webhook
+from sre_assistant.jobs.queue import JobQueue
+from sre_assistant.jobs.store import SQLiteJobStore
+
+
+def _payload(alerts_per_name=3, names=("HighCPU",), status="firing"):
+    return {
+        "version": "4", "groupKey": "{}:{alertname=\"HighCPU\"}", "status": status,
+        "commonLabels": {"namespace": "prod"},
+        "alerts": [
+            {
+                "status": status,
+                "labels": {"alertname": name, "service": "checkout", "severity": "critical", "pod": f"pod-{i}"},
+                "annotations": {"summary": f"{name} above 90%"},
+                "startsAt": "2024-05-01T00:00:00Z",
+                "fingerprint": f"{name}-{i}",
+            }
+            for name in names for i in range(alerts_per_name)
+        ],
+    }
+
+
+def test_parse_alertmanager_batch():
+    """
+    測試目的：驗證 Alertmanager 批次被轉換為 SRERequest，且 resolved 告警只計數。
+    """
+    payload = _payload()
+    payload["alerts"].append({**payload["alerts"][0], "status": "resolved"})
+
+    batch = parse_alert_webhook(payload, "alertmanager")
+
+    assert batch.resolved == 1
+    assert len(batch.requests) == 3
+    request = batch.requests[0]
+    assert request.severity.value == "P0"
+    assert request.affected_services == ["checkout"]
+    assert request.input == "HighCPU: HighCPU above 90%"
+    assert request.context["labels"]["namespace"] == "prod"
+
+
+def test_parse_grafana_extras_and_invalid_payloads():
+    """
+    測試目的：驗證 Grafana 特有欄位被保留，以及格式錯誤的 payload 會被拒絕。
+    """
+    payload = _payload(alerts_per_name=1)
+    payload["alerts"][0]["valueString"] = "[ var='A' value=97 ]"
+    batch = parse_alert_webhook(payload, "grafana")
+    assert batch.requests[0].context["valueString"] == "[ var='A' value=97 ]"
+
+    with pytest.raises(ValueError):
+        parse_alert_webhook({"receiver": "sre"}, "alertmanager")
+    with pytest.raises(ValueError):
+        parse_alert_webhook({"alerts": [{"labels": ["not", "a", "map"]}]}, "alertmanager")
+
+
+async def test_batch_is_grouped_and_enqueued_once(tmp_path):
+    """
+    測試目的：驗證 1,000 個告警的批次依事件分組，新事件以一次批次寫入排隊。
+    """
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    queue = JobQueue(store, lambda job: None, max_pending_per_tenant=1000)
+    calls = []
+
+    async def submit_many(tenant_id, payloads):
+        calls.append(len(payloads))
+        return await queue.submit_many(tenant_id, payloads)
+
+    coalescer = AlertCoalescer(queue.submit, ignored_labels=["pod"], submit_many=submit_many)
+    batch = parse_alert_webhook(_payload(alerts_per_name=200, names=[f"Alert{i}" for i in range(5)]),
+                                "alertmanager")
+
+    results = await coalescer.ingest_batch("t", batch.requests)
+
+    assert calls == [5]
+    assert len(results) == 5 and not any(r.coalesced for r in results)
+    assert await store.pending_counts() == {"t": 5}
+    assert coalescer.stats["suppressed"] == 995
+
+    again = await coalescer.ingest_batch("t", batch.requests[:10])
+    assert again[0].coalesced and again[0].run_id == results[0].run_id
+    assert calls == [5]
@@ -0,0 +1,98 @@
+# tests/test_cached_backend.py
+"""
+此檔案包含對 RAG 查詢結果快取 (`CachedBackend`) 的單元測試。
+"""
+
+import asyncio
+
+from sre_assistant.memory.cached_backend import CachedBackend
+from sre_assistant.memory.hybrid_backend import HybridBackend
+from sre_assistant.memory.in_memory_backend import InMemoryBackend
+
+
+class CountingBackend(InMemoryBackend):
+    """記錄實際送到後端的查詢次數。"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def search_batch(self, query_embeddings, k=10, filters=None):
+        self.calls += len(query_embeddings)
+        return await super().search_batch(query_embeddings, k, filters)
+
+
+async def test_repeated_queries_hit_cache_until_write():
+    """
+    測試目的：驗證量化後相同的查詢會命中快取，而 upsert/delete 會透過世代計數器使其失效。
+    """
+    inner = CountingBackend()
+    backend = CachedBackend(inner, ttl_seconds=60)
+    await backend.upsert([[1.0, 0.0], [0.0, 1.0]], [{"id": "a"}, {"id": "b"}])
+
+    first = await backend.search([1.0, 0.0], k=1, filters={"id": "a"})
+    second = await backend.search([1.0, 0.00001], k=1, filters={"id": "a"})
+    assert first == second == [{"id": "a", "similarity": 1.0}]
+    assert inner.calls == 1
+    assert backend.stats["hits"] == 1 and backend.stats["misses"] == 1
+
+    # 不同的 k 或過濾條件是不同的快取鍵
+    await backend.search([1.0, 0.0], k=2)
+    assert inner.calls == 2
+
+    await backend.delete(["a"])
+    assert await backend.search([1.0, 0.0], k=1) == [{"id": "b", "similarity": 0.0}]
+    assert inner.calls == 3
+
+
+async def test_search_batch_only_forwards_misses_and_shares_redis_generation():
+    """
+    測試目的：驗證批次查詢只將未命中的查詢交給後端，且另一個行程的寫入
+    (遞增 Redis 世代計數器) 在世代的行程內快取過期後使本行程的快取失效，
+    而期間的 LRU 命中不需要讀取 Redis。
+    """
+    class DictRedis:
+        def __init__(self):
+            self.data = {}
+            self.gets = 0
+        def get(self, key):
+            self.gets += 1
+            return self.data.get(key)
+        def set(self, key, value, ex=None):
+            self.data[key] = value
+        def incr(self, key):
+            self.data[key] = int(self.data.get(key, 0)) + 1
+            return self.data[key]
+
+    redis = DictRedis()
+    inner = CountingBackend()
+    await inner.upsert([[1.0, 0.0], [0.0, 1.0]], [{"id": "a"}, {"id": "b"}])
+    local = CachedBackend(inner, redis_client=redis, generation_ttl_seconds=0.05)
+    remote = CachedBackend(inner, redis_client=redis)
+
+    await local.search([1.0, 0.0], k=1)
+    results = await local.search_batch([[1.0, 0.0], [0.0, 1.0]], k=1)
+    assert [r[0]["id"] for r in results] == ["a", "b"]
+    assert inner.calls == 2
+    gets = redis.gets
+    await local.search([1.0, 0.0], k=1)
+    assert redis.gets == gets
+
+    # 另一個實例透過 Redis 命中，不需查詢後端
+    await remote.search([0.0, 1.0], k=1)
+    assert inner.calls == 2 and remote.stats["redis_hits"] == 1
+
+    await remote.upsert([[1.0, 0.0]], [{"id": "c"}])
+    await asyncio.sleep(0.06)
+    await local.search([1.0, 0.0], k=1)
+    assert inner.calls == 3
+
+
+async def test_bulk_upsert_falls_back_to_upsert_for_hybrid_backend():
+    """
+    測試目的：驗證被包裝的後端 (`HybridBackend`) 沒有大量寫入路徑時，`bulk_upsert` 退回到 `upsert` 並使快取失效。
+    """
+    backend = CachedBackend(HybridBackend(InMemoryBackend()))
+    assert await backend.bulk_upsert(iter([([1.0, 0.0], {"id": "a", "content": "disk full"})])) == 1
+    assert await backend.search([1.0, 0.0], k=1) == [{"id": "a", "content": "disk full", "similarity": 1.0}]
+    assert backend.stats["invalidations"] == 1
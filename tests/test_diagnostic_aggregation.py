@@ -0,0 +1,76 @@
+# tests/test_diagnostic_aggregation.py
+import json
+
+from sre_assistant.contracts import SeverityLevel
+from sre_assistant.sub_agents.diagnostic_aggregation import aggregate_diagnostics, estimate_tokens, parse_findings
+
+
+def findings_json(*findings):
+    return json.dumps({"findings": list(findings)})
+
+
+def test_overlapping_findings_are_merged_and_ranked_by_severity_and_corroboration():
+    """
+    測試目的：驗證不同代理回報的重疊發現被合併 (來源與證據聯集)，並依嚴重程度與佐證數排序。
+    """
+    results = {
+        "MetricsAnalyzer": findings_json(
+            {"summary": "checkout CPU saturated at 98%", "severity": "P1", "component": "checkout",
+             "evidence": ["cpu_usage=0.98"]},
+            {"summary": "disk usage growing on db-1", "severity": "low", "component": "db-1"},
+        ),
+        "LogAnalyzer": "```json\n" + findings_json(
+            {"summary": "checkout CPU saturated, requests timing out", "severity": "high", "component": "checkout",
+             "evidence": "upstream request timeout"},
+        ) + "\n```",
+        "TraceAnalyzer": findings_json(
+            {"summary": "payment gateway outage", "severity": "critical", "component": "payment"},
+        ),
+    }
+    aggregated = aggregate_diagnostics({"results": results, "missed": []})
+
+    assert [f.summary for f in aggregated.findings] == [
+        "payment gateway outage", "checkout CPU saturated at 98%", "disk usage growing on db-1"]
+    checkout = aggregated.findings[1]
+    assert checkout.severity == SeverityLevel.P1
+    assert checkout.sources == ["MetricsAnalyzer", "LogAnalyzer"]
+    assert checkout.evidence == ["cpu_usage=0.98", "upstream request timeout"]
+    assert aggregated.summary.splitlines()[1].startswith("- [P0] payment:")
+    assert not aggregated.partial
+
+
+def test_summary_respects_token_budget_and_flags_missed_agents():
+    """
+    測試目的：驗證摘要遵守 token 預算 (超出部分以數量帶過)，並標註未完成的代理。
+    """
+    findings = [{"summary": f"svc{i} anomaly{i} on node{i}", "severity": "P2"} for i in range(40)]
+    aggregated = aggregate_diagnostics(
+        {"results": {"LogAnalyzer": findings_json(*findings)}, "missed": ["TraceAnalyzer"]}, token_budget=120)
+
+    assert estimate_tokens(aggregated.summary) <= 120 + 20
+    assert aggregated.omitted > 0 and f"另有 {aggregated.omitted} 項" in aggregated.summary
+    assert "TraceAnalyzer 未在截止時間內完成" in aggregated.summary
+    assert aggregated.partial and aggregated.missed == ["TraceAnalyzer"]
+
+
+def test_plain_text_output_falls_back_to_line_parsing():
+    """
+    測試目的：驗證代理未輸出 JSON 時，逐行解析純文字並以關鍵字推斷嚴重程度。
+    """
+    findings = parse_findings("LogAnalyzer", "## 分析結果\n- checkout 服務大量 500 錯誤\n- 快取命中率略為下降")
+
+    assert [(f.summary, f.severity) for f in findings] == [
+        ("checkout 服務大量 500 錯誤", SeverityLevel.P1), ("快取命中率略為下降", SeverityLevel.P2)]
+    assert findings[0].sources == ["LogAnalyzer"]
+
+
+def test_empty_json_findings_and_fenced_output_do_not_become_plain_text_findings():
+    """
+    測試目的：驗證可解析的空 JSON 發現列表返回空列表，而不會退回逐行解析產生假的發現；
+    無法解析的圍欄輸出中，圍欄行不會成為發現。
+    """
+    assert parse_findings("LogAnalyzer", '{"findings": []}') == []
+    assert parse_findings("LogAnalyzer", '```json\n{"findings": []}\n```') == []
+
+    findings = parse_findings("LogAnalyzer", "```json\n- checkout 服務大量 500 錯誤\n```")
+    assert [f.summary for f in findings] == ["checkout 服務大量 500 錯誤"]
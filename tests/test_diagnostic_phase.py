@@ -0,0 +1,106 @@
+# tests/test_diagnostic_phase.py
+import asyncio
+import time
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from sre_assistant.sub_agents.diagnostic_phase import DeadlineParallelAgent
+
+
+class FakeAnalyzer(BaseAgent):
+    """延遲固定秒數後回覆一段文字的分析代理；`fail` 為 True 時拋出例外。"""
+    delay: float = 0.0
+    fail: bool = False
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend unavailable")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=f"{self.name} finding")]),
+        )
+
+
+async def run_phase(agent: DeadlineParallelAgent):
+    session_service = InMemorySessionService()
+    runner = Runner(app_name="test", agent=agent, session_service=session_service)
+    session = await session_service.create_session(app_name="test", user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text="CPU saturated on checkout")])
+    started = time.perf_counter()
+    events = [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+    elapsed = time.perf_counter() - started
+    session = await session_service.get_session(app_name="test", user_id="u", session_id=session.id)
+    return events, session.state["diagnostic_results"], elapsed
+
+
+async def test_straggler_is_cancelled_at_deadline_and_marked_missed():
+    """
+    測試目的：驗證逾時的代理在截止時間被取消，階段不被拖住，且部分結果與錯過的代理寫入會話狀態。
+    """
+    agent = DeadlineParallelAgent(
+        name="DiagnosticPhase",
+        sub_agents=[
+            FakeAnalyzer(name="MetricsAnalyzer", delay=0.05),
+            FakeAnalyzer(name="LogAnalyzer", fail=True),
+            FakeAnalyzer(name="TraceAnalyzer", delay=5.0),
+        ],
+        timeout_seconds=2.0,
+        agent_timeouts={"TraceAnalyzer": 0.3},
+    )
+    events, summary, elapsed = await run_phase(agent)
+
+    assert elapsed < 1.0
+    assert summary["results"] == {"MetricsAnalyzer": "MetricsAnalyzer finding"}
+    assert summary["completed"] == ["MetricsAnalyzer"]
+    assert summary["timed_out"] == ["TraceAnalyzer"]
+    assert summary["failed"] == {"LogAnalyzer": "RuntimeError: backend unavailable"}
+    assert summary["partial"] is True
+    assert sorted(summary["missed"]) == ["LogAnalyzer", "TraceAnalyzer"]
+    assert events[0].branch == "DiagnosticPhase.MetricsAnalyzer"
+
+
+async def test_first_n_strategy_stops_after_n_agents_complete():
+    """
+    測試目的：驗證 first_n 策略在前 N 個代理完成後即取消其餘代理。
+    """
+    agent = DeadlineParallelAgent(
+        name="DiagnosticPhase",
+        sub_agents=[
+            FakeAnalyzer(name="MetricsAnalyzer", delay=0.01),
+            FakeAnalyzer(name="LogAnalyzer", delay=0.02),
+            FakeAnalyzer(name="TraceAnalyzer", delay=5.0),
+        ],
+        aggregation_strategy="first_n",
+        min_results=2,
+    )
+    _, summary, elapsed = await run_phase(agent)
+
+    assert elapsed < 1.0
+    assert sorted(summary["completed"]) == ["LogAnalyzer", "MetricsAnalyzer"]
+    assert summary["cancelled"] == ["TraceAnalyzer"]
+    assert summary["timed_out"] == []
+    assert summary["missed"] == ["TraceAnalyzer"] and summary["partial"] is True
+
+
+async def test_all_agents_complete_without_partial_flag():
+    """
+    測試目的：驗證所有代理都在截止時間內完成時，結果完整且 partial 為 False。
+    """
+    agent = DeadlineParallelAgent(
+        name="DiagnosticPhase",
+        sub_agents=[FakeAnalyzer(name="MetricsAnalyzer"), FakeAnalyzer(name="LogAnalyzer", delay=0.01)],
+        agent_timeout_seconds=1.0,
+    )
+    _, summary, _ = await run_phase(agent)
+
+    assert set(summary["results"]) == {"MetricsAnalyzer", "LogAnalyzer"}
+    assert summary["missed"] == [] and summary["partial"] is False
@@ -0,0 +1,110 @@
+# tests/test_embedding_service.py
+"""
+此檔案包含對批次嵌入服務 (`EmbeddingService`) 的單元測試。
+
+測試使用一個會記錄呼叫的假編碼器，以驗證快取、請求合併與
+微批次行為，而不需要載入真實的 SentenceTransformer 模型。
+"""
+
+import asyncio
+
+import pytest
+
+from sre_assistant.memory.embedding_service import EmbeddingService
+
+
+class RecordingEncoder:
+    """一個將文本長度編碼為二維向量，並記錄每次批次呼叫的假編碼器。"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+async def test_concurrent_requests_are_batched_and_coalesced():
+    """
+    測試目的：驗證並行的編碼請求會被合併為一個微批次，且重複文本只編碼一次。
+    """
+    encoder = RecordingEncoder()
+    service = EmbeddingService("fake-model", encoder=encoder, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        service.encode_one("disk full"),
+        service.encode_one("disk full"),
+        service.encode(["oom killed", "disk full"]),
+    )
+
+    assert results[0] == results[1] == [9.0, 1.0]
+    assert results[2] == [[10.0, 1.0], [9.0, 1.0]]
+    assert encoder.calls == [["disk full", "oom killed"]]
+    assert service.stats["coalesced"] == 2
+    await service.close()
+
+
+async def test_lru_cache_avoids_re_encoding():
+    """
+    測試目的：驗證已編碼過的文本會從 LRU 快取返回，並遵守容量上限。
+    """
+    encoder = RecordingEncoder()
+    service = EmbeddingService("fake-model", encoder=encoder, max_wait_ms=0, cache_size=2)
+
+    await service.encode(["a", "bb"])
+    await service.encode(["a", "bb"])
+    assert len(encoder.calls) == 1
+    assert service.stats["lru_hits"] == 2
+
+    await service.encode(["ccc"])   # 淘汰最久未使用的 "a"
+    await service.encode(["a"])
+    assert encoder.calls[-1] == ["a"]
+    await service.close()
+
+
+async def test_disk_cache_survives_restart(tmp_path):
+    """
+    測試目的：驗證 SQLite 磁碟快取在新的服務實例中依然有效。
+    """
+    cache_path = str(tmp_path / "embeddings.sqlite")
+    first = EmbeddingService("fake-model", encoder=RecordingEncoder(), max_wait_ms=0, cache_path=cache_path)
+    await first.encode(["connection refused"])
+    await first.close()
+
+    encoder = RecordingEncoder()
+    second = EmbeddingService("fake-model", encoder=encoder, max_wait_ms=0, cache_path=cache_path)
+    assert await second.encode(["connection refused"]) == [[18.0, 1.0]]
+    assert encoder.calls == []
+    assert second.stats["disk_hits"] == 1
+    await second.close()
+
+
+async def test_encoder_errors_propagate_to_callers():
+    """
+    測試目的：驗證編碼失敗時，例外會傳遞給所有等待的呼叫者。
+    """
+    def failing_encoder(texts):
+        raise RuntimeError("model unavailable")
+
+    service = EmbeddingService("fake-model", encoder=failing_encoder, max_wait_ms=0)
+    with pytest.raises(RuntimeError):
+        await service.encode(["boom"])
+    await service.close()
+
+
+async def test_cancelling_one_coalesced_caller_does_not_cancel_the_others():
+    """
+    測試目的：驗證合併到同一個進行中請求的呼叫者之一被取消時，其他呼叫者仍然收到向量。
+    """
+    encoder = RecordingEncoder()
+    service = EmbeddingService("fake-model", encoder=encoder, max_wait_ms=20)
+
+    cancelled = asyncio.create_task(service.encode_one("disk full"))
+    survivor = asyncio.create_task(service.encode_one("disk full"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await survivor == [9.0, 1.0]
+    assert cancelled.cancelled()
+    assert encoder.calls == [["disk full"]]
+    await service.close()
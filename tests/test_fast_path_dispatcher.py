@@ -0,0 +1,128 @@
+# tests/test_fast_path_dispatcher.py
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from sre_assistant.sub_agents.fast_path_dispatcher import (
+    DEFAULT_DISPATCH_RULES, DispatchRule, DispatchRuleTable, FastPathDispatcher, diagnostic_signature,
+)
+
+# 與 eval/evaluation.py 的黃金測試案例相同的診斷結果
+DB_HIGH_LATENCY = {
+    "metrics_analysis": {"error_rate": 0.01, "latency_ms": 1500},
+    "logs_analysis": {"critical_errors": 5, "pattern": "timeout"},
+}
+AUTH_SERVICE_500 = {
+    "metrics_analysis": {"error_rate": 0.6, "latency_ms": 200},
+    "logs_analysis": {"critical_errors": 250, "pattern": "NullPointerException"},
+}
+
+
+class FakeLlmDispatcher(BaseAgent):
+    """記錄呼叫次數與每次呼叫時升級狀態的 LLM 分診器替身；升級後回報較高的信心。"""
+    calls: int = 0
+    confidence: float = 0.9
+    escalations: list = []
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        self.calls += 1
+        escalated = self.name in (ctx.session.state.get("model_escalation") or [])
+        self.escalations.append(escalated)
+        decision = {"selected_experts": ["KubernetesRemediationAgent"], "reasoning": "fake",
+                    "confidence": 0.95 if escalated else self.confidence}
+        yield Event(
+            invocation_id=ctx.invocation_id, author=self.name, branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text="KubernetesRemediationAgent")]),
+            actions=EventActions(state_delta={"remediation_decision": decision}),
+        )
+
+
+async def run_dispatcher(state, llm=None, **kwargs):
+    llm = llm or FakeLlmDispatcher(name="IntelligentDispatcher")
+    agent = FastPathDispatcher(name="DispatcherPhase", sub_agents=[llm], **kwargs)
+    session_service = InMemorySessionService()
+    runner = Runner(app_name="test", agent=agent, session_service=session_service)
+    session = await session_service.create_session(app_name="test", user_id="u", state=state)
+    message = types.Content(role="user", parts=[types.Part(text="dispatch")])
+    async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+        pass
+    session = await session_service.get_session(app_name="test", user_id="u", session_id=session.id)
+    return llm.calls, session.state
+
+
+def test_rule_table_maps_golden_cases_to_expected_experts():
+    """
+    測試目的：驗證內建規則表將評估案例的診斷結果對應到預期的修復專家，未知型態不命中。
+    """
+    table = DispatchRuleTable(DEFAULT_DISPATCH_RULES)
+
+    _, latency = table.match(diagnostic_signature(DB_HIGH_LATENCY))
+    _, errors = table.match(diagnostic_signature(AUTH_SERVICE_500))
+    assert latency.selected_experts == ["scaling_fix"] and latency.confidence >= 0.8
+    assert errors.selected_experts == ["rollback_fix"] and errors.confidence >= 0.8
+
+    findings = [{"severity": "P2", "component": "db-1", "summary": "disk usage growing", "evidence": []}]
+    assert table.match(diagnostic_signature({"diagnostic_findings": findings})) is None
+
+
+def test_conflicting_rules_lower_confidence():
+    """
+    測試目的：驗證指向不同專家的規則同時命中時，決策信心被降低。
+    """
+    table = DispatchRuleTable([
+        DispatchRule(name="a", experts=["scaling_fix"], all_of=["latency"], confidence=0.9),
+        DispatchRule(name="b", experts=["rollback_fix"], all_of=["deploy"], confidence=0.8),
+    ])
+    rule, decision = table.match("latency spike right after deploy")
+    assert rule.name == "a"
+    assert decision.confidence == 0.9 - 0.4 and "衝突" in decision.reasoning
+
+
+async def test_fast_path_skips_llm_for_known_signature():
+    """
+    測試目的：驗證命中已知型態時不呼叫 LLM 分診器，並將決策與路徑寫入會話狀態。
+    """
+    findings = [{"severity": "P1", "component": "checkout", "summary": "p99 latency 4s with upstream timeouts",
+                 "evidence": ["timed out after 3000ms"]}]
+    calls, state = await run_dispatcher({"diagnostic_findings": findings})
+
+    assert calls == 0
+    assert state["remediation_decision"]["selected_experts"] == ["scaling_fix"]
+    assert state["dispatch_decision"]["path"] == "fast_path"
+    assert state["dispatch_decision"]["rule"] == "latency_with_timeouts"
+
+
+async def test_unknown_signature_falls_back_to_llm():
+    """
+    測試目的：驗證未命中規則時照常呼叫 LLM 分診器，並記錄為 LLM 路徑。
+    """
+    findings = [{"severity": "P2", "component": "db-1", "summary": "disk usage growing", "evidence": []}]
+    calls, state = await run_dispatcher({"diagnostic_findings": findings})
+
+    assert calls == 1
+    assert state["remediation_decision"]["selected_experts"] == ["KubernetesRemediationAgent"]
+    assert state["dispatch_decision"]["path"] == "llm"
+    assert state["dispatch_decision"]["escalated"] is False
+
+
+async def test_low_confidence_llm_decision_is_escalated_once():
+    """
+    測試目的：驗證 LLM 分診決策信心不足時，標記升級並重新分診一次，完成後清除升級標記。
+    """
+    findings = [{"severity": "P2", "component": "db-1", "summary": "disk usage growing", "evidence": []}]
+    llm = FakeLlmDispatcher(name="IntelligentDispatcher", confidence=0.4)
+    calls, state = await run_dispatcher({"diagnostic_findings": findings}, llm, escalate_below_confidence=0.6)
+
+    assert calls == 2 and llm.escalations == [False, True]
+    assert state["dispatch_decision"]["escalated"] is True
+    assert state["dispatch_decision"]["confidence"] == 0.95
+    assert state["model_escalation"] == []
+
+    confident = FakeLlmDispatcher(name="IntelligentDispatcher", confidence=0.7)
+    calls, _ = await run_dispatcher({"diagnostic_findings": findings}, confident, escalate_below_confidence=0.6)
+    assert calls == 1
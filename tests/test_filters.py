@@ -0,0 +1,91 @@
+# tests/test_filters.py
+"""
+此檔案包含對中繼資料過濾表達式 (`sre_assistant.memory.filters`) 的單元測試，
+涵蓋解析、Python 端比對以及各後端原生語法的轉換。
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from sre_assistant.memory.filters import (
+    matches, parse_filters, to_chroma_where, to_pgvector_sql, to_vertex_restricts, to_weaviate_where,
+)
+
+FILTERS = {
+    "service": "checkout",
+    "severity": {"$in": ["P0", "P1"]},
+    "timestamp": {"$gte": "2024-05-01T00:00:00Z"},
+}
+
+
+def test_parse_filters_rejects_unknown_operator():
+    """
+    測試目的：驗證不支援的運算子與非列表的 `$in` 會引發 ValueError。
+    """
+    with pytest.raises(ValueError):
+        parse_filters({"service": {"$regex": "check.*"}})
+    with pytest.raises(ValueError):
+        parse_filters({"severity": {"$in": "P0"}})
+
+
+def test_matches_equality_membership_and_time_range():
+    """
+    測試目的：驗證 Python 端比對能處理等值、成員與混合格式的時間戳範圍。
+    """
+    meta = {"service": "checkout", "severity": "P1",
+            "timestamp": datetime(2024, 5, 2, tzinfo=timezone.utc)}
+    assert matches(meta, FILTERS)
+    assert not matches({**meta, "severity": "P3"}, FILTERS)
+    assert not matches({**meta, "timestamp": "2024-04-30T23:59:59Z"}, FILTERS)
+    assert not matches({"service": "checkout", "severity": "P0"}, FILTERS)
+
+
+def test_backend_translations():
+    """
+    測試目的：驗證過濾表達式轉換為 Chroma、pgvector、Weaviate 與 Vertex AI 的原生語法。
+    """
+    epoch = datetime(2024, 5, 1, tzinfo=timezone.utc).timestamp()
+
+    assert to_chroma_where(FILTERS) == {"$and": [
+        {"service": {"$eq": "checkout"}},
+        {"severity": {"$in": ["P0", "P1"]}},
+        {"timestamp": {"$gte": epoch}},
+    ]}
+
+    sql, params = to_pgvector_sql(FILTERS, first_param=3)
+    assert sql == ("metadata @> $6::jsonb AND metadata @> ANY($3::jsonb[]) AND "
+                   "(metadata->>$4::text)::timestamptz >= $5")
+    assert json.loads(params[3]) == {"service": "checkout"}
+    assert params[1] == "timestamp"
+    assert to_pgvector_sql(None, first_param=3) == ("TRUE", [])
+
+    # 別名只套用在欄位上，鍵或值中的 "metadata" 字樣保持不變
+    aliased, aliased_params = to_pgvector_sql({"metadata_source": "metadata-api"}, first_param=4, table_alias="e")
+    assert aliased == "e.metadata @> $4::jsonb"
+    assert json.loads(aliased_params[0]) == {"metadata_source": "metadata-api"}
+
+    where = to_weaviate_where(FILTERS)
+    assert where["operator"] == "And"
+    assert where["operands"][1]["operator"] == "Or"
+    assert where["operands"][2]["valueDate"].startswith("2024-05-01T00:00:00")
+
+    tokens, numeric = to_vertex_restricts(FILTERS)
+    assert tokens == [("service", ["checkout"]), ("severity", ["P0", "P1"])]
+    assert numeric == [("timestamp", epoch, "GREATER_EQUAL")]
+
+
+def test_range_operators_reject_non_temporal_non_numeric_values():
+    """
+    測試目的：驗證範圍運算子的值不是數值、datetime 或 ISO 8601 字串時，
+    解析與所有後端轉換都一致地引發 ValueError，而不是在轉換時崩潰或靜默不符合。
+    """
+    bad = {"v": {"$gt": "2"}}
+    for convert in (parse_filters, to_weaviate_where, lambda f: to_pgvector_sql(f, 1, "t"),
+                    lambda f: matches({"v": 3}, f)):
+        with pytest.raises(ValueError):
+            convert(bad)
+    with pytest.raises(ValueError):
+        parse_filters({"v": {"$lte": True}})
+    assert parse_filters({"v": {"$gt": "2024-05-01T00:00:00Z", "$lt": 5}})
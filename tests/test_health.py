@@ -0,0 +1,80 @@
+# tests/test_health.py
+import asyncio
+import time
+
+from sre_assistant.health import HealthAggregator
+
+
+async def test_checks_run_concurrently_with_per_check_timeout():
+    """
+    測試目的：驗證各元件檢查並行執行，卡住的檢查逾時後只讓該元件被標記為不健康。
+    """
+    aggregator = HealthAggregator(timeout_seconds=0.2, ttl_seconds=0)
+
+    async def slow_ok():
+        await asyncio.sleep(0.1)
+        return True
+
+    async def hung():
+        await asyncio.sleep(10)
+        return True
+
+    async def broken():
+        raise ConnectionError("refused")
+
+    aggregator.register("auth", slow_ok)
+    aggregator.register("vector", hung)
+    aggregator.register("cache", broken, critical=False)
+
+    started = time.perf_counter()
+    report = await aggregator.check()
+    assert time.perf_counter() - started < 0.5
+    assert not report.healthy
+    assert report.components["auth"].healthy and report.components["auth"].latency_ms >= 90
+    assert report.components["vector"].error == "timed out after 0.2s"
+    assert report.components["cache"].error == "ConnectionError: refused"
+
+
+async def test_non_critical_failures_do_not_affect_readiness():
+    """
+    測試目的：驗證非關鍵元件不健康時仍回報整體健康。
+    """
+    aggregator = HealthAggregator()
+
+    async def ok():
+        return True
+
+    async def down():
+        return False
+
+    aggregator.register("vector", ok)
+    aggregator.register("optional", down, critical=False)
+    report = await aggregator.check()
+    assert report.healthy
+    assert not report.components["optional"].healthy
+
+
+async def test_result_is_cached_and_concurrent_probes_share_one_check():
+    """
+    測試目的：驗證 TTL 內的探測使用快取，且同時到達的探測只觸發一次後端檢查。
+    """
+    calls = 0
+
+    async def counted():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return True
+
+    aggregator = HealthAggregator(ttl_seconds=60)
+    aggregator.register("vector", counted)
+
+    reports = await asyncio.gather(*(aggregator.check() for _ in range(20)))
+    assert calls == 1
+    assert all(r.healthy and not r.cached for r in reports)
+
+    cached = await aggregator.check()
+    assert cached.cached and calls == 1
+
+    await aggregator.check(force=True)
+    assert calls == 2
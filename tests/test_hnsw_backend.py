@@ -0,0 +1,57 @@
+# tests/test_hnsw_backend.py
+"""
+此檔案包含對記憶體映射 HNSW 後端 (`HNSWBackend`) 的單元測試。
+"""
+
+import numpy as np
+import pytest
+
+from sre_assistant.config.config_manager import MemoryConfig, MemoryBackend
+from sre_assistant.memory.hnsw_backend import HNSWBackend
+
+
+def make_config(path, m: int = 8) -> MemoryConfig:
+    """提供一個 16 維、小型參數的 HNSW 配置。"""
+    return MemoryConfig(backend=MemoryBackend.HNSW, embedding_dimension=16, hnsw_index_path=str(path),
+                        hnsw_m=m, hnsw_ef_construction=64, hnsw_ef_search=32)
+
+
+async def test_search_recall_soft_delete_and_warm_start(tmp_path):
+    """
+    測試目的：驗證增量插入後的搜尋結果與精確搜尋一致、軟刪除的節點不會出現在結果中，
+    且新的實例直接開啟映射檔案即可查詢 (不需重建)。
+    """
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    backend = HNSWBackend(make_config(tmp_path))
+    for start in range(0, 500, 100):
+        await backend.upsert(vectors[start:start + 100].tolist(),
+                             [{"id": str(i), "parity": i % 2} for i in range(start, start + 100)])
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = vectors[7]
+    expected = [str(i) for i in np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]]
+    assert [r["id"] for r in await backend.search(query.tolist(), k=5)] == expected
+
+    await backend.delete(["7"])
+    reopened = HNSWBackend(make_config(tmp_path))
+    assert len(reopened) == 499
+    results = await reopened.search(query.tolist(), k=4)
+    assert [r["id"] for r in results] == expected[1:5]
+
+    filtered = await reopened.search(query.tolist(), k=3, filters={"parity": 0})
+    assert len(filtered) == 3 and all(int(r["id"]) % 2 == 0 for r in filtered)
+
+    # 覆寫既有 ID：舊節點被軟刪除，新向量立即可被查到
+    await reopened.upsert([(-query).tolist()], [{"id": "3"}])
+    assert (await reopened.search((-query).tolist(), k=1))[0]["id"] == "3"
+    assert len(reopened) == 499
+
+
+def test_reopening_with_different_m_is_rejected(tmp_path):
+    """
+    測試目的：驗證以不同的 M 重新開啟既有索引會引發 ValueError，而不是默默地損壞圖結構。
+    """
+    HNSWBackend(make_config(tmp_path)).flush()
+    with pytest.raises(ValueError):
+        HNSWBackend(make_config(tmp_path, m=16))
@@ -0,0 +1,117 @@
+# tests/test_hybrid_search.py
+"""
+此檔案包含對 BM25 詞彙索引與混合檢索 (`HybridBackend`) 的單元測試。
+"""
+
+from sre_assistant.memory.hybrid_backend import HybridBackend
+from sre_assistant.memory.in_memory_backend import InMemoryBackend
+from sre_assistant.memory.lexical_index import BM25Index, tokenize
+
+
+def test_tokenize_keeps_identifiers_and_subtokens():
+    """
+    測試目的：驗證識別字 (如 Pod 名稱) 會保留完整形式，並額外輸出子片段。
+    """
+    assert list(tokenize("Pod checkout-7f9c threw NullPointerException")) == [
+        "pod", "checkout-7f9c", "checkout", "7f9c", "threw", "nullpointerexception",
+    ]
+
+
+def test_bm25_ranks_exact_tokens_and_supports_delete():
+    """
+    測試目的：驗證 BM25 能找回包含精確 token 的文件，且刪除與壓縮後結果正確。
+    """
+    index = BM25Index()
+    index.add("a", "auth-service throws NullPointerException on login", {"service": "auth"})
+    index.add("b", "database latency spike caused timeouts", {"service": "db"})
+    index.add("c", "NullPointerException NullPointerException in billing", {"service": "billing"})
+
+    results = index.search("NullPointerException", k=5)
+    assert [r["id"] for r in results] == ["c", "a"]
+    assert index.search("NullPointerException", k=5, filters={"service": "auth"})[0]["id"] == "a"
+
+    index.remove(["c"])   # 墓碑比例超過門檻，會觸發壓縮
+    assert len(index) == 2
+    assert [r["id"] for r in index.search("nullpointerexception")] == ["a"]
+
+
+async def test_hybrid_search_fuses_lexical_and_vector_rankings():
+    """
+    測試目的：驗證 RRF 會合併兩種檢索的排名，並標記各自的名次。
+    """
+    backend = HybridBackend(InMemoryBackend())
+    await backend.upsert(
+        [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+        [
+            {"id": "npe", "content": "auth-service NullPointerException stack trace"},
+            {"id": "latency", "content": "p99 latency regression after deploy"},
+            {"content": "login failures and NullPointerException after deploy"},
+        ],
+    )
+
+    results = await backend.hybrid_search("NullPointerException", query_embedding=[0.6, 0.8], k=3)
+
+    ids = [r["id"] for r in results]
+    assert ids[0] not in ("npe", "latency")   # 兩種檢索都命中的文件排在最前
+    assert results[0]["lexical_rank"] is not None and results[0]["vector_rank"] is not None
+    assert set(ids) == {ids[0], "npe", "latency"}
+
+    await backend.delete(["npe"])
+    remaining = await backend.hybrid_search("NullPointerException", k=3)
+    assert "npe" not in [r["id"] for r in remaining]
+
+
+async def test_persistent_lexical_index_survives_restart(tmp_path):
+    """
+    測試目的：驗證設定索引檔時，重新啟動後從檔案重建 postings，混合檢索仍保有詞彙的一半，
+    且取代與刪除的文件不會重新出現。
+    """
+    path = str(tmp_path / "lexical.sqlite")
+    backend = HybridBackend(InMemoryBackend(), BM25Index(path=path))
+    await backend.upsert(
+        [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+        [
+            {"id": "npe", "content": "auth-service NullPointerException stack trace", "service": "auth"},
+            {"id": "latency", "content": "p99 latency regression after deploy", "service": "db"},
+            {"id": "oom", "content": "billing pod OOMKilled", "service": "billing"},
+        ],
+    )
+    await backend.upsert([[0.0, 1.0]], [{"id": "latency", "content": "p99 latency after checkout-7f9c deploy",
+                                         "service": "db"}])
+    await backend.delete(["oom"])
+    backend.lexical_index.close()
+
+    restarted = BM25Index(path=path)
+    assert len(restarted) == 2
+    results = restarted.search("NullPointerException", k=3, filters={"service": "auth"})
+    assert [(r["id"], r["content"]) for r in results] == [("npe", "auth-service NullPointerException stack trace")]
+    assert [r["id"] for r in restarted.search("checkout deploy")] == ["latency"]
+    assert restarted.search("OOMKilled") == []
+    restarted.close()
+
+
+async def test_lexical_index_runs_off_the_event_loop():
+    """
+    測試目的：驗證詞彙索引的寫入與評分在執行緒中執行，並發的 upsert 與混合檢索不會破壞索引。
+    """
+    import asyncio
+    import threading
+
+    index = BM25Index()
+    threads = set()
+    search = index.search
+
+    def recording_search(*args, **kwargs):
+        threads.add(threading.get_ident())
+        return search(*args, **kwargs)
+
+    index.search = recording_search
+    backend = HybridBackend(InMemoryBackend(), index)
+    await asyncio.gather(*(
+        backend.upsert([[1.0, float(i)]], [{"id": f"doc-{i}", "content": f"pod checkout-{i} OOMKilled"}])
+        for i in range(20)
+    ), *(backend.hybrid_search("OOMKilled", query_embedding=[1.0, 0.0], k=5) for _ in range(20)))
+
+    assert threading.get_ident() not in threads
+    assert len(index) == 20
+    assert len(await backend.hybrid_search("OOMKilled", k=50)) == 20
@@ -0,0 +1,125 @@
+# tests/test_ingestion.py
+"""
+此檔案包含對文件攝取管線 (`IngestionPipeline`) 的單元測試。
+
+使用純記憶體向量後端與假編碼器，驗證切塊、去重與檢查點續傳行為。
+"""
+
+import os
+
+import pytest
+
+from sre_assistant.memory.embedding_service import EmbeddingService
+from sre_assistant.memory.in_memory_backend import InMemoryBackend
+from sre_assistant.memory.ingestion import IngestionCheckpoint, IngestionPipeline, chunk_tokens
+
+
+class CountingEncoder:
+    """將每段文本編碼為固定向量，並記錄總共編碼了多少段文本。"""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def __call__(self, texts):
+        self.encoded += len(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+def test_chunk_tokens_respects_size_and_overlap():
+    """
+    測試目的：驗證區塊大小與重疊符合設定，且尾端不會輸出只含重疊部分的區塊。
+    """
+    tokens = [f"t{i} " for i in range(10)]
+
+    chunks = list(chunk_tokens(tokens, chunk_size=4, chunk_overlap=1))
+
+    assert chunks == ["t0 t1 t2 t3", "t3 t4 t5 t6", "t6 t7 t8 t9"]
+    with pytest.raises(ValueError):
+        list(chunk_tokens(tokens, chunk_size=4, chunk_overlap=4))
+
+
+async def test_ingest_dedupes_and_resumes_from_checkpoint(tmp_path):
+    """
+    測試目的：驗證重複區塊只嵌入一次，且重新執行時會跳過未變更的檔案。
+    """
+    docs = tmp_path / "docs"
+    (docs / "postmortems").mkdir(parents=True)
+    content = "restart the pod\n" * 2 + "then check the logs\n" * 2
+    (docs / "runbook.md").write_text(content)
+    (docs / "postmortems" / "2024-01.md").write_text(content)
+    (docs / "ignored.bin").write_text("binary")
+
+    encoder = CountingEncoder()
+    backend = InMemoryBackend()
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint.sqlite"))
+    pipeline = IngestionPipeline(
+        backend, EmbeddingService("fake", encoder=encoder, max_wait_ms=0),
+        chunk_size=7, chunk_overlap=0, batch_size=2, checkpoint=checkpoint,
+    )
+
+    stats = await pipeline.ingest([str(docs)])
+
+    assert stats.files_seen == 2
+    assert stats.chunks_seen == 4
+    assert stats.chunks_embedded == 2   # 兩個檔案內容相同，只嵌入一次
+    assert encoder.encoded == 2
+    assert len(backend) == 2
+
+    rerun = await pipeline.ingest([str(docs)])
+    assert rerun.files_skipped == 2
+    assert rerun.chunks_embedded == 0
+    assert encoder.encoded == 2
+
+
+async def test_reingesting_changed_file_deletes_stale_chunks(tmp_path):
+    """
+    測試目的：驗證檔案修改後重新攝取時，舊版本中不再出現的區塊從後端刪除，
+    而仍被其他檔案引用的區塊保留。
+    """
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    runbook = docs / "runbook.md"
+    runbook.write_text("drain the node first\nthen restart kubelet\n")
+    (docs / "other.md").write_text("drain the node first\n")
+
+    backend = InMemoryBackend()
+    pipeline = IngestionPipeline(
+        backend, EmbeddingService("fake", encoder=CountingEncoder(), max_wait_ms=0),
+        chunk_size=4, chunk_overlap=0, batch_size=8,
+        checkpoint=IngestionCheckpoint(str(tmp_path / "checkpoint.sqlite")),
+    )
+    await pipeline.ingest([str(docs)])
+    assert len(backend) == 2
+
+    runbook.write_text("drain the node first\nthen reboot the host\n")
+    os.utime(runbook, (1, 1))
+    stats = await pipeline.ingest([str(docs)])
+    contents = sorted(r["content"] for r in await backend.search([1.0, 1.0], k=10))
+    assert contents == ["drain the node first", "then reboot the host"]
+    assert stats.chunks_deleted == 1 and stats.chunks_embedded == 1
+
+
+async def test_ingest_uses_bulk_upsert_when_backend_provides_it(tmp_path):
+    """
+    測試目的：驗證後端提供 `bulk_upsert` (例如 PostgreSQL COPY) 時，攝取管線以它寫入每一批區塊。
+    """
+    class BulkBackend(InMemoryBackend):
+        def __init__(self):
+            super().__init__()
+            self.bulk_batches = []
+
+        async def upsert(self, embeddings, metadata):
+            raise AssertionError("upsert should not be called")
+
+        async def bulk_upsert(self, items):
+            items = list(items)
+            self.bulk_batches.append(len(items))
+            await super().upsert([e for e, _ in items], [m for _, m in items])
+            return len(items)
+
+    (tmp_path / "runbook.md").write_text("one two three four five six seven eight nine")
+    backend = BulkBackend()
+    pipeline = IngestionPipeline(backend, EmbeddingService("fake", encoder=CountingEncoder(), max_wait_ms=0),
+                                 chunk_size=2, chunk_overlap=0, batch_size=3)
+    await pipeline.ingest([str(tmp_path)])
+    assert backend.bulk_batches == [3, 2] and len(backend) == 5
@@ -0,0 +1,178 @@
+# tests/test_job_queue.py
+import asyncio
+
+import pytest
+
+from sre_assistant.config.config_manager import ConfigManager, JobConfig
+from sre_assistant.jobs.models import Job, JobStatus, QueueFullError, TenantQuotaExceededError
+from sre_assistant.jobs.queue import JobQueue
+from sre_assistant.jobs.store import SQLiteJobStore
+
+
+async def _noop(job):
+    return {"ok": True}
+
+
+async def test_admission_control_rejects_with_retry_after(tmp_path):
+    """
+    測試目的：驗證單一租戶超量時返回 429、全域已滿時返回 503，且都帶有 Retry-After。
+    """
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    queue = JobQueue(store, _noop, concurrency=1, max_pending=3, max_pending_per_tenant=2)
+
+    await queue.submit("a", {})
+    await queue.submit("a", {})
+    with pytest.raises(TenantQuotaExceededError) as tenant_error:
+        await queue.submit("a", {})
+    assert tenant_error.value.status_code == 429
+    assert tenant_error.value.retry_after >= 1
+
+    await queue.submit("b", {})
+    with pytest.raises(QueueFullError) as full_error:
+        await queue.submit("c", {})
+    assert full_error.value.status_code == 503
+    assert full_error.value.retry_after >= 1
+
+
+async def test_tenants_are_served_round_robin(tmp_path):
+    """
+    測試目的：驗證一個租戶的大量排隊工作不會讓其他租戶餓死。
+    """
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    order = []
+
+    async def record(job):
+        order.append(job.tenant_id)
+
+    queue = JobQueue(store, record, concurrency=1, poll_interval=0.01)
+    for _ in range(4):
+        await queue.submit("noisy", {})
+    await queue.submit("quiet", {})
+
+    await queue.start()
+    for _ in range(200):
+        if len(order) == 5:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert len(order) == 5
+    # "quiet" 在第二個位置就被服務，而不是排在 "noisy" 的所有工作之後
+    assert order.index("quiet") <= 1
+
+
+async def test_jobs_survive_restart_and_expired_leases_are_requeued(tmp_path):
+    """
+    測試目的：驗證排隊工作在重新開啟儲存後仍在，且當機副本留下的過期租約會被重新排隊。
+    """
+    path = str(tmp_path / "jobs.sqlite")
+    store = SQLiteJobStore(path)
+    job = await store.enqueue(Job(tenant_id="t", payload={"user_query": "cpu high"}))
+    claimed = await store.claim("t", "crashed-replica", lease_seconds=-1)
+    assert claimed.status == JobStatus.RUNNING
+    await store.close()
+
+    reopened = SQLiteJobStore(path)
+    assert await reopened.requeue_expired(max_attempts=3) == 1
+    assert await reopened.pending_counts() == {"t": 1}
+
+    results = []
+
+    async def handler(j):
+        results.append(j.payload["user_query"])
+        return {"final_response": "done"}
+
+    queue = JobQueue(reopened, handler, poll_interval=0.01)
+    await queue.start()
+    for _ in range(200):
+        stored = await reopened.get(job.job_id)
+        if stored.status == JobStatus.SUCCEEDED:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert results == ["cpu high"]
+    assert stored.status == JobStatus.SUCCEEDED
+    assert stored.result == {"final_response": "done"}
+    assert stored.attempts == 2
+
+
+def test_shared_job_store_requires_connection_string(monkeypatch):
+    """
+    測試目的：驗證 PostgreSQL / Redis 工作儲存未提供連線字串時被拒絕，且連線字串可由 JOBS_DATABASE_URL 提供。
+    """
+    with pytest.raises(ValueError):
+        JobConfig(store="postgresql")
+
+    monkeypatch.setenv("JOBS_DATABASE_URL", "postgresql://jobs@db/jobs")
+    overrides = ConfigManager.__new__(ConfigManager)._apply_env_overrides({"jobs": {"store": "postgresql"}})
+    assert JobConfig(**overrides["jobs"]).connection_string == "postgresql://jobs@db/jobs"
+
+
+async def test_stop_intake_stops_claiming_while_running_jobs_finish(tmp_path):
+    """
+    測試目的：驗證停止取用後，執行中的工作照常完成，排隊中的工作保留在儲存中不被取用。
+    """
+    release = asyncio.Event()
+    started = []
+
+    async def handler(job):
+        started.append(job.payload["n"])
+        await release.wait()
+        return {"ok": True}
+
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    queue = JobQueue(store, handler, concurrency=1, poll_interval=0.05)
+    await queue.start()
+    first = await queue.submit("a", {"n": 1})
+    while not started:
+        await asyncio.sleep(0.01)
+
+    queue.stop_intake()
+    second = await queue.submit("a", {"n": 2})
+    release.set()
+    await asyncio.sleep(0.3)
+
+    assert started == [1]
+    assert (await queue.get(first.job_id)).status == JobStatus.SUCCEEDED
+    assert (await queue.get(second.job_id)).status == JobStatus.QUEUED
+    await queue.stop(drain_timeout=1.0)
+
+
+async def test_worker_that_lost_its_lease_cannot_finish_or_extend(tmp_path):
+    """
+    測試目的：驗證租約過期後，原取用者的續約與結果寫入都會被拒絕，不覆寫新取用者的執行。
+    """
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    job = await store.enqueue(Job(tenant_id="t"))
+    await store.claim("t", "slow-replica", lease_seconds=-1)
+    assert await store.requeue_expired(max_attempts=3) == 1
+    await store.claim("t", "new-replica", lease_seconds=60)
+
+    assert not await store.extend_lease(job.job_id, "slow-replica", 60)
+    assert not await store.finish(job.job_id, JobStatus.FAILED, error="stale", worker_id="slow-replica")
+    await store.release(job.job_id, "slow-replica")
+    assert await store.finish(job.job_id, JobStatus.SUCCEEDED, result={"ok": True}, worker_id="new-replica")
+    finished = await store.get(job.job_id)
+    assert finished.status == JobStatus.SUCCEEDED and finished.result == {"ok": True}
+
+
+async def test_finished_jobs_are_purged_after_retention(tmp_path):
+    """
+    測試目的：驗證佇列定期刪除超過保留期限的已結束工作，排隊中的工作不受影響。
+    """
+    import time
+
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    done = await store.enqueue(Job(tenant_id="t"))
+    await store.claim("t", "w", lease_seconds=60)
+    await store.finish(done.job_id, JobStatus.SUCCEEDED, result={"ok": True}, worker_id="w")
+    queued = await store.enqueue(Job(tenant_id="t"))
+
+    assert await store.purge(time.time() - 60) == 0
+    queue = JobQueue(store, _noop, retention_seconds=0.01)
+    await asyncio.sleep(0.02)
+    await queue._reap()
+    assert await store.get(done.job_id) is None
+    assert (await store.get(queued.job_id)).status == JobStatus.QUEUED
+    assert queue.stats["purged"] == 1
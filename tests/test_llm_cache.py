@@ -0,0 +1,161 @@
+# tests/test_llm_cache.py
+import asyncio
+import hashlib
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import LongRunningFunctionTool
+from google.genai import types
+from prometheus_client import CollectorRegistry
+
+from sre_assistant.llm_cache import LLMResponseCache
+from sre_assistant.observability.metrics import SREMetrics
+
+
+class FakeLlm(BaseLlm):
+    """回覆固定文字並記錄呼叫次數的模型替身。"""
+    calls: int = 0
+    delay: float = 0.0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False
+                                     ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=f"analysis #{self.calls}")]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=900, candidates_token_count=100),
+        )
+
+
+async def fake_embed(text: str):
+    """以詞彙雜湊組成的詞袋向量 (測試用)。"""
+    vector = [0.0] * 64
+    for word in text.lower().split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+    return vector
+
+
+def build(cache_kwargs=None, delay=0.0):
+    llm = FakeLlm(model="fake-flash", delay=delay)
+    agent = LlmAgent(name="LogAnalyzer", model=llm, instruction="分析日誌數據並找出異常錯誤")
+    metrics = SREMetrics(registry=CollectorRegistry(), agents=["LogAnalyzer"])
+    cache = LLMResponseCache(agents=["LogAnalyzer"], metrics=metrics, **(cache_kwargs or {}))
+    assert cache.attach(agent)
+    return llm, agent, cache, metrics
+
+
+async def ask(agent, text):
+    session_service = InMemorySessionService()
+    runner = Runner(app_name="test", agent=agent, session_service=session_service)
+    session = await session_service.create_session(app_name="test", user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    events = [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+    return events[-1].content.parts[0].text
+
+
+async def test_exact_tier_ignores_volatile_values_and_reports_tokens_saved():
+    """
+    測試目的：驗證只有時間戳與 UUID 不同的提示命中精確層，且回報命中次數與節省的 token。
+    """
+    llm, agent, cache, metrics = build()
+
+    first = await ask(agent, "checkout 5xx spike at 2024-05-01T10:00:00Z request 3f2b1c4e-1111-2222-3333-444455556666")
+    second = await ask(agent, "checkout 5xx spike at 2024-05-01T10:07:31Z request 9a8b7c6d-1111-2222-3333-444455556666")
+    third = await ask(agent, "payments latency regression")
+
+    assert llm.calls == 2
+    assert first == second == "analysis #1" and third == "analysis #2"
+    assert cache.stats["exact_hits"] == 1 and cache.stats["tokens_saved"] == 1000
+    assert metrics.registry.get_sample_value(
+        "sre_llm_cache_lookups_total", {"agent": "LogAnalyzer", "result": "exact"}) == 1
+    assert metrics.registry.get_sample_value("sre_llm_cache_tokens_saved_total", {"agent": "LogAnalyzer"}) == 1000
+
+
+async def test_semantic_tier_matches_near_identical_prompt():
+    """
+    測試目的：驗證語意層在相似度達到門檻時命中，不相似的提示則照常呼叫模型。
+    """
+    llm, agent, cache, _ = build({"embed": fake_embed, "semantic_threshold": 0.9})
+
+    await ask(agent, "checkout service returning many 500 errors after the latest deploy of version two")
+    reused = await ask(agent, "checkout service returning many 500 errors after the latest deploy of version 2")
+    await ask(agent, "disk usage growing on db-1")
+
+    assert reused == "analysis #1"
+    assert llm.calls == 2 and cache.stats["semantic_hits"] == 1
+
+
+async def test_concurrent_identical_prompts_call_model_once():
+    """
+    測試目的：驗證相同提示的並行請求只呼叫一次模型，其餘等待並共用結果。
+    """
+    llm, agent, cache, _ = build(delay=0.2)
+
+    answers = await asyncio.gather(*(ask(agent, "checkout 5xx spike") for _ in range(5)))
+
+    assert llm.calls == 1 and set(answers) == {"analysis #1"}
+    assert cache.stats["coalesced"] == 4
+
+
+def test_agents_with_side_effecting_tools_are_bypassed():
+    """
+    測試目的：驗證帶有長時間執行 (HITL) 或列為具副作用工具的代理不會掛上快取，未啟用的代理亦同。
+    """
+    def ask_for_approval(action: str) -> dict:
+        return {"status": "approved"}
+
+    def restart_deployment(name: str) -> dict:
+        return {"restarted": name}
+
+    cache = LLMResponseCache(agents=["RemediationExecutor", "Restarter"], side_effecting_tools=["restart_deployment"])
+    hitl = LlmAgent(name="RemediationExecutor", model="fake", tools=[LongRunningFunctionTool(ask_for_approval)])
+    restarter = LlmAgent(name="Restarter", model="fake", tools=[restart_deployment])
+    not_enabled = LlmAgent(name="TraceAnalyzer", model="fake")
+
+    assert not cache.attach(hitl) and not cache.attach(restarter) and not cache.attach(not_enabled)
+    assert hitl.before_model_callback is None and restarter.before_model_callback is None
+
+
+async def test_model_error_releases_coalesced_waiters_immediately():
+    """
+    測試目的：驗證進行中的模型呼叫拋出例外時，錯誤外掛立即釋放合併的等待者，
+    等待者改為自行呼叫模型，而不是等到 coalesce_wait_seconds 逾時。
+    """
+    from google.adk.plugins import BasePlugin
+
+    from sre_assistant.llm_cache import LLMCacheErrorPlugin
+
+    class FlakyLlm(FakeLlm):
+        async def generate_content_async(self, llm_request, stream=False):
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            if self.calls == 1:
+                raise RuntimeError("model overloaded")
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="recovered")]))
+
+    llm = FlakyLlm(model="fake-flash", delay=0.1)
+    agent = LlmAgent(name="LogAnalyzer", model=llm, instruction="分析日誌數據並找出異常錯誤")
+    cache = LLMResponseCache(agents=["LogAnalyzer"], coalesce_wait_seconds=30,
+                             metrics=SREMetrics(registry=CollectorRegistry(), agents=["LogAnalyzer"]))
+    assert cache.attach(agent)
+    plugin = LLMCacheErrorPlugin(cache)
+    assert isinstance(plugin, BasePlugin)
+
+    async def ask_with_plugin(text):
+        session_service = InMemorySessionService()
+        runner = Runner(app_name="test", agent=agent, session_service=session_service, plugins=[plugin])
+        session = await session_service.create_session(app_name="test", user_id="u")
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        events = [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message)]
+        return events[-1].content.parts[0].text
+
+    failed, waiter = await asyncio.wait_for(
+        asyncio.gather(ask_with_plugin("checkout 5xx spike"), ask_with_plugin("checkout 5xx spike"),
+                       return_exceptions=True), timeout=5)
+
+    assert isinstance(failed, RuntimeError) and waiter == "recovered"
+    assert llm.calls == 2 and not cache._inflight
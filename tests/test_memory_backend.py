@@ -0,0 +1,160 @@
+# tests/test_memory_backend.py
+"""
+此檔案包含對純記憶體向量後端 (`InMemoryBackend`) 的單元測試。
+
+這些測試不依賴任何外部服務，用以確保本地開發與 CI 中的
+RAG 搜尋結果具有真實意義。
+"""
+
+import pytest
+
+from sre_assistant.config.config_manager import MemoryConfig, MemoryBackend
+from sre_assistant.memory.in_memory_backend import InMemoryBackend
+
+
+@pytest.fixture
+def backend() -> InMemoryBackend:
+    """提供一個維度為 3、使用餘弦相似度的記憶體後端。"""
+    return InMemoryBackend(MemoryConfig(backend=MemoryBackend.MEMORY, embedding_dimension=3))
+
+
+async def test_search_returns_nearest_neighbours_in_order(backend):
+    """
+    測試目的：驗證搜尋結果是依照餘弦相似度由高到低排序，且包含分數。
+    """
+    await backend.upsert(
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.7, 0.7, 0.0]],
+        [{"id": "x", "content": "x axis"}, {"id": "y", "content": "y axis"}, {"id": "xy", "content": "diagonal"}],
+    )
+
+    results = await backend.search([1.0, 0.1, 0.0], k=2)
+
+    assert [r["id"] for r in results] == ["x", "xy"]
+    assert results[0]["similarity"] == pytest.approx(0.995, abs=1e-3)
+    assert results[0]["content"] == "x axis"
+
+
+async def test_upsert_overwrites_existing_id(backend):
+    """
+    測試目的：驗證相同 ID 的 upsert 會覆寫既有向量，而不是新增一筆。
+    """
+    await backend.upsert([[1.0, 0.0, 0.0]], [{"id": "doc"}])
+    await backend.upsert([[0.0, 0.0, 1.0]], [{"id": "doc", "version": 2}])
+
+    results = await backend.search([0.0, 0.0, 1.0], k=5)
+
+    assert len(backend) == 1
+    assert results[0]["version"] == 2
+    assert results[0]["similarity"] == pytest.approx(1.0)
+
+
+async def test_delete_and_compaction(backend):
+    """
+    測試目的：驗證刪除的向量不會出現在結果中，且壓縮後搜尋仍然正確。
+    """
+    embeddings = [[float(i), 1.0, 0.0] for i in range(10)]
+    await backend.upsert(embeddings, [{"id": str(i)} for i in range(10)])
+
+    await backend.delete(["9", "8", "missing"])
+    results = await backend.search([1.0, 0.0, 0.0], k=3)
+    assert [r["id"] for r in results] == ["7", "6", "5"]
+
+    backend.compact()
+    assert len(backend) == 8
+    results = await backend.search([1.0, 0.0, 0.0], k=3)
+    assert [r["id"] for r in results] == ["7", "6", "5"]
+
+
+async def test_dimension_mismatch_raises(backend):
+    """
+    測試目的：驗證維度不一致的向量會被拒絕。
+    """
+    with pytest.raises(ValueError):
+        await backend.upsert([[1.0, 0.0]], [{"id": "bad"}])
+
+
+async def test_search_batch_matches_individual_searches(backend):
+    """
+    測試目的：驗證批次搜尋的結果與逐一搜尋一致，並支援等值過濾。
+    """
+    await backend.upsert(
+        [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]],
+        [{"id": "a", "service": "api"}, {"id": "b", "service": "db"}, {"id": "c", "service": "api"}],
+    )
+    queries = [[1.0, 0.2, 0.0], [0.0, 0.2, 1.0]]
+
+    batched = await backend.search_batch(queries, k=2)
+    assert batched == [await backend.search(q, k=2) for q in queries]
+
+    filtered = await backend.search_batch(queries, k=5, filters={"service": "api"})
+    assert [[r["id"] for r in results] for results in filtered] == [["a", "c"], ["c", "a"]]
+
+
+async def test_default_search_batch_fans_out_to_search():
+    """
+    測試目的：驗證未覆寫 `search_batch` 的後端會退回到並行呼叫 `search`。
+    """
+    from sre_assistant.memory.base import VectorBackend
+
+    class EchoBackend(VectorBackend):
+        async def upsert(self, embeddings, metadata):
+            return True
+        async def search(self, query_embedding, k=10, filters=None):
+            return [{"query": query_embedding, "k": k, "filters": filters}]
+        async def delete(self, ids):
+            return True
+        async def health_check(self):
+            return True
+
+    results = await EchoBackend().search_batch([[1.0], [2.0]], k=3, filters={"service": "api"})
+    assert results == [[{"query": [1.0], "k": 3, "filters": {"service": "api"}}],
+                       [{"query": [2.0], "k": 3, "filters": {"service": "api"}}]]
+
+
+async def test_search_prefilters_on_in_and_timestamp_range(backend):
+    """
+    測試目的：驗證 `$in` 與時間戳範圍過濾在評分前套用，
+    即使最相似的向量被排除，仍能返回 k 筆符合條件的結果。
+    """
+    from datetime import datetime, timezone
+
+    await backend.upsert(
+        [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.5, 0.5, 0.0], [0.0, 1.0, 0.0]],
+        [
+            {"id": "a", "severity": "P3", "timestamp": "2024-05-01T00:00:00Z"},
+            {"id": "b", "severity": "P1", "timestamp": "2024-05-03T00:00:00Z"},
+            {"id": "c", "severity": "P0", "timestamp": datetime(2024, 5, 4, tzinfo=timezone.utc)},
+            {"id": "d", "severity": "P0", "timestamp": "2024-04-01T00:00:00Z"},
+        ],
+    )
+    filters = {
+        "severity": {"$in": ["P0", "P1"]},
+        "timestamp": {"$gte": datetime(2024, 5, 2, tzinfo=timezone.utc)},
+    }
+    results = await backend.search([1.0, 0.0, 0.0], k=2, filters=filters)
+    assert [r["id"] for r in results] == ["b", "c"]
+
+    # 寫入後欄式快取必須失效
+    await backend.upsert([[1.0, 0.0, 0.0]], [{"id": "a", "severity": "P1", "timestamp": "2024-05-05"}])
+    results = await backend.search([1.0, 0.0, 0.0], k=1, filters=filters)
+    assert [r["id"] for r in results] == ["a"]
+
+
+async def test_vertex_search_returns_result_dicts_like_other_backends():
+    """
+    測試目的：驗證 Vertex AI 後端將 `MatchNeighbor` 轉換為 `{"id", "similarity"}` 字典，
+    可以被 `HybridBackend` 與 `CachedBackend` 包裝。
+    """
+    from types import SimpleNamespace
+
+    from sre_assistant.memory.backend_factory import VertexAIBackend
+
+    class FakeEndpoint:
+        def find_neighbors(self, **kwargs):
+            return [[SimpleNamespace(id="runbook-1", distance=0.25)] for _ in kwargs["queries"]]
+
+    backend = VertexAIBackend.__new__(VertexAIBackend)
+    backend.index_endpoint, backend.deployed_index_id, backend.metric = FakeEndpoint(), "idx", "cosine"
+    assert await backend.search([0.1, 0.2], k=1) == [{"id": "runbook-1", "similarity": 0.75}]
+    backend.metric = "dot"
+    assert await backend.search_batch([[0.1], [0.2]], k=1) == [[{"id": "runbook-1", "similarity": 0.25}]] * 2
@@ -0,0 +1,96 @@
+# tests/test_metrics.py
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+from sre_assistant.memory.in_memory_backend import InMemoryBackend
+from sre_assistant.memory.instrumented_backend import InstrumentedBackend
+from sre_assistant.config.config_manager import MemoryConfig
+from sre_assistant.observability.metrics import MetricsMiddleware, SREMetrics
+
+
+def _sample(metrics: SREMetrics, name: str, labels=None) -> float:
+    return metrics.registry.get_sample_value(name, labels or {})
+
+
+async def test_middleware_labels_requests_by_route_template():
+    """
+    測試目的：驗證 HTTP 延遲以路由樣板 (而非實際路徑) 與狀態碼作為標籤，避免基數爆炸。
+    """
+    metrics = SREMetrics()
+    app = FastAPI()
+
+    @app.get("/runs/{run_id}")
+    async def get_run(run_id: str):
+        return {"run_id": run_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for run_id in ("a", "b", "c"):
+            await client.get(f"/runs/{run_id}")
+        await client.get("/missing")
+
+    labels = {"method": "GET", "route": "/runs/{run_id}", "status": "200"}
+    assert _sample(metrics, "sre_http_request_duration_seconds_count", labels) == 3
+    assert _sample(metrics, "sre_http_request_duration_seconds_count",
+                   {"method": "GET", "route": "unmatched", "status": "404"}) == 1
+
+
+async def test_vector_backend_tool_token_and_queue_metrics():
+    """
+    測試目的：驗證向量搜尋、工具呼叫、token 計數與佇列量測都寫入對應的指標。
+    """
+    metrics = SREMetrics(agents=["LogAnalyzer"], backends=["memory"])
+    backend = InstrumentedBackend(InMemoryBackend(MemoryConfig(backend="memory", embedding_dimension=2)), "memory", metrics)
+    await backend.upsert([[1.0, 0.0]], [{"id": "a"}])
+    await backend.search([1.0, 0.0], k=1)
+    assert _sample(metrics, "sre_vector_search_duration_seconds_count",
+                   {"backend": "memory", "operation": "search"}) == 1
+
+    tool = SimpleNamespace(name="ask_for_approval")
+    context = SimpleNamespace(function_call_id="call-1")
+    assert metrics.before_tool_callback(tool, {}, context) is None
+    assert metrics.after_tool_callback(tool, {}, context, {"status": "approved"}) is None
+    assert _sample(metrics, "sre_tool_call_duration_seconds_count",
+                   {"tool": "ask_for_approval", "outcome": "ok"}) == 1
+
+    metrics.add_tokens("LogAnalyzer", SimpleNamespace(prompt_token_count=120, candidates_token_count=30))
+    assert _sample(metrics, "sre_llm_tokens_total", {"agent": "LogAnalyzer", "type": "prompt"}) == 120
+    assert _sample(metrics, "sre_llm_tokens_total", {"agent": "LogAnalyzer", "type": "completion"}) == 30
+
+    metrics.bind_queue(lambda: {"pending": 7, "running": 2})
+    assert _sample(metrics, "sre_job_queue_depth") == 7
+    assert _sample(metrics, "sre_runs_in_flight") == 2
+    body, content_type = metrics.render()
+    assert b"sre_workflow_run_duration_seconds_bucket" in body and content_type.startswith("text/plain")
+
+
+def test_multiprocess_mode_aggregates_counters_across_workers(tmp_path):
+    """
+    測試目的：驗證設定 PROMETHEUS_MULTIPROC_DIR 時，/metrics 彙總所有 fork 出的工作行程的計數，
+    而不是只回報處理該次抓取的行程。
+    """
+    import os
+    import subprocess
+    import sys
+
+    script = """
+import os
+from sre_assistant.observability.metrics import SREMetrics, clear_stale_metrics, mark_worker_dead
+metrics = SREMetrics(agents=["LogAnalyzer"])
+clear_stale_metrics()
+for tokens in (100, 20):
+    pid = os.fork()
+    if pid == 0:
+        metrics.observe_run("succeeded", 1.0)
+        metrics.add_tokens("LogAnalyzer", type("U", (), {"prompt_token_count": tokens, "candidates_token_count": 0}))
+        os._exit(0)
+    os.waitpid(pid, 0)
+    mark_worker_dead(pid)
+print(metrics.render()[0].decode())
+"""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": os.pathsep.join(sys.path)}
+    result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True)
+    assert 'sre_llm_tokens_total{agent="LogAnalyzer",type="prompt"} 120.0' in result.stdout
+    assert 'sre_workflow_run_duration_seconds_count{status="succeeded"} 2.0' in result.stdout
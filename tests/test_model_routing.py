@@ -0,0 +1,93 @@
+# tests/test_model_routing.py
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+from prometheus_client import CollectorRegistry
+
+from sre_assistant.llm_cache import LLMResponseCache
+from sre_assistant.model_routing import ModelRouter, severity_state
+from sre_assistant.observability.metrics import SREMetrics
+
+TIERS = {"fast": "gemini-1.5-flash", "pro": "gemini-1.5-pro"}
+COSTS = {"gemini-1.5-flash": {"input": 0.075, "output": 0.30}, "gemini-1.5-pro": {"input": 1.25, "output": 5.00}}
+
+
+class RecordingLlm(BaseLlm):
+    """記錄每次請求實際路由到的模型的模型替身。"""
+    models: list = []
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False
+                                     ) -> AsyncGenerator[LlmResponse, None]:
+        self.models.append(llm_request.model)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=f"answer from {llm_request.model}")]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=1_000_000, candidates_token_count=100_000),
+        )
+
+
+def build(name, **router_kwargs):
+    llm = RecordingLlm(model="fake")
+    agent = LlmAgent(name=name, model=llm, instruction="分析診斷結果")
+    metrics = SREMetrics(registry=CollectorRegistry())
+    router = ModelRouter(TIERS, model_costs=COSTS, metrics=metrics, **router_kwargs)
+    return llm, agent, router, metrics
+
+
+async def ask(agent, text, state_delta=None):
+    session_service = InMemorySessionService()
+    runner = Runner(app_name="test", agent=agent, session_service=session_service)
+    session = await session_service.create_session(app_name="test", user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    events = [e async for e in runner.run_async(user_id="u", session_id=session.id, new_message=message,
+                                                state_delta=state_delta)]
+    return events[-1].content.parts[0].text
+
+
+async def test_severity_override_routes_request_and_records_cost_per_tier():
+    """
+    測試目的：驗證 P0 事件的分診器改用 pro 分級，其他嚴重程度維持靜態分級，且各路由分別記錄延遲與成本。
+    """
+    llm, agent, router, metrics = build("IntelligentDispatcher",
+                                        severity_overrides={"P0": {"IntelligentDispatcher": "pro"}})
+    assert router.model_for("IntelligentDispatcher") == "gemini-1.5-flash"
+    assert router.attach(agent)
+
+    await ask(agent, "checkout down", severity_state("P0"))
+    await ask(agent, "disk usage growing", severity_state("P3"))
+
+    assert llm.models == ["gemini-1.5-pro", "gemini-1.5-flash"]
+    assert router.stats["severity_overrides"] == 1
+    labels = {"agent": "IntelligentDispatcher"}
+    assert metrics.registry.get_sample_value("sre_llm_route_duration_seconds_count", {**labels, "tier": "pro"}) == 1
+    assert metrics.registry.get_sample_value("sre_llm_route_cost_usd_total", {**labels, "tier": "pro"}) == 1.75
+    assert metrics.registry.get_sample_value(
+        "sre_llm_route_cost_usd_total", {**labels, "tier": "fast"}) == pytest.approx(0.105)
+
+
+async def test_escalated_request_bypasses_response_cached_for_smaller_model():
+    """
+    測試目的：驗證升級狀態將請求路由到升級分級，且路由在快取之前執行，升級的請求不會命中小模型的快取回應。
+    """
+    llm, agent, router, _ = build("IntelligentDispatcher", escalation_tier="pro")
+    cache = LLMResponseCache(agents=["IntelligentDispatcher"], metrics=SREMetrics(registry=CollectorRegistry()))
+    assert cache.attach(agent) and router.attach(agent)
+
+    first = await ask(agent, "db latency with timeouts")
+    escalated = await ask(agent, "db latency with timeouts", {"model_escalation": ["IntelligentDispatcher"]})
+
+    assert first == "answer from gemini-1.5-flash" and escalated == "answer from gemini-1.5-pro"
+    assert cache.stats["exact_hits"] == 0 and router.stats["escalations"] == 1
+
+
+def test_unknown_tier_is_rejected():
+    """
+    測試目的：驗證引用未定義分級的路由設定被拒絕。
+    """
+    with pytest.raises(ValueError):
+        ModelRouter(TIERS, agent_tiers={"LogAnalyzer": "ultra"})
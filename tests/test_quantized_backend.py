@@ -0,0 +1,96 @@
+# tests/test_quantized_backend.py
+"""
+此檔案包含對壓縮向量儲存 (`QuantizedBackend`) 的單元測試。
+"""
+
+import numpy as np
+import pytest
+
+from sre_assistant.config.config_manager import MemoryConfig, MemoryBackend
+from sre_assistant.memory.quantized_backend import QuantizedBackend
+
+
+def make_config(path, quantization: str) -> MemoryConfig:
+    """提供一個 16 維的壓縮儲存配置。"""
+    return MemoryConfig(backend=MemoryBackend.QUANTIZED, embedding_dimension=16,
+                        quantized_store_path=str(path), quantization=quantization,
+                        pq_subvectors=4, rerank_candidates=20)
+
+
+@pytest.mark.parametrize("quantization", ["int8", "pq"])
+async def test_search_matches_exact_top_k_and_persists(tmp_path, quantization):
+    """
+    測試目的：驗證壓縮搜尋 (含全精度重新評分) 的結果與精確搜尋一致，
+    且重新開啟儲存後資料、刪除狀態與 PQ 質心都仍然存在。
+    """
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((600, 16)).astype(np.float32)
+    backend = QuantizedBackend(make_config(tmp_path, quantization))
+    await backend.upsert(vectors.tolist(), [{"id": str(i), "service": f"s{i % 3}"} for i in range(600)])
+
+    query = vectors[42] + 0.01
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+    results = await backend.search(query.tolist(), k=5)
+    assert [r["id"] for r in results] == [str(i) for i in expected]
+    assert backend.memory_bytes < vectors.nbytes
+
+    await backend.delete(["42"])
+    backend.flush()
+    reopened = QuantizedBackend(make_config(tmp_path, quantization))
+    assert len(reopened) == 599
+    results = await reopened.search(query.tolist(), k=3, filters={"service": "s1"})
+    assert "42" not in [r["id"] for r in results]
+    assert all(r["service"] == "s1" for r in results) and len(results) == 3
+
+
+async def test_pq_trains_once_enough_vectors_arrive_through_ingestion_pipeline(tmp_path):
+    """
+    測試目的：驗證 PQ 後端經由攝取管線的小批次 (預設 64 筆) 寫入時，先以全精度向量服務搜尋，
+    累積到足以訓練的向量數後自動訓練並編碼所有已寫入的向量。
+    """
+    import hashlib
+
+    from sre_assistant.memory.embedding_service import EmbeddingService
+    from sre_assistant.memory.ingestion import IngestionPipeline
+
+    def encoder(texts):
+        return [np.random.default_rng(int(hashlib.sha256(t.encode()).hexdigest()[:8], 16))
+                .standard_normal(16).tolist() for t in texts]
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for i in range(300):
+        (docs / f"runbook-{i}.md").write_text(f"runbook {i} restart service-{i}")
+    backend = QuantizedBackend(make_config(tmp_path / "store", "pq"))
+    pipeline = IngestionPipeline(backend, EmbeddingService("fake", encoder=encoder, max_wait_ms=0))
+
+    first = await pipeline.ingest([str(docs / "runbook-0.md")])
+    assert first.chunks_embedded == 1 and backend.codebooks is None
+    target = encoder(["runbook 0 restart service-0"])[0]
+    assert (await backend.search(target, k=1))[0]["content"] == "runbook 0 restart service-0"
+
+    stats = await pipeline.ingest([str(docs)])
+    assert stats.chunks_embedded == 299 and stats.batches_upserted == 5
+    assert backend.codebooks is not None and len(backend) == 300
+    results = await backend.search(target, k=3)
+    assert results[0]["content"] == "runbook 0 restart service-0"
+
+
+async def test_train_reencodes_stored_vectors_in_chunks(tmp_path, monkeypatch):
+    """
+    測試目的：驗證訓練後重新編碼已寫入的向量時分塊讀取全精度向量，且結果與一次編碼相同。
+    """
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((300, 16)).astype(np.float32)
+    backend = QuantizedBackend(make_config(tmp_path, "pq"))
+    await backend.upsert(vectors[:200].tolist(), [{"id": str(i)} for i in range(200)])
+    assert backend.codebooks is None
+
+    encoded_rows = []
+    encode = backend._encode
+    monkeypatch.setattr(backend, "_encode", lambda matrix: encoded_rows.append(len(matrix)) or encode(matrix))
+    monkeypatch.setattr(QuantizedBackend, "ENCODE_CHUNK_ROWS", 64)
+    backend.train(vectors.tolist())
+    assert encoded_rows == [64, 64, 64, 8]
+    assert np.array_equal(backend._codes[:200], encode(np.asarray(backend._vectors[:200]))[0])
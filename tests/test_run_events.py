@@ -0,0 +1,141 @@
+# tests/test_run_events.py
+import asyncio
+
+from sre_assistant.runs.events import RunEventBroker
+
+
+async def _collect(iterator, limit=100):
+    events = []
+    async for event in iterator:
+        if event is not None:
+            events.append(event)
+        if len(events) >= limit:
+            break
+    return events
+
+
+async def test_fan_out_streams_live_events_to_every_subscriber():
+    """
+    測試目的：驗證多個觀看者在執行進行中訂閱時，都能收到同一份完整的事件序列。
+    """
+    broker = RunEventBroker()
+    first = asyncio.create_task(_collect(broker.subscribe("run-1")))
+    second = asyncio.create_task(_collect(broker.subscribe("run-1")))
+    await asyncio.sleep(0)
+
+    broker.publish("run-1", "event", {"text": "CPU"})
+    await asyncio.sleep(0)
+    broker.publish("run-1", "event", {"text": " saturated"})
+    broker.close("run-1", "succeeded")
+
+    for events in await asyncio.gather(first, second):
+        assert [e.type for e in events] == ["event", "event", "end"]
+        assert [e.id for e in events] == [0, 1, 2]
+        assert events[-1].data == {"status": "succeeded"}
+
+
+async def test_resume_from_last_event_id_and_gap_for_slow_subscribers():
+    """
+    測試目的：驗證 Last-Event-ID 從下一個事件續傳，以及落後超過保留範圍時會收到 gap 事件。
+    """
+    broker = RunEventBroker(max_events_per_run=3)
+    for i in range(5):
+        broker.publish("run-1", "event", {"i": i})
+    broker.close("run-1", "succeeded")
+
+    resumed = await _collect(broker.subscribe("run-1", last_event_id=3))
+    assert [e.data for e in resumed] == [{"i": 4}, {"status": "succeeded"}]
+
+    replayed = await _collect(broker.subscribe("run-1"))
+    assert replayed[0].type == "gap"
+    assert replayed[0].data == {"missed_from": 0, "missed_to": 2}
+    assert [e.id for e in replayed[1:]] == [3, 4, 5]
+
+
+async def test_heartbeat_and_sse_format():
+    """
+    測試目的：驗證沒有事件時會產出心跳，且事件會被格式化為 SSE 訊框。
+    """
+    broker = RunEventBroker()
+    stream = broker.subscribe("run-1", heartbeat_seconds=0.01)
+    assert await stream.__anext__() is None
+
+    event = broker.publish("run-1", "event", {"text": "hi"})
+    assert event.to_sse() == 'id: 0\nevent: event\ndata: {"text": "hi"}\n\n'
+
+
+async def test_subscriber_on_another_process_reads_events_from_shared_log(tmp_path):
+    """
+    測試目的：驗證觀看者連到未執行該工作的工作行程時，經由共用的 SQLite 事件日誌收到事件與終止事件，
+    且工作在另一個行程重新執行時序號接續先前的事件。
+    """
+    from sre_assistant.runs.event_log import SQLiteRunEventLog
+
+    path = str(tmp_path / "events.sqlite")
+    worker = RunEventBroker(log=SQLiteRunEventLog(path), poll_seconds=0.01)
+    viewer = RunEventBroker(log=SQLiteRunEventLog(path), poll_seconds=0.01)
+    watching = asyncio.create_task(_collect(viewer.subscribe("run-1")))
+
+    worker.publish("run-1", "status", {"status": "running"})
+    await worker.flush()
+    retry = RunEventBroker(log=SQLiteRunEventLog(path), poll_seconds=0.01)
+    await retry.prepare("run-1")
+    retry.publish("run-1", "event", {"text": "CPU saturated"})
+    retry.close("run-1", "succeeded")
+    await retry.flush()
+
+    events = await asyncio.wait_for(watching, timeout=5)
+    assert [(e.id, e.type) for e in events] == [(0, "status"), (1, "event"), (2, "end")]
+    assert await viewer.has_events("run-1") and not viewer.has_run("run-1")
+    resumed = await _collect(viewer.subscribe("run-1", last_event_id=1))
+    assert [e.data for e in resumed] == [{"status": "succeeded"}]
+    for broker in (worker, viewer, retry):
+        await broker.stop()
+
+
+async def test_idle_subscribed_stream_for_run_not_published_here_is_evicted():
+    """
+    測試目的：驗證只被訂閱、未在本行程發布事件的串流，在觀看者離開且閒置後被淘汰，
+    而本行程執行中的串流保留到結束。
+    """
+    broker = RunEventBroker(idle_seconds=0)
+    stream = broker.subscribe("elsewhere", heartbeat_seconds=0.01)
+    assert await stream.__anext__() is None
+    broker.publish("running-here", "status", {"status": "running"})
+    await stream.aclose()
+
+    assert not broker.has_run("elsewhere")
+    assert broker.has_run("running-here")
+
+
+async def test_failed_log_write_is_retried_so_end_event_is_not_lost(tmp_path, monkeypatch):
+    """
+    測試目的：驗證事件日誌暫時無法寫入時，事件 (包含終止事件) 保留並重試，
+    從日誌讀取的觀看者最終收到完整的事件與 end。
+    """
+    from sre_assistant.runs import events as events_module
+    from sre_assistant.runs.event_log import SQLiteRunEventLog
+
+    class FlakyLog(SQLiteRunEventLog):
+        failures = 2
+
+        async def append(self, events):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("event log unavailable")
+            await super().append(events)
+
+    monkeypatch.setattr(events_module, "FLUSH_RETRY_INITIAL_SECONDS", 0.01)
+    path = str(tmp_path / "events.sqlite")
+    worker = RunEventBroker(log=FlakyLog(path), poll_seconds=0.01)
+    viewer = RunEventBroker(log=SQLiteRunEventLog(path), poll_seconds=0.01)
+    watching = asyncio.create_task(_collect(viewer.subscribe("run-1", heartbeat_seconds=0.01)))
+
+    worker.publish("run-1", "event", {"text": "CPU"})
+    worker.close("run-1", "failed")
+    await worker.flush()
+
+    events = await asyncio.wait_for(watching, timeout=5)
+    assert [e.type for e in events] == ["event", "end"]
+    for broker in (worker, viewer):
+        await broker.stop()
@@ -0,0 +1,62 @@
+# tests/test_run_store.py
+import time
+
+from sre_assistant.runs.store import RunRegistry, SQLiteRunBackend
+
+
+async def test_run_lifecycle_records_phases_and_result():
+    """
+    測試目的：驗證執行紀錄包含狀態、各階段時間與最終輸出。
+    """
+    registry = RunRegistry()
+    await registry.create("run-1", "tenant-a", "session-1", "why is checkout slow?")
+    assert (await registry.get("run-1")).status == "queued"
+
+    await registry.start("run-1")
+    for author in ("DiagnosticExpert", "DiagnosticExpert", "RemediationExpert"):
+        registry.record_event("run-1", author)
+    await registry.finish("run-1", "succeeded", final_response="scale up the pool")
+
+    record = await registry.get("run-1")
+    assert record.status == "succeeded"
+    assert record.final_response == "scale up the pool"
+    assert record.phases["DiagnosticExpert"].events == 2
+    assert set(record.phases) == {"DiagnosticExpert", "RemediationExpert"}
+    assert record.duration_ms >= 0
+
+
+async def test_lru_prefers_evicting_finished_runs_and_retention_expires():
+    """
+    測試目的：驗證記憶體依數量淘汰時優先淘汰已結束的執行，且超過保留時間的執行不再可查。
+    """
+    registry = RunRegistry(max_entries=2, retention_seconds=60)
+    await registry.create("running", "t", "s")
+    await registry.start("running")
+    await registry.create("done", "t", "s")
+    await registry.finish("done", "succeeded")
+    await registry.create("new", "t", "s")
+    assert await registry.get("running") is not None
+    assert await registry.get("done") is None
+
+    await registry.finish("new", "succeeded")
+    registry._records["new"].finished_at = time.time() - 120
+    assert await registry.get("new") is None
+
+
+async def test_persistent_backend_survives_restart(tmp_path):
+    """
+    測試目的：驗證設定持久化後端時，新的登錄實例 (例如重啟後或其他副本) 仍可查詢結果。
+    """
+    path = str(tmp_path / "runs.sqlite")
+    registry = RunRegistry(backend=SQLiteRunBackend(path))
+    await registry.create("run-1", "t", "s")
+    await registry.start("run-1")
+    registry.record_event("run-1", "SREWorkflow")
+    await registry.finish("run-1", "failed", error="timeout")
+    await registry.close()
+
+    reopened = RunRegistry(backend=SQLiteRunBackend(path))
+    record = await reopened.get("run-1")
+    assert record.status == "failed"
+    assert record.error == "timeout"
+    assert "SREWorkflow" in record.phases
@@ -0,0 +1,30 @@
+# tests/test_server.py
+import pytest
+
+from sre_assistant.config.config_manager import DeploymentConfig
+from sre_assistant.server import parse_cpu, plan_server
+
+
+def test_parse_cpu_accepts_kubernetes_quantities():
+    """
+    測試目的：驗證 CPU 數量可使用整數、小數與 millicore 表示法。
+    """
+    assert parse_cpu("2") == 2.0
+    assert parse_cpu("1.5") == 1.5
+    assert parse_cpu("500m") == 0.5
+    with pytest.raises(ValueError):
+        parse_cpu("two")
+
+
+def test_plan_sizes_workers_from_cpu_and_splits_concurrency():
+    """
+    測試目的：驗證工作行程數依 cpu 推算且不超過主機 CPU 數，並將並行上限平均分配到每個行程。
+    """
+    plan = plan_server(DeploymentConfig(platform="gke", cpu="4", concurrency=100), available_cpus=8)
+    assert plan.workers == 4
+    assert plan.limit_concurrency == 25
+
+    assert plan_server(DeploymentConfig(platform="gke", cpu="16"), available_cpus=2).workers == 2
+    assert plan_server(DeploymentConfig(platform="gke", cpu="500m"), available_cpus=8).workers == 1
+    assert plan_server(DeploymentConfig(platform="gke", workers=3), available_cpus=1).workers == 3
+    assert plan.loop in ("uvloop", "asyncio") and plan.http in ("httptools", "h11")
@@ -0,0 +1,86 @@
+# tests/test_startup.py
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from sre_assistant.lifecycle import ShutdownState, StartupState
+
+
+async def test_independent_steps_run_concurrently_and_report_readiness():
+    """
+    測試目的：驗證獨立的初始化步驟並行執行，且只有在全部完成後才回報就緒。
+    """
+    state = StartupState()
+
+    async def slow(value):
+        await asyncio.sleep(0.2)
+        return value
+
+    started = time.perf_counter()
+    results = await state.gather({"a": lambda: slow(1), "b": lambda: slow(2), "c": lambda: slow(3)})
+    assert time.perf_counter() - started < 0.5
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert not state.ready
+
+    state.complete()
+    snapshot = state.snapshot()
+    assert state.ready and snapshot["ready"]
+    assert all(c["state"] == "ready" and c["duration_ms"] >= 150 for c in snapshot["components"].values())
+
+
+async def test_failed_step_is_reported_after_other_steps_finish():
+    """
+    測試目的：驗證一個步驟失敗時其他步驟仍會完成，並以失敗狀態與錯誤訊息回報。
+    """
+    state = StartupState()
+
+    async def broken():
+        raise RuntimeError("database unreachable")
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await state.gather({"db": broken, "auth": ok})
+    assert state.failed and not state.ready
+    assert state.components["auth"].state == "ready"
+    assert state.components["db"].error == "RuntimeError: database unreachable"
+
+
+def test_backend_factory_does_not_import_unselected_sdks():
+    """
+    測試目的：驗證匯入記憶體後端工廠並建立 memory 後端時，不會匯入其他後端的 SDK。
+    """
+    code = (
+        "import sys\n"
+        "from sre_assistant.config.config_manager import MemoryConfig\n"
+        "from sre_assistant.memory.backend_factory import MemoryBackendFactory\n"
+        "MemoryBackendFactory.create(MemoryConfig(backend='memory'))\n"
+        "print('LOADED=' + ','.join(m for m in ('weaviate', 'asyncpg', 'redis', 'chromadb', 'google.cloud.aiplatform')"
+        " if m in sys.modules))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    assert proc.stdout.splitlines()[-1] == "LOADED="
+
+
+def test_shutdown_deadline_is_shared_and_starts_once():
+    """
+    測試目的：驗證排空期限在第一次收到訊號時開始且不會被延長，開始時與之後註冊的函式都會被呼叫。
+    """
+    state = ShutdownState()
+    calls = []
+    state.on_begin(lambda: calls.append("early"))
+    assert state.remaining(30.0) == 30.0
+
+    state.begin(1.0)
+    first_deadline = state.deadline
+    state.begin(60.0)
+    state.on_begin(lambda: calls.append("late"))
+
+    assert state.deadline == first_deadline and 0.0 < state.remaining(30.0) <= 1.0
+    assert calls == ["early", "late"]
@@ -0,0 +1,130 @@
+# tests/test_tracing.py
+from types import SimpleNamespace
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from sre_assistant.observability.tracing import (ADKTracingCallbacks, TailSamplingSpanProcessor,
+                                                 context_from_carrier, instrument_agent_tree, record_error,
+                                                 trace_carrier)
+
+
+def _provider(**options):
+    exporter = InMemorySpanExporter()
+    processor = TailSamplingSpanProcessor(exporter, schedule_delay_millis=10, **options)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test"), processor, exporter
+
+
+def test_tail_sampling_keeps_error_and_slow_traces_only():
+    """
+    測試目的：驗證未被頭部取樣的追蹤中，只有含錯誤或超過延遲門檻的追蹤會被完整匯出。
+    """
+    tracer, processor, exporter = _provider(head_sample_ratio=0.0, latency_threshold_ms=10_000)
+
+    with tracer.start_as_current_span("fast-ok"):
+        with tracer.start_as_current_span("child"):
+            pass
+    with tracer.start_as_current_span("fast-error"):
+        with tracer.start_as_current_span("tool") as tool:
+            record_error(tool, RuntimeError("kubectl timed out"))
+    slow = tracer.start_span("slow", start_time=0)
+    slow.end(end_time=20_000 * 1_000_000)
+
+    processor.force_flush()
+    names = sorted(span.name for span in exporter.get_finished_spans())
+    assert names == ["fast-error", "slow", "tool"]
+    assert processor.stats == {"head_sampled": 0, "tail_sampled": 2, "dropped": 1}
+
+
+def test_head_sampling_exports_immediately():
+    """
+    測試目的：驗證頭部取樣比例為 1 時所有跨度不經暫存直接匯出。
+    """
+    tracer, processor, exporter = _provider(head_sample_ratio=1.0)
+    with tracer.start_as_current_span("run"):
+        with tracer.start_as_current_span("agent_run [LogAnalyzer]"):
+            pass
+    processor.force_flush()
+    assert len(exporter.get_finished_spans()) == 2
+    assert processor.stats["head_sampled"] == 1
+
+
+def test_trace_context_propagates_from_traceparent_and_trace_id():
+    """
+    測試目的：驗證追蹤上下文可由 W3C traceparent 或 SRERequest.trace_id 接續到執行的跨度。
+    """
+    tracer, processor, exporter = _provider(head_sample_ratio=1.0)
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    for carrier in (trace_carrier({"traceparent": traceparent}),
+                    trace_carrier({}, "0af76519-16cd-43dd-8448-eb211c80319c")):
+        with tracer.start_as_current_span("sre.workflow.run", context=context_from_carrier(carrier)) as span:
+            assert format(span.get_span_context().trace_id, "032x") == "0af7651916cd43dd8448eb211c80319c"
+    assert trace_carrier({}, "not-a-trace-id") == {}
+
+
+def test_adk_callbacks_record_ttft_tokens_and_tool_errors():
+    """
+    測試目的：驗證模型回呼記錄 TTFT、延遲與 token 數，工具錯誤會將跨度標記為錯誤。
+    """
+    tracer, processor, exporter = _provider(head_sample_ratio=1.0)
+    callbacks = ADKTracingCallbacks()
+    context = SimpleNamespace(invocation_id="inv-1", agent_name="LogAnalyzer")
+
+    callbacks.before_model_callback(context, llm_request=None)
+    with tracer.start_as_current_span("call_llm"):
+        callbacks.after_model_callback(context, SimpleNamespace(partial=True, error_code=None))
+        callbacks.after_model_callback(context, SimpleNamespace(
+            partial=False, error_code=None,
+            usage_metadata=SimpleNamespace(prompt_token_count=900, candidates_token_count=120)))
+    with tracer.start_as_current_span("execute_tool ask_for_approval"):
+        tool = SimpleNamespace(name="ask_for_approval")
+        callbacks.before_tool_callback(tool, {"action": "restart"}, tool_context=None)
+        callbacks.after_tool_callback(tool, {}, None, {"error": "approval service unavailable"})
+
+    processor.force_flush()
+    llm, tool_span = exporter.get_finished_spans()
+    assert llm.attributes["sre.llm.ttft_ms"] <= llm.attributes["sre.llm.duration_ms"]
+    assert llm.attributes["sre.llm.prompt_tokens"] == 900
+    assert llm.attributes["sre.llm.completion_tokens"] == 120
+    assert tool_span.attributes["sre.tool.args"] == '{"action": "restart"}'
+    assert tool_span.status.status_code == trace.StatusCode.ERROR
+
+
+def test_instrument_agent_tree_appends_callbacks_once():
+    """
+    測試目的：驗證追蹤回呼被附加到整棵代理樹且保留既有回呼，重複附加不會產生重複的回呼。
+    """
+    def existing(callback_context):
+        return None
+
+    leaf = LlmAgent(name="Leaf", model="gemini-1.5-flash", instruction="x")
+    root = SequentialAgent(name="Root", sub_agents=[leaf], before_agent_callback=existing)
+    callbacks = ADKTracingCallbacks()
+
+    assert instrument_agent_tree(root, callbacks) == 2
+    instrument_agent_tree(root, callbacks)
+    assert root.before_agent_callback == [existing, callbacks.before_agent_callback]
+    assert leaf.before_model_callback == [callbacks.before_model_callback]
+    assert leaf.after_tool_callback == [callbacks.after_tool_callback]
+
+
+def test_sampled_remote_parent_keeps_local_children_when_head_ratio_is_low():
+    """
+    測試目的：驗證上游已取樣 (traceparent 旗標 01) 的追蹤在頭部取樣比例為 0 時，
+    根跨度與其所有本地子跨度都被匯出，且不會殘留在尾部取樣的暫存中。
+    """
+    tracer, processor, exporter = _provider(head_sample_ratio=0.0)
+    ctx = context_from_carrier({"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"})
+    with tracer.start_as_current_span("root", context=ctx):
+        with tracer.start_as_current_span("agent"):
+            with tracer.start_as_current_span("llm"):
+                pass
+    processor.force_flush()
+
+    assert sorted(s.name for s in exporter.get_finished_spans()) == ["agent", "llm", "root"]
+    assert not processor._buffers